@@ -58,15 +58,16 @@ def analyze_stock(
     # 根据full_report参数设置报告类型
     report_type = ReportType.FULL if full_report else ReportType.SIMPLE
     
-    # 运行单只股票分析
-    result = pipeline.process_single_stock(
-        code=stock_code,
-        skip_analysis=False,
-        single_stock_notify=notifier is not None,
-        report_type=report_type
-    )
-    
-    return result
+    # 运行单只股票分析（结束后关闭流水线的依赖图线程池）
+    try:
+        return pipeline.process_single_stock(
+            code=stock_code,
+            skip_analysis=False,
+            single_stock_notify=notifier is not None,
+            report_type=report_type
+        )
+    finally:
+        pipeline.close()
 
 def analyze_stocks(
     stock_codes: List[str],
@@ -125,10 +126,13 @@ def perform_market_review(
     review_notifier = notifier or pipeline.notifier
     
     # 调用大盘复盘函数
-    return run_market_review(
-        notifier=review_notifier,
-        analyzer=pipeline.analyzer,
-        search_service=pipeline.search_service
-    )
+    try:
+        return run_market_review(
+            notifier=review_notifier,
+            analyzer=pipeline.analyzer,
+            search_service=pipeline.search_service
+        )
+    finally:
+        pipeline.close()
 
 
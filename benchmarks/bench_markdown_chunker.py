@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 长报告分段基准测试
+===================================
+
+用 N 只股票的决策仪表盘报告（generate_dashboard_report）对比：
+1. 旧实现：逐行拼接并对不断增长的字符串反复 encode 计算字节数
+2. split_markdown_chunks：预计算每行字节偏移，单次线性扫描
+
+使用方法：
+    python benchmarks/bench_markdown_chunker.py              # 默认 200 只股票
+    python benchmarks/bench_markdown_chunker.py -n 500
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analyzer import AnalysisResult  # noqa: E402
+from src.formatters import format_feishu_markdown, split_markdown_chunks  # noqa: E402
+from src.notification import NotificationService  # noqa: E402
+
+
+def _build_results(count: int) -> List[AnalysisResult]:
+    """构造带完整仪表盘的分析结果"""
+    results = []
+    for i in range(count):
+        result = AnalysisResult(
+            code=f"{600000 + i}",
+            name=f"测试股票{i}",
+            sentiment_score=40 + i % 50,
+            trend_prediction="看多" if i % 2 else "震荡",
+            operation_advice=["买入", "持有", "观望", "卖出"][i % 4],
+            analysis_summary="基本面稳健，短期震荡整理，量能温和放大，关注均线支撑。" * 3,
+        )
+        result.dashboard = {
+            "core_conclusion": {
+                "one_sentence": "多头排列延续，回踩 MA5 附近可低吸，跌破 MA20 止损。",
+                "time_sensitivity": "本周内",
+                "position_advice": {"no_position": "回踩 MA5 轻仓试探", "has_position": "继续持有，上移止损"},
+            },
+            "intelligence": {
+                "sentiment_summary": "机构调研密集，北向资金连续三日净流入。",
+                "earnings_outlook": "三季报预告净利润同比增长 15%-20%。",
+                "risk_alerts": ["大股东减持计划尚未实施完毕", "行业价格战加剧"],
+                "positive_catalysts": ["新产品放量", "海外订单增长"],
+                "latest_news": "公司公告中标 12 亿元项目。",
+            },
+            "data_perspective": {
+                "trend_status": {"ma_alignment": "MA5>MA10>MA20", "is_bullish": True, "trend_score": 75},
+                "price_position": {"current_price": 25.3, "bias_status": "安全", "support_level": 24.1, "resistance_level": 27.0},
+                "volume_analysis": {"volume_ratio": 1.3, "volume_status": "温和放量", "turnover_rate": 2.1,
+                                    "volume_meaning": "资金温和流入"},
+                "chip_structure": {"profit_ratio": "68%", "avg_cost": 23.9, "concentration": "12%", "chip_health": "健康"},
+            },
+            "battle_plan": {
+                "sniper_points": {"ideal_buy": "24.8", "secondary_buy": "24.1", "stop_loss": "23.5", "take_profit": "27.0"},
+                "position_strategy": {"suggested_position": "3成", "entry_plan": "分两批建仓", "risk_control": "跌破 23.5 离场"},
+                "action_checklist": ["✅ 多头排列", "✅ 乖离率安全", "⚠️ 量能一般", "✅ 筹码健康"],
+            },
+        }
+        results.append(result)
+    return results
+
+
+def _legacy_chunk_by_lines(content: str, max_bytes: int) -> List[str]:
+    """旧实现（各渠道的 force_chunked 分支）：每加一行都对整个当前块重新 encode"""
+    chunks = []
+    current_chunk = ""
+    for line in content.split('\n'):
+        test_chunk = current_chunk + ('\n' if current_chunk else '') + line
+        if len(test_chunk.encode('utf-8')) > max_bytes - 100:
+            if current_chunk:
+                chunks.append(current_chunk)
+            current_chunk = line
+        else:
+            current_chunk = test_chunk
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def _measure(func, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="长报告分段基准测试")
+    parser.add_argument("-n", "--count", type=int, default=200, help="股票数量")
+    args = parser.parse_args()
+
+    report = NotificationService().generate_dashboard_report(_build_results(args.count))
+    # 飞书格式转换后不再含 --- / ### 标记，旧实现走逐行分支
+    feishu_report = format_feishu_markdown(report)
+    print(f"报告: {args.count} 只股票, {len(report)} 字符 / {len(report.encode('utf-8'))} 字节")
+
+    for label, content, limit in (
+        ("企业微信 4000B", report, 4000),
+        ("飞书 20000B", feishu_report, 20000),
+    ):
+        legacy = _measure(lambda: _legacy_chunk_by_lines(content, limit))
+        current = _measure(lambda: split_markdown_chunks(content, limit - 100))
+        chunks = split_markdown_chunks(content, limit - 100)
+        print(f"{label:<14} 旧实现 {legacy * 1000:8.2f}ms   单次扫描 {current * 1000:6.2f}ms   "
+              f"({legacy / current:.0f}x, {len(chunks)} 段)")
+
+    current = _measure(lambda: split_markdown_chunks(report, 4096, count_bytes=False))
+    print(f"{'Telegram 4096字':<14} 单次扫描 {current * 1000:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
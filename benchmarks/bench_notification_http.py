@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 推送连接复用基准测试
+===================================
+
+在本地启动一个模拟 Webhook（HTTP/1.1 keep-alive），对比：
+1. 每条消息直接 requests.post（每次新建连接）
+2. 按主机复用的连接池 Session（src.notification._get_http_session）
+
+使用方法：
+    python benchmarks/bench_notification_http.py            # 默认 200 条
+    python benchmarks/bench_notification_http.py -n 1000
+    python benchmarks/bench_notification_http.py --latency 0.005   # 模拟每次建连的网络延迟（秒）
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.notification import _get_http_session  # noqa: E402
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """模拟机器人 Webhook：读取请求体，返回 {"errcode": 0}"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # 与真实服务端一致，避免 keep-alive 下响应头/体分包触发延迟 ACK
+    connect_latency = 0.0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+        # 模拟 TCP/TLS 握手的往返延迟（只在新连接上产生）
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = b'{"errcode": 0}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _run(label: str, post, url: str, count: int) -> None:
+    payload = {"msgtype": "markdown", "markdown": {"content": "测试报告" * 200}}
+    _WebhookHandler.connections = 0
+    started = time.perf_counter()
+    for _ in range(count):
+        response = post(url, json=payload, timeout=10)
+        response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {count} 条  总耗时 {elapsed:.3f}s  "
+          f"单条 {elapsed / count * 1000:.2f}ms  新建连接 {_WebhookHandler.connections}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="推送连接复用基准测试")
+    parser.add_argument("-n", "--count", type=int, default=200, help="发送条数")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟建连延迟（秒）")
+    args = parser.parse_args()
+
+    _WebhookHandler.connect_latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _WebhookHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/cgi-bin/webhook/send"
+
+    try:
+        _run("requests.post", requests.post, url, args.count)
+        session = _get_http_session(url)
+        _run("pooled session", session.post, url, args.count)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -75,7 +75,7 @@ class MarketCommand(BotCommand):
             from src.config import get_config
             from src.notification import NotificationService
             from src.market_analyzer import MarketAnalyzer
-            from src.search_service import SearchService
+            from src.search_service import get_search_service
             from src.analyzer import GeminiAnalyzer
 
             config = get_config()
@@ -84,11 +84,7 @@ class MarketCommand(BotCommand):
             # 初始化搜索服务
             search_service = None
             if config.bocha_api_keys or config.tavily_api_keys or config.serpapi_keys:
-                search_service = SearchService(
-                    bocha_keys=config.bocha_api_keys,
-                    tavily_keys=config.tavily_api_keys,
-                    serpapi_keys=config.serpapi_keys
-                )
+                search_service = get_search_service()
 
             # 初始化 AI 分析器
             analyzer = None
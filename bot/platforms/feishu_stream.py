@@ -39,6 +39,8 @@ try:
         ReplyMessageRequestBody,
         CreateMessageRequest,
         CreateMessageRequestBody,
+        PatchMessageRequest,
+        PatchMessageRequestBody,
     )
 
     FEISHU_SDK_AVAILABLE = True
@@ -78,6 +80,32 @@ class FeishuReplyClient:
         config = get_config()
         self._max_bytes = getattr(config, 'feishu_max_bytes', 20000)
 
+    @staticmethod
+    def _build_card_json(content: str, update_multi: bool = False) -> str:
+        """
+        构建交互卡片 payload
+        
+        Args:
+            content: lark_md 内容
+            update_multi: 是否为共享卡片（发送后需要原地更新的卡片必须开启）
+        """
+        config = {"wide_screen_mode": True}
+        if update_multi:
+            config["update_multi"] = True
+        card_data = {
+            "config": config,
+            "elements": [
+                {
+                    "tag": "div",
+                    "text": {
+                        "tag": "lark_md",
+                        "content": content
+                    }
+                }
+            ]
+        }
+        return json.dumps(card_data)
+
     def _send_interactive_card(self, content: str, message_id: Optional[str] = None,
                                chat_id: Optional[str] = None,
                                receive_id_type: str = "chat_id",
@@ -102,21 +130,7 @@ class FeishuReplyClient:
             if at_user and user_id:
                 final_content = f"<at user_id=\"{user_id}\"></at> {content}"
             
-            # 构建交互卡片 payload
-            card_data = {
-                "config": {"wide_screen_mode": True},
-                "elements": [
-                    {
-                        "tag": "div",
-                        "text": {
-                            "tag": "lark_md",
-                            "content": final_content
-                        }
-                    }
-                ]
-            }
-
-            content_json = json.dumps(card_data)
+            content_json = self._build_card_json(final_content)
 
             if message_id:
                 # 回复消息
@@ -158,6 +172,73 @@ class FeishuReplyClient:
             logger.error(f"[Feishu Stream] 发送交互卡片异常: {e}")
             return False
 
+    def create_card(self, chat_id: str, content: str, receive_id_type: str = "chat_id") -> Optional[str]:
+        """
+        发送可更新的交互卡片（用于分析进度看板）
+        
+        Args:
+            chat_id: 会话 ID
+            content: Markdown 格式的内容
+            receive_id_type: 接收者 ID 类型
+            
+        Returns:
+            卡片消息 ID（用于 update_card），失败返回 None
+        """
+        try:
+            request = CreateMessageRequest.builder() \
+                .receive_id_type(receive_id_type) \
+                .request_body(
+                CreateMessageRequestBody.builder()
+                .receive_id(chat_id)
+                .content(self._build_card_json(format_feishu_markdown(content), update_multi=True))
+                .msg_type("interactive")
+                .build()
+            ) \
+                .build()
+            response = self._client.im.v1.message.create(request)
+            if not response.success():
+                logger.error(
+                    f"[Feishu Stream] 发送进度卡片失败: code={response.code}, "
+                    f"msg={response.msg}, log_id={response.get_log_id()}"
+                )
+                return None
+            return response.data.message_id
+        except Exception as e:
+            logger.error(f"[Feishu Stream] 发送进度卡片异常: {e}")
+            return None
+
+    def update_card(self, message_id: str, content: str) -> bool:
+        """
+        原地更新 create_card 发送的卡片内容
+        
+        Args:
+            message_id: 卡片消息 ID
+            content: Markdown 格式的新内容
+            
+        Returns:
+            是否更新成功
+        """
+        try:
+            request = PatchMessageRequest.builder() \
+                .message_id(message_id) \
+                .request_body(
+                PatchMessageRequestBody.builder()
+                .content(self._build_card_json(format_feishu_markdown(content), update_multi=True))
+                .build()
+            ) \
+                .build()
+            response = self._client.im.v1.message.patch(request)
+            if not response.success():
+                logger.error(
+                    f"[Feishu Stream] 更新进度卡片失败: code={response.code}, "
+                    f"msg={response.msg}, log_id={response.get_log_id()}"
+                )
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"[Feishu Stream] 更新进度卡片异常: {e}")
+            return False
+
     def reply_text(self, message_id: str, text: str, at_user: bool = False,
                    user_id: Optional[str] = None) -> bool:
         """
@@ -16,6 +16,7 @@
 
 import logging
 import random
+import threading
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime
@@ -291,6 +292,9 @@ class DataFetcherManager:
             fetchers: 数据源列表（可选，默认按优先级自动创建）
         """
         self._fetchers: List[BaseFetcher] = []
+        # 所属板块缓存（由流水线线程池并发调用 get_industry_board）
+        self._board_cache: Dict[str, Optional[str]] = {}
+        self._board_cache_lock = threading.Lock()
         
         if fetchers:
             # 按优先级排序
@@ -769,6 +773,42 @@ class DataFetcherManager:
         logger.info(f"[股票名称] 批量获取完成，成功 {len(result)}/{len(stock_codes)}")
         return result
 
+    def get_industry_board(self, stock_code: str) -> Optional[str]:
+        """
+        获取股票所属行业板块名称（用于按板块合并行业情报搜索）
+        
+        数据来源：支持 get_belong_board 的数据源（EfinanceFetcher）
+        选择策略：优先名称含"行业"的板块，否则取第一个板块
+        
+        Args:
+            stock_code: 股票代码
+        
+        Returns:
+            行业板块名称，获取失败返回 None
+        """
+        with self._board_cache_lock:
+            if stock_code in self._board_cache:
+                return self._board_cache[stock_code]
+        
+        for fetcher in self._fetchers:
+            if not hasattr(fetcher, 'get_belong_board'):
+                continue
+            try:
+                df = fetcher.get_belong_board(stock_code)
+            except Exception as e:
+                logger.debug(f"[所属板块] {fetcher.name} 获取 {stock_code} 失败: {e}")
+                continue
+            if df is None or df.empty or '板块名称' not in df.columns:
+                continue
+            
+            names = [str(name) for name in df['板块名称'].tolist() if name]
+            board = next((name for name in names if '行业' in name), names[0] if names else None)
+            with self._board_cache_lock:
+                self._board_cache[stock_code] = board
+            return board
+        
+        return None
+    
     def get_main_indices(self) -> List[Dict[str, Any]]:
         """获取主要指数实时行情（自动切换数据源）"""
         for fetcher in self._fetchers:
@@ -50,7 +50,7 @@ from src.config import get_config, Config
 from src.notification import NotificationService
 from src.core.pipeline import StockAnalysisPipeline
 from src.core.market_review import run_market_review
-from src.search_service import SearchService
+from src.search_service import get_search_service
 from src.analyzer import GeminiAnalyzer
 
 # 配置日志格式
@@ -423,11 +423,7 @@ def main() -> int:
             analyzer = None
             
             if config.bocha_api_keys or config.tavily_api_keys or config.serpapi_keys:
-                search_service = SearchService(
-                    bocha_keys=config.bocha_api_keys,
-                    tavily_keys=config.tavily_api_keys,
-                    serpapi_keys=config.serpapi_keys
-                )
+                search_service = get_search_service()
             
             if config.gemini_api_key or config.openai_api_key:
                 analyzer = GeminiAnalyzer(api_key=config.gemini_api_key)
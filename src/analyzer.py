@@ -10,11 +10,14 @@ A股自选股智能分析系统 - AI分析层
 3. 结合技术面和消息面生成分析报告
 """
 
+import bisect
 import json
 import logging
+import threading
 import time
-from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
+from dataclasses import dataclass, field, fields, replace
+from datetime import timedelta
+from typing import Optional, Dict, Any, List, Tuple
 from json_repair import repair_json
 
 from tenacity import (
@@ -26,6 +29,7 @@ from tenacity import (
 )
 
 from src.config import get_config
+from src.metrics import get_metrics, STAGE_LLM, STAGE_PARSE
 
 logger = logging.getLogger(__name__)
 
@@ -288,6 +292,537 @@ class AnalysisResult:
         return star_map.get(self.confidence_level, '⭐⭐')
 
 
+# ========================================
+# 结构化输出 Schema - 由 AnalysisResult / 决策仪表盘结构推导
+# ========================================
+# 采用 Gemini response_schema 支持的 OpenAPI 子集（type/properties/required/items/nullable），
+# OpenAI 兼容 API 使用时由 _to_openai_json_schema() 转换为 JSON Schema
+# ========================================
+
+def _str_field(description: str = "") -> Dict[str, Any]:
+    return {'type': 'string', 'description': description} if description else {'type': 'string'}
+
+
+def _num_field() -> Dict[str, Any]:
+    return {'type': 'number', 'nullable': True}
+
+
+def _object_field(properties: Dict[str, Any], required: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': list(properties.keys()) if required is None else required,
+    }
+
+
+DASHBOARD_SCHEMA: Dict[str, Any] = _object_field({
+    'core_conclusion': _object_field({
+        'one_sentence': _str_field('一句话核心结论（30字以内）'),
+        'signal_type': _str_field('🟢买入信号/🟡持有观望/🔴卖出信号/⚠️风险警告'),
+        'time_sensitivity': _str_field('立即行动/今日内/本周内/不急'),
+        'position_advice': _object_field({
+            'no_position': _str_field('空仓者建议'),
+            'has_position': _str_field('持仓者建议'),
+        }),
+    }),
+    'data_perspective': _object_field({
+        'trend_status': _object_field({
+            'ma_alignment': _str_field(),
+            'is_bullish': {'type': 'boolean'},
+            'trend_score': _num_field(),
+        }),
+        'price_position': _object_field({
+            'current_price': _num_field(),
+            'ma5': _num_field(),
+            'ma10': _num_field(),
+            'ma20': _num_field(),
+            'bias_ma5': _num_field(),
+            'bias_status': _str_field('安全/警戒/危险'),
+            'support_level': _num_field(),
+            'resistance_level': _num_field(),
+        }, required=['current_price', 'bias_ma5', 'bias_status']),
+        'volume_analysis': _object_field({
+            'volume_ratio': _num_field(),
+            'volume_status': _str_field('放量/缩量/平量'),
+            'turnover_rate': _num_field(),
+            'volume_meaning': _str_field(),
+        }, required=['volume_status', 'volume_meaning']),
+        'chip_structure': _object_field({
+            'profit_ratio': _num_field(),
+            'avg_cost': _num_field(),
+            'concentration': _num_field(),
+            'chip_health': _str_field('健康/一般/警惕'),
+        }, required=['chip_health']),
+    }),
+    'intelligence': _object_field({
+        'latest_news': _str_field(),
+        'risk_alerts': {'type': 'array', 'items': {'type': 'string'}},
+        'positive_catalysts': {'type': 'array', 'items': {'type': 'string'}},
+        'earnings_outlook': _str_field(),
+        'sentiment_summary': _str_field(),
+    }),
+    'battle_plan': _object_field({
+        'sniper_points': _object_field({
+            'ideal_buy': _str_field(),
+            'secondary_buy': _str_field(),
+            'stop_loss': _str_field(),
+            'take_profit': _str_field(),
+        }),
+        'position_strategy': _object_field({
+            'suggested_position': _str_field(),
+            'entry_plan': _str_field(),
+            'risk_control': _str_field(),
+        }),
+        'action_checklist': {'type': 'array', 'items': {'type': 'string'}},
+    }),
+})
+
+# 不由模型输出的元数据字段
+_SCHEMA_EXCLUDED_FIELDS = {'code', 'name', 'raw_response', 'success', 'error_message'}
+
+# 结构化输出的必填顶层字段
+_SCHEMA_REQUIRED_FIELDS = [
+    'stock_name', 'sentiment_score', 'trend_prediction', 'operation_advice',
+    'decision_type', 'confidence_level', 'dashboard', 'analysis_summary',
+]
+
+
+def build_analysis_response_schema() -> Dict[str, Any]:
+    """
+    根据 AnalysisResult 字段推导结构化输出 Schema
+    
+    - str 字段 -> string，int -> integer，bool -> boolean
+    - dashboard 字段使用 DASHBOARD_SCHEMA
+    - 元数据字段（code/name/raw_response 等）不要求模型输出
+    """
+    type_map = {str: 'string', int: 'integer', bool: 'boolean', 'str': 'string', 'int': 'integer', 'bool': 'boolean'}
+    properties: Dict[str, Any] = {'stock_name': _str_field('股票中文名称')}
+    for f in fields(AnalysisResult):
+        if f.name in _SCHEMA_EXCLUDED_FIELDS:
+            continue
+        if f.name == 'dashboard':
+            properties['dashboard'] = DASHBOARD_SCHEMA
+            continue
+        json_type = type_map.get(f.type)
+        if json_type:
+            properties[f.name] = {'type': json_type}
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': [k for k in _SCHEMA_REQUIRED_FIELDS if k in properties],
+    }
+
+
+ANALYSIS_RESPONSE_SCHEMA: Dict[str, Any] = build_analysis_response_schema()
+
+
+def _to_openai_json_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """将 Gemini 风格 Schema（nullable）转换为标准 JSON Schema（type: [t, "null"]）"""
+    converted: Dict[str, Any] = {}
+    for key, value in schema.items():
+        if key == 'nullable':
+            continue
+        if key == 'properties':
+            converted[key] = {k: _to_openai_json_schema(v) for k, v in value.items()}
+        elif key == 'items':
+            converted[key] = _to_openai_json_schema(value)
+        else:
+            converted[key] = value
+    if schema.get('nullable'):
+        converted['type'] = [schema['type'], 'null']
+    return converted
+
+
+def find_missing_fields(data: Any, schema: Dict[str, Any], path: str = '') -> List[str]:
+    """
+    按 Schema 校验数据，返回缺失（或为空）的必填字段路径列表，如 ["dashboard.battle_plan.sniper_points"]
+    """
+    if schema.get('type') != 'object' or not isinstance(data, dict):
+        return []
+    missing = []
+    properties = schema.get('properties', {})
+    for key in schema.get('required', []):
+        field_path = f"{path}.{key}" if path else key
+        value = data.get(key)
+        prop_schema = properties.get(key, {})
+        # 可空数值字段：模型显式给出 null 视为有效（如数据缺失时的价格）
+        if value is None and key in data and prop_schema.get('nullable'):
+            continue
+        if value in (None, '', {}, []):
+            missing.append(field_path)
+            continue
+        missing.extend(find_missing_fields(value, prop_schema, field_path))
+    return missing
+
+
+def _deep_merge(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """递归合并字典（patch 覆盖 base 中缺失/为空的字段）"""
+    for key, value in patch.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _deep_merge(base[key], value)
+        elif value not in (None, '', {}, []):
+            base[key] = value
+    return base
+
+
+@dataclass
+class PromptCacheStats:
+    """
+    Prompt 缓存统计（按运行累计）
+    
+    - calls: 统计到用量的调用次数
+    - cache_hits: 命中缓存的调用次数
+    - prompt_tokens: 输入 Token 总数
+    - cached_tokens: 命中缓存（免预填充）的输入 Token 数
+    """
+    calls: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """缓存命中率"""
+        return self.cache_hits / self.calls if self.calls else 0.0
+    
+    @property
+    def saved_ratio(self) -> float:
+        """预填充 Token 节省比例"""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            'calls': self.calls,
+            'cache_hits': self.cache_hits,
+            'hit_rate': round(self.hit_rate, 4),
+            'prompt_tokens': self.prompt_tokens,
+            'cached_tokens': self.cached_tokens,
+            'saved_ratio': round(self.saved_ratio, 4),
+        }
+
+
+@dataclass
+class TierStats:
+    """
+    分层分析统计（本地初筛 / 远程模型）
+    
+    - local_calls / local_latency: 本地模型调用次数与累计耗时
+    - remote_calls / remote_latency: 远程模型调用次数与累计耗时
+    - escalations: 升级到远程模型的次数，escalation_reasons 按原因计数
+    - precheck_escalations: 其中调用本地模型前即判定升级的次数（完整报告、强信号、数据缺失），
+      这些股票未调用本地模型；升级率按经过分层判断的股票数（本地调用 + 预检升级）计算
+    """
+    local_calls: int = 0
+    local_latency: float = 0.0
+    remote_calls: int = 0
+    remote_latency: float = 0.0
+    escalations: int = 0
+    precheck_escalations: int = 0
+    escalation_reasons: Dict[str, int] = field(default_factory=dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        routed = self.local_calls + self.precheck_escalations
+        return {
+            'local_calls': self.local_calls,
+            'local_avg_latency': round(self.local_latency / self.local_calls, 3) if self.local_calls else 0.0,
+            'remote_calls': self.remote_calls,
+            'remote_avg_latency': round(self.remote_latency / self.remote_calls, 3) if self.remote_calls else 0.0,
+            'escalations': self.escalations,
+            'precheck_escalations': self.precheck_escalations,
+            'escalation_rate': round(self.escalations / routed, 4) if routed else 0.0,
+            'escalation_reasons': dict(self.escalation_reasons),
+        }
+
+
+# Gemini 官方 OpenAI 兼容端点（多 Key 路由时每个 Key 使用独立客户端，
+# 避免 genai.configure 全局 Key 在并发下互相覆盖）
+GEMINI_OPENAI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+
+@dataclass
+class LLMEndpoint:
+    """
+    LLM 路由端点（一个 API Key + 接口地址 + 模型 的组合）
+    
+    健康状态：
+    - outstanding: 当前进行中的请求数（最少在途请求调度依据）
+    - consecutive_failures / cooldown_until: 连续失败后进入冷却期，冷却期内不参与调度
+    - rpm: 每分钟请求上限（0 表示不限制），达到上限时暂不分配
+    """
+    name: str
+    base_url: Optional[str]
+    api_key: str = field(repr=False)
+    model: str = ""
+    weight: float = 1.0
+    rpm: int = 0
+    client: Any = field(default=None, repr=False)
+    
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+    total_calls: int = 0
+    total_errors: int = 0
+    avg_latency: float = 0.0  # 成功请求耗时的指数加权平均（秒）
+    json_schema_supported: bool = True
+    recent_starts: List[float] = field(default_factory=list)
+    
+    def load(self) -> float:
+        """加权负载：(在途请求数 + 1) / 权重，越小越优先"""
+        return (self.outstanding + 1) / max(self.weight, 0.01)
+    
+    def next_free_at(self, now: float) -> float:
+        """
+        最早可分配新请求的时间：冷却结束，且最近 60 秒内的请求数低于 RPM 上限
+        
+        recent_starts 按时间升序，可能包含已预约的未来时间点
+        """
+        free_at = self.cooldown_until
+        if self.rpm > 0:
+            self.recent_starts = [t for t in self.recent_starts if now - t < 60]
+            if len(self.recent_starts) >= self.rpm:
+                # 倒数第 rpm 个请求滑出 60 秒窗口后才有空位
+                free_at = max(free_at, self.recent_starts[-self.rpm] + 60)
+        return free_at
+    
+    def is_ready(self, now: float) -> bool:
+        """是否可分配新请求（不在冷却期且未达到 RPM 上限）"""
+        return self.next_free_at(now) <= now
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（不包含 API Key）"""
+        return {
+            'name': self.name,
+            'model': self.model,
+            'weight': self.weight,
+            'rpm': self.rpm,
+            'outstanding': self.outstanding,
+            'total_calls': self.total_calls,
+            'total_errors': self.total_errors,
+            'avg_latency': round(self.avg_latency, 3),
+            'healthy': time.time() >= self.cooldown_until,
+        }
+
+
+class LLMRouter:
+    """
+    多 Key / 多接口 LLM 路由器
+    
+    职责：
+    1. 将请求分散到多个 Gemini Key、OpenAI 兼容接口（DeepSeek/通义千问/Ollama 等）
+    2. 按权重的最少在途请求（least-outstanding-requests）调度
+    3. 实时健康检查：失败退避冷却、限流冷却、RPM 上限
+    4. 单个端点失败时自动换到其他端点重试
+    
+    吞吐量随配置的 Key 数量线性扩展，不再受限于单个 Key 的 RPM。
+    """
+    
+    # 连续失败达到该次数后进入冷却
+    FAILURE_THRESHOLD = 3
+    # 冷却基础时长 / 最大时长（秒）
+    COOLDOWN_BASE = 5.0
+    COOLDOWN_MAX = 300.0
+    
+    def __init__(self, endpoints: List[LLMEndpoint]):
+        self._endpoints = endpoints
+        self._lock = threading.Lock()
+    
+    @property
+    def endpoints(self) -> List[LLMEndpoint]:
+        return self._endpoints
+    
+    @property
+    def is_available(self) -> bool:
+        return bool(self._endpoints)
+    
+    @staticmethod
+    def parse_endpoint_spec(spec: str) -> Optional[LLMEndpoint]:
+        """
+        解析端点配置：base_url|api_key|model[|weight[|rpm]]
+        
+        示例：https://api.deepseek.com/v1|sk-xxx|deepseek-chat|2|60
+        """
+        parts = [p.strip() for p in spec.split('|')]
+        if len(parts) < 3 or not parts[0].startswith('http') or not parts[2]:
+            logger.warning(f"[LLM路由] 无效的端点配置（格式: base_url|api_key|model[|weight[|rpm]]）: {spec[:60]}")
+            return None
+        try:
+            weight = float(parts[3]) if len(parts) > 3 and parts[3] else 1.0
+            rpm = int(parts[4]) if len(parts) > 4 and parts[4] else 0
+        except ValueError:
+            logger.warning(f"[LLM路由] 端点权重/RPM 配置无效: {spec[:60]}")
+            return None
+        from urllib.parse import urlparse
+        host = urlparse(parts[0]).netloc or parts[0]
+        return LLMEndpoint(
+            name=f"{host}/{parts[2]}",
+            base_url=parts[0],
+            api_key=parts[1] or 'none',  # 本地 Ollama 等无需 Key，OpenAI SDK 要求非空
+            model=parts[2],
+            weight=weight,
+            rpm=rpm,
+        )
+    
+    @classmethod
+    def from_config(cls, config) -> 'LLMRouter':
+        """
+        根据配置构建路由器
+        
+        端点来源：
+        1. GEMINI_API_KEY + GEMINI_API_KEYS（每个 Key 一个端点，经 Gemini OpenAI 兼容接口调用）
+        2. OPENAI_API_KEY / OPENAI_BASE_URL / OPENAI_MODEL
+        3. LLM_ROUTER_ENDPOINTS 中的额外接口
+        """
+        endpoints: List[LLMEndpoint] = []
+        
+        gemini_keys: List[str] = []
+        for key in [config.gemini_api_key] + list(config.gemini_api_keys):
+            if key and not key.startswith('your_') and len(key) > 10 and key not in gemini_keys:
+                gemini_keys.append(key)
+        for i, key in enumerate(gemini_keys, 1):
+            endpoints.append(LLMEndpoint(
+                name=f"gemini#{i}/{config.gemini_model}",
+                base_url=GEMINI_OPENAI_BASE_URL,
+                api_key=key,
+                model=config.gemini_model,
+                rpm=config.gemini_key_rpm,
+            ))
+        
+        if config.openai_api_key and not config.openai_api_key.startswith('your_') and len(config.openai_api_key) > 10:
+            base_url = config.openai_base_url if config.openai_base_url and config.openai_base_url.startswith('http') else None
+            endpoints.append(LLMEndpoint(
+                name=f"openai/{config.openai_model}",
+                base_url=base_url,
+                api_key=config.openai_api_key,
+                model=config.openai_model,
+            ))
+        
+        for spec in config.llm_router_endpoints:
+            endpoint = cls.parse_endpoint_spec(spec)
+            if endpoint:
+                endpoints.append(endpoint)
+        
+        ready: List[LLMEndpoint] = []
+        try:
+            from openai import OpenAI
+        except ImportError:
+            logger.error("未安装 openai 库，LLM 路由不可用，请运行: pip install openai")
+            return cls([])
+        
+        for endpoint in endpoints:
+            try:
+                client_kwargs = {"api_key": endpoint.api_key}
+                if endpoint.base_url:
+                    client_kwargs["base_url"] = endpoint.base_url
+                endpoint.client = OpenAI(**client_kwargs)
+                ready.append(endpoint)
+            except Exception as e:
+                logger.error(f"[LLM路由] 端点 {endpoint.name} 初始化失败: {e}")
+        
+        logger.info(f"[LLM路由] 已启用 {len(ready)} 个端点: {', '.join(e.name for e in ready)}")
+        return cls(ready)
+    
+    def acquire(self, exclude: Optional[List[LLMEndpoint]] = None) -> Optional[LLMEndpoint]:
+        """选择一个端点并占用（在途请求数 +1），见 reserve"""
+        return self.reserve(exclude)[0]
+    
+    def reserve(self, exclude: Optional[List[LLMEndpoint]] = None) -> Tuple[Optional[LLMEndpoint], float]:
+        """
+        选择一个端点并占用（在途请求数 +1），返回端点与可发起请求的时间
+        
+        策略：在可用端点中选择加权负载最小者，负载相同时选平均耗时更短者；
+        全部不可用（冷却中或达到 RPM 上限）时选择最早空出的端点并预约该时间点，
+        调用方需等到该时间再发起请求（保证请求不会被丢弃，也不会超过 RPM 上限）。
+        """
+        exclude = exclude or []
+        with self._lock:
+            now = time.time()
+            candidates = [e for e in self._endpoints if e not in exclude] or list(self._endpoints)
+            if not candidates:
+                return None, now
+            ready = [e for e in candidates if e.is_ready(now)]
+            if ready:
+                endpoint = min(ready, key=lambda e: (e.load(), e.avg_latency, e.total_calls))
+                start_at = now
+            else:
+                endpoint = min(candidates, key=lambda e: (e.next_free_at(now), e.load()))
+                start_at = endpoint.next_free_at(now)
+            endpoint.outstanding += 1
+            endpoint.total_calls += 1
+            bisect.insort(endpoint.recent_starts, start_at)
+            return endpoint, start_at
+    
+    def release(self, endpoint: LLMEndpoint, success: bool, latency: float, rate_limited: bool = False) -> None:
+        """释放端点并更新健康状态"""
+        with self._lock:
+            endpoint.outstanding = max(endpoint.outstanding - 1, 0)
+            if success:
+                endpoint.consecutive_failures = 0
+                endpoint.cooldown_until = 0.0
+                if endpoint.avg_latency <= 0:
+                    endpoint.avg_latency = latency
+                else:
+                    endpoint.avg_latency = endpoint.avg_latency * 0.7 + latency * 0.3
+                return
+            
+            endpoint.total_errors += 1
+            endpoint.consecutive_failures += 1
+            if rate_limited or endpoint.consecutive_failures >= self.FAILURE_THRESHOLD:
+                cooldown = min(
+                    self.COOLDOWN_BASE * (2 ** (endpoint.consecutive_failures - 1)),
+                    self.COOLDOWN_MAX,
+                )
+                endpoint.cooldown_until = time.time() + cooldown
+                logger.warning(f"[LLM路由] 端点 {endpoint.name} 进入冷却 {cooldown:.0f}s "
+                               f"(连续失败 {endpoint.consecutive_failures} 次)")
+    
+    def call(self, invoke, max_attempts: int = 3) -> str:
+        """
+        通过路由调用 LLM，失败时换端点重试
+        
+        Args:
+            invoke: 回调函数 invoke(endpoint) -> str
+            max_attempts: 最大尝试次数
+            
+        Returns:
+            响应文本
+        """
+        tried: List[LLMEndpoint] = []
+        last_error: Optional[Exception] = None
+        
+        for attempt in range(max_attempts):
+            endpoint, start_at = self.reserve(exclude=tried)
+            if endpoint is None:
+                break
+            tried.append(endpoint)
+            
+            wait = start_at - time.time()
+            if wait > 0:
+                logger.info(f"[LLM路由] 所有端点均在冷却或达到 RPM 上限，等待 {endpoint.name} {wait:.1f} 秒...")
+                time.sleep(wait)
+            
+            start = time.time()
+            try:
+                text = invoke(endpoint)
+                self.release(endpoint, success=True, latency=time.time() - start)
+                logger.debug(f"[LLM路由] {endpoint.name} 调用成功，耗时 {time.time() - start:.2f}s")
+                return text
+            except Exception as e:
+                last_error = e
+                error_str = str(e)
+                rate_limited = '429' in error_str or 'rate' in error_str.lower() or 'quota' in error_str.lower()
+                self.release(endpoint, success=False, latency=time.time() - start, rate_limited=rate_limited)
+                logger.warning(f"[LLM路由] {endpoint.name} 调用失败，第 {attempt + 1}/{max_attempts} 次尝试: {error_str[:100]}")
+        
+        raise last_error or Exception("LLM 路由无可用端点")
+    
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """获取各端点调度统计"""
+        with self._lock:
+            return [e.to_dict() for e in self._endpoints]
+
+
 class GeminiAnalyzer:
     """
     Gemini AI 分析器
@@ -485,6 +1020,86 @@ class GeminiAnalyzer:
 4. **检查清单可视化**：用 ✅⚠️❌ 明确显示每项检查结果
 5. **风险优先级**：舆情中的风险点要醒目标出"""
 
+    # ========================================
+    # 固定任务说明 - 每次请求都相同，与 SYSTEM_PROMPT 一起组成稳定前缀
+    # ========================================
+    # 稳定前缀放在请求最前面，可命中 Gemini 上下文缓存 / OpenAI 兼容 API 的前缀缓存，
+    # 每只股票只需发送变化的数据部分（可变后缀）
+    # ========================================
+
+    ANALYSIS_TASK_PROMPT = """## 分析任务通用要求（每次分析请求都适用）
+
+### 重点关注（必须明确回答）：
+1. ❓ 是否满足 MA5>MA10>MA20 多头排列？
+2. ❓ 当前乖离率是否在安全范围内（<5%）？—— 超过5%必须标注"严禁追高"
+3. ❓ 量能是否配合（缩量回调/放量突破）？
+4. ❓ 筹码结构是否健康？
+5. ❓ 消息面有无重大利空？（减持、处罚、业绩变脸等）
+
+### 决策仪表盘要求：
+- **股票名称**：必须输出正确的中文全称（如"贵州茅台"而非"股票600519"）
+- **核心结论**：一句话说清该买/该卖/该等
+- **持仓分类建议**：空仓者怎么做 vs 持仓者怎么做
+- **具体狙击点位**：买入价、止损价、目标价（精确到分）
+- **检查清单**：每项用 ✅/⚠️/❌ 标记
+
+请输出完整的 JSON 格式决策仪表盘。"""
+
+    # 稳定前缀（可缓存部分）
+    STABLE_PREFIX = SYSTEM_PROMPT + "\n\n" + ANALYSIS_TASK_PROMPT
+
+    # ========================================
+    # 本地模型初筛提示词 - 只给出精简结论
+    # ========================================
+
+    LOCAL_TIER_PROMPT = """你是 A 股趋势交易初筛助手，只需根据给出的技术面与新闻数据快速给出精简结论。
+
+交易纪律：MA5>MA10>MA20 多头排列才考虑买入；乖离率(MA5) > 5% 严禁追高；跌破 MA20 观望；有减持/处罚/业绩变脸等重大利空时不买入。
+
+只输出一个 JSON 对象，不要输出其他内容：
+{
+    "stock_name": "股票中文名称",
+    "sentiment_score": 0-100整数,
+    "trend_prediction": "强烈看多/看多/震荡/看空/强烈看空",
+    "operation_advice": "买入/加仓/持有/减仓/卖出/观望",
+    "decision_type": "buy/hold/sell",
+    "confidence_level": "高/中/低",
+    "one_sentence": "一句话结论（30字以内）",
+    "analysis_summary": "50字以内的分析摘要"
+}"""
+
+    # ========================================
+    # 情报修正提示词 - 投机调用后情报迟到时使用
+    # ========================================
+    # 只发送首次结论与新到达的情报，模型输出调整项，不重复发送完整行情上下文
+
+    NEWS_REFINE_PROMPT = """# 情报修正任务
+
+此前在新闻情报尚未到达时，已基于行情数据对 {name}({code}) 给出以下结论：
+- 综合评分：{score}
+- 趋势预测：{trend}
+- 操作建议：{advice}
+- 一句话结论：{one_sentence}
+
+以下是刚获取到的新闻情报：
+{news}
+
+请判断情报是否需要调整结论：只有出现重大利好/利空（业绩变脸、减持、监管处罚、政策变化等）时才调整。
+本次不要输出决策仪表盘，只输出一个 JSON 对象：
+{{
+    "changed": true/false,
+    "sentiment_score": 0-100整数,
+    "trend_prediction": "强烈看多/看多/震荡/看空/强烈看空",
+    "operation_advice": "买入/加仓/持有/减仓/卖出/观望",
+    "one_sentence": "调整后的一句话结论（未调整时留空）",
+    "news_summary": "情报要点（50字以内）",
+    "risk_warning": "情报中的风险点（没有则留空）"
+}}"""
+
+    # 触发升级的系统评分阈值（>= 强多 或 <= 强空 视为强信号）
+    TIER_STRONG_BULL_SCORE = 70
+    TIER_STRONG_BEAR_SCORE = 30
+
     def __init__(self, api_key: Optional[str] = None):
         """
         初始化 AI 分析器
@@ -501,6 +1116,32 @@ class GeminiAnalyzer:
         self._using_fallback = False  # 是否正在使用备选模型
         self._use_openai = False  # 是否使用 OpenAI 兼容 API
         self._openai_client = None  # OpenAI 客户端
+        self._context_cache = None  # Gemini 上下文缓存（CachedContent）
+        self._context_cache_expires_at = 0.0  # 上下文缓存过期时间戳
+        self._cache_lock = threading.Lock()
+        self._cache_stats = PromptCacheStats()
+        self._openai_json_schema_supported = True  # OpenAI 兼容接口是否支持 json_schema 输出
+        self._router: Optional[LLMRouter] = None  # 多 Key / 多接口路由器
+        self._local_client = None  # 本地模型客户端（分层分析初筛）
+        self._tier_lock = threading.Lock()
+        self._tier_stats = TierStats()
+        
+        # 分层分析：本地 OpenAI 兼容模型（Ollama / llama.cpp 等）做初筛
+        if config.local_llm_enabled:
+            self._init_local_model()
+        
+        # 启用路由模式：请求分散到所有已配置的 Key 与接口
+        if config.llm_router_enabled:
+            router = LLMRouter.from_config(config)
+            if router.is_available:
+                self._router = router
+                self._current_model_name = "router"
+                if config.gemini_context_cache_enabled:
+                    # 路由端点统一走 OpenAI 兼容接口，无法使用 CachedContent（仅原生 SDK 支持）
+                    logger.warning("[LLM缓存] 已启用 LLM 路由，Gemini 上下文缓存（CachedContent）不生效，"
+                                   "稳定前缀依赖各接口的隐式前缀缓存")
+                return
+            logger.warning("[LLM路由] 未配置可用端点，回退到单 Key 模式")
         
         # 检查 Gemini API Key 是否有效（过滤占位符）
         gemini_key_valid = self._api_key and not self._api_key.startswith('your_') and len(self._api_key) > 10
@@ -521,6 +1162,29 @@ class GeminiAnalyzer:
         if not self._model and not self._openai_client:
             logger.warning("未配置任何 AI API Key，AI 分析功能将不可用")
     
+    def _init_local_model(self) -> None:
+        """
+        初始化本地模型客户端（OpenAI 兼容接口，如 Ollama / llama.cpp server）
+        
+        本地模型只负责精简初筛，初始化失败时所有股票直接走远程模型。
+        """
+        config = get_config()
+        if not config.local_llm_base_url or not config.local_llm_base_url.startswith('http'):
+            logger.warning("[分层分析] 未配置本地模型地址 (LOCAL_LLM_BASE_URL)，跳过本地初筛")
+            return
+        try:
+            from openai import OpenAI
+            self._local_client = OpenAI(
+                api_key=config.local_llm_api_key or 'none',
+                base_url=config.local_llm_base_url,
+                timeout=config.local_llm_timeout,
+            )
+            logger.info(f"[分层分析] 本地模型初始化成功 (base_url: {config.local_llm_base_url}, "
+                        f"model: {config.local_llm_model})")
+        except Exception as e:
+            logger.error(f"[分层分析] 本地模型初始化失败: {e}")
+            self._local_client = None
+    
     def _init_openai_fallback(self) -> None:
         """
         初始化 OpenAI 兼容 API 作为备选
@@ -598,20 +1262,14 @@ class GeminiAnalyzer:
             
             # 尝试初始化主模型
             try:
-                self._model = genai.GenerativeModel(
-                    model_name=model_name,
-                    system_instruction=self.SYSTEM_PROMPT,
-                )
+                self._model = self._create_gemini_model(model_name)
                 self._current_model_name = model_name
                 self._using_fallback = False
                 logger.info(f"Gemini 模型初始化成功 (模型: {model_name})")
             except Exception as model_error:
                 # 尝试备选模型
                 logger.warning(f"主模型 {model_name} 初始化失败: {model_error}，尝试备选模型 {fallback_model}")
-                self._model = genai.GenerativeModel(
-                    model_name=fallback_model,
-                    system_instruction=self.SYSTEM_PROMPT,
-                )
+                self._model = self._create_gemini_model(fallback_model)
                 self._current_model_name = fallback_model
                 self._using_fallback = True
                 logger.info(f"Gemini 备选模型初始化成功 (模型: {fallback_model})")
@@ -628,15 +1286,11 @@ class GeminiAnalyzer:
             是否成功切换
         """
         try:
-            import google.generativeai as genai
             config = get_config()
             fallback_model = config.gemini_model_fallback
             
             logger.warning(f"[LLM] 切换到备选模型: {fallback_model}")
-            self._model = genai.GenerativeModel(
-                model_name=fallback_model,
-                system_instruction=self.SYSTEM_PROMPT,
-            )
+            self._model = self._create_gemini_model(fallback_model)
             self._current_model_name = fallback_model
             self._using_fallback = True
             logger.info(f"[LLM] 备选模型 {fallback_model} 初始化成功")
@@ -645,17 +1299,133 @@ class GeminiAnalyzer:
             logger.error(f"[LLM] 切换备选模型失败: {e}")
             return False
     
+    def _create_gemini_model(self, model_name: str):
+        """
+        创建 Gemini 模型实例（稳定前缀作为 system_instruction）
+        
+        启用上下文缓存时，先将稳定前缀写入 CachedContent，再基于缓存创建模型，
+        之后每次请求只需发送可变的股票数据；缓存创建失败（如前缀过短、模型不支持）
+        时回退为普通模式，不影响分析流程。
+        
+        Args:
+            model_name: 模型名称
+            
+        Returns:
+            GenerativeModel 实例
+        """
+        import google.generativeai as genai
+        
+        config = get_config()
+        if config.gemini_context_cache_enabled:
+            try:
+                from google.generativeai import caching
+                
+                cache_model = model_name if model_name.startswith('models/') else f'models/{model_name}'
+                ttl = max(int(config.gemini_context_cache_ttl), 60)
+                cache = caching.CachedContent.create(
+                    model=cache_model,
+                    display_name='stock-dashboard-prefix',
+                    system_instruction=self.STABLE_PREFIX,
+                    ttl=timedelta(seconds=ttl),
+                )
+                self._context_cache = cache
+                self._context_cache_expires_at = time.time() + ttl
+                logger.info(f"[LLM缓存] Gemini 上下文缓存已创建 (模型: {model_name}, TTL: {ttl}s)")
+                return genai.GenerativeModel.from_cached_content(cached_content=cache)
+            except Exception as e:
+                logger.warning(f"[LLM缓存] Gemini 上下文缓存创建失败，使用普通模式: {e}")
+        
+        self._context_cache = None
+        self._context_cache_expires_at = 0.0
+        return genai.GenerativeModel(
+            model_name=model_name,
+            system_instruction=self.STABLE_PREFIX,
+        )
+    
+    def _refresh_context_cache_if_needed(self) -> None:
+        """
+        上下文缓存即将过期时重建模型（提前 60 秒刷新，避免请求命中已过期缓存）
+        """
+        if self._context_cache is None:
+            return
+        if time.time() < self._context_cache_expires_at - 60:
+            return
+        
+        with self._cache_lock:
+            # 双重检查：其他线程可能已完成刷新
+            if time.time() < self._context_cache_expires_at - 60:
+                return
+            logger.info("[LLM缓存] Gemini 上下文缓存即将过期，重新创建")
+            try:
+                self._model = self._create_gemini_model(self._current_model_name)
+            except Exception as e:
+                logger.warning(f"[LLM缓存] 重建上下文缓存失败: {e}")
+    
+    def _record_prompt_usage(self, prompt_tokens: int, cached_tokens: int) -> None:
+        """
+        记录一次调用的 Prompt Token 用量（含缓存命中部分）
+        
+        Args:
+            prompt_tokens: 输入 Token 总数
+            cached_tokens: 命中缓存的输入 Token 数
+        """
+        with self._cache_lock:
+            stats = self._cache_stats
+            stats.calls += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.cached_tokens += cached_tokens
+            if cached_tokens > 0:
+                stats.cache_hits += 1
+    
+    def _record_gemini_usage(self, response: Any) -> None:
+        """从 Gemini 响应的 usage_metadata 中提取缓存用量"""
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
+        self._record_prompt_usage(prompt_tokens, cached_tokens)
+    
+    def _record_openai_usage(self, response: Any) -> None:
+        """
+        从 OpenAI 兼容响应的 usage 中提取缓存用量
+        
+        兼容字段：
+        - OpenAI: usage.prompt_tokens_details.cached_tokens
+        - DeepSeek: usage.prompt_cache_hit_tokens
+        """
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_tokens = getattr(details, 'cached_tokens', 0) if details is not None else 0
+        if not cached_tokens:
+            cached_tokens = getattr(usage, 'prompt_cache_hit_tokens', 0) or 0
+        self._record_prompt_usage(prompt_tokens, cached_tokens or 0)
+    
+    def get_prompt_cache_stats(self) -> Dict[str, Any]:
+        """获取 Prompt 缓存统计（命中次数、节省的预填充 Token 等）"""
+        with self._cache_lock:
+            return self._cache_stats.to_dict()
+    
+    def reset_prompt_cache_stats(self) -> None:
+        """重置 Prompt 缓存统计（每次运行开始时调用）"""
+        with self._cache_lock:
+            self._cache_stats = PromptCacheStats()
+    
     def is_available(self) -> bool:
         """检查分析器是否可用"""
-        return self._model is not None or self._openai_client is not None
+        return self._model is not None or self._openai_client is not None or self._router is not None
     
-    def _call_openai_api(self, prompt: str, generation_config: dict) -> str:
+    def _call_openai_api(self, prompt: str, generation_config: dict, system_prompt: Optional[str] = None) -> str:
         """
         调用 OpenAI 兼容 API
         
         Args:
             prompt: 提示词
             generation_config: 生成配置
+            system_prompt: 系统提示词（默认使用稳定前缀 STABLE_PREFIX）
             
         Returns:
             响应文本
@@ -672,26 +1442,24 @@ class GeminiAnalyzer:
                     logger.info(f"[OpenAI] 第 {attempt + 1} 次重试，等待 {delay:.1f} 秒...")
                     time.sleep(delay)
                 
-                config = get_config()
-                response = self._openai_client.chat.completions.create(
-                    model=self._current_model_name,
-                    messages=[
-                        {"role": "system", "content": self.SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=generation_config.get('temperature', config.openai_temperature),
-                    max_tokens=generation_config.get('max_output_tokens', 8192),
+                return self._openai_chat_completion(
+                    self._openai_client,
+                    self._current_model_name,
+                    prompt,
+                    generation_config,
+                    allow_json_schema=self._openai_json_schema_supported,
+                    system_prompt=system_prompt,
                 )
-                
-                if response and response.choices and response.choices[0].message.content:
-                    return response.choices[0].message.content
-                else:
-                    raise ValueError("OpenAI API 返回空响应")
                     
             except Exception as e:
                 error_str = str(e)
                 is_rate_limit = '429' in error_str or 'rate' in error_str.lower() or 'quota' in error_str.lower()
                 
+                # 部分兼容 API（如 DeepSeek）不支持 json_schema，降级为 json_object 后继续重试
+                if self._openai_json_schema_supported and self._is_json_schema_unsupported(error_str, generation_config):
+                    self._openai_json_schema_supported = False
+                    logger.warning("[OpenAI] 当前接口不支持 json_schema，降级为 json_object 模式")
+                
                 if is_rate_limit:
                     logger.warning(f"[OpenAI] API 限流，第 {attempt + 1}/{max_retries} 次尝试: {error_str[:100]}")
                 else:
@@ -702,6 +1470,123 @@ class GeminiAnalyzer:
         
         raise Exception("OpenAI API 调用失败，已达最大重试次数")
     
+    def _openai_chat_completion(
+        self,
+        client: Any,
+        model: str,
+        prompt: str,
+        generation_config: dict,
+        allow_json_schema: bool = True,
+        system_prompt: Optional[str] = None,
+        record_usage: bool = True
+    ) -> str:
+        """
+        单次调用 OpenAI 兼容 Chat Completions 接口（不含重试）
+        
+        Args:
+            client: OpenAI 客户端
+            model: 模型名称
+            prompt: 提示词（可变后缀）
+            generation_config: 生成配置
+            allow_json_schema: 该接口是否支持 json_schema 输出
+            system_prompt: 系统提示词（默认使用稳定前缀 STABLE_PREFIX）
+            record_usage: 是否计入 Prompt 缓存统计（本地模型不计入）
+            
+        Returns:
+            响应文本
+        """
+        config = get_config()
+        request_kwargs = {
+            "model": model,
+            "messages": [
+                # 稳定前缀放在首位，命中 OpenAI 兼容 API 的自动前缀缓存
+                {"role": "system", "content": system_prompt or self.STABLE_PREFIX},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": generation_config.get('temperature', config.openai_temperature),
+            "max_tokens": generation_config.get('max_output_tokens', 8192),
+        }
+        response_format = self._build_openai_response_format(generation_config, allow_json_schema)
+        if response_format:
+            request_kwargs["response_format"] = response_format
+        response = client.chat.completions.create(**request_kwargs)
+        if record_usage:
+            self._record_openai_usage(response)
+        
+        if response and response.choices and response.choices[0].message.content:
+            return response.choices[0].message.content
+        raise ValueError("OpenAI API 返回空响应")
+    
+    @staticmethod
+    def _is_json_schema_unsupported(error_str: str, generation_config: dict) -> bool:
+        """判断错误是否由接口不支持 json_schema 输出引起"""
+        return 'response_schema' in generation_config and (
+            'response_format' in error_str or 'json_schema' in error_str
+        )
+    
+    def _build_openai_response_format(
+        self,
+        generation_config: dict,
+        allow_json_schema: Optional[bool] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        将生成配置中的结构化输出参数转换为 OpenAI response_format
+        
+        - 带 response_schema：json_schema（不支持时降级为 json_object）
+        - 仅 response_mime_type=application/json：json_object
+        """
+        if allow_json_schema is None:
+            allow_json_schema = self._openai_json_schema_supported
+        schema = generation_config.get('response_schema')
+        if schema and allow_json_schema:
+            return {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "stock_dashboard",
+                    "schema": _to_openai_json_schema(schema),
+                    "strict": False,
+                },
+            }
+        if schema or generation_config.get('response_mime_type') == 'application/json':
+            return {"type": "json_object"}
+        return None
+    
+    def _call_router(self, prompt: str, generation_config: dict, system_prompt: Optional[str] = None) -> str:
+        """
+        通过 LLMRouter 调用（端点失败时自动切换到其他端点）
+        
+        Args:
+            prompt: 提示词
+            generation_config: 生成配置
+            system_prompt: 系统提示词（默认使用稳定前缀 STABLE_PREFIX）
+            
+        Returns:
+            响应文本
+        """
+        def invoke(endpoint: LLMEndpoint) -> str:
+            try:
+                return self._openai_chat_completion(
+                    endpoint.client,
+                    endpoint.model,
+                    prompt,
+                    generation_config,
+                    allow_json_schema=endpoint.json_schema_supported,
+                    system_prompt=system_prompt,
+                )
+            except Exception as e:
+                if endpoint.json_schema_supported and self._is_json_schema_unsupported(str(e), generation_config):
+                    endpoint.json_schema_supported = False
+                    logger.warning(f"[LLM路由] {endpoint.name} 不支持 json_schema，降级为 json_object 模式")
+                raise
+        
+        config = get_config()
+        max_attempts = max(config.gemini_max_retries, len(self._router.endpoints))
+        return self._router.call(invoke, max_attempts=max_attempts)
+    
+    def get_router_stats(self) -> List[Dict[str, Any]]:
+        """获取路由端点统计（未启用路由时返回空列表）"""
+        return self._router.get_stats() if self._router else []
+    
     def _call_api_with_retry(self, prompt: str, generation_config: dict) -> str:
         """
         调用 AI API，带有重试和模型切换机制
@@ -720,6 +1605,10 @@ class GeminiAnalyzer:
         Returns:
             响应文本
         """
+        # 路由模式：按负载与健康状态在多个端点间调度
+        if self._router is not None:
+            return self._call_router(prompt, generation_config)
+        
         # 如果已经在使用 OpenAI 模式，直接调用 OpenAI
         if self._use_openai:
             return self._call_openai_api(prompt, generation_config)
@@ -740,11 +1629,13 @@ class GeminiAnalyzer:
                     logger.info(f"[Gemini] 第 {attempt + 1} 次重试，等待 {delay:.1f} 秒...")
                     time.sleep(delay)
                 
+                self._refresh_context_cache_if_needed()
                 response = self._model.generate_content(
                     prompt,
                     generation_config=generation_config,
                     request_options={"timeout": 120}
                 )
+                self._record_gemini_usage(response)
                 
                 if response and response.text:
                     return response.text
@@ -797,20 +1688,23 @@ class GeminiAnalyzer:
     def analyze(
         self, 
         context: Dict[str, Any],
-        news_context: Optional[str] = None
+        news_context: Optional[str] = None,
+        report_type: Optional[str] = None
     ) -> AnalysisResult:
         """
         分析单只股票
         
         流程：
         1. 格式化输入数据（技术面 + 新闻）
-        2. 调用 Gemini API（带重试和模型切换）
-        3. 解析 JSON 响应
-        4. 返回结构化结果
+        2. 分层分析（启用时）：本地模型初筛，无信号的股票直接返回精简结论
+        3. 调用 Gemini API（带重试和模型切换）
+        4. 解析 JSON 响应
+        5. 返回结构化结果
         
         Args:
             context: 从 storage.get_analysis_context() 获取的上下文数据
             news_context: 预先搜索的新闻内容（可选）
+            report_type: 报告类型（simple/full），full 报告始终使用远程模型
             
         Returns:
             AnalysisResult 对象
@@ -853,6 +1747,12 @@ class GeminiAnalyzer:
             # 格式化输入（包含技术面数据和新闻）
             prompt = self._format_prompt(context, name, news_context)
             
+            # 分层分析：本地模型初筛，未触发升级条件时直接返回精简结论
+            if self._local_client is not None:
+                local_result = self._run_local_tier(context, code, name, prompt, news_context, report_type)
+                if local_result is not None:
+                    return local_result
+            
             # 获取模型名称
             model_name = getattr(self, '_current_model_name', None)
             if not model_name:
@@ -876,16 +1776,28 @@ class GeminiAnalyzer:
                 "temperature": config.gemini_temperature,
                 "max_output_tokens": 8192,
             }
+            
+            # 结构化输出模式：由 Schema 约束模型直接输出合法 JSON
+            structured = config.llm_structured_output
+            if structured:
+                generation_config["response_mime_type"] = "application/json"
+                generation_config["response_schema"] = ANALYSIS_RESPONSE_SCHEMA
 
             # 根据实际使用的 API 显示日志
-            api_provider = "OpenAI" if self._use_openai else "Gemini"
+            if self._router is not None:
+                api_provider = "Router"
+            else:
+                api_provider = "OpenAI" if self._use_openai else "Gemini"
             logger.info(f"[LLM调用] 开始调用 {api_provider} API...")
             
             # 使用带重试的 API 调用
             start_time = time.time()
-            response_text = self._call_api_with_retry(prompt, generation_config)
+            with get_metrics().span(STAGE_LLM, code, source=str(model_name)):
+                response_text = self._call_api_with_retry(prompt, generation_config)
             elapsed = time.time() - start_time
 
+            self._record_tier_call('remote', elapsed)
+
             # 记录响应信息
             logger.info(f"[LLM返回] {api_provider} API 响应成功, 耗时 {elapsed:.2f}s, 响应长度 {len(response_text)} 字符")
             
@@ -895,7 +1807,12 @@ class GeminiAnalyzer:
             logger.debug(f"=== {api_provider} 完整响应 ({len(response_text)}字符) ===\n{response_text}\n=== End Response ===")
             
             # 解析响应
-            result = self._parse_response(response_text, code, name)
+            with get_metrics().span(STAGE_PARSE, code) as span:
+                if structured:
+                    result = self._parse_structured_response(response_text, code, name, prompt, generation_config)
+                else:
+                    result = self._parse_response(response_text, code, name)
+                span.success = result.success
             result.raw_response = response_text
             result.search_performed = bool(news_context)
             
@@ -918,6 +1835,217 @@ class GeminiAnalyzer:
                 error_message=str(e),
             )
     
+    def refine_with_news(self, result: AnalysisResult, news_context: str) -> Optional[AnalysisResult]:
+        """
+        用迟到的情报修正已有结论（投机调用模式）
+        
+        只发送首次结论摘要与情报，模型返回调整项后更新到结论副本；
+        相比带情报重新完整分析，请求与输出都短得多。
+        
+        Returns:
+            修正后的结果（情报未改变结论时只补充情报摘要）；调用或解析失败返回 None
+        """
+        prompt = self.NEWS_REFINE_PROMPT.format(
+            name=result.name,
+            code=result.code,
+            score=result.sentiment_score,
+            trend=result.trend_prediction,
+            advice=result.operation_advice,
+            one_sentence=result.get_core_conclusion(),
+            news=news_context,
+        )
+        generation_config = {
+            "temperature": get_config().gemini_temperature,
+            "max_output_tokens": 1024,
+            "response_mime_type": "application/json",
+        }
+        try:
+            with get_metrics().span(STAGE_LLM, result.code, source=f"refine:{self._current_model_name}"):
+                response_text = self._call_api_with_retry(prompt, generation_config)
+            data = json.loads(self._fix_json_string(response_text[response_text.find('{'):response_text.rfind('}') + 1]))
+            if not isinstance(data, dict):
+                raise ValueError("修正结果不是 JSON 对象")
+        except Exception as e:
+            logger.warning(f"[LLM] {result.code} 情报修正失败，保留首次结论: {e}")
+            return None
+        
+        refined = replace(result, search_performed=True)
+        if data.get('news_summary'):
+            refined.news_summary = data['news_summary']
+        if data.get('risk_warning'):
+            refined.risk_warning = data['risk_warning']
+        if data.get('changed'):
+            try:
+                refined.sentiment_score = int(data.get('sentiment_score', result.sentiment_score))
+            except (TypeError, ValueError):
+                pass
+            refined.trend_prediction = data.get('trend_prediction') or result.trend_prediction
+            refined.operation_advice = data.get('operation_advice') or result.operation_advice
+            if refined.operation_advice != result.operation_advice:
+                if refined.operation_advice in ('买入', '加仓', '强烈买入'):
+                    refined.decision_type = 'buy'
+                elif refined.operation_advice in ('卖出', '减仓', '强烈卖出'):
+                    refined.decision_type = 'sell'
+                else:
+                    refined.decision_type = 'hold'
+            one_sentence = data.get('one_sentence')
+            if one_sentence:
+                refined.analysis_summary = one_sentence
+                if refined.dashboard and 'core_conclusion' in refined.dashboard:
+                    refined.dashboard = {
+                        **refined.dashboard,
+                        'core_conclusion': {**refined.dashboard['core_conclusion'], 'one_sentence': one_sentence},
+                    }
+            logger.info(f"[LLM] {result.code} 情报修正结论: {result.operation_advice} → {refined.operation_advice}, "
+                        f"评分 {result.sentiment_score} → {refined.sentiment_score}")
+        return refined
+    
+    def _check_escalation(self, context: Dict[str, Any], report_type: Optional[str]) -> Optional[str]:
+        """
+        初筛前检查是否必须使用远程模型
+        
+        升级条件：
+        - 完整报告（full）请求
+        - 行情数据缺失（仅靠新闻分析，需要更强的模型）
+        - 系统强信号（强烈买入/强烈卖出，或评分达到强多/强空阈值）
+        - 指标冲突（趋势与信号方向相反，或买入理由与风险因素同时较多）
+        
+        Returns:
+            升级原因；无需升级返回 None
+        """
+        if report_type is not None and str(getattr(report_type, 'value', report_type)).lower() == 'full':
+            return 'full_report'
+        if context.get('data_missing'):
+            return 'data_missing'
+        
+        trend = context.get('trend_analysis')
+        if not trend:
+            return None
+        
+        buy_signal = trend.get('buy_signal', '')
+        signal_score = trend.get('signal_score', 50) or 0
+        if buy_signal in ('强烈买入', '强烈卖出'):
+            return 'strong_signal'
+        if signal_score >= self.TIER_STRONG_BULL_SCORE or signal_score <= self.TIER_STRONG_BEAR_SCORE:
+            return 'strong_signal'
+        
+        trend_status = trend.get('trend_status', '')
+        bullish_trend = '多头' in trend_status
+        bearish_trend = '空头' in trend_status
+        if (bullish_trend and buy_signal in ('卖出', '强烈卖出')) or (bearish_trend and buy_signal in ('买入', '强烈买入')):
+            return 'conflicting_indicators'
+        if len(trend.get('signal_reasons') or []) >= 2 and len(trend.get('risk_factors') or []) >= 2:
+            return 'conflicting_indicators'
+        
+        return None
+    
+    def _run_local_tier(
+        self,
+        context: Dict[str, Any],
+        code: str,
+        name: str,
+        prompt: str,
+        news_context: Optional[str],
+        report_type: Optional[str]
+    ) -> Optional[AnalysisResult]:
+        """
+        本地模型初筛
+        
+        Returns:
+            无需升级时返回本地精简结论；需要升级到远程模型时返回 None
+        """
+        reason = self._check_escalation(context, report_type)
+        if reason:
+            self._record_escalation(code, reason, precheck=True)
+            return None
+        
+        config = get_config()
+        start_time = time.time()
+        try:
+            response_text = self._openai_chat_completion(
+                self._local_client,
+                config.local_llm_model,
+                prompt,
+                {"temperature": 0.2, "max_output_tokens": 1024},
+                allow_json_schema=False,
+                system_prompt=self.LOCAL_TIER_PROMPT,
+                record_usage=False,
+            )
+            data = json.loads(self._fix_json_string(response_text[response_text.find('{'):response_text.rfind('}') + 1]))
+        except Exception as e:
+            self._record_tier_call('local', time.time() - start_time)
+            get_metrics().record(STAGE_LLM, time.time() - start_time, code, f"local:{config.local_llm_model}", False)
+            logger.warning(f"[分层分析] {code} 本地模型初筛失败: {e}")
+            self._record_escalation(code, 'local_failed')
+            return None
+        elapsed = time.time() - start_time
+        self._record_tier_call('local', elapsed)
+        get_metrics().record(STAGE_LLM, elapsed, code, source=f"local:{config.local_llm_model}")
+        
+        if not isinstance(data, dict):
+            self._record_escalation(code, 'local_failed')
+            return None
+        
+        # 本地模型给出买卖信号，或评分偏离震荡区间，交给远程模型给出完整决策
+        decision_type = data.get('decision_type', 'hold')
+        try:
+            score = int(data.get('sentiment_score', 50))
+        except (TypeError, ValueError):
+            score = 50
+        if decision_type in ('buy', 'sell') or not 40 <= score <= 60:
+            self._record_escalation(code, 'local_signal')
+            return None
+        
+        one_sentence = data.get('one_sentence') or data.get('analysis_summary', '')
+        advice = data.get('operation_advice', '观望')
+        data['dashboard'] = {
+            'core_conclusion': {
+                'one_sentence': one_sentence,
+                'signal_type': '🟡持有观望',
+                'time_sensitivity': '不急',
+                'position_advice': {'no_position': advice, 'has_position': advice},
+            },
+        }
+        data.setdefault('analysis_summary', one_sentence)
+        data['data_sources'] = f"本地模型初筛 ({config.local_llm_model})"
+        
+        result = self._build_result_from_data(data, code, name)
+        result.raw_response = response_text
+        result.search_performed = bool(news_context)
+        logger.info(f"[分层分析] {name}({code}) 本地初筛无明显信号，耗时 {elapsed:.2f}s: "
+                    f"{result.operation_advice}, 评分 {result.sentiment_score}")
+        return result
+    
+    def _record_tier_call(self, tier: str, latency: float) -> None:
+        """记录分层调用耗时（tier: local / remote）"""
+        with self._tier_lock:
+            if tier == 'local':
+                self._tier_stats.local_calls += 1
+                self._tier_stats.local_latency += latency
+            else:
+                self._tier_stats.remote_calls += 1
+                self._tier_stats.remote_latency += latency
+    
+    def _record_escalation(self, code: str, reason: str, precheck: bool = False) -> None:
+        """记录一次升级到远程模型（precheck: 未调用本地模型即升级）"""
+        logger.info(f"[分层分析] {code} 升级到远程模型，原因: {reason}")
+        with self._tier_lock:
+            self._tier_stats.escalations += 1
+            if precheck:
+                self._tier_stats.precheck_escalations += 1
+            reasons = self._tier_stats.escalation_reasons
+            reasons[reason] = reasons.get(reason, 0) + 1
+    
+    def get_tier_stats(self) -> Dict[str, Any]:
+        """获取分层分析统计（升级率、各层平均耗时）"""
+        with self._tier_lock:
+            return self._tier_stats.to_dict()
+    
+    def reset_tier_stats(self) -> None:
+        """重置分层分析统计（每次运行开始时调用）"""
+        with self._tier_lock:
+            self._tier_stats = TierStats()
+    
     def _format_prompt(
         self, 
         context: Dict[str, Any], 
@@ -1074,32 +2202,17 @@ class GeminiAnalyzer:
 在回答技术面问题（如均线、乖离率）时，请直接说明“数据缺失，无法判断”，**严禁编造数据**。
 """
         
-        # 明确的输出要求
+        # 明确的输出要求（固定的分析要点已并入稳定前缀 ANALYSIS_TASK_PROMPT，此处仅保留与个股相关的部分）
         prompt += f"""
 ---
 
 ## ✅ 分析任务
 
-请为 **{stock_name}({code})** 生成【决策仪表盘】，严格按照 JSON 格式输出。
+请为 **{stock_name}({code})** 生成【决策仪表盘】，严格按照 JSON 格式输出（重点关注项与仪表盘要求见系统指令）。
 
 ### ⚠️ 重要：股票名称确认
 如果上方显示的股票名称为"股票{code}"或不正确，请在分析开头**明确输出该股票的正确中文全称**。
-
-### 重点关注（必须明确回答）：
-1. ❓ 是否满足 MA5>MA10>MA20 多头排列？
-2. ❓ 当前乖离率是否在安全范围内（<5%）？—— 超过5%必须标注"严禁追高"
-3. ❓ 量能是否配合（缩量回调/放量突破）？
-4. ❓ 筹码结构是否健康？
-5. ❓ 消息面有无重大利空？（减持、处罚、业绩变脸等）
-
-### 决策仪表盘要求：
-- **股票名称**：必须输出正确的中文全称（如"贵州茅台"而非"股票600519"）
-- **核心结论**：一句话说清该买/该卖/该等
-- **持仓分类建议**：空仓者怎么做 vs 持仓者怎么做
-- **具体狙击点位**：买入价、止损价、目标价（精确到分）
-- **检查清单**：每项用 ✅/⚠️/❌ 标记
-
-请输出完整的 JSON 格式决策仪表盘。"""
+"""
         
         return prompt
     
@@ -1157,64 +2270,7 @@ class GeminiAnalyzer:
                 
                 data = json.loads(json_str)
                 
-                # 提取 dashboard 数据
-                dashboard = data.get('dashboard', None)
-
-                # 优先使用 AI 返回的股票名称（如果原名称无效或包含代码）
-                ai_stock_name = data.get('stock_name')
-                if ai_stock_name and (name.startswith('股票') or name == code or 'Unknown' in name):
-                    name = ai_stock_name
-
-                # 解析所有字段，使用默认值防止缺失
-                # 解析 decision_type，如果没有则根据 operation_advice 推断
-                decision_type = data.get('decision_type', '')
-                if not decision_type:
-                    op = data.get('operation_advice', '持有')
-                    if op in ['买入', '加仓', '强烈买入']:
-                        decision_type = 'buy'
-                    elif op in ['卖出', '减仓', '强烈卖出']:
-                        decision_type = 'sell'
-                    else:
-                        decision_type = 'hold'
-                
-                return AnalysisResult(
-                    code=code,
-                    name=name,
-                    # 核心指标
-                    sentiment_score=int(data.get('sentiment_score', 50)),
-                    trend_prediction=data.get('trend_prediction', '震荡'),
-                    operation_advice=data.get('operation_advice', '持有'),
-                    decision_type=decision_type,
-                    confidence_level=data.get('confidence_level', '中'),
-                    # 决策仪表盘
-                    dashboard=dashboard,
-                    # 走势分析
-                    trend_analysis=data.get('trend_analysis', ''),
-                    short_term_outlook=data.get('short_term_outlook', ''),
-                    medium_term_outlook=data.get('medium_term_outlook', ''),
-                    # 技术面
-                    technical_analysis=data.get('technical_analysis', ''),
-                    ma_analysis=data.get('ma_analysis', ''),
-                    volume_analysis=data.get('volume_analysis', ''),
-                    pattern_analysis=data.get('pattern_analysis', ''),
-                    # 基本面
-                    fundamental_analysis=data.get('fundamental_analysis', ''),
-                    sector_position=data.get('sector_position', ''),
-                    company_highlights=data.get('company_highlights', ''),
-                    # 情绪面/消息面
-                    news_summary=data.get('news_summary', ''),
-                    market_sentiment=data.get('market_sentiment', ''),
-                    hot_topics=data.get('hot_topics', ''),
-                    # 综合
-                    analysis_summary=data.get('analysis_summary', '分析完成'),
-                    key_points=data.get('key_points', ''),
-                    risk_warning=data.get('risk_warning', ''),
-                    buy_reason=data.get('buy_reason', ''),
-                    # 元数据
-                    search_performed=data.get('search_performed', False),
-                    data_sources=data.get('data_sources', '技术面数据'),
-                    success=True,
-                )
+                return self._build_result_from_data(data, code, name)
             else:
                 # 没有找到 JSON，尝试从纯文本中提取信息
                 logger.warning(f"无法从响应中提取 JSON，使用原始文本分析")
@@ -1224,6 +2280,163 @@ class GeminiAnalyzer:
             logger.warning(f"JSON 解析失败: {e}，尝试从文本提取")
             return self._parse_text_response(response_text, code, name)
     
+    def _parse_structured_response(
+        self,
+        response_text: str,
+        code: str,
+        name: str,
+        prompt: str,
+        generation_config: dict
+    ) -> AnalysisResult:
+        """
+        解析结构化输出（Schema 约束）响应 - 快速校验路径
+        
+        流程：
+        1. 直接 json.loads（输出受 Schema 约束，无需清洗代码块/修复 JSON）
+        2. 按 ANALYSIS_RESPONSE_SCHEMA 校验必填字段
+        3. 仅对缺失字段发起一次定向补全调用并合并，不重新生成整份分析
+        4. 非法 JSON 时回退到兼容解析 _parse_response
+        """
+        try:
+            data = json.loads(response_text)
+        except (json.JSONDecodeError, TypeError):
+            data = None
+        
+        if not isinstance(data, dict):
+            logger.warning(f"[结构化输出] {code} 响应不是合法 JSON 对象，回退到兼容解析")
+            return self._parse_response(response_text, code, name)
+        
+        missing = find_missing_fields(data, ANALYSIS_RESPONSE_SCHEMA)
+        if missing:
+            logger.info(f"[结构化输出] {code} 缺失 {len(missing)} 个字段，发起定向补全: {missing}")
+            patch = self._repair_missing_fields(prompt, data, missing, generation_config)
+            if patch:
+                _deep_merge(data, patch)
+                still_missing = find_missing_fields(data, ANALYSIS_RESPONSE_SCHEMA)
+                if still_missing:
+                    logger.warning(f"[结构化输出] {code} 补全后仍缺失字段（使用默认值）: {still_missing}")
+                else:
+                    logger.info(f"[结构化输出] {code} 缺失字段补全成功")
+        else:
+            logger.debug(f"[结构化输出] {code} Schema 校验通过")
+        
+        return self._build_result_from_data(data, code, name)
+    
+    def _repair_missing_fields(
+        self,
+        prompt: str,
+        partial_data: Dict[str, Any],
+        missing_fields: List[str],
+        generation_config: dict
+    ) -> Optional[Dict[str, Any]]:
+        """
+        定向补全缺失字段
+        
+        只要求模型输出缺失的字段（保持原嵌套路径），输出 Token 远少于整份重新分析。
+        补全请求不携带完整 Schema（完整 Schema 会要求重复输出全部必填字段），仅保留 JSON 模式。
+        
+        Returns:
+            仅包含缺失字段的字典；失败返回 None
+        """
+        missing_lines = "\n".join(f"- {path}" for path in missing_fields)
+        repair_prompt = f"""{prompt}
+
+---
+
+## 🔧 补全缺失字段
+
+你上一次输出的决策仪表盘 JSON 缺少以下字段（按嵌套路径列出）：
+{missing_lines}
+
+上一次的输出：
+```json
+{json.dumps(partial_data, ensure_ascii=False)}
+```
+
+请只输出一个 JSON 对象，**仅包含上述缺失字段**，保持与决策仪表盘相同的嵌套结构，不要重复已有字段。"""
+        
+        repair_config = {k: v for k, v in generation_config.items() if k != 'response_schema'}
+        repair_config['max_output_tokens'] = 2048
+        
+        try:
+            response_text = self._call_api_with_retry(repair_prompt, repair_config)
+            try:
+                patch = json.loads(response_text)
+            except json.JSONDecodeError:
+                patch = json.loads(self._fix_json_string(response_text))
+            return patch if isinstance(patch, dict) else None
+        except Exception as e:
+            logger.warning(f"[结构化输出] 缺失字段补全失败: {e}")
+            return None
+    
+    def _build_result_from_data(
+        self,
+        data: Dict[str, Any],
+        code: str,
+        name: str
+    ) -> AnalysisResult:
+        """
+        由解析后的 JSON 字典构建 AnalysisResult（缺失字段使用默认值）
+        """
+        # 提取 dashboard 数据
+        dashboard = data.get('dashboard', None)
+
+        # 优先使用 AI 返回的股票名称（如果原名称无效或包含代码）
+        ai_stock_name = data.get('stock_name')
+        if ai_stock_name and (name.startswith('股票') or name == code or 'Unknown' in name):
+            name = ai_stock_name
+
+        # 解析所有字段，使用默认值防止缺失
+        # 解析 decision_type，如果没有则根据 operation_advice 推断
+        decision_type = data.get('decision_type', '')
+        if not decision_type:
+            op = data.get('operation_advice', '持有')
+            if op in ['买入', '加仓', '强烈买入']:
+                decision_type = 'buy'
+            elif op in ['卖出', '减仓', '强烈卖出']:
+                decision_type = 'sell'
+            else:
+                decision_type = 'hold'
+
+        return AnalysisResult(
+            code=code,
+            name=name,
+            # 核心指标
+            sentiment_score=int(data.get('sentiment_score', 50)),
+            trend_prediction=data.get('trend_prediction', '震荡'),
+            operation_advice=data.get('operation_advice', '持有'),
+            decision_type=decision_type,
+            confidence_level=data.get('confidence_level', '中'),
+            # 决策仪表盘
+            dashboard=dashboard,
+            # 走势分析
+            trend_analysis=data.get('trend_analysis', ''),
+            short_term_outlook=data.get('short_term_outlook', ''),
+            medium_term_outlook=data.get('medium_term_outlook', ''),
+            # 技术面
+            technical_analysis=data.get('technical_analysis', ''),
+            ma_analysis=data.get('ma_analysis', ''),
+            volume_analysis=data.get('volume_analysis', ''),
+            pattern_analysis=data.get('pattern_analysis', ''),
+            # 基本面
+            fundamental_analysis=data.get('fundamental_analysis', ''),
+            sector_position=data.get('sector_position', ''),
+            company_highlights=data.get('company_highlights', ''),
+            # 情绪面/消息面
+            news_summary=data.get('news_summary', ''),
+            market_sentiment=data.get('market_sentiment', ''),
+            hot_topics=data.get('hot_topics', ''),
+            # 综合
+            analysis_summary=data.get('analysis_summary', '分析完成'),
+            key_points=data.get('key_points', ''),
+            risk_warning=data.get('risk_warning', ''),
+            buy_reason=data.get('buy_reason', ''),
+            # 元数据
+            search_performed=data.get('search_performed', False),
+            data_sources=data.get('data_sources', '技术面数据'),
+            success=True,
+        )
+    
     def _fix_json_string(self, json_str: str) -> str:
         """修复常见的 JSON 格式问题"""
         import re
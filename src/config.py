@@ -10,12 +10,15 @@ A股自选股智能分析系统 - 配置管理模块
 3. 提供类型安全的配置访问接口
 """
 
+import logging
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv, dotenv_values
 from dataclasses import dataclass, field
 
+logger = logging.getLogger(__name__)
+
 
 def setup_env():
     """初始化环境变量（支持从 .env 加载）"""
@@ -24,6 +27,25 @@ def setup_env():
     load_dotenv(dotenv_path=env_path)
 
 
+def _parse_search_quotas(raw: str) -> Dict[str, int]:
+    """
+    解析 SEARCH_MONTHLY_QUOTAS（格式 provider:quota,provider:quota）
+
+    格式错误的条目记录警告后跳过，不影响其余配置加载
+    """
+    quotas: Dict[str, int] = {}
+    for item in raw.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            name, quota = item.split(':', 1)
+            quotas[name.strip().lower()] = int(quota)
+        except ValueError:
+            logger.warning(f"SEARCH_MONTHLY_QUOTAS 条目格式错误，已忽略: {item!r}（应为 provider:次数）")
+    return quotas
+
+
 @dataclass
 class Config:
     """
@@ -57,6 +79,26 @@ class Config:
     gemini_max_retries: int = 5  # 最大重试次数
     gemini_retry_delay: float = 5.0  # 重试基础延时（秒）
 
+    # Gemini 上下文缓存（稳定前缀：系统提示词 + 固定任务说明）
+    gemini_context_cache_enabled: bool = False  # 是否启用显式上下文缓存（CachedContent）
+    gemini_context_cache_ttl: int = 3600  # 上下文缓存有效期（秒）
+
+    # 结构化输出模式：Gemini response_schema / OpenAI response_format 约束输出为合法 JSON
+    llm_structured_output: bool = False
+
+    # 多 Key / 多接口 LLM 路由（按权重的最少在途请求调度）
+    llm_router_enabled: bool = False
+    gemini_api_keys: List[str] = field(default_factory=list)  # 额外的 Gemini API Keys
+    gemini_key_rpm: int = 0  # 每个 Gemini Key 的每分钟请求上限（0 为不限制）
+    llm_router_endpoints: List[str] = field(default_factory=list)  # 额外接口: base_url|api_key|model[|weight[|rpm]]
+
+    # 分层分析：本地 OpenAI 兼容模型（Ollama / llama.cpp）初筛，强信号/指标冲突/完整报告升级到远程模型
+    local_llm_enabled: bool = False
+    local_llm_base_url: str = "http://127.0.0.1:11434/v1"
+    local_llm_model: str = "qwen2.5:7b"
+    local_llm_api_key: Optional[str] = None
+    local_llm_timeout: int = 60  # 本地模型请求超时（秒）
+
     # OpenAI 兼容 API（备选，当 Gemini 不可用时使用）
     openai_api_key: Optional[str] = None
     openai_base_url: Optional[str] = None  # 如: https://api.openai.com/v1
@@ -67,6 +109,11 @@ class Config:
     bocha_api_keys: List[str] = field(default_factory=list)  # Bocha API Keys
     tavily_api_keys: List[str] = field(default_factory=list)  # Tavily API Keys
     serpapi_keys: List[str] = field(default_factory=list)  # SerpAPI Keys
+    search_cache_enabled: bool = True  # 搜索结果持久化缓存（同一查询在有效期内不重复请求）
+    news_intel_reuse_enabled: bool = True  # 优先复用情报库中新鲜期内的新闻，只搜索过期/缺失的维度
+    sector_intel_batch_enabled: bool = True  # 同板块股票合并搜索行业维度情报
+    search_monthly_quotas: Dict[str, int] = field(default_factory=dict)  # 每个 Key 的月额度覆盖 {provider: quota}
+    search_prefer_free_quota: bool = False  # 优先使用有剩余免费额度的引擎（默认保持 Bocha→Tavily→SerpAPI 优先级）
     
     # === 通知配置（可同时配置多个，全部推送）===
     
@@ -106,6 +153,14 @@ class Config:
 
     # 单股推送模式：每分析完一只股票立即推送，而不是汇总后推送
     single_stock_notify: bool = False
+    # 渐进推送：分析开始即发送进度看板，每完成一只股票原地更新（Telegram/Discord/飞书会话）
+    progressive_notify: bool = False
+    progressive_update_interval: float = 3.0  # 看板两次更新的最小间隔（秒）
+
+    # 多渠道并发推送的整体截止时间（秒），超时渠道记为失败
+    notification_deadline: float = 120.0
+    # 通知发件箱：推送消息先写入数据库，由后台线程按渠道限流投递并失败重试
+    notification_outbox_enabled: bool = False
 
     # 报告类型：simple(精简) 或 full(完整)
     report_type: str = "simple"
@@ -136,6 +191,17 @@ class Config:
     
     # === 系统配置 ===
     max_workers: int = 3  # 低并发防封禁
+    # 单股分析依赖图：行情/筹码/情报/数据库读取并发执行
+    speculative_llm_enabled: bool = False  # 情报超时未返回时提前调用 LLM，迟到的情报用于二次修正
+    speculative_news_wait: float = 8.0  # 等待情报搜索的最长时间（秒）
+    # 分阶段流水线：数据获取/AI 分析/保存/推送各自独立线程数，阶段间有界队列背压；情报搜索与数据获取并行
+    staged_pipeline_enabled: bool = True
+    stage_fetch_workers: int = 0  # 数据获取阶段线程数（0 表示与 max_workers 相同）
+    stage_search_workers: int = 3  # 情报搜索线程数（与数据获取阶段并行）
+    stage_llm_workers: int = 0  # AI 分析阶段线程数（0 表示与 max_workers 相同）
+    stage_persist_workers: int = 2  # 保存分析历史阶段线程数
+    stage_notify_workers: int = 1  # 单股推送阶段线程数
+    stage_queue_size: int = 4  # 每个阶段最多积压的待处理股票数
     debug: bool = False
     http_proxy: Optional[str] = None  # HTTP 代理 (例如: http://127.0.0.1:10809)
     https_proxy: Optional[str] = None # HTTPS 代理
@@ -329,6 +395,18 @@ class Config:
             gemini_request_delay=float(os.getenv('GEMINI_REQUEST_DELAY', '2.0')),
             gemini_max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '5')),
             gemini_retry_delay=float(os.getenv('GEMINI_RETRY_DELAY', '5.0')),
+            gemini_context_cache_enabled=os.getenv('GEMINI_CONTEXT_CACHE_ENABLED', 'false').lower() == 'true',
+            gemini_context_cache_ttl=int(os.getenv('GEMINI_CONTEXT_CACHE_TTL', '3600')),
+            llm_structured_output=os.getenv('LLM_STRUCTURED_OUTPUT', 'false').lower() == 'true',
+            llm_router_enabled=os.getenv('LLM_ROUTER_ENABLED', 'false').lower() == 'true',
+            gemini_api_keys=[k.strip() for k in os.getenv('GEMINI_API_KEYS', '').split(',') if k.strip()],
+            gemini_key_rpm=int(os.getenv('GEMINI_KEY_RPM', '0')),
+            llm_router_endpoints=[e.strip() for e in os.getenv('LLM_ROUTER_ENDPOINTS', '').split(';') if e.strip()],
+            local_llm_enabled=os.getenv('LOCAL_LLM_ENABLED', 'false').lower() == 'true',
+            local_llm_base_url=os.getenv('LOCAL_LLM_BASE_URL', 'http://127.0.0.1:11434/v1'),
+            local_llm_model=os.getenv('LOCAL_LLM_MODEL', 'qwen2.5:7b'),
+            local_llm_api_key=os.getenv('LOCAL_LLM_API_KEY'),
+            local_llm_timeout=int(os.getenv('LOCAL_LLM_TIMEOUT', '60')),
             openai_api_key=os.getenv('OPENAI_API_KEY'),
             openai_base_url=os.getenv('OPENAI_BASE_URL'),
             openai_model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
@@ -336,6 +414,11 @@ class Config:
             bocha_api_keys=bocha_api_keys,
             tavily_api_keys=tavily_api_keys,
             serpapi_keys=serpapi_keys,
+            search_cache_enabled=os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true',
+            news_intel_reuse_enabled=os.getenv('NEWS_INTEL_REUSE_ENABLED', 'true').lower() == 'true',
+            sector_intel_batch_enabled=os.getenv('SECTOR_INTEL_BATCH_ENABLED', 'true').lower() == 'true',
+            search_monthly_quotas=_parse_search_quotas(os.getenv('SEARCH_MONTHLY_QUOTAS', '')),
+            search_prefer_free_quota=os.getenv('SEARCH_PREFER_FREE_QUOTA', 'false').lower() == 'true',
             wechat_webhook_url=os.getenv('WECHAT_WEBHOOK_URL'),
             feishu_webhook_url=os.getenv('FEISHU_WEBHOOK_URL'),
             telegram_bot_token=os.getenv('TELEGRAM_BOT_TOKEN'),
@@ -356,6 +439,10 @@ class Config:
             astrbot_url=os.getenv('ASTRBOT_URL'),
             astrbot_token=os.getenv('ASTRBOT_TOKEN'),
             single_stock_notify=os.getenv('SINGLE_STOCK_NOTIFY', 'false').lower() == 'true',
+            progressive_notify=os.getenv('PROGRESSIVE_NOTIFY', 'false').lower() == 'true',
+            progressive_update_interval=float(os.getenv('PROGRESSIVE_UPDATE_INTERVAL', '3')),
+            notification_deadline=float(os.getenv('NOTIFICATION_DEADLINE', '120')),
+            notification_outbox_enabled=os.getenv('NOTIFICATION_OUTBOX_ENABLED', 'false').lower() == 'true',
             report_type=os.getenv('REPORT_TYPE', 'simple').lower(),
             analysis_delay=float(os.getenv('ANALYSIS_DELAY', '0')),
             feishu_max_bytes=int(os.getenv('FEISHU_MAX_BYTES', '20000')),
@@ -366,6 +453,15 @@ class Config:
             log_dir=os.getenv('LOG_DIR', './logs'),
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
             max_workers=int(os.getenv('MAX_WORKERS', '3')),
+            speculative_llm_enabled=os.getenv('SPECULATIVE_LLM_ENABLED', 'false').lower() == 'true',
+            speculative_news_wait=float(os.getenv('SPECULATIVE_NEWS_WAIT', '8')),
+            staged_pipeline_enabled=os.getenv('STAGED_PIPELINE_ENABLED', 'true').lower() == 'true',
+            stage_fetch_workers=int(os.getenv('STAGE_FETCH_WORKERS', '0')),
+            stage_search_workers=int(os.getenv('STAGE_SEARCH_WORKERS', '3')),
+            stage_llm_workers=int(os.getenv('STAGE_LLM_WORKERS', '0')),
+            stage_persist_workers=int(os.getenv('STAGE_PERSIST_WORKERS', '2')),
+            stage_notify_workers=int(os.getenv('STAGE_NOTIFY_WORKERS', '1')),
+            stage_queue_size=int(os.getenv('STAGE_QUEUE_SIZE', '4')),
             debug=os.getenv('DEBUG', 'false').lower() == 'true',
             http_proxy=os.getenv('HTTP_PROXY'),
             https_proxy=os.getenv('HTTPS_PROXY'),
@@ -463,7 +559,7 @@ class Config:
         if not self.tushare_token:
             warnings.append("提示：未配置 Tushare Token，将使用其他数据源")
         
-        if not self.gemini_api_key and not self.openai_api_key:
+        if not self.gemini_api_key and not self.openai_api_key and not self.gemini_api_keys and not self.llm_router_endpoints:
             warnings.append("警告：未配置 Gemini 或 OpenAI API Key，AI 分析功能将不可用")
         elif not self.gemini_api_key:
             warnings.append("提示：未配置 Gemini API Key，将使用 OpenAI 兼容 API")
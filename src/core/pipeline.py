@@ -12,10 +12,14 @@ A股自选股智能分析系统 - 核心分析流水线
 """
 
 import logging
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import uuid
+from contextlib import closing
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
 from datetime import date
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 
 from src.config import get_config, Config
 from src.storage import get_db
@@ -23,15 +27,34 @@ from data_provider import DataFetcherManager
 from data_provider.realtime_types import ChipDistribution
 from src.analyzer import GeminiAnalyzer, AnalysisResult, STOCK_NAME_MAP
 from src.notification import NotificationService, NotificationChannel
-from src.search_service import SearchService
+from src.search_service import SearchResponse, SearchResult, get_search_service
 from src.enums import ReportType
+from src.metrics import (
+    get_metrics, STAGE_CHIP, STAGE_DB_WRITE, STAGE_FETCH, STAGE_REALTIME, STAGE_TREND
+)
 from src.stock_analyzer import StockTrendAnalyzer, TrendAnalysisResult
+from src.core.staged_executor import PipelineStage, StagedExecutor
 from bot.models import BotMessage
 
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _StockTask:
+    """分阶段流水线中单只股票的处理状态（各阶段逐步填充）"""
+    code: str
+    enhanced_context: Optional[Dict[str, Any]] = None
+    realtime_quote: Any = None
+    chip_data: Optional[ChipDistribution] = None
+    search_future: Optional[Future] = None
+    news_context: Optional[str] = None
+    result: Optional[AnalysisResult] = None
+
+    def __str__(self) -> str:
+        return self.code
+
+
 class StockAnalysisPipeline:
     """
     股票分析主流程调度器
@@ -42,6 +65,9 @@ class StockAnalysisPipeline:
     3. 实现并发控制和异常处理
     """
     
+    # 所属板块查询的截止时间（秒），超时的股票按个股搜索
+    SECTOR_BOARD_DEADLINE = 5.0
+    
     def __init__(
         self,
         config: Optional[Config] = None,
@@ -62,6 +88,8 @@ class StockAnalysisPipeline:
         self.max_workers = max_workers or self.config.max_workers
         self.source_message = source_message
         self.query_id = query_id
+        # 发件箱幂等范围：同一次运行内相同消息只推送一次，不同运行的相同消息照常推送
+        self._notify_scope = query_id or uuid.uuid4().hex
         self.query_source = self._resolve_query_source(query_source)
         self.save_context_snapshot = (
             self.config.save_context_snapshot if save_context_snapshot is None else save_context_snapshot
@@ -75,12 +103,16 @@ class StockAnalysisPipeline:
         self.analyzer = GeminiAnalyzer()
         self.notifier = NotificationService(source_message=source_message)
         
-        # 初始化搜索服务
-        self.search_service = SearchService(
-            bocha_keys=self.config.bocha_api_keys,
-            tavily_keys=self.config.tavily_api_keys,
-            serpapi_keys=self.config.serpapi_keys,
-        )
+        # 搜索服务（进程内共享单例）
+        self.search_service = get_search_service()
+        
+        # 批量运行时按板块合并搜索的共享情报（后台规划，结果为 {股票代码: {维度: SearchResponse}}）
+        self._shared_intel: Optional[Future] = None
+        
+        # 单股分析依赖图的任务线程池（行情/筹码/数据库/情报并发执行，所有股票共享）
+        # 首次使用时创建，运行结束由 close() 关闭
+        self._stage_executor: Optional[ThreadPoolExecutor] = None
+        self._stage_executor_lock = threading.Lock()
         
         logger.info(f"调度器初始化完成，最大并发数: {self.max_workers}")
         logger.info("已启用趋势分析器 (MA5>MA10>MA20 多头判断)")
@@ -128,13 +160,16 @@ class StockAnalysisPipeline:
             
             # 从数据源获取数据
             logger.info(f"[{code}] 开始从数据源获取数据...")
-            df, source_name = self.fetcher_manager.get_daily_data(code, days=30)
+            with get_metrics().span(STAGE_FETCH, code) as span:
+                df, source_name = self.fetcher_manager.get_daily_data(code, days=30)
+                span.source = source_name or ''
             
             if df is None or df.empty:
                 return False, "获取数据为空"
             
             # 保存到数据库
-            saved_count = self.db.save_daily_data(df, code, source_name)
+            with get_metrics().span(STAGE_DB_WRITE, code, source='daily_data'):
+                saved_count = self.db.save_daily_data(df, code, source_name)
             logger.info(f"[{code}] 数据保存成功（来源: {source_name}，新增 {saved_count} 条）")
             
             return True, None
@@ -148,13 +183,18 @@ class StockAnalysisPipeline:
         """
         分析单只股票（增强版：含量比、换手率、筹码分析、多维度情报）
         
-        流程：
-        1. 获取实时行情（量比、换手率）- 通过 DataFetcherManager 自动故障切换
-        2. 获取筹码分布 - 通过 DataFetcherManager 带熔断保护
-        3. 进行趋势分析（基于交易理念）
-        4. 多维度情报搜索（最新消息+风险排查+业绩预期）
-        5. 从数据库获取分析上下文
-        6. 调用 AI 进行综合分析
+        按依赖图并发执行，单股耗时趋近于最慢的单个依赖：
+        
+            实时行情 ──┐
+            筹码分布 ──┤
+            数据库上下文 → 趋势分析 ──┼──→ AI 综合分析 → 保存历史
+            情报搜索（依赖股票名称）──┘
+        
+        1. 实时行情、筹码分布、数据库上下文同时发起；股票名称已知时情报搜索也同时发起，
+           否则等待实时行情返回名称后再发起
+        2. 数据库上下文就绪后立即进行趋势分析
+        3. 启用投机调用（SPECULATIVE_LLM_ENABLED）时，情报超过等待时间未返回则先调用 AI，
+           分析期间到达的情报用于二次修正
         
         Args:
             code: 股票代码
@@ -164,153 +204,432 @@ class StockAnalysisPipeline:
             AnalysisResult 或 None（如果分析失败）
         """
         try:
-            # 获取股票名称（优先从实时行情获取真实名称）
-            stock_name = STOCK_NAME_MAP.get(code, '')
+            enhanced_context, realtime_quote, chip_data, search_future = self._prepare_analysis(code)
             
-            # Step 1: 获取实时行情（量比、换手率等）- 使用统一入口，自动故障切换
-            realtime_quote = None
-            try:
-                realtime_quote = self.fetcher_manager.get_realtime_quote(code)
-                if realtime_quote:
-                    # 使用实时行情返回的真实股票名称
-                    if realtime_quote.name:
-                        stock_name = realtime_quote.name
-                    # 兼容不同数据源的字段（有些数据源可能没有 volume_ratio）
-                    volume_ratio = getattr(realtime_quote, 'volume_ratio', None)
-                    turnover_rate = getattr(realtime_quote, 'turnover_rate', None)
-                    logger.info(f"[{code}] {stock_name} 实时行情: 价格={realtime_quote.price}, "
-                              f"量比={volume_ratio}, 换手率={turnover_rate}% "
-                              f"(来源: {realtime_quote.source.value if hasattr(realtime_quote, 'source') else 'unknown'})")
-                else:
-                    logger.info(f"[{code}] 实时行情获取失败或已禁用，将使用历史数据进行分析")
-            except Exception as e:
-                logger.warning(f"[{code}] 获取实时行情失败: {e}")
+            # Step 5: 调用 AI 分析（传入增强的上下文和新闻）
+            result, news_context = self._analyze_with_news(
+                code, enhanced_context, search_future, report_type
+            )
+
+            # Step 6: 保存分析历史记录
+            if result:
+                self._save_analysis_history(
+                    code, result, report_type, enhanced_context, news_context, realtime_quote, chip_data
+                )
+
+            return result
             
-            # 如果还是没有名称，使用代码作为名称
-            if not stock_name:
-                stock_name = f'股票{code}'
+        except Exception as e:
+            logger.error(f"[{code}] 分析失败: {e}")
+            logger.exception(f"[{code}] 详细错误信息:")
+            return None
+    
+    def _prepare_analysis(
+        self,
+        code: str,
+        submit_search: bool = True
+    ) -> Tuple[Dict[str, Any], Any, Optional[ChipDistribution], Optional[Future]]:
+        """
+        并发获取实时行情、筹码分布、数据库上下文并完成趋势分析，组装增强上下文（analyze_stock Step 1-4）
+        
+        Args:
+            code: 股票代码
+            submit_search: 是否同时发起情报搜索（分阶段流水线中由搜索阶段单独执行）
             
-            # Step 2: 获取筹码分布 - 使用统一入口，带熔断保护
-            chip_data = None
-            try:
+        Returns:
+            Tuple[增强上下文, 实时行情, 筹码分布, 情报搜索任务（未发起时为 None）]
+        """
+        # 获取股票名称（优先从实时行情获取真实名称）
+        stock_name = STOCK_NAME_MAP.get(code, '')
+        
+        # Step 1: 并发发起无依赖的任务
+        executor = self._get_stage_executor()
+        quote_future = executor.submit(self._fetch_realtime_quote, code)
+        chip_future = executor.submit(self._fetch_chip_distribution, code)
+        context_future = executor.submit(self.db.get_analysis_context, code)
+        search_future = None
+        if submit_search and stock_name:
+            search_future = self._submit_intel_search(code, stock_name)
+        
+        # Step 2: 趋势分析（依赖数据库上下文）
+        context = None
+        try:
+            context = context_future.result()
+        except Exception as e:
+            logger.warning(f"[{code}] 获取分析上下文失败: {e}")
+        trend_result = self._analyze_trend(code, context)
+        
+        # Step 3: 实时行情返回真实名称；名称未知时此时才发起情报搜索
+        realtime_quote = quote_future.result()
+        if realtime_quote and realtime_quote.name:
+            stock_name = realtime_quote.name
+        # 如果还是没有名称，使用代码作为名称
+        if not stock_name:
+            stock_name = f'股票{code}'
+        if submit_search and search_future is None:
+            search_future = self._submit_intel_search(code, stock_name)
+        
+        chip_data = chip_future.result()
+        
+        if context is None:
+            logger.warning(f"[{code}] 无法获取历史行情数据，将仅基于新闻和实时行情分析")
+            context = {
+                'code': code,
+                'stock_name': stock_name,
+                'date': date.today().isoformat(),
+                'data_missing': True,
+                'today': {},
+                'yesterday': {}
+            }
+        
+        # Step 4: 增强上下文数据（添加实时行情、筹码、趋势分析结果、股票名称）
+        enhanced_context = self._enhance_context(
+            context, 
+            realtime_quote, 
+            chip_data, 
+            trend_result,
+            stock_name  # 传入股票名称
+        )
+        return enhanced_context, realtime_quote, chip_data, search_future
+    
+    def _save_analysis_history(
+        self,
+        code: str,
+        result: AnalysisResult,
+        report_type: ReportType,
+        enhanced_context: Dict[str, Any],
+        news_context: Optional[str],
+        realtime_quote,
+        chip_data: Optional[ChipDistribution]
+    ) -> None:
+        """保存分析历史记录（失败只记录日志）"""
+        try:
+            context_snapshot = self._build_context_snapshot(
+                enhanced_context=enhanced_context,
+                news_content=news_context,
+                realtime_quote=realtime_quote,
+                chip_data=chip_data
+            )
+            with get_metrics().span(STAGE_DB_WRITE, code, source='analysis_history'):
+                self.db.save_analysis_history(
+                    result=result,
+                    query_id=self.query_id or "",
+                    report_type=report_type.value,
+                    news_content=news_context,
+                    context_snapshot=context_snapshot,
+                    save_snapshot=self.save_context_snapshot
+                )
+        except Exception as e:
+            logger.warning(f"[{code}] 保存分析历史失败: {e}")
+    
+    def _fetch_realtime_quote(self, code: str):
+        """获取实时行情（量比、换手率等）- 使用统一入口，自动故障切换"""
+        try:
+            with get_metrics().span(STAGE_REALTIME, code) as span:
+                realtime_quote = self.fetcher_manager.get_realtime_quote(code)
+                if realtime_quote is None:
+                    span.success = False
+                elif hasattr(realtime_quote, 'source'):
+                    span.source = getattr(realtime_quote.source, 'value', str(realtime_quote.source))
+            if realtime_quote:
+                # 兼容不同数据源的字段（有些数据源可能没有 volume_ratio）
+                volume_ratio = getattr(realtime_quote, 'volume_ratio', None)
+                turnover_rate = getattr(realtime_quote, 'turnover_rate', None)
+                logger.info(f"[{code}] {realtime_quote.name} 实时行情: 价格={realtime_quote.price}, "
+                          f"量比={volume_ratio}, 换手率={turnover_rate}% "
+                          f"(来源: {realtime_quote.source.value if hasattr(realtime_quote, 'source') else 'unknown'})")
+            else:
+                logger.info(f"[{code}] 实时行情获取失败或已禁用，将使用历史数据进行分析")
+            return realtime_quote
+        except Exception as e:
+            logger.warning(f"[{code}] 获取实时行情失败: {e}")
+            return None
+    
+    def _fetch_chip_distribution(self, code: str) -> Optional[ChipDistribution]:
+        """获取筹码分布 - 使用统一入口，带熔断保护"""
+        try:
+            with get_metrics().span(STAGE_CHIP, code) as span:
                 chip_data = self.fetcher_manager.get_chip_distribution(code)
-                if chip_data:
-                    logger.info(f"[{code}] 筹码分布: 获利比例={chip_data.profit_ratio:.1%}, "
-                              f"90%集中度={chip_data.concentration_90:.2%}")
-                else:
-                    logger.debug(f"[{code}] 筹码分布获取失败或已禁用")
-            except Exception as e:
-                logger.warning(f"[{code}] 获取筹码分布失败: {e}")
-            
-            # Step 3: 趋势分析（基于交易理念）
-            trend_result: Optional[TrendAnalysisResult] = None
-            try:
-                # 获取历史数据进行趋势分析
-                context = self.db.get_analysis_context(code)
-                if context and 'raw_data' in context:
-                    import pandas as pd
-                    raw_data = context['raw_data']
-                    if isinstance(raw_data, list) and len(raw_data) > 0:
+                span.success = chip_data is not None
+                span.source = chip_data.source if chip_data else ''
+            if chip_data:
+                logger.info(f"[{code}] 筹码分布: 获利比例={chip_data.profit_ratio:.1%}, "
+                          f"90%集中度={chip_data.concentration_90:.2%}")
+            else:
+                logger.debug(f"[{code}] 筹码分布获取失败或已禁用")
+            return chip_data
+        except Exception as e:
+            logger.warning(f"[{code}] 获取筹码分布失败: {e}")
+            return None
+    
+    def _analyze_trend(self, code: str, context: Optional[Dict[str, Any]]) -> Optional[TrendAnalysisResult]:
+        """趋势分析（基于交易理念），复用已加载的分析上下文"""
+        try:
+            if context and 'raw_data' in context:
+                import pandas as pd
+                raw_data = context['raw_data']
+                if isinstance(raw_data, list) and len(raw_data) > 0:
+                    with get_metrics().span(STAGE_TREND, code):
                         df = pd.DataFrame(raw_data)
                         trend_result = self.trend_analyzer.analyze(df, code)
-                        logger.info(f"[{code}] 趋势分析: {trend_result.trend_status.value}, "
-                                  f"买入信号={trend_result.buy_signal.value}, 评分={trend_result.signal_score}")
-            except Exception as e:
-                logger.warning(f"[{code}] 趋势分析失败: {e}")
+                    logger.info(f"[{code}] 趋势分析: {trend_result.trend_status.value}, "
+                              f"买入信号={trend_result.buy_signal.value}, 评分={trend_result.signal_score}")
+                    return trend_result
+        except Exception as e:
+            logger.warning(f"[{code}] 趋势分析失败: {e}")
+        return None
+    
+    def _get_stage_executor(self) -> ThreadPoolExecutor:
+        """获取依赖图线程池（关闭后再次使用时重新创建）"""
+        with self._stage_executor_lock:
+            if self._stage_executor is None:
+                self._stage_executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers * 4,
+                    thread_name_prefix="stage"
+                )
+            return self._stage_executor
+    
+    def close(self) -> None:
+        """关闭依赖图线程池（已提交的任务继续执行完，如后台完成的情报搜索）"""
+        with self._stage_executor_lock:
+            executor, self._stage_executor = self._stage_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def _submit_intel_search(self, code: str, stock_name: str) -> Optional[Future]:
+        """提交多维度情报搜索任务（搜索服务不可用时返回 None）"""
+        if not self.search_service.is_available:
+            logger.info(f"[{code}] 搜索服务不可用，跳过情报搜索")
+            return None
+        return self._get_stage_executor().submit(self._search_intel, code, stock_name)
+    
+    def _search_intel(self, code: str, stock_name: str) -> Optional[str]:
+        """
+        多维度情报搜索（最新消息+风险排查+业绩预期），并保存到数据库
+        
+        优先复用情报库中仍在新鲜期内的维度，只对过期或缺失的维度发起外部搜索
+        
+        Returns:
+            格式化后的情报报告；无结果返回 None
+        """
+        try:
+            stored_results = self._load_fresh_intel(code) if self.config.news_intel_reuse_enabled else {}
+            # 板块合并搜索的共享维度（情报库已有新鲜数据时优先使用情报库）
+            shared_results = {
+                dim: response for dim, response in self._get_shared_intel(code).items()
+                if dim not in stored_results
+            }
+            stale_dimensions = [
+                dim for dim in self.search_service.INTEL_DIMENSION_NAMES
+                if dim not in stored_results and dim not in shared_results
+            ]
             
-            # Step 4: 多维度情报搜索（最新消息+风险排查+业绩预期）
-            news_context = None
-            if self.search_service.is_available:
-                logger.info(f"[{code}] 开始多维度情报搜索...")
-                
+            searched_results: Dict[str, SearchResponse] = {}
+            if stale_dimensions:
+                logger.info(f"[{code}] 开始多维度情报搜索: {', '.join(stale_dimensions)}"
+                            f"（复用情报库 {len(stored_results)} 个维度）")
                 # 使用多维度搜索（最多5次搜索）
-                intel_results = self.search_service.search_comprehensive_intel(
+                searched_results = self.search_service.search_comprehensive_intel(
                     stock_code=code,
                     stock_name=stock_name,
-                    max_searches=5
+                    max_searches=5,
+                    dimensions=stale_dimensions
                 )
-                
-                # 格式化情报报告
-                if intel_results:
-                    news_context = self.search_service.format_intel_report(intel_results, stock_name)
-                    total_results = sum(
-                        len(r.results) for r in intel_results.values() if r.success
-                    )
-                    logger.info(f"[{code}] 情报搜索完成: 共 {total_results} 条结果")
-                    logger.debug(f"[{code}] 情报搜索结果:\n{news_context}")
-
-                    # 保存新闻情报到数据库（用于后续复盘与查询）
-                    try:
-                        query_context = self._build_query_context()
-                        for dim_name, response in intel_results.items():
-                            if response and response.success and response.results:
-                                self.db.save_news_intel(
-                                    code=code,
-                                    name=stock_name,
-                                    dimension=dim_name,
-                                    query=response.query,
-                                    response=response,
-                                    query_context=query_context
-                                )
-                    except Exception as e:
-                        logger.warning(f"[{code}] 保存新闻情报失败: {e}")
             else:
-                logger.info(f"[{code}] 搜索服务不可用，跳过情报搜索")
+                logger.info(f"[{code}] 情报库各维度均在新鲜期内，跳过外部搜索")
             
-            # Step 5: 获取分析上下文（技术面数据）
-            context = self.db.get_analysis_context(code)
-            
-            if context is None:
-                logger.warning(f"[{code}] 无法获取历史行情数据，将仅基于新闻和实时行情分析")
-                from datetime import date
-                context = {
-                    'code': code,
-                    'stock_name': stock_name,
-                    'date': date.today().isoformat(),
-                    'data_missing': True,
-                    'today': {},
-                    'yesterday': {}
-                }
+            searched_results.update(shared_results)
+            intel_results = {**stored_results, **searched_results}
+            if not intel_results:
+                return None
             
-            # Step 6: 增强上下文数据（添加实时行情、筹码、趋势分析结果、股票名称）
-            enhanced_context = self._enhance_context(
-                context, 
-                realtime_quote, 
-                chip_data, 
-                trend_result,
-                stock_name  # 传入股票名称
+            # 格式化情报报告
+            news_context = self.search_service.format_intel_report(intel_results, stock_name)
+            total_results = sum(
+                len(r.results) for r in intel_results.values() if r.success
             )
+            logger.info(f"[{code}] 情报搜索完成: 共 {total_results} 条结果")
+            logger.debug(f"[{code}] 情报搜索结果:\n{news_context}")
             
-            # Step 7: 调用 AI 分析（传入增强的上下文和新闻）
-            result = self.analyzer.analyze(enhanced_context, news_context=news_context)
-
-            # Step 8: 保存分析历史记录
-            if result:
-                try:
-                    context_snapshot = self._build_context_snapshot(
-                        enhanced_context=enhanced_context,
-                        news_content=news_context,
-                        realtime_quote=realtime_quote,
-                        chip_data=chip_data
-                    )
-                    self.db.save_analysis_history(
-                        result=result,
-                        query_id=self.query_id or "",
-                        report_type=report_type.value,
-                        news_content=news_context,
-                        context_snapshot=context_snapshot,
-                        save_snapshot=self.save_context_snapshot
+            # 保存新搜索到的新闻情报到数据库（用于后续复盘与查询）
+            try:
+                last_seen_id = self.db.get_latest_news_id(code)
+                with get_metrics().span(STAGE_DB_WRITE, code, source='news_intel'):
+                    self.db.save_news_intel_batch(
+                        code=code,
+                        name=stock_name,
+                        responses={
+                            dim_name: response for dim_name, response in searched_results.items()
+                            if response and response.success
+                        },
+                        query_context=self._build_query_context()
                     )
-                except Exception as e:
-                    logger.warning(f"[{code}] 保存分析历史失败: {e}")
-
-            return result
+                # 入库时已合并近似重复，本次新增的记录即上次运行以来首次出现的新闻（首次分析不标注）
+                if last_seen_id:
+                    new_news = self.db.get_new_news_since(code, last_seen_id)
+                    if new_news:
+                        logger.info(f"[{code}] 上次运行以来新增 {len(new_news)} 条新闻")
+                        news_context += self._format_new_news(new_news)
+            except Exception as e:
+                logger.warning(f"[{code}] 保存新闻情报失败: {e}")
             
+            return news_context
         except Exception as e:
-            logger.error(f"[{code}] 分析失败: {e}")
-            logger.exception(f"[{code}] 详细错误信息:")
+            logger.warning(f"[{code}] 情报搜索失败: {e}")
             return None
     
+    @staticmethod
+    def _format_new_news(news: List[Any]) -> str:
+        """格式化上次运行以来的新增新闻（附加在情报报告末尾，提示模型重点关注）"""
+        lines = [f"\n\n🆕 上次分析以来的新消息 ({len(news)} 条):"]
+        for i, item in enumerate(news[:10], 1):
+            date_str = f" [{item.published_date:%Y-%m-%d}]" if item.published_date else ""
+            lines.append(f"  {i}. {item.title}{date_str}")
+        return "\n".join(lines)
+    
+    def _start_sector_intel(self, stock_codes: List[str]) -> Future:
+        """后台执行板块合并搜索，与第一批股票的数据获取重叠，不推迟分析开始"""
+        planner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sector-intel")
+        try:
+            return planner.submit(self._plan_sector_intel, stock_codes)
+        finally:
+            planner.shutdown(wait=False)
+    
+    def _get_shared_intel(self, code: str) -> Dict[str, SearchResponse]:
+        """取股票的板块共享维度（板块合并搜索尚未完成时等待，其自身受截止时间约束）"""
+        if self._shared_intel is None:
+            return {}
+        try:
+            return self._shared_intel.result().get(code, {})
+        except Exception as e:
+            logger.warning(f"[{code}] 板块共享情报不可用，将按个股搜索: {e}")
+            return {}
+    
+    def _plan_sector_intel(self, stock_codes: List[str]) -> Dict[str, Dict[str, SearchResponse]]:
+        """
+        获取各股票所属行业板块，按板块合并搜索行业、宏观维度情报
+        
+        板块查询截止时间为 SECTOR_BOARD_DEADLINE，超时未返回的股票视为板块未知（按个股搜索），
+        不会因个别查询卡住而拖慢情报搜索。
+        
+        Returns:
+            {股票代码: {维度: SearchResponse}}，失败时返回空字典（退化为逐股搜索）
+        """
+        try:
+            board_futures = {
+                code: self._get_stage_executor().submit(self.fetcher_manager.get_industry_board, code)
+                for code in stock_codes
+            }
+            deadline = self.SECTOR_BOARD_DEADLINE
+            done, not_done = wait(board_futures.values(), timeout=deadline)
+            if not_done:
+                logger.warning(f"[板块情报] {len(not_done)} 只股票的所属板块查询超过 {deadline}s，将按个股搜索")
+            stock_boards = {
+                code: future.result() if future in done and future.exception() is None else None
+                for code, future in board_futures.items()
+            }
+            return self.search_service.plan_batch_intel(stock_boards)
+        except Exception as e:
+            logger.warning(f"板块情报合并搜索失败，将逐股搜索: {e}")
+            return {}
+    
+    def _load_fresh_intel(self, code: str) -> Dict[str, SearchResponse]:
+        """
+        从情报库读取新鲜期内的新闻情报（新鲜期与搜索缓存的维度有效期一致）
+        
+        Returns:
+            {维度: SearchResponse}，读取失败时返回空字典
+        """
+        try:
+            max_age = {
+                dim: self.search_service.SEARCH_CACHE_TTLS.get(dim, self.search_service.DEFAULT_SEARCH_CACHE_TTL)
+                for dim in self.search_service.INTEL_DIMENSION_NAMES
+            }
+            fresh = self.db.get_fresh_news_intel(code, max_age)
+        except Exception as e:
+            logger.warning(f"[{code}] 读取情报库失败，将全部重新搜索: {e}")
+            return {}
+        
+        return {
+            # 条目全部合并到其他维度的新鲜维度没有记录，以空结果参与复用
+            dim: SearchResponse(
+                query=(rows[0].query or '') if rows else '',
+                results=[
+                    SearchResult(
+                        title=row.title,
+                        snippet=row.snippet or '',
+                        url=row.url if row.url.startswith('http') else '',
+                        source=row.source or '',
+                        published_date=row.published_date.strftime('%Y-%m-%d') if row.published_date else None,
+                    )
+                    for row in rows
+                ],
+                provider=f"{rows[0].provider}(情报库)" if rows else "情报库",
+                success=True,
+            )
+            for dim, rows in fresh.items()
+        }
+    
+    def _analyze_with_news(
+        self,
+        code: str,
+        enhanced_context: Dict[str, Any],
+        search_future: Optional[Future],
+        report_type: ReportType
+    ) -> Tuple[Optional[AnalysisResult], Optional[str]]:
+        """
+        等待情报后调用 AI 分析
+        
+        投机调用模式下，情报在等待时间内未返回则先基于行情数据分析；
+        若分析结束时情报已到达，只将首次结论与情报发给模型做简短修正（不重复发送完整上下文），
+        修正失败时保留首次结果。
+        
+        Returns:
+            Tuple[分析结果, 实际使用的情报内容]
+        """
+        if search_future is None:
+            return self.analyzer.analyze(enhanced_context, report_type=report_type.value), None
+        
+        if not self.config.speculative_llm_enabled:
+            news_context = search_future.result()
+            result = self.analyzer.analyze(
+                enhanced_context,
+                news_context=news_context,
+                report_type=report_type.value
+            )
+            return result, news_context
+        
+        try:
+            news_context = search_future.result(timeout=self.config.speculative_news_wait)
+        except FutureTimeoutError:
+            logger.info(f"[{code}] 情报搜索 {self.config.speculative_news_wait}s 未返回，提前调用 AI 分析")
+        else:
+            result = self.analyzer.analyze(
+                enhanced_context,
+                news_context=news_context,
+                report_type=report_type.value
+            )
+            return result, news_context
+        
+        result = self.analyzer.analyze(enhanced_context, report_type=report_type.value)
+        if not search_future.done():
+            # 情报仍未返回：不再阻塞，搜索任务在后台完成并入库
+            logger.info(f"[{code}] 情报搜索仍未完成，使用无情报的分析结果")
+            return result, None
+        
+        news_context = search_future.result()
+        if not news_context:
+            return result, None
+        
+        if not result or not result.success:
+            return result, None
+        
+        logger.info(f"[{code}] 情报已到达，基于首次结论进行情报修正")
+        refined = self.analyzer.refine_with_news(result, news_context)
+        if refined is not None:
+            return refined, news_context
+        return result, None
+    
     def _enhance_context(
         self,
         context: Dict[str, Any],
@@ -542,24 +861,8 @@ class StockAnalysisPipeline:
                 )
                 
                 # 单股推送模式（#55）：每分析完一只股票立即推送
-                if single_stock_notify and self.notifier.is_available():
-                    try:
-                        # 根据报告类型选择生成方法
-                        if report_type == ReportType.FULL:
-                            # 完整报告：使用决策仪表盘格式
-                            report_content = self.notifier.generate_dashboard_report([result])
-                            logger.info(f"[{code}] 使用完整报告格式")
-                        else:
-                            # 精简报告：使用单股报告格式（默认）
-                            report_content = self.notifier.generate_single_stock_report(result)
-                            logger.info(f"[{code}] 使用精简报告格式")
-                        
-                        if self.notifier.send(report_content):
-                            logger.info(f"[{code}] 单股推送成功")
-                        else:
-                            logger.warning(f"[{code}] 单股推送失败")
-                    except Exception as e:
-                        logger.error(f"[{code}] 单股推送异常: {e}")
+                if single_stock_notify:
+                    self._notify_single_stock(code, result, report_type)
             
             return result
             
@@ -568,6 +871,174 @@ class StockAnalysisPipeline:
             logger.exception(f"[{code}] 处理过程发生未知异常: {e}")
             return None
     
+    def _notify_single_stock(self, code: str, result: AnalysisResult, report_type: ReportType) -> None:
+        """单股推送（#55）：分析完成后立即推送该股报告"""
+        if not self.notifier.is_available():
+            return
+        try:
+            # 根据报告类型选择生成方法
+            if report_type == ReportType.FULL:
+                # 完整报告：使用决策仪表盘格式
+                report_content = self.notifier.generate_dashboard_report([result])
+                logger.info(f"[{code}] 使用完整报告格式")
+            else:
+                # 精简报告：使用单股报告格式（默认）
+                report_content = self.notifier.generate_single_stock_report(result)
+                logger.info(f"[{code}] 使用精简报告格式")
+            
+            if self._notify(report_content):
+                logger.info(f"[{code}] 单股推送成功")
+            else:
+                logger.warning(f"[{code}] 单股推送失败")
+        except Exception as e:
+            logger.error(f"[{code}] 单股推送异常: {e}")
+    
+    def _build_stages(
+        self,
+        skip_analysis: bool,
+        single_stock_notify: bool,
+        report_type: ReportType,
+        analysis_delay: float,
+        search_pool: Optional[ThreadPoolExecutor] = None
+    ) -> List[PipelineStage]:
+        """
+        构建分阶段流水线：数据获取（情报搜索并行）→ AI 分析 → 保存历史 → 单股推送
+        
+        各阶段线程数独立配置：数据获取受数据源反爬限制、AI 分析受 LLM 并发限制，互不占用对方的线程。
+        
+        情报搜索不设单独阶段：数据获取阶段一开始（股票名称已知时）就把搜索提交到 search_pool，
+        与行情/筹码/上下文获取重叠执行，搜索并发由 search_pool 的线程数（受 API 配额限制）控制；
+        AI 分析阶段只等待搜索结果（投机调用模式下超时先行分析）。
+        """
+        def submit_search(task: _StockTask, stock_name: str) -> None:
+            if search_pool is not None and task.search_future is None:
+                task.search_future = search_pool.submit(self._search_intel, task.code, stock_name)
+        
+        def fetch(task: _StockTask) -> Optional[_StockTask]:
+            logger.info(f"========== 开始处理 {task.code} ==========")
+            if not skip_analysis and STOCK_NAME_MAP.get(task.code):
+                submit_search(task, STOCK_NAME_MAP[task.code])
+            success, error = self.fetch_and_save_stock_data(task.code)
+            if not success:
+                logger.warning(f"[{task.code}] 数据获取失败: {error}")
+                # 即使获取失败，也尝试用已有数据分析
+            if skip_analysis:
+                logger.info(f"[{task.code}] 跳过 AI 分析（dry-run 模式）")
+                return None
+            task.enhanced_context, task.realtime_quote, task.chip_data, _ = self._prepare_analysis(
+                task.code, submit_search=False
+            )
+            # 名称未知时等实时行情返回真实名称后再搜索
+            submit_search(task, task.enhanced_context.get('stock_name', ''))
+            return task
+        
+        def analyze(task: _StockTask) -> Optional[_StockTask]:
+            task.result, task.news_context = self._analyze_with_news(
+                task.code, task.enhanced_context, task.search_future, report_type
+            )
+            # Issue #128: 分析间隔，避免 LLM 接口限流
+            if analysis_delay > 0:
+                time.sleep(analysis_delay)
+            if not task.result:
+                return None
+            logger.info(
+                f"[{task.code}] 分析完成: {task.result.operation_advice}, "
+                f"评分 {task.result.sentiment_score}"
+            )
+            return task
+        
+        def persist(task: _StockTask) -> _StockTask:
+            self._save_analysis_history(
+                task.code, task.result, report_type, task.enhanced_context,
+                task.news_context, task.realtime_quote, task.chip_data
+            )
+            return task
+        
+        def notify(task: _StockTask) -> _StockTask:
+            self._notify_single_stock(task.code, task.result, report_type)
+            return task
+        
+        config = self.config
+        stages = [PipelineStage("fetch", fetch, config.stage_fetch_workers or self.max_workers)]
+        if skip_analysis:
+            return stages
+        if search_pool is None:
+            logger.info("搜索服务不可用，跳过情报搜索")
+        stages.append(PipelineStage("llm", analyze, config.stage_llm_workers or self.max_workers))
+        stages.append(PipelineStage("persist", persist, config.stage_persist_workers))
+        if single_stock_notify:
+            stages.append(PipelineStage("notify", notify, config.stage_notify_workers))
+        return stages
+    
+    def _run_staged(
+        self,
+        stock_codes: List[str],
+        skip_analysis: bool,
+        single_stock_notify: bool,
+        report_type: ReportType,
+        analysis_delay: float
+    ) -> Iterator[AnalysisResult]:
+        """分阶段流水线处理，按完成顺序产出分析结果"""
+        search_pool = None
+        if not skip_analysis and self.search_service.is_available:
+            search_pool = ThreadPoolExecutor(
+                max_workers=self.config.stage_search_workers, thread_name_prefix="stage-search"
+            )
+        stages = self._build_stages(skip_analysis, single_stock_notify, report_type, analysis_delay, search_pool)
+        logger.info(
+            "分阶段流水线: " + " → ".join(f"{stage.name}×{stage.workers}" for stage in stages)
+            + f"，阶段队列容量 {self.config.stage_queue_size}"
+        )
+        executor = StagedExecutor(stages, queue_size=self.config.stage_queue_size)
+        try:
+            with closing(executor.run(_StockTask(code) for code in stock_codes)) as tasks:
+                for task in tasks:
+                    if task.result:
+                        yield task.result
+        finally:
+            if search_pool is not None:
+                # 迟到的情报搜索（投机调用模式）在后台完成并入库，不阻塞本次运行结束
+                search_pool.shutdown(wait=False)
+    
+    def _run_per_stock(
+        self,
+        stock_codes: List[str],
+        skip_analysis: bool,
+        single_stock_notify: bool,
+        report_type: ReportType,
+        analysis_delay: float
+    ) -> Iterator[AnalysisResult]:
+        """每只股票一个任务（process_single_stock），按完成顺序产出分析结果"""
+        # 注意：max_workers 设置较低（默认3）以避免触发反爬
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 提交任务
+            future_to_code = {
+                executor.submit(
+                    self.process_single_stock,
+                    code,
+                    skip_analysis=skip_analysis,
+                    single_stock_notify=single_stock_notify,
+                    report_type=report_type  # Issue #119: 传递报告类型
+                ): code
+                for code in stock_codes
+            }
+            
+            # 收集结果
+            for idx, future in enumerate(as_completed(future_to_code)):
+                code = future_to_code[future]
+                try:
+                    result = future.result()
+                    if result:
+                        yield result
+
+                    # Issue #128: 分析间隔 - 在个股分析和大盘分析之间添加延迟
+                    if idx < len(stock_codes) - 1 and analysis_delay > 0:
+                        logger.debug(f"等待 {analysis_delay} 秒后继续下一只股票...")
+                        time.sleep(analysis_delay)
+
+                except Exception as e:
+                    logger.error(f"[{code}] 任务执行失败: {e}")
+    
     def run(
         self, 
         stock_codes: Optional[List[str]] = None,
@@ -579,7 +1050,7 @@ class StockAnalysisPipeline:
         
         流程：
         1. 获取待分析的股票列表
-        2. 使用线程池并发处理
+        2. 并发处理（默认分阶段流水线：数据获取（情报搜索并行）→ AI 分析 → 保存 → 推送）
         3. 收集分析结果
         4. 发送通知
         
@@ -603,6 +1074,10 @@ class StockAnalysisPipeline:
             return []
         
         logger.info(f"===== 开始分析 {len(stock_codes)} 只股票 =====")
+        self.analyzer.reset_prompt_cache_stats()
+        self.analyzer.reset_tier_stats()
+        self.search_service.reset_cache_stats()
+        get_metrics().begin_run()
         logger.info(f"股票列表: {', '.join(stock_codes)}")
         logger.info(f"并发数: {self.max_workers}, 模式: {'仅获取数据' if dry_run else '完整分析'}")
         
@@ -613,6 +1088,12 @@ class StockAnalysisPipeline:
             if prefetch_count > 0:
                 logger.info(f"已启用批量预取架构：一次拉取全市场数据，{len(stock_codes)} 只股票共享缓存")
         
+        # === 按板块合并行业、宏观情报搜索（同板块股票共用一次搜索，后台与数据获取并行）===
+        self._shared_intel = None
+        if (not dry_run and len(stock_codes) >= 2 and self.config.sector_intel_batch_enabled
+                and self.search_service.is_available):
+            self._shared_intel = self._start_sector_intel(stock_codes)
+        
         # 单股推送模式（#55）：从配置读取
         single_stock_notify = getattr(self.config, 'single_stock_notify', False)
         # Issue #119: 从配置读取报告类型
@@ -624,38 +1105,38 @@ class StockAnalysisPipeline:
         if single_stock_notify:
             logger.info(f"已启用单股推送模式：每分析完一只股票立即推送（报告类型: {report_type_str}）")
         
+        # 渐进推送：先发进度看板，每完成一只股票原地更新（单股推送模式下不启用）
+        progress_dashboard = None
+        if (self.config.progressive_notify and send_notification and not dry_run
+                and not single_stock_notify):
+            from src.progressive_notify import ProgressiveDashboard
+            progress_dashboard = ProgressiveDashboard(
+                self.notifier, len(stock_codes),
+                update_interval=self.config.progressive_update_interval
+            )
+            if not progress_dashboard.start():
+                logger.info("渐进推送：没有支持编辑消息的渠道，仅推送完整报告")
+                progress_dashboard = None
+        
         results: List[AnalysisResult] = []
         
-        # 使用线程池并发处理
-        # 注意：max_workers 设置较低（默认3）以避免触发反爬
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交任务
-            future_to_code = {
-                executor.submit(
-                    self.process_single_stock,
-                    code,
-                    skip_analysis=dry_run,
-                    single_stock_notify=single_stock_notify and send_notification,
-                    report_type=report_type  # Issue #119: 传递报告类型
-                ): code
-                for code in stock_codes
-            }
-            
-            # 收集结果
-            for idx, future in enumerate(as_completed(future_to_code)):
-                code = future_to_code[future]
-                try:
-                    result = future.result()
-                    if result:
-                        results.append(result)
-
-                    # Issue #128: 分析间隔 - 在个股分析和大盘分析之间添加延迟
-                    if idx < len(stock_codes) - 1 and analysis_delay > 0:
-                        logger.debug(f"等待 {analysis_delay} 秒后继续下一只股票...")
-                        time.sleep(analysis_delay)
-
-                except Exception as e:
-                    logger.error(f"[{code}] 任务执行失败: {e}")
+        # 并发处理：分阶段流水线（各阶段独立线程数 + 背压），或每只股票一个任务
+        run_stocks = self._run_staged if self.config.staged_pipeline_enabled else self._run_per_stock
+        # closing：中断（Ctrl+C）或收集异常时立即取消尚未处理的股票
+        try:
+            with closing(run_stocks(
+                stock_codes,
+                skip_analysis=dry_run,
+                single_stock_notify=single_stock_notify and send_notification,
+                report_type=report_type,  # Issue #119: 传递报告类型
+                analysis_delay=analysis_delay
+            )) as completed:
+                for result in completed:
+                    results.append(result)
+                    if progress_dashboard:
+                        progress_dashboard.add_result(result)
+        finally:
+            self.close()
         
         # 统计
         elapsed_time = time.time() - start_time
@@ -671,6 +1152,13 @@ class StockAnalysisPipeline:
         
         logger.info("===== 分析完成 =====")
         logger.info(f"成功: {success_count}, 失败: {fail_count}, 耗时: {elapsed_time:.2f} 秒")
+        self._log_prompt_cache_stats()
+        self._log_llm_router_stats()
+        self._log_tier_stats()
+        self._log_search_cache_stats()
+        
+        if progress_dashboard:
+            progress_dashboard.finalize()
         
         # 发送通知（单股推送模式下跳过汇总推送，避免重复）
         if results and send_notification and not dry_run:
@@ -681,8 +1169,68 @@ class StockAnalysisPipeline:
             else:
                 self._send_notifications(results)
         
+        # 发件箱模式：退出前等待已入队消息投递完成（未完成的下次启动继续投递）
+        if self.config.notification_outbox_enabled and send_notification and not dry_run:
+            from src.notification_outbox import get_outbox_dispatcher
+            get_outbox_dispatcher().wait_idle(self.config.notification_deadline)
+        
+        self._log_stage_metrics(len(stock_codes))
         return results
     
+    def _notify(self, content: str, channel_contents: Optional[Dict[NotificationChannel, str]] = None) -> bool:
+        """推送消息：启用发件箱时入队由后台投递，否则各渠道并发直接发送"""
+        if self.config.notification_outbox_enabled:
+            return self.notifier.enqueue(content, channel_contents, scope=self._notify_scope)
+        results = self.notifier.deliver(content, channel_contents=channel_contents)
+        return any(result.success for result in results)
+    
+    def _log_stage_metrics(self, stock_count: int) -> None:
+        """汇总并输出本次运行各阶段耗时（p50/p95/p99），定位慢在数据源、搜索、LLM 还是推送"""
+        if not get_metrics().end_run(stock_count):
+            return
+        logger.info(f"===== 阶段耗时汇总 =====\n{get_metrics().format_run_summary()}")
+    
+    def _log_prompt_cache_stats(self) -> None:
+        """输出本次运行的 Prompt 缓存统计（命中率、节省的预填充 Token）"""
+        stats = self.analyzer.get_prompt_cache_stats()
+        if not stats['calls']:
+            return
+        logger.info(
+            f"[LLM缓存] 调用 {stats['calls']} 次, 命中 {stats['cache_hits']} 次 "
+            f"(命中率 {stats['hit_rate']:.1%}), 输入 {stats['prompt_tokens']} tokens, "
+            f"缓存 {stats['cached_tokens']} tokens (节省预填充 {stats['saved_ratio']:.1%})"
+        )
+    
+    def _log_llm_router_stats(self) -> None:
+        """输出 LLM 路由各端点的调度统计（未启用路由时跳过）"""
+        for endpoint in self.analyzer.get_router_stats():
+            logger.info(
+                f"[LLM路由] {endpoint['name']}: 调用 {endpoint['total_calls']} 次, "
+                f"失败 {endpoint['total_errors']} 次, 平均耗时 {endpoint['avg_latency']:.2f}s"
+            )
+    
+    def _log_tier_stats(self) -> None:
+        """输出分层分析统计（本地初筛升级率、各层平均耗时，未启用时跳过）"""
+        stats = self.analyzer.get_tier_stats()
+        if not stats['local_calls'] and not stats['escalations']:
+            return
+        logger.info(
+            f"[分层分析] 本地初筛 {stats['local_calls']} 次 (平均 {stats['local_avg_latency']:.2f}s), "
+            f"远程 {stats['remote_calls']} 次 (平均 {stats['remote_avg_latency']:.2f}s), "
+            f"升级 {stats['escalations']} 次 (升级率 {stats['escalation_rate']:.0%}), "
+            f"原因: {stats['escalation_reasons']}"
+        )
+    
+    def _log_search_cache_stats(self) -> None:
+        """输出搜索缓存命中统计（未启用缓存或无搜索时跳过）"""
+        stats = self.search_service.get_cache_stats()
+        if not stats or not (stats['hits'] + stats['misses']):
+            return
+        logger.info(
+            f"[搜索缓存] 命中 {stats['hits']} 次, 未命中 {stats['misses']} 次 "
+            f"(命中率 {stats['hit_rate']:.1%})"
+        )
+    
     def _send_notifications(self, results: List[AnalysisResult], skip_push: bool = False) -> None:
         """
         发送分析结果通知
@@ -710,43 +1258,16 @@ class StockAnalysisPipeline:
             # 推送通知
             if self.notifier.is_available():
                 channels = self.notifier.get_available_channels()
-                context_success = self.notifier.send_to_context(report)
 
-                # 企业微信：只发精简版（平台限制）
-                wechat_success = False
+                # 企业微信：只发精简版（平台限制）；其他渠道：发完整报告
+                channel_contents = {}
                 if NotificationChannel.WECHAT in channels:
                     dashboard_content = self.notifier.generate_wechat_dashboard(results)
                     logger.info(f"企业微信仪表盘长度: {len(dashboard_content)} 字符")
                     logger.debug(f"企业微信推送内容:\n{dashboard_content}")
-                    wechat_success = self.notifier.send_to_wechat(dashboard_content)
-
-                # 其他渠道：发完整报告（避免自定义 Webhook 被 wechat 截断逻辑污染）
-                non_wechat_success = False
-                for channel in channels:
-                    if channel == NotificationChannel.WECHAT:
-                        continue
-                    if channel == NotificationChannel.FEISHU:
-                        non_wechat_success = self.notifier.send_to_feishu(report) or non_wechat_success
-                    elif channel == NotificationChannel.TELEGRAM:
-                        non_wechat_success = self.notifier.send_to_telegram(report) or non_wechat_success
-                    elif channel == NotificationChannel.EMAIL:
-                        non_wechat_success = self.notifier.send_to_email(report) or non_wechat_success
-                    elif channel == NotificationChannel.CUSTOM:
-                        non_wechat_success = self.notifier.send_to_custom(report) or non_wechat_success
-                    elif channel == NotificationChannel.PUSHPLUS:
-                        non_wechat_success = self.notifier.send_to_pushplus(report) or non_wechat_success
-                    elif channel == NotificationChannel.SERVERCHAN3:
-                        non_wechat_success = self.notifier.send_to_serverchan3(report) or non_wechat_success
-                    elif channel == NotificationChannel.DISCORD:
-                        non_wechat_success = self.notifier.send_to_discord(report) or non_wechat_success
-                    elif channel == NotificationChannel.PUSHOVER:
-                        non_wechat_success = self.notifier.send_to_pushover(report) or non_wechat_success
-                    elif channel == NotificationChannel.ASTRBOT:
-                        non_wechat_success = self.notifier.send_to_astrbot(report) or non_wechat_success
-                    else:
-                        logger.warning(f"未知通知渠道: {channel}")
+                    channel_contents[NotificationChannel.WECHAT] = dashboard_content
 
-                success = wechat_success or non_wechat_success or context_success
+                success = self._notify(report, channel_contents)
                 if success:
                     logger.info("决策仪表盘推送成功")
                 else:
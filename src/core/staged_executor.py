@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 分阶段流水线执行器
+===================================
+
+职责：
+1. 将单股处理拆分为若干阶段（数据获取 → 情报搜索 → LLM 分析 → 保存 → 推送），
+   每个阶段独立的工作线程数，按各自瓶颈调优（数据源防封禁、搜索配额、LLM 并发）
+2. 阶段之间使用有界队列衔接：下游积压时上游阻塞等待（背压），
+   避免数据源阶段远远跑在 LLM 前面，堆积大量待分析数据
+3. 结果按完成顺序逐个产出，供调用方收集、更新进度看板
+
+同一阶段的工作线程共享一个先进先出队列，任一空闲线程都会取走下一项，
+不会出现某个线程手里排着任务、其他线程空闲的情况。
+
+调用方提前结束迭代（Ctrl+C、消费循环异常）时取消剩余项：不再投入新项，
+各阶段丢弃尚未处理的项，并按阶段顺序依次停止工作线程。
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+from src.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# 阶段之间队列的默认容量（每个阶段最多积压的待处理项）
+DEFAULT_QUEUE_SIZE = 4
+
+# 阶段排队耗时的指标名前缀（queue.<阶段>），用于判断各阶段线程数是否需要调整
+STAGE_QUEUE_PREFIX = "queue"
+
+# 阻塞放入队列时检查取消标记的间隔（秒）
+_PUT_POLL_INTERVAL = 0.1
+
+_STOP = object()
+
+
+class PipelineStage:
+    """
+    流水线阶段
+
+    Args:
+        name: 阶段名称（用于日志、线程名和指标）
+        handler: 处理函数，接收上一阶段产出的项，返回交给下一阶段的项；
+                 返回 None 表示该项到此结束（不再进入后续阶段）
+        workers: 该阶段的工作线程数
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Any], workers: int = 1):
+        self.name = name
+        self.handler = handler
+        self.workers = max(int(workers), 1)
+
+
+class StagedExecutor:
+    """
+    分阶段流水线执行器
+
+    Example:
+        executor = StagedExecutor([
+            PipelineStage("fetch", fetch, workers=3),
+            PipelineStage("llm", analyze, workers=2),
+        ])
+        for result in executor.run(codes):
+            ...
+
+    处理函数抛出的异常会被记录，该项视为结束；其他项不受影响。
+    """
+
+    def __init__(self, stages: Sequence[PipelineStage], queue_size: int = DEFAULT_QUEUE_SIZE):
+        if not stages:
+            raise ValueError("至少需要一个阶段")
+        self._stages = list(stages)
+        self._queue_size = max(int(queue_size), 1)
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        处理全部输入项，按完成顺序产出最后一个阶段的结果
+
+        被中途丢弃（处理函数返回 None 或异常）的项不会产出。
+        """
+        items = list(items)
+        if not items:
+            return
+
+        queues: List[queue.Queue] = [queue.Queue(maxsize=self._queue_size) for _ in self._stages]
+        # 最后一个阶段的产出不设上限：调用方逐个消费，不应反压到流水线
+        outputs: queue.Queue = queue.Queue()
+        cancel = threading.Event()
+        stage_threads: List[List[threading.Thread]] = []
+
+        for index, stage in enumerate(self._stages):
+            downstream = queues[index + 1] if index + 1 < len(queues) else None
+            threads = []
+            for worker_index in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[index], downstream, outputs, cancel),
+                    name=f"stage-{stage.name}-{worker_index}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+            stage_threads.append(threads)
+
+        feeder = threading.Thread(
+            target=self._feed, args=(items, queues[0], cancel), name="stage-feeder", daemon=True
+        )
+        feeder.start()
+
+        completed = False
+        try:
+            # 每个输入项最终恰好对应一次产出：结果或丢弃标记
+            for _ in range(len(items)):
+                finished, value = outputs.get()
+                if finished:
+                    yield value
+            completed = True
+        finally:
+            if not completed:
+                cancel.set()
+                logger.warning("分阶段流水线提前结束，取消尚未处理的股票")
+            feeder.join()
+            # 按阶段顺序停止：上一阶段全部线程退出后再停止下一阶段，
+            # 保证不会有项在下游线程退出后才进入下游队列
+            for index, threads in enumerate(stage_threads):
+                for _ in threads:
+                    queues[index].put(_STOP)
+                for thread in threads:
+                    thread.join()
+
+    @staticmethod
+    def _put(target: queue.Queue, entry: Any, cancel: threading.Event) -> bool:
+        """阻塞放入队列（背压），取消时放弃并返回 False"""
+        while not cancel.is_set():
+            try:
+                target.put(entry, timeout=_PUT_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @classmethod
+    def _feed(cls, items: List[Any], first: queue.Queue, cancel: threading.Event) -> None:
+        for item in items:
+            # 第一个阶段队列已满时阻塞，输入按处理能力逐步进入流水线
+            if not cls._put(first, (item, time.perf_counter()), cancel):
+                return
+
+    def _work(
+        self,
+        stage: PipelineStage,
+        inbox: queue.Queue,
+        downstream: Optional[queue.Queue],
+        outputs: queue.Queue,
+        cancel: threading.Event,
+    ) -> None:
+        metrics = get_metrics()
+        while True:
+            entry = inbox.get()
+            if entry is _STOP:
+                return
+            if cancel.is_set():
+                continue
+            item, enqueued_at = entry
+            metrics.record(f"{STAGE_QUEUE_PREFIX}.{stage.name}", time.perf_counter() - enqueued_at, code=str(item))
+
+            try:
+                result = stage.handler(item)
+            except Exception as e:
+                logger.exception(f"[{item}] 阶段 {stage.name} 处理异常: {e}")
+                result = None
+
+            if result is None:
+                outputs.put((False, None))
+            elif downstream is None:
+                outputs.put((True, result))
+            else:
+                # 下游队列已满时阻塞（背压）：本阶段线程暂停取新任务，直到下游腾出空间
+                self._put(downstream, (result, time.perf_counter()), cancel)
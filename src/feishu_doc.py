@@ -2,13 +2,24 @@
 # -*- coding: utf-8 -*-
 import logging
 import json
+import time
+import uuid
 import lark_oapi as lark
 from lark_oapi.api.docx.v1 import *
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import quote
 from src.config import get_config
+from src.markdown_render import MarkdownBlock, parse_inline, parse_markdown
 
 logger = logging.getLogger(__name__)
 
+# 飞书文档 API 限制：单次最多创建 50 个子块；同一文档的编辑请求约 3 次/秒
+MAX_BLOCKS_PER_REQUEST = 50
+DOC_REQUESTS_PER_SECOND = 3
+MAX_BATCH_ATTEMPTS = 4          # 单批最多尝试次数（首次 + 重试）
+RETRY_BASE_DELAY = 1.0          # 重试等待（秒），之后每次翻倍
+RATE_LIMIT_CODE = 99991400      # 飞书接口频率超限错误码（等待加倍）
+
 
 class FeishuDocManager:
     """飞书云文档管理器 (基于官方 SDK lark-oapi)"""
@@ -67,29 +78,10 @@ class FeishuDocManager:
             # 将 Markdown 转换为 SDK 需要的 Block 对象列表
             blocks = self._markdown_to_sdk_blocks(content_md)
 
-            # 飞书 API 限制每次写入 Block 数量（建议 50 个左右），分批写入
-            batch_size = 50
-            doc_block_id = doc_id  # 文档本身也是一个 block
-
-            for i in range(0, len(blocks), batch_size):
-                batch_blocks = blocks[i:i + batch_size]
-
-                # 构造批量添加块的请求
-                batch_add_request = CreateDocumentBlockChildrenRequest.builder() \
-                    .document_id(doc_id) \
-                    .block_id(doc_block_id) \
-                    .request_body(CreateDocumentBlockChildrenRequestBody.builder()
-                                  .children(batch_blocks)  # SDK 需要 Block 对象列表
-                                  .index(-1)  # 追加到末尾
-                                  .build()) \
-                    .build()
-
-                write_resp = self.client.docx.v1.document_block_children.create(batch_add_request)
-
-                if not write_resp.success():
-                    logger.error(f"写入文档内容失败(批次{i}): {write_resp.code} - {write_resp.msg}")
-
-            logger.info(f"文档内容写入完成")
+            # 分批写入（失败批次单独重试，统计写入吞吐）
+            stats = self._upload_blocks(doc_id, blocks)
+            if stats['failed_batches']:
+                logger.error(f"飞书文档有 {stats['failed_batches']} 批内容写入失败，文档内容不完整: {doc_url}")
             return doc_url
 
         except Exception as e:
@@ -98,68 +90,181 @@ class FeishuDocManager:
             logger.error(traceback.format_exc())
             return None
 
+    def _upload_blocks(self, doc_id: str, blocks: List[Block]) -> Dict[str, Any]:
+        """
+        按顺序分批写入文档块
+
+        同一父块下的插入必须串行才能保证顺序，因此按飞书的单文档频率限制匀速发送；
+        失败的批次单独重试（复用 client_token，请求超时但实际已写入时服务端会去重，不会重复插入），
+        不影响已写入的批次。只有网络异常、频率超限和服务端 5xx 错误会重试，
+        参数错误（如非法块）重试也不会成功，直接记为失败批次。
+
+        Returns:
+            写入统计（块数、批数、重试次数、失败批数、耗时、吞吐）
+        """
+        batches = [blocks[i:i + MAX_BLOCKS_PER_REQUEST] for i in range(0, len(blocks), MAX_BLOCKS_PER_REQUEST)]
+        interval = 1.0 / DOC_REQUESTS_PER_SECOND
+        started = time.monotonic()
+        next_request_at = started
+        retries = 0
+        failed_batches = 0
+
+        for number, batch in enumerate(batches, 1):
+            client_token = str(uuid.uuid4())
+            for attempt in range(1, MAX_BATCH_ATTEMPTS + 1):
+                wait = next_request_at - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                next_request_at = time.monotonic() + interval
+
+                code, status, error = self._write_batch(doc_id, batch, client_token)
+                if error is None:
+                    break
+                retryable = code is None or code == RATE_LIMIT_CODE or (status or 0) >= 500
+                if not retryable or attempt == MAX_BATCH_ATTEMPTS:
+                    failed_batches += 1
+                    logger.error(f"写入文档内容失败(批次 {number}/{len(batches)}，已尝试 {attempt} 次): {error}")
+                    break
+
+                retries += 1
+                delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                if code == RATE_LIMIT_CODE:
+                    delay *= 2
+                logger.warning(f"写入文档内容失败(批次 {number}/{len(batches)})，{delay:.0f}s 后重试: {error}")
+                next_request_at = max(next_request_at, time.monotonic() + delay)
+
+        elapsed = time.monotonic() - started
+        stats = {
+            'blocks': len(blocks),
+            'batches': len(batches),
+            'retries': retries,
+            'failed_batches': failed_batches,
+            'elapsed': round(elapsed, 2),
+            'blocks_per_second': round(len(blocks) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        logger.info(
+            f"文档内容写入完成: {stats['blocks']} 个块 / {stats['batches']} 批，"
+            f"重试 {retries} 次，失败 {failed_batches} 批，耗时 {elapsed:.1f}s"
+            f"（{stats['blocks_per_second']} 块/秒）"
+        )
+        return stats
+
+    def _write_batch(
+        self, doc_id: str, batch: List[Block], client_token: str
+    ) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+        """
+        追加一批子块到文档末尾
+
+        Returns:
+            (错误码, HTTP 状态码, 错误信息)，成功时均为 None；网络异常时错误码与状态码为 None
+        """
+        # 构造批量添加块的请求（文档本身也是一个 block）
+        batch_add_request = CreateDocumentBlockChildrenRequest.builder() \
+            .document_id(doc_id) \
+            .block_id(doc_id) \
+            .client_token(client_token) \
+            .request_body(CreateDocumentBlockChildrenRequestBody.builder()
+                          .children(batch)  # SDK 需要 Block 对象列表
+                          .index(-1)  # 追加到末尾
+                          .build()) \
+            .build()
+
+        try:
+            write_resp = self.client.docx.v1.document_block_children.create(batch_add_request)
+        except Exception as e:
+            return None, None, str(e)
+
+        if not write_resp.success():
+            status = getattr(write_resp.raw, 'status_code', None)
+            return write_resp.code, status, f"{write_resp.code} - {write_resp.msg}"
+        return None, None, None
+
     def _markdown_to_sdk_blocks(self, md_text: str) -> List[Block]:
         """
-        将简单的 Markdown 转换为飞书 SDK 的 Block 对象
+        将 Markdown 转换为飞书 SDK 的 Block 对象
+
+        基于共享的 Markdown 语法树（与邮件 HTML、Telegram 等渠道共用同一次解析），
+        加粗、斜体、行内代码、链接转换为文本样式，列表转换为飞书列表块
         """
+        return self._blocks_from_tree(parse_markdown(md_text).blocks)
+
+    def _blocks_from_tree(self, tree: Tuple[MarkdownBlock, ...]) -> List[Block]:
+        """将语法树节点转换为飞书 SDK Block 列表"""
         blocks = []
-        lines = md_text.split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # 默认普通文本 (Text = 2)
-            block_type = 2
-            text_content = line
-
-            # 识别标题
-            if line.startswith('# '):
-                block_type = 3  # H1
-                text_content = line[2:]
-            elif line.startswith('## '):
-                block_type = 4  # H2
-                text_content = line[3:]
-            elif line.startswith('### '):
-                block_type = 5  # H3
-                text_content = line[4:]
-            elif line.startswith('---'):
-                # 分割线
+        for node in tree:
+            if node.kind == 'heading':
+                # 标题 block_type: H1 = 3 ... H6 = 8
+                blocks.append(self._text_block(2 + node.level, f"heading{node.level}", node.lines[0]))
+            elif node.kind == 'paragraph':
+                blocks.extend(self._text_block(2, "text", line.strip()) for line in node.lines)
+            elif node.kind == 'quote':
+                blocks.extend(self._blocks_from_tree(node.children))
+            elif node.kind == 'list':
+                for item in node.items:
+                    # 有序列表 Ordered = 13，无序列表 Bullet = 12
+                    block_type, attr = (13, "ordered") if item.ordered else (12, "bullet")
+                    blocks.append(self._text_block(block_type, attr, " ".join(item.lines)))
+            elif node.kind == 'table':
+                # 表格块需要单独创建单元格，这里按行写入文本
+                blocks.extend(self._text_block(2, "text", " | ".join(row)) for row in node.rows)
+            elif node.kind == 'code':
+                blocks.extend(
+                    self._text_block(2, "text", line, styled=False)
+                    for line in node.lines if line.strip()
+                )
+            elif node.kind == 'divider':
+                # 分割线 Divider = 22
                 blocks.append(Block.builder()
                               .block_type(22)
                               .divider(Divider.builder().build())
                               .build())
-                continue
-
-            # 构造 Text 类型的 Block
-            # SDK 的结构嵌套比较深: Block -> Text -> elements -> TextElement -> TextRun -> content
-            text_run = TextRun.builder() \
-                .content(text_content) \
-                .text_element_style(TextElementStyle.builder().build()) \
-                .build()
-
-            text_element = TextElement.builder() \
-                .text_run(text_run) \
-                .build()
+        return blocks
 
-            text_obj = Text.builder() \
-                .elements([text_element]) \
-                .style(TextStyle.builder().build()) \
-                .build()
+    def _text_block(self, block_type: int, attr: str, content: str, styled: bool = True) -> Block:
+        """
+        构造文本类 Block（普通文本、标题、列表项）
 
-            # 根据 block_type 放入正确的属性容器
-            block_builder = Block.builder().block_type(block_type)
+        SDK 的结构嵌套比较深: Block -> Text -> elements -> TextElement -> TextRun -> content
+        """
+        tokens = parse_inline(content) if styled else (('text', content),)
+        text_obj = Text.builder() \
+            .elements(self._text_elements(tokens, {}) or [self._text_element('', {})]) \
+            .style(TextStyle.builder().build()) \
+            .build()
 
-            if block_type == 2:
-                block_builder.text(text_obj)
-            elif block_type == 3:
-                block_builder.heading1(text_obj)
-            elif block_type == 4:
-                block_builder.heading2(text_obj)
-            elif block_type == 5:
-                block_builder.heading3(text_obj)
+        # 根据 block_type 放入正确的属性容器（text / heading1 / bullet 等）
+        block_builder = Block.builder().block_type(block_type)
+        getattr(block_builder, attr)(text_obj)
+        return block_builder.build()
 
-            blocks.append(block_builder.build())
+    def _text_elements(self, tokens, style: Dict[str, Any]) -> List[TextElement]:
+        """将行内语法节点转换为带样式的 TextElement 列表"""
+        elements = []
+        for token in tokens:
+            kind = token[0]
+            if kind == 'text':
+                elements.append(self._text_element(token[1], style))
+            elif kind == 'code':
+                elements.append(self._text_element(token[1], {**style, 'inline_code': True}))
+            elif kind == 'bold':
+                elements.extend(self._text_elements(token[1], {**style, 'bold': True}))
+            elif kind == 'italic':
+                elements.extend(self._text_elements(token[1], {**style, 'italic': True}))
+            else:
+                # 飞书要求链接地址 URL 编码
+                link = Link.builder().url(quote(token[2], safe='')).build()
+                elements.extend(self._text_elements(token[1], {**style, 'link': link}))
+        return elements
 
-        return blocks
\ No newline at end of file
+    @staticmethod
+    def _text_element(content: str, style: Dict[str, Any]) -> TextElement:
+        style_builder = TextElementStyle.builder()
+        for name, value in style.items():
+            getattr(style_builder, name)(value)
+        text_run = TextRun.builder() \
+            .content(content) \
+            .text_element_style(style_builder.build()) \
+            .build()
+        return TextElement.builder() \
+            .text_run(text_run) \
+            .build()
@@ -9,6 +9,9 @@
 
 import re
 import time
+from bisect import bisect_right
+from itertools import accumulate
+from operator import add
 from typing import List, Callable
 
 
@@ -107,66 +110,169 @@ def format_feishu_markdown(content: str) -> str:
     return "\n".join(lines).strip()
 
 
-def _chunk_by_lines(content: str, max_bytes: int, send_func: Callable[[str], bool]) -> bool:
+# 分段断点优先级（数值越小越优先在此处断开）
+_BREAK_DIVIDER = 0       # 分隔线（---，股票之间），断开后丢弃分隔线本身
+_BREAK_HEADING = 1       # 一/二级标题
+_BREAK_SUBHEADING = 2    # 三级及以下标题
+_BREAK_BOLD_TITLE = 3    # 加粗标题行（AI 未输出标准标题、或飞书格式转换后的标题）
+_BREAK_PARAGRAPH = 4     # 空行（段落之间）
+_BREAK_LINE = 5          # 普通行之间
+_BREAK_INSIDE_BLOCK = 6  # 表格行之间 / 代码块内部，尽量不断开
+_BREAK_INSIDE_LINE = 7   # 超长行内部（硬切）
+_BREAK_LEVELS = 8
+
+_DIVIDER_CHARS = ('-', '*', '_', '─')
+_HEADING_RE = re.compile(r'(#{1,6})\s')
+
+
+def _line_break_priorities(lines: List[str]) -> List[int]:
+    """计算每一行之前断开的优先级（单次遍历）"""
+    priorities = []
+    in_fence = False
+    prev_is_table = False
+    for line in lines:
+        stripped = line.strip()
+        first = stripped[:1]
+        if in_fence:
+            priority = _BREAK_INSIDE_BLOCK
+            in_fence = not stripped.startswith('```')
+        elif not first:
+            priority = _BREAK_PARAGRAPH
+        elif first in _DIVIDER_CHARS and len(stripped) >= 3 and not stripped.strip(first):
+            priority = _BREAK_DIVIDER
+        elif first == '#':
+            match = _HEADING_RE.match(stripped)
+            if match is None:
+                priority = _BREAK_LINE
+            else:
+                priority = _BREAK_HEADING if len(match.group(1)) <= 2 else _BREAK_SUBHEADING
+        elif first == '*' and stripped.startswith('**'):
+            priority = _BREAK_BOLD_TITLE
+        elif first == '|' and prev_is_table:
+            priority = _BREAK_INSIDE_BLOCK
+        else:
+            priority = _BREAK_LINE
+            in_fence = stripped.startswith('```')
+        prev_is_table = first == '|'
+        priorities.append(priority)
+    return priorities
+
+
+def _split_long_line(line: str, max_size: int, count_bytes: bool) -> List[str]:
+    """单行超出限制时按长度硬切（按字节切分时不会切断多字节字符）"""
+    if not count_bytes:
+        return [line[i:i + max_size] for i in range(0, len(line), max_size)]
+
+    encoded = line.encode('utf-8')
+    pieces = []
+    pos = 0
+    while pos < len(encoded):
+        stop = min(pos + max_size, len(encoded))
+        # 回退到 UTF-8 字符边界（续字节形如 10xxxxxx）
+        while stop < len(encoded) and (encoded[stop] & 0xC0) == 0x80:
+            stop -= 1
+        pieces.append(encoded[pos:stop].decode('utf-8'))
+        pos = stop
+    return pieces
+
+
+def split_markdown_chunks(content: str, max_size: int, count_bytes: bool = True) -> List[str]:
     """
-    强制按行分割发送（无法智能分割时的 fallback）
-    
+    将长 Markdown 按结构切分为不超过 max_size 的多段（各推送渠道共用）
+
+    每行的长度只计算一次并累加为前缀偏移，每段的结束位置和断点都用二分查找确定，
+    整体为一次线性预处理。断点按优先级选择：分隔线 > 标题 > 加粗标题 > 空行 > 普通行，
+    表格和代码块内部尽量不断开；每段在预算内取优先级最高、位置最靠后的断点
+    （等价于按股票分块贪心打包）。单个分块超长时自动降级到更细的断点，
+    单行超长时按长度硬切，不会丢弃内容。
+
     Args:
-        content: 完整消息内容
-        max_bytes: 单条消息最大字节数
-        send_func: 发送单条消息的函数
-        
+        content: 完整 Markdown 内容
+        max_size: 单段最大长度（不含分页标记，调用方需自行预留）
+        count_bytes: True 按 UTF-8 字节计（企业微信、飞书、钉钉），False 按字符计（Telegram、Discord）
+
     Returns:
-        是否全部发送成功
+        分段后的内容列表（段首尾的空行和分隔线已去除）
     """
-    chunks = []
-    current_chunk = ""
-    
-    # 按行分割，确保不会在多字节字符中间截断
+    max_size = max(max_size, 4)  # 至少容纳一个 UTF-8 字符
     lines = content.split('\n')
-    
-    for line in lines:
-        test_chunk = current_chunk + ('\n' if current_chunk else '') + line
-        if len(test_chunk.encode('utf-8')) > max_bytes - 100:  # 预留空间给分页标记
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = line
-        else:
-            current_chunk = test_chunk
-    
-    if current_chunk:
-        chunks.append(current_chunk)
-    
-    total_chunks = len(chunks)
-    success_count = 0
-    
-    for i, chunk in enumerate(chunks):
-        # 添加分页标记
-        page_marker = f"\n\n📄 ({i+1}/{total_chunks})" if total_chunks > 1 else ""
-        
-        try:
-            if send_func(chunk + page_marker):
-                success_count += 1
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"飞书第 {i+1}/{total_chunks} 批发送异常: {e}")
-        
-        # 批次间隔，避免触发频率限制
-        if i < total_chunks - 1:
-            time.sleep(1)
-    
-    return success_count == total_chunks
+    priorities = _line_break_priorities(lines)
+    if count_bytes:
+        sizes = list(map(len, map(str.encode, lines)))
+    else:
+        sizes = list(map(len, lines))
+    joins = [1] * len(lines)
+    joins[0] = 0
+
+    if max(sizes) > max_size:
+        # 拆出超长行：后续片段与前一片段之间没有换行符，片段间为最低优先级断点
+        split_lines: List[str] = []
+        split_priorities: List[int] = []
+        split_sizes: List[int] = []
+        split_joins: List[int] = []
+        for line, priority, size, join in zip(lines, priorities, sizes, joins):
+            if size <= max_size:
+                split_lines.append(line)
+                split_priorities.append(priority)
+                split_sizes.append(size)
+                split_joins.append(join)
+                continue
+            for index, piece in enumerate(_split_long_line(line, max_size, count_bytes)):
+                split_lines.append(piece)
+                split_priorities.append(priority if index == 0 else _BREAK_INSIDE_LINE)
+                split_sizes.append(len(piece.encode('utf-8')) if count_bytes else len(piece))
+                split_joins.append(join if index == 0 else 0)
+        lines, priorities, sizes, joins = split_lines, split_priorities, split_sizes, split_joins
+
+    # 片段起点的字符偏移与计量偏移（均包含与前一片段之间的换行符），只计算一次
+    total = len(lines)
+    char_pos = [0]
+    char_pos.extend(accumulate(map(add, joins, map(len, lines))))
+    size_pos = [0]
+    size_pos.extend(accumulate(map(add, joins, sizes)))
+
+    # 各优先级的断点位置（在该片段之前断开），升序
+    break_positions: List[List[int]] = [[] for _ in range(_BREAK_LEVELS)]
+    for index, priority in enumerate(priorities):
+        break_positions[priority].append(index)
+
+    chunks: List[str] = []
+    start = 0
+    while start < total:
+        # 段首跳过空行和分隔线
+        while start < total and (priorities[start] == _BREAK_DIVIDER or not lines[start].strip()):
+            start += 1
+        if start >= total:
+            break
+
+        # lines[start:end] 为预算内能容纳的最长区间（首片段不计前导换行）
+        budget_pos = size_pos[start] + joins[start] + max_size
+        end = bisect_right(size_pos, budget_pos, start + 1) - 1
+        if end >= total:
+            chunk = content[char_pos[start] + joins[start]:].rstrip()
+            if chunk:
+                chunks.append(chunk)
+            break
+
+        # 区间内优先级最高、位置最靠后的断点（end 处必然可断，一定能找到）
+        for positions in break_positions:
+            k = bisect_right(positions, end) - 1
+            if k >= 0 and positions[k] > start:
+                cut = positions[k]
+                break
+        chunk = content[char_pos[start] + joins[start]:char_pos[cut]].rstrip()
+        if chunk:
+            chunks.append(chunk)
+        start = cut
+
+    return chunks
 
 
 def chunk_feishu_content(content: str, max_bytes: int, send_func: Callable[[str], bool]) -> bool:
     """
     将超长内容分段发送到飞书
     
-    智能分割策略：
-    1. 优先按 "---" 分隔（股票之间的分隔线）
-    2. 其次按 "### " 标题分割（每只股票的标题）
-    3. 最后按行强制分割
+    分段规则见 split_markdown_chunks（分隔线 > 标题 > 段落 > 行，超长行硬切）
     
     Args:
         content: 完整消息内容
@@ -176,73 +282,8 @@ def chunk_feishu_content(content: str, max_bytes: int, send_func: Callable[[str]
     Returns:
         是否全部发送成功
     """
-    def get_bytes(s: str) -> int:
-        """获取字符串的 UTF-8 字节数"""
-        return len(s.encode('utf-8'))
-    
-    def _truncate_to_bytes(text: str, max_bytes: int) -> str:
-        """按字节截断文本，确保不会在多字节字符中间截断"""
-        encoded = text.encode('utf-8')
-        if len(encoded) <= max_bytes:
-            return text
-        
-        # 从最大字节数开始向前查找，找到完整的 UTF-8 字符边界
-        truncated = encoded[:max_bytes]
-        while truncated and (truncated[-1] & 0xC0) == 0x80:
-            truncated = truncated[:-1]
-        
-        return truncated.decode('utf-8', errors='ignore')
-    
-    # 智能分割：优先按 "---" 分隔（股票之间的分隔线）
-    # 如果没有分隔线，按 "### " 标题分割（每只股票的标题）
-    if "\n---\n" in content:
-        sections = content.split("\n---\n")
-        separator = "\n---\n"
-    elif "\n### " in content:
-        # 按 ### 分割，但保留 ### 前缀
-        parts = content.split("\n### ")
-        sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-        separator = "\n"
-    else:
-        # 无法智能分割，按行强制分割
-        return _chunk_by_lines(content, max_bytes, send_func)
-    
-    chunks = []
-    current_chunk = []
-    current_bytes = 0
-    separator_bytes = get_bytes(separator)
-    
-    for section in sections:
-        section_bytes = get_bytes(section) + separator_bytes
-        
-        # 如果单个 section 就超长，需要强制截断
-        if section_bytes > max_bytes:
-            # 先发送当前积累的内容
-            if current_chunk:
-                chunks.append(separator.join(current_chunk))
-                current_chunk = []
-                current_bytes = 0
-            
-            # 强制截断这个超长 section（按字节截断）
-            truncated = _truncate_to_bytes(section, max_bytes - 200)
-            truncated += "\n\n...(本段内容过长已截断)"
-            chunks.append(truncated)
-            continue
-        
-        # 检查加入后是否超长
-        if current_bytes + section_bytes > max_bytes:
-            # 保存当前块，开始新块
-            if current_chunk:
-                chunks.append(separator.join(current_chunk))
-            current_chunk = [section]
-            current_bytes = section_bytes
-        else:
-            current_chunk.append(section)
-            current_bytes += section_bytes
-    
-    # 添加最后一块
-    if current_chunk:
-        chunks.append(separator.join(current_chunk))
+    # 预留空间给分页标记
+    chunks = split_markdown_chunks(content, max_bytes - 100)
     
     # 分批发送
     total_chunks = len(chunks)
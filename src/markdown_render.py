@@ -0,0 +1,505 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - Markdown 解析与多格式渲染
+===================================
+
+职责：
+1. 将报告 Markdown 单次解析为块级语法树（标题、段落、引用、列表、表格、代码块、分隔线）
+2. 由同一棵语法树生成 HTML（邮件 / AstrBot）、Telegram MarkdownV2、纯文本（Pushover 等），
+   飞书文档的 SDK Block 也由该语法树生成（见 feishu_doc.py）
+3. 按内容哈希缓存解析结果及各格式的渲染结果，同一报告推送到多个渠道时只解析、渲染一次
+
+只覆盖报告与 AI 输出中实际使用的 Markdown 子集，不追求 CommonMark 完整兼容。
+"""
+
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# 最多缓存的文档数（每份报告一条，各渠道共用）
+DEFAULT_MAX_DOCUMENTS = 32
+
+_HEADING_RE = re.compile(r'^ {0,3}(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+_DIVIDER_RE = re.compile(r'^ {0,3}(?:(?:-\s*){3,}|(?:\*\s*){3,}|(?:_\s*){3,})$')
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})\s*([\w+-]*)')
+_LIST_ITEM_RE = re.compile(r'^(\s*)([-*+]|\d{1,9}[.)])\s+(.*)$')
+_TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$')
+_TABLE_CELL_SPLIT_RE = re.compile(r'(?<!\\)\|')
+
+_INLINE_RE = re.compile(
+    r'\\(?P<escaped>[\\`*_{}\[\]()#+\-.!|>~])'
+    r'|(?P<code_fence>`+)(?P<code>.+?)(?P=code_fence)'
+    r'|\*\*\*(?P<bold_italic>[^\s*](?:.*?[^\s*])??)\*\*\*'
+    r'|(?<!\w)___(?P<bold_italic_alt>[^\s_](?:.*?[^\s_])??)___(?!\w)'
+    r'|\*\*(?P<bold>.+?)\*\*'
+    r'|(?<!\w)__(?P<bold_alt>.+?)__(?!\w)'
+    r'|\*(?P<italic>[^\s*](?:.*?[^\s*])??)\*'
+    r'|(?<!\w)_(?P<italic_alt>[^\s_](?:.*?[^\s_])??)_(?!\w)'
+    r'|\[(?P<link_text>[^\]]+)\]\((?P<link_url>[^)\s]+)(?:\s+"[^"]*")?\)'
+)
+
+# Telegram MarkdownV2 需要转义的字符（文本 / 代码 / 链接地址）
+_TELEGRAM_ESCAPE = str.maketrans({char: '\\' + char for char in '_*[]()~`>#+-=|{}.!\\'})
+_TELEGRAM_CODE_ESCAPE = str.maketrans({char: '\\' + char for char in '`\\'})
+_TELEGRAM_URL_ESCAPE = str.maketrans({char: '\\' + char for char in ')\\'})
+
+# 可能开始新块的行首字符（其余行直接归入段落，免去逐个正则匹配）
+_BLOCK_START_CHARS = frozenset('#-*_+`~>|0123456789')
+
+_PLAIN_DIVIDER = '────────'
+
+
+class ListItem(NamedTuple):
+    """列表项：缩进、标记（- / 1. 等）、内容行（首行及续行）"""
+    indent: int
+    marker: str
+    lines: Tuple[str, ...]
+
+    @property
+    def ordered(self) -> bool:
+        return self.marker[0].isdigit()
+
+
+class MarkdownBlock(NamedTuple):
+    """
+    块级语法节点
+
+    kind 取值：heading / paragraph / quote / list / table / code / divider / blank
+    """
+    kind: str
+    level: int = 0                                  # 标题级别；blank 为连续空行数
+    lines: Tuple[str, ...] = ()                     # 标题文本、段落行、代码行
+    items: Tuple[ListItem, ...] = ()                # 列表项
+    rows: Tuple[Tuple[str, ...], ...] = ()          # 表格行（首行为表头）
+    aligns: Tuple[Optional[str], ...] = ()          # 表格列对齐
+    children: Tuple['MarkdownBlock', ...] = ()      # 引用块内的子块
+    info: str = ''                                  # 代码块语言
+
+
+# ========== 块级解析 ==========
+
+def _is_table_start(lines: List[str], index: int) -> bool:
+    return (
+        index + 1 < len(lines)
+        and '|' in lines[index]
+        and '|' in lines[index + 1]
+        and _TABLE_SEPARATOR_RE.match(lines[index + 1]) is not None
+    )
+
+
+def _split_table_row(line: str) -> Tuple[str, ...]:
+    row = line.strip()
+    if row.startswith('|'):
+        row = row[1:]
+    if row.endswith('|') and not row.endswith('\\|'):
+        row = row[:-1]
+    return tuple(cell.strip() for cell in _TABLE_CELL_SPLIT_RE.split(row))
+
+
+def _table_aligns(separator: str) -> Tuple[Optional[str], ...]:
+    aligns = []
+    for cell in _split_table_row(separator):
+        left, right = cell.startswith(':'), cell.endswith(':')
+        if left and right:
+            aligns.append('center')
+        elif right:
+            aligns.append('right')
+        elif left:
+            aligns.append('left')
+        else:
+            aligns.append(None)
+    return tuple(aligns)
+
+
+def _starts_block(lines: List[str], index: int) -> bool:
+    """该行是否开始一个新块（段落在此结束，列表允许紧贴段落）"""
+    line = lines[index]
+    if line.lstrip()[:1] not in _BLOCK_START_CHARS and '|' not in line:
+        return False
+    return bool(
+        _HEADING_RE.match(line)
+        or _DIVIDER_RE.match(line)
+        or _FENCE_RE.match(line)
+        or line.lstrip().startswith('>')
+        or _LIST_ITEM_RE.match(line)
+        or _is_table_start(lines, index)
+    )
+
+
+def _parse_blocks(lines: List[str]) -> List[MarkdownBlock]:
+    """单次遍历将行序列解析为块"""
+    blocks: List[MarkdownBlock] = []
+    index = 0
+    total = len(lines)
+    while index < total:
+        line = lines[index]
+        stripped = line.strip()
+
+        if not stripped:
+            start = index
+            while index < total and not lines[index].strip():
+                index += 1
+            blocks.append(MarkdownBlock('blank', level=index - start))
+            continue
+
+        if not _starts_block(lines, index):
+            paragraph = [line]
+            index += 1
+            while index < total and lines[index].strip() and not _starts_block(lines, index):
+                paragraph.append(lines[index])
+                index += 1
+            blocks.append(MarkdownBlock('paragraph', lines=tuple(paragraph)))
+            continue
+
+        fence = _FENCE_RE.match(line)
+        if fence:
+            marker = fence.group(1)
+            body = []
+            index += 1
+            while index < total and not lines[index].strip().startswith(marker):
+                body.append(lines[index])
+                index += 1
+            index += 1  # 跳过结束围栏（未闭合时到文末）
+            blocks.append(MarkdownBlock('code', lines=tuple(body), info=fence.group(2)))
+            continue
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            blocks.append(MarkdownBlock('heading', level=len(heading.group(1)), lines=(heading.group(2),)))
+            index += 1
+            continue
+
+        if _DIVIDER_RE.match(line):
+            blocks.append(MarkdownBlock('divider'))
+            index += 1
+            continue
+
+        if stripped.startswith('>'):
+            inner = []
+            while index < total and lines[index].lstrip().startswith('>'):
+                content = lines[index].lstrip()[1:]
+                inner.append(content[1:] if content.startswith(' ') else content)
+                index += 1
+            blocks.append(MarkdownBlock('quote', children=tuple(_parse_blocks(inner))))
+            continue
+
+        if _is_table_start(lines, index):
+            rows = [_split_table_row(line)]
+            aligns = _table_aligns(lines[index + 1])
+            index += 2
+            while index < total and '|' in lines[index] and lines[index].strip():
+                rows.append(_split_table_row(lines[index]))
+                index += 1
+            blocks.append(MarkdownBlock('table', rows=tuple(rows), aligns=aligns))
+            continue
+
+        item_match = _LIST_ITEM_RE.match(line)
+        if item_match:
+            items: List[ListItem] = []
+            while index < total:
+                item_match = _LIST_ITEM_RE.match(lines[index])
+                if item_match and not _DIVIDER_RE.match(lines[index]):
+                    items.append(ListItem(len(item_match.group(1)), item_match.group(2), (item_match.group(3),)))
+                elif (lines[index].strip() and lines[index][:1].isspace()
+                      and not _starts_block(lines, index)):
+                    # 缩进续行并入上一项
+                    last = items[-1]
+                    items[-1] = last._replace(lines=last.lines + (lines[index].strip(),))
+                else:
+                    break
+                index += 1
+            blocks.append(MarkdownBlock('list', items=tuple(items)))
+            continue
+
+        paragraph = [line]
+        index += 1
+        while index < total and lines[index].strip() and not _starts_block(lines, index):
+            paragraph.append(lines[index])
+            index += 1
+        blocks.append(MarkdownBlock('paragraph', lines=tuple(paragraph)))
+    return blocks
+
+
+# ========== 行内解析 ==========
+
+# 行内节点：('text', str) / ('code', str) / ('bold', 子节点) / ('italic', 子节点) / ('link', 子节点, url)
+InlineTokens = Tuple[tuple, ...]
+
+
+@lru_cache(maxsize=8192)
+def parse_inline(text: str) -> InlineTokens:
+    """解析行内格式（加粗、斜体、行内代码、链接），同一文本只解析一次"""
+    tokens: List[tuple] = []
+    position = 0
+    for match in _INLINE_RE.finditer(text):
+        if match.start() > position:
+            tokens.append(('text', text[position:match.start()]))
+        position = match.end()
+        group = match.lastgroup
+        if group == 'escaped':
+            tokens.append(('text', match.group('escaped')))
+        elif group == 'code':
+            tokens.append(('code', match.group('code').strip()))
+        elif group in ('bold_italic', 'bold_italic_alt'):
+            # ***x*** 为斜体包裹的加粗（与 markdown2 一致：<em><strong>x</strong></em>）
+            tokens.append(('italic', (('bold', parse_inline(match.group(group))),)))
+        elif group in ('bold', 'bold_alt'):
+            tokens.append(('bold', parse_inline(match.group(group))))
+        elif group in ('italic', 'italic_alt'):
+            tokens.append(('italic', parse_inline(match.group(group))))
+        else:
+            tokens.append(('link', parse_inline(match.group('link_text')), match.group('link_url')))
+    if position < len(text):
+        tokens.append(('text', text[position:]))
+
+    # 合并相邻文本节点
+    merged: List[tuple] = []
+    for token in tokens:
+        if token[0] == 'text' and merged and merged[-1][0] == 'text':
+            merged[-1] = ('text', merged[-1][1] + token[1])
+        else:
+            merged.append(token)
+    return tuple(merged)
+
+
+def _inline_html(tokens: InlineTokens) -> str:
+    parts = []
+    for token in tokens:
+        kind = token[0]
+        if kind == 'text':
+            parts.append(html.escape(token[1], quote=False))
+        elif kind == 'code':
+            parts.append(f"<code>{html.escape(token[1], quote=False)}</code>")
+        elif kind == 'bold':
+            parts.append(f"<strong>{_inline_html(token[1])}</strong>")
+        elif kind == 'italic':
+            parts.append(f"<em>{_inline_html(token[1])}</em>")
+        else:
+            parts.append(f'<a href="{html.escape(token[2])}">{_inline_html(token[1])}</a>')
+    return ''.join(parts)
+
+
+def _inline_plain(tokens: InlineTokens) -> str:
+    parts = []
+    for token in tokens:
+        if token[0] in ('text', 'code'):
+            parts.append(token[1])
+        else:
+            parts.append(_inline_plain(token[1]))
+    return ''.join(parts)
+
+
+def _inline_telegram(tokens: InlineTokens, in_bold: bool = False, in_italic: bool = False) -> str:
+    parts = []
+    for token in tokens:
+        kind = token[0]
+        if kind == 'text':
+            parts.append(token[1].translate(_TELEGRAM_ESCAPE))
+        elif kind == 'code':
+            parts.append('`' + token[1].translate(_TELEGRAM_CODE_ESCAPE) + '`')
+        elif kind == 'bold':
+            inner = _inline_telegram(token[1], True, in_italic)
+            parts.append(inner if in_bold else f"*{inner}*")
+        elif kind == 'italic':
+            inner = _inline_telegram(token[1], in_bold, True)
+            parts.append(inner if in_italic else f"_{inner}_")
+        else:
+            url = token[2].translate(_TELEGRAM_URL_ESCAPE)
+            parts.append(f"[{_inline_telegram(token[1], in_bold, in_italic)}]({url})")
+    return ''.join(parts)
+
+
+# ========== 块级渲染 ==========
+
+def _render_list_html(items: Tuple[ListItem, ...]) -> str:
+    """按缩进渲染嵌套列表"""
+    parts: List[str] = []
+    stack: List[Tuple[int, str]] = []
+    for item in items:
+        tag = 'ol' if item.ordered else 'ul'
+        while len(stack) > 1 and item.indent < stack[-1][0]:
+            parts.append(f"</li>\n</{stack.pop()[1]}>")
+        if not stack:
+            parts.append(f"<{tag}>\n")
+            stack.append((item.indent, tag))
+        elif item.indent > stack[-1][0]:
+            parts.append(f"\n<{tag}>\n")
+            stack.append((item.indent, tag))
+        else:
+            parts.append("</li>\n")
+            if tag != stack[-1][1]:
+                parts.append(f"</{stack[-1][1]}>\n<{tag}>\n")
+                stack[-1] = (stack[-1][0], tag)
+        parts.append("<li>" + "<br />\n".join(_inline_html(parse_inline(line)) for line in item.lines))
+    while stack:
+        parts.append(f"</li>\n</{stack.pop()[1]}>")
+    return ''.join(parts)
+
+
+def _render_table_html(block: MarkdownBlock) -> str:
+    def cell(tag: str, text: str, column: int) -> str:
+        align = block.aligns[column] if column < len(block.aligns) else None
+        style = f' style="text-align:{align};"' if align else ''
+        return f"  <{tag}{style}>{_inline_html(parse_inline(text))}</{tag}>"
+
+    header, *body = block.rows
+    lines = ["<table>", "<thead>", "<tr>"]
+    lines.extend(cell('th', text, column) for column, text in enumerate(header))
+    lines.extend(["</tr>", "</thead>", "<tbody>"])
+    for row in body:
+        lines.append("<tr>")
+        lines.extend(cell('td', text, column) for column, text in enumerate(row))
+        lines.append("</tr>")
+    lines.extend(["</tbody>", "</table>"])
+    return "\n".join(lines)
+
+
+def _render_html(blocks: Tuple[MarkdownBlock, ...]) -> str:
+    parts = []
+    for block in blocks:
+        kind = block.kind
+        if kind == 'heading':
+            parts.append(f"<h{block.level}>{_inline_html(parse_inline(block.lines[0]))}</h{block.level}>")
+        elif kind == 'paragraph':
+            body = "<br />\n".join(_inline_html(parse_inline(line.strip())) for line in block.lines)
+            parts.append(f"<p>{body}</p>")
+        elif kind == 'quote':
+            parts.append(f"<blockquote>\n{_render_html(block.children)}\n</blockquote>")
+        elif kind == 'list':
+            parts.append(_render_list_html(block.items))
+        elif kind == 'table':
+            parts.append(_render_table_html(block))
+        elif kind == 'code':
+            language = f' class="language-{block.info}"' if block.info else ''
+            code = html.escape("\n".join(block.lines), quote=False)
+            parts.append(f"<pre><code{language}>{code}\n</code></pre>")
+        elif kind == 'divider':
+            parts.append("<hr />")
+    return "\n\n".join(parts)
+
+
+def _list_item_prefix(item: ListItem, bullet: str) -> str:
+    return ' ' * item.indent + (bullet if not item.ordered else f"{item.marker} ")
+
+
+def _render_plain_lines(blocks: Tuple[MarkdownBlock, ...]) -> List[str]:
+    lines: List[str] = []
+    for block in blocks:
+        kind = block.kind
+        if kind == 'heading':
+            lines.append(_inline_plain(parse_inline(block.lines[0])))
+        elif kind == 'paragraph':
+            lines.extend(_inline_plain(parse_inline(line)) for line in block.lines)
+        elif kind == 'quote':
+            lines.extend(_render_plain_lines(block.children))
+        elif kind == 'list':
+            for item in block.items:
+                prefix = _list_item_prefix(item, '• ')
+                lines.append(prefix + _inline_plain(parse_inline(item.lines[0])))
+                lines.extend(' ' * len(prefix) + _inline_plain(parse_inline(line)) for line in item.lines[1:])
+        elif kind == 'table':
+            lines.extend(' | '.join(_inline_plain(parse_inline(cell)) for cell in row) for row in block.rows)
+        elif kind == 'code':
+            lines.extend(block.lines)
+        elif kind == 'divider':
+            lines.append(_PLAIN_DIVIDER)
+        else:
+            lines.extend([''] * min(block.level, 2))
+    return lines
+
+
+def _render_telegram_lines(blocks: Tuple[MarkdownBlock, ...]) -> List[str]:
+    lines: List[str] = []
+    for block in blocks:
+        kind = block.kind
+        if kind == 'heading':
+            # Telegram 不支持标题，用加粗代替
+            lines.append(f"*{_inline_telegram(parse_inline(block.lines[0]), in_bold=True)}*")
+        elif kind == 'paragraph':
+            lines.extend(_inline_telegram(parse_inline(line)) for line in block.lines)
+        elif kind == 'quote':
+            lines.extend(f">{line}" for line in _render_telegram_lines(block.children))
+        elif kind == 'list':
+            for item in block.items:
+                prefix = _list_item_prefix(item, '• ').translate(_TELEGRAM_ESCAPE)
+                lines.append(prefix + _inline_telegram(parse_inline(item.lines[0])))
+                lines.extend('  ' + _inline_telegram(parse_inline(line)) for line in item.lines[1:])
+        elif kind == 'table':
+            # Telegram 不支持表格，逐行输出，表头加粗
+            for row_index, row in enumerate(block.rows):
+                row_text = ' \\| '.join(_inline_telegram(parse_inline(cell), in_bold=row_index == 0) for cell in row)
+                lines.append(f"*{row_text}*" if row_index == 0 else row_text)
+        elif kind == 'code':
+            language = block.info
+            code = "\n".join(block.lines).translate(_TELEGRAM_CODE_ESCAPE)
+            lines.append(f"```{language}\n{code}\n```")
+        elif kind == 'divider':
+            lines.append(_PLAIN_DIVIDER)
+        else:
+            lines.extend([''] * min(block.level, 2))
+    return lines
+
+
+class MarkdownDocument:
+    """
+    解析后的 Markdown 文档
+
+    各格式的渲染结果在首次使用时生成并缓存在文档上（文档本身按内容哈希缓存，见 parse_markdown）。
+    """
+
+    def __init__(self, blocks: Tuple[MarkdownBlock, ...]):
+        self.blocks = blocks
+        self._rendered: Dict[str, str] = {}
+
+    def _render(self, name: str, renderer) -> str:
+        rendered = self._rendered.get(name)
+        if rendered is None:
+            rendered = renderer()
+            self._rendered[name] = rendered
+        return rendered
+
+    def to_html(self) -> str:
+        """HTML 片段（不含页面框架与样式）"""
+        return self._render('html', lambda: _render_html(self.blocks))
+
+    def to_telegram(self) -> str:
+        """Telegram MarkdownV2（parse_mode=MarkdownV2）"""
+        return self._render('telegram', lambda: "\n".join(_render_telegram_lines(self.blocks)).strip())
+
+    def to_plain_text(self) -> str:
+        """纯文本（去除格式标记，保留可读性）"""
+        return self._render('plain', lambda: "\n".join(_render_plain_lines(self.blocks)).strip())
+
+
+_documents: 'OrderedDict[str, MarkdownDocument]' = OrderedDict()
+_documents_lock = threading.Lock()
+
+
+def parse_markdown(text: str) -> MarkdownDocument:
+    """
+    解析 Markdown（按内容哈希缓存，同一内容只解析一次）
+
+    Args:
+        text: Markdown 文本
+
+    Returns:
+        解析后的文档，可调用 to_html / to_telegram / to_plain_text 获取各格式
+    """
+    key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+    with _documents_lock:
+        document = _documents.get(key)
+        if document is not None:
+            _documents.move_to_end(key)
+            return document
+
+    document = MarkdownDocument(tuple(_parse_blocks(text.split('\n'))))
+    with _documents_lock:
+        _documents[key] = document
+        while len(_documents) > DEFAULT_MAX_DOCUMENTS:
+            _documents.popitem(last=False)
+    return document
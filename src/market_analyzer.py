@@ -295,12 +295,22 @@ class MarketAnalyzer:
             }
             
             # 根据 analyzer 使用的 API 类型调用
-            if self.analyzer._use_openai:
+            # 复盘输出 Markdown，使用通用系统提示词（不带单股分析的 JSON 决策仪表盘任务说明）
+            system_prompt = self.analyzer.SYSTEM_PROMPT
+            if self.analyzer._router is not None:
+                # 多 Key / 多接口路由模式
+                review = self.analyzer._call_router(prompt, generation_config, system_prompt=system_prompt)
+            elif self.analyzer._use_openai:
                 # 使用 OpenAI 兼容 API
-                review = self.analyzer._call_openai_api(prompt, generation_config)
+                review = self.analyzer._call_openai_api(prompt, generation_config, system_prompt=system_prompt)
             else:
-                # 使用 Gemini API
-                response = self.analyzer._model.generate_content(
+                # 使用 Gemini API（单股分析模型的 system_instruction 为稳定前缀，复盘单独创建模型）
+                import google.generativeai as genai
+                model = genai.GenerativeModel(
+                    model_name=self.analyzer._current_model_name,
+                    system_instruction=system_prompt,
+                )
+                response = model.generate_content(
                     prompt,
                     generation_config=generation_config,
                 )
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 阶段耗时指标
+===================================
+
+职责：
+1. 记录分析流程各阶段的耗时（行情获取、实时行情、筹码、趋势、各维度搜索、LLM 调用、
+   响应解析、数据库写入、推送），带股票代码和数据源/渠道
+2. 每次运行结束后按阶段汇总 p50/p95/p99，输出运行汇总表
+3. 导出 Prometheus 文本格式（Web 服务 /metrics）
+
+进程内单例（见 get_metrics），各模块直接记录，无需逐层传递。
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# 阶段名称（搜索按维度细分为 search.<维度>）
+STAGE_FETCH = "fetch"              # 日线数据获取
+STAGE_REALTIME = "realtime"        # 实时行情
+STAGE_CHIP = "chip"                # 筹码分布
+STAGE_TREND = "trend"              # 趋势分析
+STAGE_SEARCH = "search"            # 情报搜索（按维度）
+STAGE_LLM = "llm"                  # LLM 调用
+STAGE_PARSE = "parse"              # LLM 响应解析
+STAGE_DB_WRITE = "db_write"        # 数据库写入
+STAGE_NOTIFY = "notify"            # 推送（按渠道）
+
+# Prometheus 直方图分桶（秒）
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# 单次运行最多保留的阶段记录数（用于分位数统计）
+MAX_RUN_SPANS = 100000
+
+_METRIC_PREFIX = "stock_analysis"
+
+
+class StageSpan:
+    """一次阶段耗时记录（span 上下文中可补充数据源、标记失败）"""
+
+    __slots__ = ('stage', 'code', 'source', 'success', 'elapsed')
+
+    def __init__(self, stage: str, code: str = "", source: str = "", success: bool = True, elapsed: float = 0.0):
+        self.stage = stage
+        self.code = code
+        self.source = source
+        self.success = success
+        self.elapsed = elapsed
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩法分位数（sorted_values 已升序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(q * len(sorted_values) + 0.999999) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Histogram:
+    """按 (阶段, 来源) 累计的耗时直方图"""
+
+    __slots__ = ('buckets', 'count', 'total', 'failures')
+
+    def __init__(self):
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.failures = 0
+
+    def observe(self, elapsed: float, success: bool) -> None:
+        self.count += 1
+        self.total += elapsed
+        if not success:
+            self.failures += 1
+        for index, bound in enumerate(HISTOGRAM_BUCKETS):
+            if elapsed <= bound:
+                self.buckets[index] += 1
+
+
+class StageMetrics:
+    """
+    阶段耗时指标
+
+    - 累计直方图：进程生命周期内持续累加，用于 Prometheus 导出
+    - 运行记录：begin_run 至 end_run 之间的记录按阶段汇总分位数（同一时间按一次运行统计；
+      运行之外的记录，如 Web 单股分析，只计入累计直方图）
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], _Histogram] = defaultdict(_Histogram)
+        self._run_spans: List[StageSpan] = []
+        self._run_started: Optional[float] = None
+        self._last_summary: List[Dict[str, Any]] = []
+        self._last_run: Dict[str, Any] = {}
+        self._runs = 0
+
+    def record(self, stage: str, elapsed: float, code: str = "", source: str = "", success: bool = True) -> None:
+        """记录一次阶段耗时"""
+        self._add(StageSpan(stage, code, source, success, elapsed))
+
+    @contextmanager
+    def span(self, stage: str, code: str = "", source: str = "") -> Iterator[StageSpan]:
+        """
+        记录代码块耗时，抛出异常时记为失败
+
+        Example:
+            with get_metrics().span(STAGE_REALTIME, code) as span:
+                quote = fetch()
+                span.source = quote.source
+        """
+        span = StageSpan(stage, code, source)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.success = False
+            raise
+        finally:
+            span.elapsed = time.perf_counter() - started
+            self._add(span)
+
+    def _add(self, span: StageSpan) -> None:
+        with self._lock:
+            self._histograms[(span.stage, span.source)].observe(span.elapsed, span.success)
+            if self._run_started is not None and len(self._run_spans) < MAX_RUN_SPANS:
+                self._run_spans.append(span)
+
+    def begin_run(self) -> None:
+        """开始一次运行（清空上次运行的记录）"""
+        with self._lock:
+            self._run_spans = []
+            self._run_started = time.time()
+
+    def end_run(self, stocks: int = 0) -> List[Dict[str, Any]]:
+        """
+        结束运行并按阶段汇总
+
+        Args:
+            stocks: 本次分析的股票数（用于计算吞吐）
+
+        Returns:
+            各阶段汇总（count / failures / total / p50 / p95 / p99 / max，按合计耗时降序）
+        """
+        with self._lock:
+            spans = self._run_spans
+            elapsed = time.time() - self._run_started if self._run_started else 0.0
+            self._run_spans = []
+            self._run_started = None
+            self._runs += 1
+
+        by_stage: Dict[str, List[StageSpan]] = defaultdict(list)
+        for span in spans:
+            by_stage[span.stage].append(span)
+
+        summary = []
+        for stage, stage_spans in by_stage.items():
+            values = sorted(span.elapsed for span in stage_spans)
+            summary.append({
+                'stage': stage,
+                'count': len(values),
+                'failures': sum(1 for span in stage_spans if not span.success),
+                'total': sum(values),
+                'p50': _percentile(values, 0.50),
+                'p95': _percentile(values, 0.95),
+                'p99': _percentile(values, 0.99),
+                'max': values[-1],
+            })
+        summary.sort(key=lambda row: row['total'], reverse=True)
+
+        with self._lock:
+            self._last_summary = summary
+            self._last_run = {
+                'elapsed': elapsed,
+                'stocks': stocks,
+                'stocks_per_minute': stocks * 60 / elapsed if elapsed > 0 else 0.0,
+            }
+        return summary
+
+    def get_last_run(self) -> Dict[str, Any]:
+        """最近一次运行的汇总（含各阶段分位数）"""
+        with self._lock:
+            return {**self._last_run, 'stages': list(self._last_summary)}
+
+    def format_run_summary(self) -> str:
+        """最近一次运行的汇总表（用于日志输出）"""
+        run = self.get_last_run()
+        lines = [
+            f"{'阶段':<20}{'次数':>6}{'失败':>6}{'合计(s)':>9}{'p50(s)':>9}{'p95(s)':>9}{'p99(s)':>9}{'最大(s)':>8}"
+        ]
+        for row in run['stages']:
+            lines.append(
+                f"{row['stage']:<22}{row['count']:>8}{row['failures']:>8}{row['total']:>11.2f}"
+                f"{row['p50']:>9.2f}{row['p95']:>9.2f}{row['p99']:>9.2f}{row['max']:>10.2f}"
+            )
+        if run.get('stocks'):
+            lines.append(f"吞吐: {run['stocks']} 只 / {run['elapsed']:.1f}s"
+                         f"（{run['stocks_per_minute']:.1f} 只/分钟）")
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        """导出 Prometheus 文本格式（text/plain; version=0.0.4）"""
+        with self._lock:
+            histograms = {key: (list(h.buckets), h.count, h.total, h.failures) for key, h in self._histograms.items()}
+            summary = list(self._last_summary)
+            last_run = dict(self._last_run)
+            runs = self._runs
+
+        name = f"{_METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} 分析流程各阶段耗时",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage, source), (buckets, count, total, _) in sorted(histograms.items()):
+            labels = f'stage="{_escape_label(stage)}",source="{_escape_label(source)}"'
+            for bound, bucket_count in zip(HISTOGRAM_BUCKETS, buckets):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+
+        name = f"{_METRIC_PREFIX}_stage_failures_total"
+        lines += [f"# HELP {name} 分析流程各阶段失败次数", f"# TYPE {name} counter"]
+        for (stage, source), (_, _, _, failures) in sorted(histograms.items()):
+            lines.append(f'{name}{{stage="{_escape_label(stage)}",source="{_escape_label(source)}"}} {failures}')
+
+        name = f"{_METRIC_PREFIX}_last_run_stage_seconds"
+        lines += [f"# HELP {name} 最近一次运行各阶段耗时分位数", f"# TYPE {name} gauge"]
+        for row in summary:
+            stage = _escape_label(row['stage'])
+            for quantile in ('p50', 'p95', 'p99'):
+                lines.append(f'{name}{{stage="{stage}",quantile="0.{quantile[1:]}"}} {row[quantile]:.6f}')
+
+        lines += [
+            f"# HELP {_METRIC_PREFIX}_runs_total 已完成的分析运行次数",
+            f"# TYPE {_METRIC_PREFIX}_runs_total counter",
+            f"{_METRIC_PREFIX}_runs_total {runs}",
+        ]
+        if last_run:
+            lines += [
+                f"# HELP {_METRIC_PREFIX}_last_run_duration_seconds 最近一次运行总耗时",
+                f"# TYPE {_METRIC_PREFIX}_last_run_duration_seconds gauge",
+                f"{_METRIC_PREFIX}_last_run_duration_seconds {last_run['elapsed']:.3f}",
+                f"# HELP {_METRIC_PREFIX}_last_run_stocks 最近一次运行分析的股票数",
+                f"# TYPE {_METRIC_PREFIX}_last_run_stocks gauge",
+                f"{_METRIC_PREFIX}_last_run_stocks {last_run['stocks']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+_metrics = StageMetrics()
+
+
+def get_metrics() -> StageMetrics:
+    """获取进程内共享的阶段耗时指标"""
+    return _metrics
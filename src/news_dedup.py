@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 新闻近似去重
+===================================
+
+职责：
+1. 基于 SimHash 计算新闻指纹（标题 + 摘要开头）
+2. 分段索引快速查找近似重复（同一通稿在不同网站、不同维度重复出现）
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+SIMHASH_BITS = 64
+DEFAULT_MAX_DISTANCE = 6  # 汉明距离不超过该值视为近似重复（新闻标题较短，阈值比长文本略宽）
+
+# 64 位指纹分为 8 段，每段 8 位：汉明距离 <= 7 时至少有一段完全相同（抽屉原理）
+_BANDS = 8
+_BAND_BITS = SIMHASH_BITS // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+# 参与指纹计算的摘要长度：只取导语部分。不同来源的摘要截断位置不同、
+# SerpAPI 还会拼接网页正文，尾部差异会显著拉大短文本的汉明距离
+_SNIPPET_PREFIX_LEN = 40
+
+_NOISE_RE = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def _tokenize(text: str) -> List[str]:
+    """字符二元组分词（中文无需分词器，对标点、空白、全半角不敏感）"""
+    normalized = _NOISE_RE.sub('', unicodedata.normalize('NFKC', text).lower())
+    if len(normalized) < 2:
+        return [normalized] if normalized else []
+    return [normalized[i:i + 2] for i in range(len(normalized) - 1)]
+
+
+def simhash(text: str) -> int:
+    """计算文本的 64 位 SimHash 指纹"""
+    weights = [0] * SIMHASH_BITS
+    for token in _tokenize(text):
+        token_hash = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if token_hash >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个指纹的汉明距离"""
+    return bin(a ^ b).count('1')
+
+
+def news_fingerprint(title: str, snippet: str = '') -> int:
+    """新闻指纹：标题 + 摘要开头"""
+    return simhash(f"{title or ''} {(snippet or '')[:_SNIPPET_PREFIX_LEN]}")
+
+
+class SimHashIndex:
+    """
+    SimHash 近似重复索引
+
+    按指纹分段建立倒排桶，查找时只比较至少一段相同的候选项，
+    避免与全部已有条目逐一比较。
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self._max_distance = max_distance
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, Any]]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _band_keys(fingerprint: int) -> List[Tuple[int, int]]:
+        return [(band, fingerprint >> (band * _BAND_BITS) & _BAND_MASK) for band in range(_BANDS)]
+
+    def add(self, fingerprint: int, item: Any) -> None:
+        """加入索引"""
+        for key in self._band_keys(fingerprint):
+            self._buckets.setdefault(key, []).append((fingerprint, item))
+        self._size += 1
+
+    def find(self, fingerprint: int) -> Optional[Any]:
+        """查找近似重复项（返回距离最近的一项，不存在返回 None）"""
+        best: Optional[Tuple[int, Any]] = None
+        for key in self._band_keys(fingerprint):
+            for candidate, item in self._buckets.get(key, ()):
+                distance = hamming_distance(fingerprint, candidate)
+                if distance <= self._max_distance and (best is None or distance < best[0]):
+                    best = (distance, item)
+        return best[1] if best else None
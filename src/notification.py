@@ -14,21 +14,27 @@ A股自选股智能分析系统 - 通知层
    - 邮件 SMTP
    - Pushover（手机/桌面推送）
 """
+import atexit
 import hashlib
 import hmac
 import logging
 import json
 import smtplib
 import re
-import markdown2
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.header import Header
 from enum import Enum
 
 import requests
+import requests.adapters
 try:
     import discord
     discord_available = True
@@ -37,7 +43,10 @@ except ImportError:
 
 from src.config import get_config
 from src.analyzer import AnalysisResult
-from src.formatters import format_feishu_markdown
+from src.formatters import format_feishu_markdown, split_markdown_chunks
+from src.markdown_render import parse_markdown
+from src.metrics import get_metrics, STAGE_NOTIFY
+from src.report_fragments import get_fragment_cache
 from bot.models import BotMessage
 
 logger = logging.getLogger(__name__)
@@ -83,6 +92,105 @@ SMTP_CONFIGS = {
 }
 
 
+# 邮件 HTML 样式：更紧凑的排版，美观的表格
+_EMAIL_CSS = """body {
+    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Helvetica, Arial, sans-serif;
+    line-height: 1.5;
+    color: #24292e;
+    font-size: 14px;
+    padding: 15px;
+    max-width: 900px;
+    margin: 0 auto;
+}
+h1 {
+    font-size: 20px;
+    border-bottom: 1px solid #eaecef;
+    padding-bottom: 0.3em;
+    margin-top: 1.2em;
+    margin-bottom: 0.8em;
+    color: #0366d6;
+}
+h2 {
+    font-size: 18px;
+    border-bottom: 1px solid #eaecef;
+    padding-bottom: 0.3em;
+    margin-top: 1.0em;
+    margin-bottom: 0.6em;
+}
+h3 {
+    font-size: 16px;
+    margin-top: 0.8em;
+    margin-bottom: 0.4em;
+}
+p {
+    margin-top: 0;
+    margin-bottom: 8px;
+}
+/* 表格样式优化 */
+table {
+    border-collapse: collapse;
+    width: 100%;
+    margin: 12px 0;
+    display: block;
+    overflow-x: auto;
+    font-size: 13px;
+}
+th, td {
+    border: 1px solid #dfe2e5;
+    padding: 6px 10px;
+    text-align: left;
+}
+th {
+    background-color: #f6f8fa;
+    font-weight: 600;
+}
+tr:nth-child(2n) {
+    background-color: #f8f8f8;
+}
+tr:hover {
+    background-color: #f1f8ff;
+}
+/* 引用块样式 */
+blockquote {
+    color: #6a737d;
+    border-left: 0.25em solid #dfe2e5;
+    padding: 0 1em;
+    margin: 0 0 10px 0;
+}
+/* 代码块样式 */
+code {
+    padding: 0.2em 0.4em;
+    margin: 0;
+    font-size: 85%;
+    background-color: rgba(27,31,35,0.05);
+    border-radius: 3px;
+    font-family: SFMono-Regular, Consolas, "Liberation Mono", Menlo, monospace;
+}
+pre {
+    padding: 12px;
+    overflow: auto;
+    line-height: 1.45;
+    background-color: #f6f8fa;
+    border-radius: 3px;
+    margin-bottom: 10px;
+}
+hr {
+    height: 0.25em;
+    padding: 0;
+    margin: 16px 0;
+    background-color: #e1e4e8;
+    border: 0;
+}
+ul, ol {
+    padding-left: 20px;
+    margin-bottom: 10px;
+}
+li {
+    margin: 2px 0;
+}
+"""
+
+
 class ChannelDetector:
     """
     渠道检测器 - 简化版
@@ -109,6 +217,161 @@ class ChannelDetector:
         return names.get(channel, "未知渠道")
 
 
+@dataclass
+class ChannelDeliveryResult:
+    """单个渠道的推送结果"""
+    channel: str          # 渠道标识（NotificationChannel.value，消息上下文渠道为 "context"）
+    name: str             # 渠道中文名称
+    success: bool
+    elapsed: float = 0.0  # 耗时（秒），超时渠道为截止时间
+    timed_out: bool = False
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'channel': self.channel,
+            'name': self.name,
+            'success': self.success,
+            'elapsed': round(self.elapsed, 2),
+            'timed_out': self.timed_out,
+            'error': self.error,
+        }
+
+
+# === 推送连接复用 ===
+# 按目标主机复用 keep-alive Session：长报告分段发送、单股推送模式连续发送时不再重复 TLS 握手
+_HTTP_POOL_MAXSIZE = 4  # 每个主机的连接池大小（渠道发送通道串行发送，少量连接即可）
+_http_sessions: Dict[str, requests.Session] = {}
+_http_sessions_lock = threading.Lock()
+
+
+def _get_http_session(url: str) -> requests.Session:
+    """获取目标主机（scheme + host）共享的 HTTP Session"""
+    parts = urlsplit(url)
+    key = f"{parts.scheme}://{parts.netloc}"
+    with _http_sessions_lock:
+        session = _http_sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=_HTTP_POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_sessions[key] = session
+        return session
+
+
+class _SmtpConnectionCache:
+    """
+    SMTP 连接复用
+
+    同一发件账号的连续邮件（单股推送模式逐只发送）复用已登录的连接，
+    空闲超过 IDLE_TIMEOUT 或服务器断开时重新连接。
+    """
+
+    IDLE_TIMEOUT = 60.0  # 秒，多数 SMTP 服务器会主动断开更久的空闲连接
+
+    def __init__(self):
+        self._connections: Dict[Tuple[str, int, str], Tuple[smtplib.SMTP, float]] = {}
+        self._lock = threading.Lock()
+
+    def send(self, server: str, port: int, use_ssl: bool, sender: str, password: str, msg: MIMEMultipart) -> None:
+        """发送邮件（连接失效时重连一次）"""
+        key = (server, port, sender)
+        with self._lock:
+            connection = self._get_connection(key, use_ssl, password)
+            try:
+                connection.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._discard(key)
+                connection = self._get_connection(key, use_ssl, password)
+                connection.send_message(msg)
+            self._connections[key] = (connection, time.monotonic())
+
+    def _get_connection(self, key: Tuple[str, int, str], use_ssl: bool, password: str) -> smtplib.SMTP:
+        cached = self._connections.get(key)
+        if cached is not None:
+            connection, last_used = cached
+            if time.monotonic() - last_used < self.IDLE_TIMEOUT:
+                return connection
+            self._discard(key)
+
+        server, port, sender = key
+        if use_ssl:
+            # SSL 连接（端口 465）
+            connection = smtplib.SMTP_SSL(server, port, timeout=30)
+        else:
+            # TLS 连接（端口 587）
+            connection = smtplib.SMTP(server, port, timeout=30)
+            connection.starttls()
+        try:
+            connection.login(sender, password)
+        except Exception:
+            connection.close()
+            raise
+        self._connections[key] = (connection, time.monotonic())
+        return connection
+
+    def _discard(self, key: Tuple[str, int, str]) -> None:
+        cached = self._connections.pop(key, None)
+        if cached is not None:
+            try:
+                cached[0].quit()
+            except Exception:
+                cached[0].close()
+
+    def close_all(self) -> None:
+        """关闭所有连接（进程退出时调用）"""
+        with self._lock:
+            for key in list(self._connections):
+                self._discard(key)
+
+
+_smtp_connections = _SmtpConnectionCache()
+atexit.register(_smtp_connections.close_all)
+
+
+# 每个渠道一条单线程发送通道（进程内共享）：
+# 渠道之间并发发送；同一渠道的消息（含分段消息）按提交顺序串行发送，不会乱序
+_channel_lanes: Dict[str, ThreadPoolExecutor] = {}
+_channel_lanes_lock = threading.Lock()
+
+
+def _get_channel_lane(channel_key: str) -> ThreadPoolExecutor:
+    """获取渠道的发送通道（首次使用时创建）"""
+    with _channel_lanes_lock:
+        lane = _channel_lanes.get(channel_key)
+        if lane is None:
+            lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"notify_{channel_key}")
+            _channel_lanes[channel_key] = lane
+        return lane
+
+
+def split_telegram_chunks(content: str, max_length: int, budget: Optional[int] = None) -> List[str]:
+    """
+    按 Telegram MarkdownV2 转换后的长度切分消息（各段转换后均不超过 max_length 字符）
+    
+    先按原文长度切分；转义（. - | ( 等）使某段转换后超长时，按膨胀比例缩小原文预算重新切分该段。
+    
+    Args:
+        content: 原始 Markdown 内容
+        max_length: 转换后单段最大字符数
+        budget: 原文切分预算（默认等于 max_length，递归时逐步缩小）
+    
+    Returns:
+        分段后的原始 Markdown 列表（发送时逐段转换）
+    """
+    budget = max_length if budget is None else budget
+    chunks: List[str] = []
+    for chunk in split_markdown_chunks(content, budget, count_bytes=False):
+        converted = len(parse_markdown(chunk).to_telegram())
+        if converted <= max_length:
+            chunks.append(chunk)
+            continue
+        smaller = min(budget - 1, len(chunk) * max_length // converted)
+        chunks.extend(split_telegram_chunks(chunk, max_length, smaller))
+    return chunks
+
+
 class NotificationService:
     """
     通知服务
@@ -190,6 +453,10 @@ class NotificationService:
         self._feishu_max_bytes = getattr(config, 'feishu_max_bytes', 20000)
         self._wechat_max_bytes = getattr(config, 'wechat_max_bytes', 4000)
         
+        # 多渠道并发推送的整体截止时间（秒）与最近一次推送的各渠道结果
+        self._notification_deadline = getattr(config, 'notification_deadline', 120.0)
+        self.last_delivery: List[ChannelDeliveryResult] = []
+        
         # 检测所有已配置的渠道
         self._available_channels = self._detect_all_channels()
         if self._has_context_channel():
@@ -397,138 +664,144 @@ class NotificationService:
             "",
         ])
         
-        # 逐个股票的详细分析
-        for result in sorted_results:
-            emoji = result.get_emoji()
-            confidence_stars = result.get_confidence_stars() if hasattr(result, 'get_confidence_stars') else '⭐⭐'
-            
+        # 逐个股票的详细分析（片段按结果缓存，文件报告与各渠道复用）
+        report_lines.extend(self._render_fragments('daily', sorted_results, self._render_daily_block))
+        
+        # 底部信息（去除免责声明）
+        report_lines.extend([
+            "",
+            f"*报告生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*",
+        ])
+        
+        return "\n".join(report_lines)
+    
+    def _render_daily_block(self, result: AnalysisResult) -> str:
+        """渲染日报中单只股票的详细分析片段"""
+        report_lines = []
+        emoji = result.get_emoji()
+        confidence_stars = result.get_confidence_stars() if hasattr(result, 'get_confidence_stars') else '⭐⭐'
+        
+        report_lines.extend([
+            f"### {emoji} {result.name} ({result.code})",
+            "",
+            f"**操作建议：{result.operation_advice}** | **综合评分：{result.sentiment_score}分** | **趋势预测：{result.trend_prediction}** | **置信度：{confidence_stars}**",
+            "",
+        ])
+        
+        # 核心看点
+        if hasattr(result, 'key_points') and result.key_points:
             report_lines.extend([
-                f"### {emoji} {result.name} ({result.code})",
+                f"**🎯 核心看点**：{result.key_points}",
                 "",
-                f"**操作建议：{result.operation_advice}** | **综合评分：{result.sentiment_score}分** | **趋势预测：{result.trend_prediction}** | **置信度：{confidence_stars}**",
+            ])
+        
+        # 买入/卖出理由
+        if hasattr(result, 'buy_reason') and result.buy_reason:
+            report_lines.extend([
+                f"**💡 操作理由**：{result.buy_reason}",
                 "",
             ])
-            
-            # 核心看点
-            if hasattr(result, 'key_points') and result.key_points:
-                report_lines.extend([
-                    f"**🎯 核心看点**：{result.key_points}",
-                    "",
-                ])
-            
-            # 买入/卖出理由
-            if hasattr(result, 'buy_reason') and result.buy_reason:
-                report_lines.extend([
-                    f"**💡 操作理由**：{result.buy_reason}",
-                    "",
-                ])
-            
-            # 走势分析
-            if hasattr(result, 'trend_analysis') and result.trend_analysis:
-                report_lines.extend([
-                    "#### 📉 走势分析",
-                    f"{result.trend_analysis}",
-                    "",
-                ])
-            
-            # 短期/中期展望
-            outlook_lines = []
-            if hasattr(result, 'short_term_outlook') and result.short_term_outlook:
-                outlook_lines.append(f"- **短期（1-3日）**：{result.short_term_outlook}")
-            if hasattr(result, 'medium_term_outlook') and result.medium_term_outlook:
-                outlook_lines.append(f"- **中期（1-2周）**：{result.medium_term_outlook}")
-            if outlook_lines:
-                report_lines.extend([
-                    "#### 🔮 市场展望",
-                    *outlook_lines,
-                    "",
-                ])
-            
-            # 技术面分析
-            tech_lines = []
-            if result.technical_analysis:
-                tech_lines.append(f"**综合**：{result.technical_analysis}")
-            if hasattr(result, 'ma_analysis') and result.ma_analysis:
-                tech_lines.append(f"**均线**：{result.ma_analysis}")
-            if hasattr(result, 'volume_analysis') and result.volume_analysis:
-                tech_lines.append(f"**量能**：{result.volume_analysis}")
-            if hasattr(result, 'pattern_analysis') and result.pattern_analysis:
-                tech_lines.append(f"**形态**：{result.pattern_analysis}")
-            if tech_lines:
-                report_lines.extend([
-                    "#### 📊 技术面分析",
-                    *tech_lines,
-                    "",
-                ])
-            
-            # 基本面分析
-            fund_lines = []
-            if hasattr(result, 'fundamental_analysis') and result.fundamental_analysis:
-                fund_lines.append(result.fundamental_analysis)
-            if hasattr(result, 'sector_position') and result.sector_position:
-                fund_lines.append(f"**板块地位**：{result.sector_position}")
-            if hasattr(result, 'company_highlights') and result.company_highlights:
-                fund_lines.append(f"**公司亮点**：{result.company_highlights}")
-            if fund_lines:
-                report_lines.extend([
-                    "#### 🏢 基本面分析",
-                    *fund_lines,
-                    "",
-                ])
-            
-            # 消息面/情绪面
-            news_lines = []
-            if result.news_summary:
-                news_lines.append(f"**新闻摘要**：{result.news_summary}")
-            if hasattr(result, 'market_sentiment') and result.market_sentiment:
-                news_lines.append(f"**市场情绪**：{result.market_sentiment}")
-            if hasattr(result, 'hot_topics') and result.hot_topics:
-                news_lines.append(f"**相关热点**：{result.hot_topics}")
-            if news_lines:
-                report_lines.extend([
-                    "#### 📰 消息面/情绪面",
-                    *news_lines,
-                    "",
-                ])
-            
-            # 综合分析
-            if result.analysis_summary:
-                report_lines.extend([
-                    "#### 📝 综合分析",
-                    result.analysis_summary,
-                    "",
-                ])
-            
-            # 风险提示
-            if hasattr(result, 'risk_warning') and result.risk_warning:
-                report_lines.extend([
-                    f"⚠️ **风险提示**：{result.risk_warning}",
-                    "",
-                ])
-            
-            # 数据来源说明
-            if hasattr(result, 'search_performed') and result.search_performed:
-                report_lines.append("*🔍 已执行联网搜索*")
-            if hasattr(result, 'data_sources') and result.data_sources:
-                report_lines.append(f"*📋 数据来源：{result.data_sources}*")
-            
-            # 错误信息（如果有）
-            if not result.success and result.error_message:
-                report_lines.extend([
-                    "",
-                    f"❌ **分析异常**：{result.error_message[:100]}",
-                ])
-            
+        
+        # 走势分析
+        if hasattr(result, 'trend_analysis') and result.trend_analysis:
             report_lines.extend([
+                "#### 📉 走势分析",
+                f"{result.trend_analysis}",
                 "",
-                "---",
+            ])
+        
+        # 短期/中期展望
+        outlook_lines = []
+        if hasattr(result, 'short_term_outlook') and result.short_term_outlook:
+            outlook_lines.append(f"- **短期（1-3日）**：{result.short_term_outlook}")
+        if hasattr(result, 'medium_term_outlook') and result.medium_term_outlook:
+            outlook_lines.append(f"- **中期（1-2周）**：{result.medium_term_outlook}")
+        if outlook_lines:
+            report_lines.extend([
+                "#### 🔮 市场展望",
+                *outlook_lines,
                 "",
             ])
         
-        # 底部信息（去除免责声明）
+        # 技术面分析
+        tech_lines = []
+        if result.technical_analysis:
+            tech_lines.append(f"**综合**：{result.technical_analysis}")
+        if hasattr(result, 'ma_analysis') and result.ma_analysis:
+            tech_lines.append(f"**均线**：{result.ma_analysis}")
+        if hasattr(result, 'volume_analysis') and result.volume_analysis:
+            tech_lines.append(f"**量能**：{result.volume_analysis}")
+        if hasattr(result, 'pattern_analysis') and result.pattern_analysis:
+            tech_lines.append(f"**形态**：{result.pattern_analysis}")
+        if tech_lines:
+            report_lines.extend([
+                "#### 📊 技术面分析",
+                *tech_lines,
+                "",
+            ])
+        
+        # 基本面分析
+        fund_lines = []
+        if hasattr(result, 'fundamental_analysis') and result.fundamental_analysis:
+            fund_lines.append(result.fundamental_analysis)
+        if hasattr(result, 'sector_position') and result.sector_position:
+            fund_lines.append(f"**板块地位**：{result.sector_position}")
+        if hasattr(result, 'company_highlights') and result.company_highlights:
+            fund_lines.append(f"**公司亮点**：{result.company_highlights}")
+        if fund_lines:
+            report_lines.extend([
+                "#### 🏢 基本面分析",
+                *fund_lines,
+                "",
+            ])
+        
+        # 消息面/情绪面
+        news_lines = []
+        if result.news_summary:
+            news_lines.append(f"**新闻摘要**：{result.news_summary}")
+        if hasattr(result, 'market_sentiment') and result.market_sentiment:
+            news_lines.append(f"**市场情绪**：{result.market_sentiment}")
+        if hasattr(result, 'hot_topics') and result.hot_topics:
+            news_lines.append(f"**相关热点**：{result.hot_topics}")
+        if news_lines:
+            report_lines.extend([
+                "#### 📰 消息面/情绪面",
+                *news_lines,
+                "",
+            ])
+        
+        # 综合分析
+        if result.analysis_summary:
+            report_lines.extend([
+                "#### 📝 综合分析",
+                result.analysis_summary,
+                "",
+            ])
+        
+        # 风险提示
+        if hasattr(result, 'risk_warning') and result.risk_warning:
+            report_lines.extend([
+                f"⚠️ **风险提示**：{result.risk_warning}",
+                "",
+            ])
+        
+        # 数据来源说明
+        if hasattr(result, 'search_performed') and result.search_performed:
+            report_lines.append("*🔍 已执行联网搜索*")
+        if hasattr(result, 'data_sources') and result.data_sources:
+            report_lines.append(f"*📋 数据来源：{result.data_sources}*")
+        
+        # 错误信息（如果有）
+        if not result.success and result.error_message:
+            report_lines.extend([
+                "",
+                f"❌ **分析异常**：{result.error_message[:100]}",
+            ])
+        
         report_lines.extend([
             "",
-            f"*报告生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*",
+            "---",
+            "",
         ])
         
         return "\n".join(report_lines)
@@ -558,6 +831,21 @@ class NotificationService:
         else:
             return ('观望', '⚪', '观望')
     
+    def _render_fragments(
+        self,
+        kind: str,
+        results: List[AnalysisResult],
+        renderer: Callable[[AnalysisResult], str]
+    ) -> List[str]:
+        """
+        获取每只股票的报告片段（按结果指纹缓存）
+        
+        同一批结果会先后生成本地报告、各渠道推送内容和飞书文档，
+        片段只在结果首次出现（或内容变化）时渲染一次
+        """
+        cache = get_fragment_cache()
+        return [cache.render(kind, result, renderer) for result in results]
+    
     def generate_dashboard_report(
         self,
         results: List[AnalysisResult],
@@ -600,246 +888,325 @@ class NotificationService:
                 "",
             ])
             for r in sorted_results:
-                emoji = r.get_emoji()
-                report_lines.append(
-                    f"{emoji} **{r.name}({r.code})**: {r.operation_advice} | "
-                    f"评分 {r.sentiment_score} | {r.trend_prediction}"
-                )
+                report_lines.append(self._format_summary_line(r))
             report_lines.extend([
                 "",
                 "---",
                 "",
             ])
 
-        # 逐个股票的决策仪表盘
-        for result in sorted_results:
-            signal_text, signal_emoji, signal_tag = self._get_signal_level(result)
-            dashboard = result.dashboard if hasattr(result, 'dashboard') and result.dashboard else {}
-            
-            # 股票名称（优先使用 dashboard 或 result 中的名称）
-            stock_name = result.name if result.name and not result.name.startswith('股票') else f'股票{result.code}'
-            
+        # 逐个股票的决策仪表盘（片段按结果缓存，文件报告、各渠道与飞书文档复用）
+        report_lines.extend(self._render_fragments('dashboard', sorted_results, self._render_dashboard_block))
+        
+        # 底部（去除免责声明）
+        report_lines.extend([
+            "",
+            f"*报告生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*",
+        ])
+        
+        return "\n".join(report_lines)
+    
+    def _render_dashboard_block(self, result: AnalysisResult) -> str:
+        """渲染决策仪表盘中单只股票的片段"""
+        report_lines = []
+        signal_text, signal_emoji, signal_tag = self._get_signal_level(result)
+        dashboard = result.dashboard if hasattr(result, 'dashboard') and result.dashboard else {}
+        
+        # 股票名称（优先使用 dashboard 或 result 中的名称）
+        stock_name = result.name if result.name and not result.name.startswith('股票') else f'股票{result.code}'
+        
+        report_lines.extend([
+            f"## {signal_emoji} {stock_name} ({result.code})",
+            "",
+        ])
+        
+        # ========== 舆情与基本面概览（放在最前面）==========
+        intel = dashboard.get('intelligence', {}) if dashboard else {}
+        if intel:
             report_lines.extend([
-                f"## {signal_emoji} {stock_name} ({result.code})",
+                "### 📰 重要信息速览",
                 "",
             ])
             
-            # ========== 舆情与基本面概览（放在最前面）==========
-            intel = dashboard.get('intelligence', {}) if dashboard else {}
-            if intel:
-                report_lines.extend([
-                    "### 📰 重要信息速览",
-                    "",
-                ])
-                
-                # 舆情情绪总结
-                if intel.get('sentiment_summary'):
-                    report_lines.append(f"**💭 舆情情绪**: {intel['sentiment_summary']}")
-                
-                # 业绩预期
-                if intel.get('earnings_outlook'):
-                    report_lines.append(f"**📊 业绩预期**: {intel['earnings_outlook']}")
-                
-                # 风险警报（醒目显示）
-                risk_alerts = intel.get('risk_alerts', [])
-                if risk_alerts:
-                    report_lines.append("")
-                    report_lines.append("**🚨 风险警报**:")
-                    for alert in risk_alerts:
-                        report_lines.append(f"- {alert}")
-                
-                # 利好催化
-                catalysts = intel.get('positive_catalysts', [])
-                if catalysts:
-                    report_lines.append("")
-                    report_lines.append("**✨ 利好催化**:")
-                    for cat in catalysts:
-                        report_lines.append(f"- {cat}")
-                
-                # 最新消息
-                if intel.get('latest_news'):
-                    report_lines.append("")
-                    report_lines.append(f"**📢 最新动态**: {intel['latest_news']}")
-                
+            # 舆情情绪总结
+            if intel.get('sentiment_summary'):
+                report_lines.append(f"**💭 舆情情绪**: {intel['sentiment_summary']}")
+            
+            # 业绩预期
+            if intel.get('earnings_outlook'):
+                report_lines.append(f"**📊 业绩预期**: {intel['earnings_outlook']}")
+            
+            # 风险警报（醒目显示）
+            risk_alerts = intel.get('risk_alerts', [])
+            if risk_alerts:
+                report_lines.append("")
+                report_lines.append("**🚨 风险警报**:")
+                for alert in risk_alerts:
+                    report_lines.append(f"- {alert}")
+            
+            # 利好催化
+            catalysts = intel.get('positive_catalysts', [])
+            if catalysts:
                 report_lines.append("")
+                report_lines.append("**✨ 利好催化**:")
+                for cat in catalysts:
+                    report_lines.append(f"- {cat}")
             
-            # ========== 核心结论 ==========
-            core = dashboard.get('core_conclusion', {}) if dashboard else {}
-            one_sentence = core.get('one_sentence', result.analysis_summary)
-            time_sense = core.get('time_sensitivity', '本周内')
-            pos_advice = core.get('position_advice', {})
+            # 最新消息
+            if intel.get('latest_news'):
+                report_lines.append("")
+                report_lines.append(f"**📢 最新动态**: {intel['latest_news']}")
             
+            report_lines.append("")
+        
+        # ========== 核心结论 ==========
+        core = dashboard.get('core_conclusion', {}) if dashboard else {}
+        one_sentence = core.get('one_sentence', result.analysis_summary)
+        time_sense = core.get('time_sensitivity', '本周内')
+        pos_advice = core.get('position_advice', {})
+        
+        report_lines.extend([
+            "### 📌 核心结论",
+            "",
+            f"**{signal_emoji} {signal_text}** | {result.trend_prediction}",
+            "",
+            f"> **一句话决策**: {one_sentence}",
+            "",
+            f"⏰ **时效性**: {time_sense}",
+            "",
+        ])
+        
+        # 持仓分类建议
+        if pos_advice:
             report_lines.extend([
-                "### 📌 核心结论",
-                "",
-                f"**{signal_emoji} {signal_text}** | {result.trend_prediction}",
+                "| 持仓情况 | 操作建议 |",
+                "|---------|---------|",
+                f"| 🆕 **空仓者** | {pos_advice.get('no_position', result.operation_advice)} |",
+                f"| 💼 **持仓者** | {pos_advice.get('has_position', '继续持有')} |",
                 "",
-                f"> **一句话决策**: {one_sentence}",
-                "",
-                f"⏰ **时效性**: {time_sense}",
+            ])
+        
+        # ========== 数据透视 ==========
+        data_persp = dashboard.get('data_perspective', {}) if dashboard else {}
+        if data_persp:
+            trend_data = data_persp.get('trend_status', {})
+            price_data = data_persp.get('price_position', {})
+            vol_data = data_persp.get('volume_analysis', {})
+            chip_data = data_persp.get('chip_structure', {})
+            
+            report_lines.extend([
+                "### 📊 数据透视",
                 "",
             ])
             
-            # 持仓分类建议
-            if pos_advice:
+            # 趋势状态
+            if trend_data:
+                is_bullish = "✅ 是" if trend_data.get('is_bullish', False) else "❌ 否"
                 report_lines.extend([
-                    "| 持仓情况 | 操作建议 |",
-                    "|---------|---------|",
-                    f"| 🆕 **空仓者** | {pos_advice.get('no_position', result.operation_advice)} |",
-                    f"| 💼 **持仓者** | {pos_advice.get('has_position', '继续持有')} |",
+                    f"**均线排列**: {trend_data.get('ma_alignment', 'N/A')} | 多头排列: {is_bullish} | 趋势强度: {trend_data.get('trend_score', 'N/A')}/100",
                     "",
                 ])
             
-            # ========== 数据透视 ==========
-            data_persp = dashboard.get('data_perspective', {}) if dashboard else {}
-            if data_persp:
-                trend_data = data_persp.get('trend_status', {})
-                price_data = data_persp.get('price_position', {})
-                vol_data = data_persp.get('volume_analysis', {})
-                chip_data = data_persp.get('chip_structure', {})
-                
+            # 价格位置
+            if price_data:
+                bias_status = price_data.get('bias_status', 'N/A')
+                bias_emoji = "✅" if bias_status == "安全" else ("⚠️" if bias_status == "警戒" else "🚨")
                 report_lines.extend([
-                    "### 📊 数据透视",
+                    "| 价格指标 | 数值 |",
+                    "|---------|------|",
+                    f"| 当前价 | {price_data.get('current_price', 'N/A')} |",
+                    f"| MA5 | {price_data.get('ma5', 'N/A')} |",
+                    f"| MA10 | {price_data.get('ma10', 'N/A')} |",
+                    f"| MA20 | {price_data.get('ma20', 'N/A')} |",
+                    f"| 乖离率(MA5) | {price_data.get('bias_ma5', 'N/A')}% {bias_emoji}{bias_status} |",
+                    f"| 支撑位 | {price_data.get('support_level', 'N/A')} |",
+                    f"| 压力位 | {price_data.get('resistance_level', 'N/A')} |",
                     "",
                 ])
-                
-                # 趋势状态
-                if trend_data:
-                    is_bullish = "✅ 是" if trend_data.get('is_bullish', False) else "❌ 否"
-                    report_lines.extend([
-                        f"**均线排列**: {trend_data.get('ma_alignment', 'N/A')} | 多头排列: {is_bullish} | 趋势强度: {trend_data.get('trend_score', 'N/A')}/100",
-                        "",
-                    ])
-                
-                # 价格位置
-                if price_data:
-                    bias_status = price_data.get('bias_status', 'N/A')
-                    bias_emoji = "✅" if bias_status == "安全" else ("⚠️" if bias_status == "警戒" else "🚨")
-                    report_lines.extend([
-                        "| 价格指标 | 数值 |",
-                        "|---------|------|",
-                        f"| 当前价 | {price_data.get('current_price', 'N/A')} |",
-                        f"| MA5 | {price_data.get('ma5', 'N/A')} |",
-                        f"| MA10 | {price_data.get('ma10', 'N/A')} |",
-                        f"| MA20 | {price_data.get('ma20', 'N/A')} |",
-                        f"| 乖离率(MA5) | {price_data.get('bias_ma5', 'N/A')}% {bias_emoji}{bias_status} |",
-                        f"| 支撑位 | {price_data.get('support_level', 'N/A')} |",
-                        f"| 压力位 | {price_data.get('resistance_level', 'N/A')} |",
-                        "",
-                    ])
-                
-                # 量能分析
-                if vol_data:
-                    report_lines.extend([
-                        f"**量能**: 量比 {vol_data.get('volume_ratio', 'N/A')} ({vol_data.get('volume_status', '')}) | 换手率 {vol_data.get('turnover_rate', 'N/A')}%",
-                        f"💡 *{vol_data.get('volume_meaning', '')}*",
-                        "",
-                    ])
-                
-                # 筹码结构
-                if chip_data:
-                    chip_health = chip_data.get('chip_health', 'N/A')
-                    chip_emoji = "✅" if chip_health == "健康" else ("⚠️" if chip_health == "一般" else "🚨")
-                    report_lines.extend([
-                        f"**筹码**: 获利比例 {chip_data.get('profit_ratio', 'N/A')} | 平均成本 {chip_data.get('avg_cost', 'N/A')} | 集中度 {chip_data.get('concentration', 'N/A')} {chip_emoji}{chip_health}",
-                        "",
-                    ])
-            
-            # 舆情情报已移至顶部显示
-            
-            # ========== 作战计划 ==========
-            battle = dashboard.get('battle_plan', {}) if dashboard else {}
-            if battle:
+            
+            # 量能分析
+            if vol_data:
                 report_lines.extend([
-                    "### 🎯 作战计划",
+                    f"**量能**: 量比 {vol_data.get('volume_ratio', 'N/A')} ({vol_data.get('volume_status', '')}) | 换手率 {vol_data.get('turnover_rate', 'N/A')}%",
+                    f"💡 *{vol_data.get('volume_meaning', '')}*",
                     "",
                 ])
-                
-                # 狙击点位
-                sniper = battle.get('sniper_points', {})
-                if sniper:
-                    report_lines.extend([
-                        "**📍 狙击点位**",
-                        "",
-                        "| 点位类型 | 价格 |",
-                        "|---------|------|",
-                        f"| 🎯 理想买入点 | {sniper.get('ideal_buy', 'N/A')} |",
-                        f"| 🔵 次优买入点 | {sniper.get('secondary_buy', 'N/A')} |",
-                        f"| 🛑 止损位 | {sniper.get('stop_loss', 'N/A')} |",
-                        f"| 🎊 目标位 | {sniper.get('take_profit', 'N/A')} |",
-                        "",
-                    ])
-                
-                # 仓位策略
-                position = battle.get('position_strategy', {})
-                if position:
-                    report_lines.extend([
-                        f"**💰 仓位建议**: {position.get('suggested_position', 'N/A')}",
-                        f"- 建仓策略: {position.get('entry_plan', 'N/A')}",
-                        f"- 风控策略: {position.get('risk_control', 'N/A')}",
-                        "",
-                    ])
-                
-                # 检查清单
-                checklist = battle.get('action_checklist', []) if battle else []
-                if checklist:
-                    report_lines.extend([
-                        "**✅ 检查清单**",
-                        "",
-                    ])
-                    for item in checklist:
-                        report_lines.append(f"- {item}")
-                    report_lines.append("")
-            
-            # 如果没有 dashboard，显示传统格式
-            if not dashboard:
-                # 操作理由
-                if result.buy_reason:
-                    report_lines.extend([
-                        f"**💡 操作理由**: {result.buy_reason}",
-                        "",
-                    ])
-                
-                # 风险提示
-                if result.risk_warning:
-                    report_lines.extend([
-                        f"**⚠️ 风险提示**: {result.risk_warning}",
-                        "",
-                    ])
-                
-                # 技术面分析
-                if result.ma_analysis or result.volume_analysis:
-                    report_lines.extend([
-                        "### 📊 技术面",
-                        "",
-                    ])
-                    if result.ma_analysis:
-                        report_lines.append(f"**均线**: {result.ma_analysis}")
-                    if result.volume_analysis:
-                        report_lines.append(f"**量能**: {result.volume_analysis}")
-                    report_lines.append("")
-                
-                # 消息面
-                if result.news_summary:
-                    report_lines.extend([
-                        "### 📰 消息面",
-                        f"{result.news_summary}",
-                        "",
-                    ])
             
+            # 筹码结构
+            if chip_data:
+                chip_health = chip_data.get('chip_health', 'N/A')
+                chip_emoji = "✅" if chip_health == "健康" else ("⚠️" if chip_health == "一般" else "🚨")
+                report_lines.extend([
+                    f"**筹码**: 获利比例 {chip_data.get('profit_ratio', 'N/A')} | 平均成本 {chip_data.get('avg_cost', 'N/A')} | 集中度 {chip_data.get('concentration', 'N/A')} {chip_emoji}{chip_health}",
+                    "",
+                ])
+        
+        # 舆情情报已移至顶部显示
+        
+        # ========== 作战计划 ==========
+        battle = dashboard.get('battle_plan', {}) if dashboard else {}
+        if battle:
             report_lines.extend([
-                "---",
+                "### 🎯 作战计划",
                 "",
             ])
+            
+            # 狙击点位
+            sniper = battle.get('sniper_points', {})
+            if sniper:
+                report_lines.extend([
+                    "**📍 狙击点位**",
+                    "",
+                    "| 点位类型 | 价格 |",
+                    "|---------|------|",
+                    f"| 🎯 理想买入点 | {sniper.get('ideal_buy', 'N/A')} |",
+                    f"| 🔵 次优买入点 | {sniper.get('secondary_buy', 'N/A')} |",
+                    f"| 🛑 止损位 | {sniper.get('stop_loss', 'N/A')} |",
+                    f"| 🎊 目标位 | {sniper.get('take_profit', 'N/A')} |",
+                    "",
+                ])
+            
+            # 仓位策略
+            position = battle.get('position_strategy', {})
+            if position:
+                report_lines.extend([
+                    f"**💰 仓位建议**: {position.get('suggested_position', 'N/A')}",
+                    f"- 建仓策略: {position.get('entry_plan', 'N/A')}",
+                    f"- 风控策略: {position.get('risk_control', 'N/A')}",
+                    "",
+                ])
+            
+            # 检查清单
+            checklist = battle.get('action_checklist', []) if battle else []
+            if checklist:
+                report_lines.extend([
+                    "**✅ 检查清单**",
+                    "",
+                ])
+                for item in checklist:
+                    report_lines.append(f"- {item}")
+                report_lines.append("")
+        
+        # 如果没有 dashboard，显示传统格式
+        if not dashboard:
+            # 操作理由
+            if result.buy_reason:
+                report_lines.extend([
+                    f"**💡 操作理由**: {result.buy_reason}",
+                    "",
+                ])
+            
+            # 风险提示
+            if result.risk_warning:
+                report_lines.extend([
+                    f"**⚠️ 风险提示**: {result.risk_warning}",
+                    "",
+                ])
+            
+            # 技术面分析
+            if result.ma_analysis or result.volume_analysis:
+                report_lines.extend([
+                    "### 📊 技术面",
+                    "",
+                ])
+                if result.ma_analysis:
+                    report_lines.append(f"**均线**: {result.ma_analysis}")
+                if result.volume_analysis:
+                    report_lines.append(f"**量能**: {result.volume_analysis}")
+                report_lines.append("")
+            
+            # 消息面
+            if result.news_summary:
+                report_lines.extend([
+                    "### 📰 消息面",
+                    f"{result.news_summary}",
+                    "",
+                ])
         
-        # 底部（去除免责声明）
         report_lines.extend([
+            "---",
             "",
-            f"*报告生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*",
         ])
         
         return "\n".join(report_lines)
     
+    @staticmethod
+    def _format_summary_line(result: AnalysisResult) -> str:
+        """单只股票的一行摘要（仪表盘摘要区、进度看板共用）"""
+        return (
+            f"{result.get_emoji()} **{result.name}({result.code})**: {result.operation_advice} | "
+            f"评分 {result.sentiment_score} | {result.trend_prediction}"
+        )
+    
+    def generate_progress_dashboard(
+        self,
+        results: List[AnalysisResult],
+        total: int,
+        elapsed: float,
+        finished: bool = False,
+        max_length: Optional[int] = None,
+        length_func: Callable[[str], int] = len
+    ) -> str:
+        """
+        生成分析进度看板（渐进推送模式：首条消息发出后随每只股票完成原地更新）
+        
+        Args:
+            results: 已完成的分析结果
+            total: 本次分析的股票总数
+            elapsed: 已用时（秒）
+            finished: 是否已全部完成（最终汇总）
+            max_length: 渠道单条消息长度上限（字符），超出时省略评分靠后的股票
+            length_func: 按渠道实际发送的格式计算长度（如 Telegram MarkdownV2 转义后会变长）
+            
+        Returns:
+            Markdown 格式的进度看板
+        """
+        report_date = datetime.now().strftime('%Y-%m-%d')
+        sorted_results = sorted(results, key=lambda x: x.sentiment_score, reverse=True)
+        buy_count = sum(1 for r in results if getattr(r, 'decision_type', '') == 'buy')
+        sell_count = sum(1 for r in results if getattr(r, 'decision_type', '') == 'sell')
+        hold_count = sum(1 for r in results if getattr(r, 'decision_type', '') in ('hold', ''))
+        
+        if finished:
+            status = f"✅ 分析完成 {len(results)}/{total}"
+            footer = f"*耗时 {elapsed:.0f} 秒，完整决策仪表盘随后推送*"
+        else:
+            status = f"⏳ 分析中 {len(results)}/{total}"
+            footer = f"*已用时 {elapsed:.0f} 秒，结果按评分排序，完成后更新*"
+        
+        header = "\n".join([
+            f"## 🎯 {report_date} 决策仪表盘",
+            "",
+            f"> {status} | 🟢买入:{buy_count} 🟡观望:{hold_count} 🔴卖出:{sell_count}",
+            "",
+        ])
+        lines = [self._format_summary_line(r) for r in sorted_results]
+        
+        def build(kept: int) -> str:
+            shown = lines if kept >= len(lines) else lines[:kept] + [f"…… 另有 {len(lines) - kept} 只"]
+            return "\n".join([header, *shown, "", footer])
+        
+        if max_length is None:
+            return build(len(lines))
+        
+        # 超出渠道上限时只保留评分靠前的股票（按转换后的长度逐行估算）
+        budget = max_length - length_func(header) - length_func(footer) - 40
+        kept = 0
+        used = 0
+        for line in lines:
+            line_length = length_func(line) + 1
+            if used + line_length > budget:
+                break
+            used += line_length
+            kept += 1
+        
+        # 整条消息转换后复核，仍超出时继续省略
+        content = build(kept)
+        while kept > 0 and length_func(content) > max_length:
+            kept -= 1
+            content = build(kept)
+        return content
+    
     def generate_wechat_dashboard(self, results: List[AnalysisResult]) -> str:
         """
         生成企业微信决策仪表盘精简版（控制在4000字符内）
@@ -869,104 +1236,8 @@ class NotificationService:
             "",
         ]
         
-        for result in sorted_results:
-            signal_text, signal_emoji, _ = self._get_signal_level(result)
-            dashboard = result.dashboard if hasattr(result, 'dashboard') and result.dashboard else {}
-            core = dashboard.get('core_conclusion', {}) if dashboard else {}
-            battle = dashboard.get('battle_plan', {}) if dashboard else {}
-            intel = dashboard.get('intelligence', {}) if dashboard else {}
-            
-            # 股票名称
-            stock_name = result.name if result.name and not result.name.startswith('股票') else f'股票{result.code}'
-            
-            # 标题行：信号等级 + 股票名称
-            lines.append(f"### {signal_emoji} **{signal_text}** | {stock_name}({result.code})")
-            lines.append("")
-            
-            # 核心决策（一句话）
-            one_sentence = core.get('one_sentence', result.analysis_summary) if core else result.analysis_summary
-            if one_sentence:
-                lines.append(f"📌 **{one_sentence[:80]}**")
-                lines.append("")
-            
-            # 重要信息区（舆情+基本面）
-            info_lines = []
-            
-            # 业绩预期
-            if intel.get('earnings_outlook'):
-                outlook = intel['earnings_outlook'][:60]
-                info_lines.append(f"📊 业绩: {outlook}")
-            
-            # 舆情情绪
-            if intel.get('sentiment_summary'):
-                sentiment = intel['sentiment_summary'][:50]
-                info_lines.append(f"💭 舆情: {sentiment}")
-            
-            if info_lines:
-                lines.extend(info_lines)
-                lines.append("")
-            
-            # 风险警报（最重要，醒目显示）
-            risks = intel.get('risk_alerts', []) if intel else []
-            if risks:
-                lines.append("🚨 **风险**:")
-                for risk in risks[:2]:  # 最多显示2条
-                    risk_text = risk[:50] + "..." if len(risk) > 50 else risk
-                    lines.append(f"   • {risk_text}")
-                lines.append("")
-            
-            # 利好催化
-            catalysts = intel.get('positive_catalysts', []) if intel else []
-            if catalysts:
-                lines.append("✨ **利好**:")
-                for cat in catalysts[:2]:  # 最多显示2条
-                    cat_text = cat[:50] + "..." if len(cat) > 50 else cat
-                    lines.append(f"   • {cat_text}")
-                lines.append("")
-            
-            # 狙击点位
-            sniper = battle.get('sniper_points', {}) if battle else {}
-            if sniper:
-                ideal_buy = sniper.get('ideal_buy', '')
-                stop_loss = sniper.get('stop_loss', '')
-                take_profit = sniper.get('take_profit', '')
-                
-                points = []
-                if ideal_buy:
-                    points.append(f"🎯买点:{ideal_buy[:15]}")
-                if stop_loss:
-                    points.append(f"🛑止损:{stop_loss[:15]}")
-                if take_profit:
-                    points.append(f"🎊目标:{take_profit[:15]}")
-                
-                if points:
-                    lines.append(" | ".join(points))
-                    lines.append("")
-            
-            # 持仓建议
-            pos_advice = core.get('position_advice', {}) if core else {}
-            if pos_advice:
-                no_pos = pos_advice.get('no_position', '')
-                has_pos = pos_advice.get('has_position', '')
-                if no_pos:
-                    lines.append(f"🆕 空仓者: {no_pos[:50]}")
-                if has_pos:
-                    lines.append(f"💼 持仓者: {has_pos[:50]}")
-                lines.append("")
-            
-            # 检查清单简化版
-            checklist = battle.get('action_checklist', []) if battle else []
-            if checklist:
-                # 只显示不通过的项目
-                failed_checks = [c for c in checklist if c.startswith('❌') or c.startswith('⚠️')]
-                if failed_checks:
-                    lines.append("**检查未通过项**:")
-                    for check in failed_checks[:3]:
-                        lines.append(f"   {check[:40]}")
-                    lines.append("")
-            
-            lines.append("---")
-            lines.append("")
+        # 逐个股票的精简仪表盘（片段按结果缓存）
+        lines.extend(self._render_fragments('wechat_dashboard', sorted_results, self._render_wechat_dashboard_block))
         
         # 底部
         lines.append(f"*生成时间: {datetime.now().strftime('%H:%M')}*")
@@ -975,6 +1246,109 @@ class NotificationService:
         
         return content
     
+    def _render_wechat_dashboard_block(self, result: AnalysisResult) -> str:
+        """渲染企业微信精简仪表盘中单只股票的片段"""
+        lines = []
+        signal_text, signal_emoji, _ = self._get_signal_level(result)
+        dashboard = result.dashboard if hasattr(result, 'dashboard') and result.dashboard else {}
+        core = dashboard.get('core_conclusion', {}) if dashboard else {}
+        battle = dashboard.get('battle_plan', {}) if dashboard else {}
+        intel = dashboard.get('intelligence', {}) if dashboard else {}
+        
+        # 股票名称
+        stock_name = result.name if result.name and not result.name.startswith('股票') else f'股票{result.code}'
+        
+        # 标题行：信号等级 + 股票名称
+        lines.append(f"### {signal_emoji} **{signal_text}** | {stock_name}({result.code})")
+        lines.append("")
+        
+        # 核心决策（一句话）
+        one_sentence = core.get('one_sentence', result.analysis_summary) if core else result.analysis_summary
+        if one_sentence:
+            lines.append(f"📌 **{one_sentence[:80]}**")
+            lines.append("")
+        
+        # 重要信息区（舆情+基本面）
+        info_lines = []
+        
+        # 业绩预期
+        if intel.get('earnings_outlook'):
+            outlook = intel['earnings_outlook'][:60]
+            info_lines.append(f"📊 业绩: {outlook}")
+        
+        # 舆情情绪
+        if intel.get('sentiment_summary'):
+            sentiment = intel['sentiment_summary'][:50]
+            info_lines.append(f"💭 舆情: {sentiment}")
+        
+        if info_lines:
+            lines.extend(info_lines)
+            lines.append("")
+        
+        # 风险警报（最重要，醒目显示）
+        risks = intel.get('risk_alerts', []) if intel else []
+        if risks:
+            lines.append("🚨 **风险**:")
+            for risk in risks[:2]:  # 最多显示2条
+                risk_text = risk[:50] + "..." if len(risk) > 50 else risk
+                lines.append(f"   • {risk_text}")
+            lines.append("")
+        
+        # 利好催化
+        catalysts = intel.get('positive_catalysts', []) if intel else []
+        if catalysts:
+            lines.append("✨ **利好**:")
+            for cat in catalysts[:2]:  # 最多显示2条
+                cat_text = cat[:50] + "..." if len(cat) > 50 else cat
+                lines.append(f"   • {cat_text}")
+            lines.append("")
+        
+        # 狙击点位
+        sniper = battle.get('sniper_points', {}) if battle else {}
+        if sniper:
+            ideal_buy = sniper.get('ideal_buy', '')
+            stop_loss = sniper.get('stop_loss', '')
+            take_profit = sniper.get('take_profit', '')
+            
+            points = []
+            if ideal_buy:
+                points.append(f"🎯买点:{ideal_buy[:15]}")
+            if stop_loss:
+                points.append(f"🛑止损:{stop_loss[:15]}")
+            if take_profit:
+                points.append(f"🎊目标:{take_profit[:15]}")
+            
+            if points:
+                lines.append(" | ".join(points))
+                lines.append("")
+        
+        # 持仓建议
+        pos_advice = core.get('position_advice', {}) if core else {}
+        if pos_advice:
+            no_pos = pos_advice.get('no_position', '')
+            has_pos = pos_advice.get('has_position', '')
+            if no_pos:
+                lines.append(f"🆕 空仓者: {no_pos[:50]}")
+            if has_pos:
+                lines.append(f"💼 持仓者: {has_pos[:50]}")
+            lines.append("")
+        
+        # 检查清单简化版
+        checklist = battle.get('action_checklist', []) if battle else []
+        if checklist:
+            # 只显示不通过的项目
+            failed_checks = [c for c in checklist if c.startswith('❌') or c.startswith('⚠️')]
+            if failed_checks:
+                lines.append("**检查未通过项**:")
+                for check in failed_checks[:3]:
+                    lines.append(f"   {check[:40]}")
+                lines.append("")
+        
+        lines.append("---")
+        lines.append("")
+        
+        return "\n".join(lines)
+    
     def generate_wechat_summary(self, results: List[AnalysisResult]) -> str:
         """
         生成企业微信精简版日报（控制在4000字符内）
@@ -1003,30 +1377,8 @@ class NotificationService:
             "",
         ]
         
-        # 每只股票精简信息（控制长度）
-        for result in sorted_results:
-            emoji = result.get_emoji()
-            
-            # 核心信息行
-            lines.append(f"### {emoji} {result.name}({result.code})")
-            lines.append(f"**{result.operation_advice}** | 评分:{result.sentiment_score} | {result.trend_prediction}")
-            
-            # 操作理由（截断）
-            if hasattr(result, 'buy_reason') and result.buy_reason:
-                reason = result.buy_reason[:80] + "..." if len(result.buy_reason) > 80 else result.buy_reason
-                lines.append(f"💡 {reason}")
-            
-            # 核心看点
-            if hasattr(result, 'key_points') and result.key_points:
-                points = result.key_points[:60] + "..." if len(result.key_points) > 60 else result.key_points
-                lines.append(f"🎯 {points}")
-            
-            # 风险提示（截断）
-            if hasattr(result, 'risk_warning') and result.risk_warning:
-                risk = result.risk_warning[:50] + "..." if len(result.risk_warning) > 50 else result.risk_warning
-                lines.append(f"⚠️ {risk}")
-            
-            lines.append("")
+        # 每只股票精简信息（控制长度，片段按结果缓存）
+        lines.extend(self._render_fragments('wechat_summary', sorted_results, self._render_wechat_summary_block))
         
         # 底部
         lines.extend([
@@ -1039,6 +1391,34 @@ class NotificationService:
         
         return content
     
+    def _render_wechat_summary_block(self, result: AnalysisResult) -> str:
+        """渲染企业微信精简日报中单只股票的片段"""
+        lines = []
+        emoji = result.get_emoji()
+        
+        # 核心信息行
+        lines.append(f"### {emoji} {result.name}({result.code})")
+        lines.append(f"**{result.operation_advice}** | 评分:{result.sentiment_score} | {result.trend_prediction}")
+        
+        # 操作理由（截断）
+        if hasattr(result, 'buy_reason') and result.buy_reason:
+            reason = result.buy_reason[:80] + "..." if len(result.buy_reason) > 80 else result.buy_reason
+            lines.append(f"💡 {reason}")
+        
+        # 核心看点
+        if hasattr(result, 'key_points') and result.key_points:
+            points = result.key_points[:60] + "..." if len(result.key_points) > 60 else result.key_points
+            lines.append(f"🎯 {points}")
+        
+        # 风险提示（截断）
+        if hasattr(result, 'risk_warning') and result.risk_warning:
+            risk = result.risk_warning[:50] + "..." if len(result.risk_warning) > 50 else result.risk_warning
+            lines.append(f"⚠️ {risk}")
+        
+        lines.append("")
+        
+        return "\n".join(lines)
+    
     def generate_single_stock_report(self, result: AnalysisResult) -> str:
         """
         生成单只股票的分析报告（用于单股推送模式 #55）
@@ -1052,11 +1432,7 @@ class NotificationService:
             Markdown 格式的单股报告
         """
         report_date = datetime.now().strftime('%Y-%m-%d %H:%M')
-        signal_text, signal_emoji, _ = self._get_signal_level(result)
-        dashboard = result.dashboard if hasattr(result, 'dashboard') and result.dashboard else {}
-        core = dashboard.get('core_conclusion', {}) if dashboard else {}
-        battle = dashboard.get('battle_plan', {}) if dashboard else {}
-        intel = dashboard.get('intelligence', {}) if dashboard else {}
+        _, signal_emoji, _ = self._get_signal_level(result)
         
         # 股票名称
         stock_name = result.name if result.name and not result.name.startswith('股票') else f'股票{result.code}'
@@ -1066,8 +1442,22 @@ class NotificationService:
             "",
             f"> {report_date} | 评分: **{result.sentiment_score}** | {result.trend_prediction}",
             "",
+            # 报告正文与生成时间无关，按结果缓存
+            get_fragment_cache().render('single_stock', result, self._render_single_stock_body),
         ]
         
+        return "\n".join(lines)
+    
+    def _render_single_stock_body(self, result: AnalysisResult) -> str:
+        """渲染单股报告正文（核心结论、重要信息、操作点位、持仓建议）"""
+        signal_text, _, _ = self._get_signal_level(result)
+        dashboard = result.dashboard if hasattr(result, 'dashboard') and result.dashboard else {}
+        core = dashboard.get('core_conclusion', {}) if dashboard else {}
+        battle = dashboard.get('battle_plan', {}) if dashboard else {}
+        intel = dashboard.get('intelligence', {}) if dashboard else {}
+        
+        lines = []
+        
         # 核心决策（一句话）
         one_sentence = core.get('one_sentence', result.analysis_summary) if core else result.analysis_summary
         if one_sentence:
@@ -1206,7 +1596,7 @@ class NotificationService:
         """
         分批发送长消息到企业微信
         
-        按股票分析块（以 --- 或 ### 分隔）智能分割，确保每批不超过限制
+        按股票分析块（分隔线 / 标题 / 段落）切分，确保每批不超过限制
         
         Args:
             content: 完整消息内容
@@ -1217,70 +1607,8 @@ class NotificationService:
         """
         import time
         
-        def get_bytes(s: str) -> int:
-            """获取字符串的 UTF-8 字节数"""
-            return len(s.encode('utf-8'))
-        
-        # 智能分割：优先按 "---" 分隔（股票之间的分隔线）
-        # 其次尝试各级标题分割
-        if "\n---\n" in content:
-            sections = content.split("\n---\n")
-            separator = "\n---\n"
-        elif "\n### " in content:
-            # 按 ### 分割
-            parts = content.split("\n### ")
-            sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-            separator = "\n"
-        elif "\n## " in content:
-            # 按 ## 分割 (兼容二级标题)
-            parts = content.split("\n## ")
-            sections = [parts[0]] + [f"## {p}" for p in parts[1:]]
-            separator = "\n"
-        elif "\n**" in content:
-            # 按 ** 加粗标题分割 (兼容 AI 未输出标准 Markdown 标题的情况)
-            parts = content.split("\n**")
-            sections = [parts[0]] + [f"**{p}" for p in parts[1:]]
-            separator = "\n"
-        else:
-            # 无法智能分割，按字符强制分割
-            return self._send_wechat_force_chunked(content, max_bytes)
-        
-        chunks = []
-        current_chunk = []
-        current_bytes = 0
-        separator_bytes = get_bytes(separator)
-        
-        for section in sections:
-            section_bytes = get_bytes(section) + separator_bytes
-            
-            # 如果单个 section 就超长，需要强制截断
-            if section_bytes > max_bytes:
-                # 先发送当前积累的内容
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                    current_chunk = []
-                    current_bytes = 0
-                
-                # 强制截断这个超长 section（按字节截断）
-                truncated = self._truncate_to_bytes(section, max_bytes - 200)
-                truncated += "\n\n...(本段内容过长已截断)"
-                chunks.append(truncated)
-                continue
-            
-            # 检查加入后是否超长
-            if current_bytes + section_bytes > max_bytes:
-                # 保存当前块，开始新块
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_bytes = section_bytes
-            else:
-                current_chunk.append(section)
-                current_bytes += section_bytes
-        
-        # 添加最后一块
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
+        # 预留空间给分页标记
+        chunks = split_markdown_chunks(content, max_bytes - 100)
         
         # 分批发送
         total_chunks = len(chunks)
@@ -1311,53 +1639,6 @@ class NotificationService:
 
         return success_count == total_chunks
     
-    def _send_wechat_force_chunked(self, content: str, max_bytes: int) -> bool:
-        """
-        强制按字节分割发送（无法智能分割时的 fallback）
-        
-        Args:
-            content: 完整消息内容
-            max_bytes: 单条消息最大字节数
-        """
-        import time
-        
-        chunks = []
-        current_chunk = ""
-        
-        # 按行分割，确保不会在多字节字符中间截断
-        lines = content.split('\n')
-        
-        for line in lines:
-            test_chunk = current_chunk + ('\n' if current_chunk else '') + line
-            if len(test_chunk.encode('utf-8')) > max_bytes - 100:  # 预留空间给分页标记
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = line
-            else:
-                current_chunk = test_chunk
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        total_chunks = len(chunks)
-        success_count = 0
-        
-        logger.info(f"企业微信强制分批发送：共 {total_chunks} 批")
-        
-        for i, chunk in enumerate(chunks):
-            page_marker = f"\n\n📄 *({i+1}/{total_chunks})*" if total_chunks > 1 else ""
-            
-            try:
-                if self._send_wechat_message(chunk + page_marker):
-                    success_count += 1
-            except Exception as e:
-                logger.error(f"企业微信第 {i+1}/{total_chunks} 批发送异常: {e}")
-            
-            if i < total_chunks - 1:
-                time.sleep(1)
-        
-        return success_count == total_chunks
-    
     def _truncate_to_bytes(self, text: str, max_bytes: int) -> str:
         """
         按字节数截断字符串，确保不会在多字节字符中间截断
@@ -1404,7 +1685,7 @@ class NotificationService:
         """发送企业微信消息"""
         payload = self._gen_wechat_payload(content)
         
-        response = requests.post(
+        response = _get_http_session(self._wechat_url).post(
             self._wechat_url,
             json=payload,
             timeout=10
@@ -1470,7 +1751,7 @@ class NotificationService:
         """
         分批发送长消息到飞书
         
-        按股票分析块（以 --- 或 ### 分隔）智能分割，确保每批不超过限制
+        按股票分析块（分隔线 / 标题 / 段落）切分，确保每批不超过限制
         
         Args:
             content: 完整消息内容
@@ -1481,60 +1762,8 @@ class NotificationService:
         """
         import time
         
-        def get_bytes(s: str) -> int:
-            """获取字符串的 UTF-8 字节数"""
-            return len(s.encode('utf-8'))
-        
-        # 智能分割：优先按 "---" 分隔（股票之间的分隔线）
-        # 如果没有分隔线，按 "### " 标题分割（每只股票的标题）
-        if "\n---\n" in content:
-            sections = content.split("\n---\n")
-            separator = "\n---\n"
-        elif "\n### " in content:
-            # 按 ### 分割，但保留 ### 前缀
-            parts = content.split("\n### ")
-            sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-            separator = "\n"
-        else:
-            # 无法智能分割，按行强制分割
-            return self._send_feishu_force_chunked(content, max_bytes)
-        
-        chunks = []
-        current_chunk = []
-        current_bytes = 0
-        separator_bytes = get_bytes(separator)
-        
-        for section in sections:
-            section_bytes = get_bytes(section) + separator_bytes
-            
-            # 如果单个 section 就超长，需要强制截断
-            if section_bytes > max_bytes:
-                # 先发送当前积累的内容
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                    current_chunk = []
-                    current_bytes = 0
-                
-                # 强制截断这个超长 section（按字节截断）
-                truncated = self._truncate_to_bytes(section, max_bytes - 200)
-                truncated += "\n\n...(本段内容过长已截断)"
-                chunks.append(truncated)
-                continue
-            
-            # 检查加入后是否超长
-            if current_bytes + section_bytes > max_bytes:
-                # 保存当前块，开始新块
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_bytes = section_bytes
-            else:
-                current_chunk.append(section)
-                current_bytes += section_bytes
-        
-        # 添加最后一块
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
+        # 预留空间给分页标记
+        chunks = split_markdown_chunks(content, max_bytes - 100)
         
         # 分批发送
         total_chunks = len(chunks)
@@ -1565,60 +1794,13 @@ class NotificationService:
         
         return success_count == total_chunks
     
-    def _send_feishu_force_chunked(self, content: str, max_bytes: int) -> bool:
-        """
-        强制按字节分割发送（无法智能分割时的 fallback）
-        
-        Args:
-            content: 完整消息内容
-            max_bytes: 单条消息最大字节数
-        """
-        import time
-        
-        chunks = []
-        current_chunk = ""
-        
-        # 按行分割，确保不会在多字节字符中间截断
-        lines = content.split('\n')
-        
-        for line in lines:
-            test_chunk = current_chunk + ('\n' if current_chunk else '') + line
-            if len(test_chunk.encode('utf-8')) > max_bytes - 100:  # 预留空间给分页标记
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = line
-            else:
-                current_chunk = test_chunk
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        total_chunks = len(chunks)
-        success_count = 0
-        
-        logger.info(f"飞书强制分批发送：共 {total_chunks} 批")
-        
-        for i, chunk in enumerate(chunks):
-            page_marker = f"\n\n📄 ({i+1}/{total_chunks})" if total_chunks > 1 else ""
-            
-            try:
-                if self._send_feishu_message(chunk + page_marker):
-                    success_count += 1
-            except Exception as e:
-                logger.error(f"飞书第 {i+1}/{total_chunks} 批发送异常: {e}")
-            
-            if i < total_chunks - 1:
-                time.sleep(1)
-        
-        return success_count == total_chunks
-    
     def _send_feishu_message(self, content: str) -> bool:
         """发送单条飞书消息（优先使用 Markdown 卡片）"""
         def _post_payload(payload: Dict[str, Any]) -> bool:
             logger.debug(f"飞书请求 URL: {self._feishu_url}")
             logger.debug(f"飞书请求 payload 长度: {len(content)} 字符")
 
-            response = requests.post(
+            response = _get_http_session(self._feishu_url).post(
                 self._feishu_url,
                 json=payload,
                 timeout=30
@@ -1736,18 +1918,8 @@ class NotificationService:
                 use_ssl = True
                 logger.warning(f"未知邮箱类型 {domain}，尝试通用配置: {smtp_server}:{smtp_port}")
             
-            # 根据配置选择连接方式
-            if use_ssl:
-                # SSL 连接（端口 465）
-                server = smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=30)
-            else:
-                # TLS 连接（端口 587）
-                server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
-                server.starttls()
-            
-            server.login(sender, password)
-            server.send_message(msg)
-            server.quit()
+            # 复用已登录的 SMTP 连接（SSL 端口 465 / STARTTLS 端口 587）
+            _smtp_connections.send(smtp_server, smtp_port, use_ssl, sender, password, msg)
             
             logger.info(f"邮件发送成功，收件人: {receivers}")
             return True
@@ -1766,115 +1938,13 @@ class NotificationService:
         """
         将 Markdown 转换为 HTML，支持表格并优化排版
 
-        使用 markdown2 库进行转换，并添加优化的 CSS 样式
+        由共享的 Markdown 语法树渲染（同一内容只解析、渲染一次，邮件与 AstrBot 共用），
+        并添加优化的 CSS 样式
         解决问题：
         1. 邮件表格未渲染问题
         2. 邮件内容排版过于松散问题
         """
-        # 使用 markdown2 转换，开启表格和其他扩展支持
-        html_content = markdown2.markdown(
-            markdown_text,
-            extras=["tables", "fenced-code-blocks", "break-on-newline", "cuddled-lists"]
-        )
-
-        # 优化 CSS 样式：更紧凑的排版，美观的表格
-        css_style = """
-            body {
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Helvetica, Arial, sans-serif;
-                line-height: 1.5;
-                color: #24292e;
-                font-size: 14px;
-                padding: 15px;
-                max-width: 900px;
-                margin: 0 auto;
-            }
-            h1 {
-                font-size: 20px;
-                border-bottom: 1px solid #eaecef;
-                padding-bottom: 0.3em;
-                margin-top: 1.2em;
-                margin-bottom: 0.8em;
-                color: #0366d6;
-            }
-            h2 {
-                font-size: 18px;
-                border-bottom: 1px solid #eaecef;
-                padding-bottom: 0.3em;
-                margin-top: 1.0em;
-                margin-bottom: 0.6em;
-            }
-            h3 {
-                font-size: 16px;
-                margin-top: 0.8em;
-                margin-bottom: 0.4em;
-            }
-            p {
-                margin-top: 0;
-                margin-bottom: 8px;
-            }
-            /* 表格样式优化 */
-            table {
-                border-collapse: collapse;
-                width: 100%;
-                margin: 12px 0;
-                display: block;
-                overflow-x: auto;
-                font-size: 13px;
-            }
-            th, td {
-                border: 1px solid #dfe2e5;
-                padding: 6px 10px;
-                text-align: left;
-            }
-            th {
-                background-color: #f6f8fa;
-                font-weight: 600;
-            }
-            tr:nth-child(2n) {
-                background-color: #f8f8f8;
-            }
-            tr:hover {
-                background-color: #f1f8ff;
-            }
-            /* 引用块样式 */
-            blockquote {
-                color: #6a737d;
-                border-left: 0.25em solid #dfe2e5;
-                padding: 0 1em;
-                margin: 0 0 10px 0;
-            }
-            /* 代码块样式 */
-            code {
-                padding: 0.2em 0.4em;
-                margin: 0;
-                font-size: 85%;
-                background-color: rgba(27,31,35,0.05);
-                border-radius: 3px;
-                font-family: SFMono-Regular, Consolas, "Liberation Mono", Menlo, monospace;
-            }
-            pre {
-                padding: 12px;
-                overflow: auto;
-                line-height: 1.45;
-                background-color: #f6f8fa;
-                border-radius: 3px;
-                margin-bottom: 10px;
-            }
-            hr {
-                height: 0.25em;
-                padding: 0;
-                margin: 16px 0;
-                background-color: #e1e4e8;
-                border: 0;
-            }
-            ul, ol {
-                padding-left: 20px;
-                margin-bottom: 10px;
-            }
-            li {
-                margin: 2px 0;
-            }
-        """
+        html_content = parse_markdown(markdown_text).to_html()
 
         return f"""
         <!DOCTYPE html>
@@ -1882,7 +1952,7 @@ class NotificationService:
         <head>
             <meta charset="utf-8">
             <style>
-                {css_style}
+                {_EMAIL_CSS}
             </style>
         </head>
         <body>
@@ -1900,7 +1970,7 @@ class NotificationService:
         {
             "chat_id": "xxx",
             "text": "消息内容",
-            "parse_mode": "Markdown"
+            "parse_mode": "MarkdownV2"
         }
         
         Args:
@@ -1921,10 +1991,10 @@ class NotificationService:
             # Telegram API 端点
             api_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
             
-            # Telegram 消息最大长度 4096 字符
+            # Telegram 消息最大长度 4096 字符（按 MarkdownV2 转义后的长度计算）
             max_length = 4096
             
-            if len(content) <= max_length:
+            if len(self._convert_to_telegram_markdown(content)) <= max_length:
                 # 单条消息发送
                 return self._send_telegram_message(api_url, chat_id, content, message_thread_id)
             else:
@@ -1946,14 +2016,14 @@ class NotificationService:
         payload = {
             "chat_id": chat_id,
             "text": telegram_text,
-            "parse_mode": "Markdown",
+            "parse_mode": "MarkdownV2",
             "disable_web_page_preview": True
         }
 
         if message_thread_id:
             payload['message_thread_id'] = message_thread_id
         
-        response = requests.post(api_url, json=payload, timeout=10)
+        response = _get_http_session(api_url).post(api_url, json=payload, timeout=10)
         
         if response.status_code == 200:
             result = response.json()
@@ -1971,7 +2041,7 @@ class NotificationService:
                     payload['text'] = text  # 使用原始文本
                     del payload['parse_mode']
                     
-                    response = requests.post(api_url, json=payload, timeout=10)
+                    response = _get_http_session(api_url).post(api_url, json=payload, timeout=10)
                     if response.status_code == 200 and response.json().get('ok'):
                         logger.info("Telegram 消息发送成功（纯文本）")
                         return True
@@ -1983,38 +2053,12 @@ class NotificationService:
             return False
     
     def _send_telegram_chunked(self, api_url: str, chat_id: str, content: str, max_length: int, message_thread_id: Optional[str] = None) -> bool:
-        """分段发送长 Telegram 消息"""
-        # 按段落分割
-        sections = content.split("\n---\n")
-        
-        current_chunk = []
-        current_length = 0
+        """分段发送长 Telegram 消息（按 MarkdownV2 转换后的字符数计长度）"""
+        chunks = split_telegram_chunks(content, max_length)
         all_success = True
-        chunk_index = 1
         
-        for section in sections:
-            section_length = len(section) + 5  # +5 for "\n---\n"
-            
-            if current_length + section_length > max_length:
-                # 发送当前块
-                if current_chunk:
-                    chunk_content = "\n---\n".join(current_chunk)
-                    logger.info(f"发送 Telegram 消息块 {chunk_index}...")
-                    if not self._send_telegram_message(api_url, chat_id, chunk_content, message_thread_id):
-                        all_success = False
-                    chunk_index += 1
-                
-                # 重置
-                current_chunk = [section]
-                current_length = section_length
-            else:
-                current_chunk.append(section)
-                current_length += section_length
-        
-        # 发送最后一块
-        if current_chunk:
-            chunk_content = "\n---\n".join(current_chunk)
-            logger.info(f"发送 Telegram 消息块 {chunk_index}...")
+        for chunk_index, chunk_content in enumerate(chunks, 1):
+            logger.info(f"发送 Telegram 消息块 {chunk_index}/{len(chunks)}...")
             if not self._send_telegram_message(api_url, chat_id, chunk_content, message_thread_id):
                 all_success = False
                 
@@ -2022,27 +2066,14 @@ class NotificationService:
     
     def _convert_to_telegram_markdown(self, text: str) -> str:
         """
-        将标准 Markdown 转换为 Telegram 支持的格式
+        将标准 Markdown 转换为 Telegram MarkdownV2 格式（parse_mode=MarkdownV2）
         
-        Telegram Markdown 限制：
-        - 不支持 # 标题
-        - 使用 *bold* 而非 **bold**
-        - 使用 _italic_ 
+        由共享的 Markdown 语法树渲染：
+        - 标题转为加粗（Telegram 不支持 # 标题）
+        - **bold** 转为 *bold*，*italic* 转为 _italic_
+        - 普通文本中的特殊字符按 MarkdownV2 规则转义
         """
-        result = text
-        
-        # 移除 # 标题标记（Telegram 不支持）
-        result = re.sub(r'^#{1,6}\s+', '', result, flags=re.MULTILINE)
-        
-        # 转换 **bold** 为 *bold*
-        result = re.sub(r'\*\*(.+?)\*\*', r'*\1*', result)
-        
-        # 转义特殊字符（Telegram Markdown 需要）
-        # 注意：不转义已经用于格式的 * _ `
-        for char in ['[', ']', '(', ')']:
-            result = result.replace(char, f'\\{char}')
-        
-        return result
+        return parse_markdown(text).to_telegram()
     
     def send_to_pushover(self, content: str, title: Optional[str] = None) -> bool:
         """
@@ -2102,36 +2133,9 @@ class NotificationService:
         """
         将 Markdown 转换为纯文本
         
-        移除 Markdown 格式标记，保留可读性
+        移除 Markdown 格式标记，保留可读性（由共享的 Markdown 语法树渲染）
         """
-        text = markdown_text
-        
-        # 移除标题标记 # ## ###
-        text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
-        
-        # 移除加粗 **text** -> text
-        text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-        
-        # 移除斜体 *text* -> text
-        text = re.sub(r'\*(.+?)\*', r'\1', text)
-        
-        # 移除引用 > text -> text
-        text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
-        
-        # 移除列表标记 - item -> item
-        text = re.sub(r'^[-*]\s+', '• ', text, flags=re.MULTILINE)
-        
-        # 移除分隔线 ---
-        text = re.sub(r'^---+$', '────────', text, flags=re.MULTILINE)
-        
-        # 移除表格语法 |---|---|
-        text = re.sub(r'\|[-:]+\|[-:|\s]+\|', '', text)
-        text = re.sub(r'^\|(.+)\|$', r'\1', text, flags=re.MULTILINE)
-        
-        # 清理多余空行
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        return text.strip()
+        return parse_markdown(markdown_text).to_plain_text()
     
     def _send_pushover_message(
         self, 
@@ -2162,7 +2166,7 @@ class NotificationService:
                 "priority": priority,
             }
             
-            response = requests.post(api_url, data=payload, timeout=30)
+            response = _get_http_session(api_url).post(api_url, data=payload, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -2324,84 +2328,19 @@ class NotificationService:
         if self._custom_webhook_bearer_token:
             headers['Authorization'] = f'Bearer {self._custom_webhook_bearer_token}'
         body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
-        response = requests.post(url, data=body, headers=headers, timeout=timeout)
+        response = _get_http_session(url).post(url, data=body, headers=headers, timeout=timeout)
         if response.status_code == 200:
             return True
         logger.error(f"自定义 Webhook 推送失败: HTTP {response.status_code}")
         logger.debug(f"响应内容: {response.text[:200]}")
         return False
 
-    def _chunk_markdown_by_bytes(self, content: str, max_bytes: int) -> List[str]:
-        def get_bytes(s: str) -> int:
-            return len(s.encode('utf-8'))
-
-        def split_by_bytes(text: str, limit: int) -> List[str]:
-            parts: List[str] = []
-            remaining = text
-            while remaining:
-                part = self._truncate_to_bytes(remaining, limit)
-                if not part:
-                    break
-                parts.append(part)
-                remaining = remaining[len(part):]
-            return parts
-
-        # 优先按分隔线/标题分割，保证分页自然
-        if "\n---\n" in content:
-            sections = content.split("\n---\n")
-            separator = "\n---\n"
-        elif "\n### " in content:
-            parts = content.split("\n### ")
-            sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-            separator = "\n"
-        else:
-            # fallback：按行拼接
-            sections = content.split("\n")
-            separator = "\n"
-
-        chunks: List[str] = []
-        current_chunk: List[str] = []
-        current_bytes = 0
-        sep_bytes = get_bytes(separator)
-
-        for section in sections:
-            section_bytes = get_bytes(section)
-            extra = sep_bytes if current_chunk else 0
-
-            # 单段超长：截断
-            if section_bytes + extra > max_bytes:
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                    current_chunk = []
-                    current_bytes = 0
-
-                # 无法按结构拆分时，按字节强制拆分，避免整段被截断丢失
-                for part in split_by_bytes(section, max(200, max_bytes - 200)):
-                    chunks.append(part)
-                continue
-
-            if current_bytes + section_bytes + extra > max_bytes:
-                chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_bytes = section_bytes
-            else:
-                if current_chunk:
-                    current_bytes += sep_bytes
-                current_chunk.append(section)
-                current_bytes += section_bytes
-
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
-
-        # 移除空块
-        return [c for c in (c.strip() for c in chunks) if c]
-
     def _send_dingtalk_chunked(self, url: str, content: str, max_bytes: int = 20000) -> bool:
         import time as _time
 
         # 为 payload 开销预留空间，避免 body 超限
         budget = max(1000, max_bytes - 1500)
-        chunks = self._chunk_markdown_by_bytes(content, budget)
+        chunks = split_markdown_chunks(content, budget)
         if not chunks:
             return False
 
@@ -2584,41 +2523,7 @@ class NotificationService:
         """
         import time
         
-        def get_bytes(s: str) -> int:
-            return len(s.encode('utf-8'))
-        
-        # 按段落或分隔线分割
-        if "\n---\n" in content:
-            sections = content.split("\n---\n")
-            separator = "\n---\n"
-        elif "\n### " in content:
-            parts = content.split("\n### ")
-            sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-            separator = "\n"
-        else:
-            # 按行分割
-            sections = content.split("\n")
-            separator = "\n"
-        
-        chunks = []
-        current_chunk = []
-        current_bytes = 0
-        separator_bytes = get_bytes(separator)
-        
-        for section in sections:
-            section_bytes = get_bytes(section) + separator_bytes
-            
-            if current_bytes + section_bytes > max_bytes:
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_bytes = section_bytes
-            else:
-                current_chunk.append(section)
-                current_bytes += section_bytes
-        
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
+        chunks = split_markdown_chunks(content, max_bytes)
         
         # 发送每个分块
         success = True
@@ -2677,7 +2582,7 @@ class NotificationService:
                 "template": "markdown"  # 使用 Markdown 格式
             }
 
-            response = requests.post(api_url, json=payload, timeout=10)
+            response = _get_http_session(api_url).post(api_url, json=payload, timeout=10)
 
             if response.status_code == 200:
                 result = response.json()
@@ -2755,7 +2660,7 @@ class NotificationService:
             headers = {
                 'Content-Type': 'application/json;charset=utf-8'
             }
-            response = requests.post(url, json=params, headers=headers, timeout=10)
+            response = _get_http_session(url).post(url, json=params, headers=headers, timeout=10)
 
             if response.status_code == 200:
                 result = response.json()
@@ -2831,7 +2736,7 @@ class NotificationService:
                 'avatar_url': 'https://picsum.photos/200'
             }
             
-            response = requests.post(
+            response = _get_http_session(self._discord_config['webhook_url']).post(
                 self._discord_config['webhook_url'],
                 json=payload,
                 timeout=10
@@ -2868,7 +2773,7 @@ class NotificationService:
             }
             
             url = f'https://discord.com/api/v10/channels/{self._discord_config["channel_id"]}/messages'
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = _get_http_session(url).post(url, json=payload, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 logger.info("Discord Bot 消息发送成功")
@@ -2911,7 +2816,7 @@ class NotificationService:
                     hashlib.sha256
                 ).hexdigest()
             url = self._astrbot_config['astrbot_url']
-            response = requests.post(url, json=payload, timeout=10,headers={
+            response = _get_http_session(url).post(url, json=payload, timeout=10,headers={
                         "Content-Type": "application/json",
                         "X-Signature": signature,
                         "X-Timestamp": timestamp
@@ -2931,7 +2836,7 @@ class NotificationService:
         """
         统一发送接口 - 向所有已配置的渠道发送
         
-        遍历所有已配置的渠道，逐一发送消息
+        各渠道并发发送（同一渠道内分段顺序不变），详细结果见 deliver()
         
         Args:
             content: 消息内容（Markdown 格式）
@@ -2939,98 +2844,150 @@ class NotificationService:
         Returns:
             是否至少有一个渠道发送成功
         """
-        context_success = self.send_to_context(content)
-
-        if not self._available_channels:
-            if context_success:
-                logger.info("已通过消息上下文渠道完成推送（无其他通知渠道）")
-                return True
+        results = self.deliver(content)
+        return any(result.success for result in results)
+    
+    def deliver(
+        self,
+        content: str,
+        deadline: Optional[float] = None,
+        channel_contents: Optional[Dict[NotificationChannel, str]] = None
+    ) -> List[ChannelDeliveryResult]:
+        """
+        向消息上下文渠道和所有已配置渠道并发推送，返回各渠道的推送结果
+        
+        Args:
+            content: 消息内容（Markdown 格式）
+            deadline: 整体截止时间（秒），默认 NOTIFICATION_DEADLINE；
+                      超时渠道记为失败，其发送通道中的任务继续在后台完成
+            channel_contents: 个别渠道使用的不同内容（如企业微信精简版）
+            
+        Returns:
+            各渠道推送结果（消息上下文渠道在前，其余按渠道配置顺序）
+        """
+        channel_contents = channel_contents or {}
+        senders: List[tuple] = []
+        if self._has_context_channel():
+            senders.append(("context", "消息上下文", self.send_to_context, content))
+        for channel in self._available_channels:
+            sender = self._get_channel_sender(channel)
+            if sender is None:
+                logger.warning(f"不支持的通知渠道: {channel}")
+                continue
+            senders.append((
+                channel.value, ChannelDetector.get_channel_name(channel), sender,
+                channel_contents.get(channel, content)
+            ))
+        
+        if not senders:
             logger.warning("通知服务不可用，跳过推送")
-            return False
+            self.last_delivery = []
+            return []
         
-        channel_names = self.get_channel_names()
-        logger.info(f"正在向 {len(self._available_channels)} 个渠道发送通知：{channel_names}")
+        if self._available_channels:
+            logger.info(f"正在向 {len(self._available_channels)} 个渠道发送通知：{self.get_channel_names()}")
         
-        success_count = 0
-        fail_count = 0
+        deadline = self._notification_deadline if deadline is None else deadline
+        started = time.monotonic()
         
-        for channel in self._available_channels:
-            channel_name = ChannelDetector.get_channel_name(channel)
+        def run(sender: Callable[[str], bool], message: str) -> tuple:
+            lane_started = time.monotonic()
+            return bool(sender(message)), time.monotonic() - lane_started
+        
+        futures: Dict[Future, tuple] = {
+            _get_channel_lane(key).submit(run, sender, message): (key, name)
+            for key, name, sender, message in senders
+        }
+        wait(futures, timeout=deadline)
+        
+        results: List[ChannelDeliveryResult] = []
+        for future, (key, name) in futures.items():
+            if not future.done():
+                results.append(ChannelDeliveryResult(
+                    key, name, success=False, elapsed=time.monotonic() - started,
+                    timed_out=True, error=f"超过推送截止时间 {deadline}s"
+                ))
+                continue
             try:
-                if channel == NotificationChannel.WECHAT:
-                    result = self.send_to_wechat(content)
-                elif channel == NotificationChannel.FEISHU:
-                    result = self.send_to_feishu(content)
-                elif channel == NotificationChannel.TELEGRAM:
-                    result = self.send_to_telegram(content)
-                elif channel == NotificationChannel.EMAIL:
-                    result = self.send_to_email(content)
-                elif channel == NotificationChannel.PUSHOVER:
-                    result = self.send_to_pushover(content)
-                elif channel == NotificationChannel.PUSHPLUS:
-                    result = self.send_to_pushplus(content)
-                elif channel == NotificationChannel.SERVERCHAN3:
-                    result = self.send_to_serverchan3(content)
-                elif channel == NotificationChannel.CUSTOM:
-                    result = self.send_to_custom(content)
-                elif channel == NotificationChannel.DISCORD:
-                    result = self.send_to_discord(content)
-                elif channel == NotificationChannel.ASTRBOT:
-                    result = self.send_to_astrbot(content)
-                else:
-                    logger.warning(f"不支持的通知渠道: {channel}")
-                    result = False
-                
-                if result:
-                    success_count += 1
-                else:
-                    fail_count += 1
-                    
+                success, elapsed = future.result()
+                results.append(ChannelDeliveryResult(key, name, success=success, elapsed=elapsed))
             except Exception as e:
-                logger.error(f"{channel_name} 发送失败: {e}")
-                fail_count += 1
+                logger.error(f"{name} 发送失败: {e}")
+                results.append(ChannelDeliveryResult(key, name, success=False, error=str(e)))
+        
+        self.last_delivery = results
+        for r in results:
+            get_metrics().record(STAGE_NOTIFY, r.elapsed, source=r.channel, success=r.success)
+        summary = "，".join(
+            f"{r.name} {'成功' if r.success else ('超时' if r.timed_out else '失败')}({r.elapsed:.1f}s)"
+            for r in results
+        )
+        success_count = sum(1 for r in results if r.success)
+        logger.info(f"通知发送完成：成功 {success_count} 个，失败 {len(results) - success_count} 个，"
+                    f"总耗时 {time.monotonic() - started:.1f}s [{summary}]")
+        return results
+    
+    def enqueue(
+        self,
+        content: str,
+        channel_contents: Optional[Dict[NotificationChannel, str]] = None,
+        scope: Optional[str] = None
+    ) -> bool:
+        """
+        写入发件箱由后台线程投递（不阻塞调用方，进程崩溃后可继续投递）
+        
+        消息上下文渠道（会话临时 Webhook）不进入发件箱，仍直接发送。
+        
+        Args:
+            content: 消息内容（Markdown 格式）
+            channel_contents: 个别渠道使用的不同内容（如企业微信精简版）
+            scope: 幂等范围（如运行 ID），同一范围内相同消息只入队一次；为空时按时间窗口去重
+            
+        Returns:
+            是否有新消息入队（或已通过消息上下文渠道发送）；相同消息已在发件箱中时返回 False
+        """
+        from src.notification_outbox import get_outbox_dispatcher
         
-        logger.info(f"通知发送完成：成功 {success_count} 个，失败 {fail_count} 个")
-        return success_count > 0 or context_success
+        context_success = self.send_to_context(content) if self._has_context_channel() else False
+        if not self._available_channels:
+            return context_success
+        
+        channel_contents = channel_contents or {}
+        added = get_outbox_dispatcher().enqueue({
+            channel: channel_contents.get(channel, content) for channel in self._available_channels
+        }, scope=scope)
+        if not added:
+            logger.info(f"发件箱中已有相同消息，未重复入队：{self.get_channel_names()}")
+            return context_success
+        logger.info(f"已写入发件箱 {added} 条消息，等待后台投递：{self.get_channel_names()}")
+        return True
+    
+    def _get_channel_sender(self, channel: NotificationChannel) -> Optional[Callable[[str], bool]]:
+        """获取渠道的发送方法"""
+        return {
+            NotificationChannel.WECHAT: self.send_to_wechat,
+            NotificationChannel.FEISHU: self.send_to_feishu,
+            NotificationChannel.TELEGRAM: self.send_to_telegram,
+            NotificationChannel.EMAIL: self.send_to_email,
+            NotificationChannel.PUSHOVER: self.send_to_pushover,
+            NotificationChannel.PUSHPLUS: self.send_to_pushplus,
+            NotificationChannel.SERVERCHAN3: self.send_to_serverchan3,
+            NotificationChannel.CUSTOM: self.send_to_custom,
+            NotificationChannel.DISCORD: self.send_to_discord,
+            NotificationChannel.ASTRBOT: self.send_to_astrbot,
+        }.get(channel)
     
     def _send_chunked_messages(self, content: str, max_length: int) -> bool:
         """
         分段发送长消息
         
-        按段落（---）分割，确保每段不超过最大长度
+        按结构（分隔线 / 标题 / 段落）切分，确保每段不超过最大长度（按字符计）
         """
-        # 按分隔线分割
-        sections = content.split("\n---\n")
-        
-        current_chunk = []
-        current_length = 0
+        chunks = split_markdown_chunks(content, max_length, count_bytes=False)
         all_success = True
-        chunk_index = 1
-        
-        for section in sections:
-            section_with_divider = section + "\n---\n"
-            section_length = len(section_with_divider)
-            
-            if current_length + section_length > max_length:
-                # 发送当前块
-                if current_chunk:
-                    chunk_content = "\n---\n".join(current_chunk)
-                    logger.info(f"发送消息块 {chunk_index}...")
-                    if not self.send(chunk_content):
-                        all_success = False
-                    chunk_index += 1
-                
-                # 重置
-                current_chunk = [section]
-                current_length = section_length
-            else:
-                current_chunk.append(section)
-                current_length += section_length
         
-        # 发送最后一块
-        if current_chunk:
-            chunk_content = "\n---\n".join(current_chunk)
-            logger.info(f"发送消息块 {chunk_index}（最后）...")
+        for chunk_index, chunk_content in enumerate(chunks, 1):
+            logger.info(f"发送消息块 {chunk_index}/{len(chunks)}...")
             if not self.send(chunk_content):
                 all_success = False
         
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 通知发件箱投递
+===================================
+
+职责：
+1. 入队时按渠道长度上限切分长消息，每个分段一条发件箱记录（幂等键含幂等范围与分段序号）
+2. 每个渠道一个后台投递线程，按分段限流发送，保持渠道内消息顺序
+3. 发送失败按指数退避重试（只重发失败的分段，其后的分段等它送达后再发），超过最大次数标记为失败
+4. 进程重启后继续投递上次未送达的消息
+5. 定期清理过期的已送达记录
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.formatters import split_markdown_chunks
+from src.metrics import get_metrics, STAGE_NOTIFY
+from src.notification import ChannelDetector, NotificationChannel, NotificationService, split_telegram_chunks
+from src.storage import DatabaseManager, get_db
+
+logger = logging.getLogger(__name__)
+
+
+# 各渠道单条消息长度上限：(长度, 是否按 UTF-8 字节计)；未列出的渠道不切分（由发送方法自行处理）
+# 企业微信、飞书的上限取配置 WECHAT_MAX_BYTES / FEISHU_MAX_BYTES
+CHANNEL_CHUNK_LIMITS: Dict[str, Tuple[int, bool]] = {
+    NotificationChannel.WECHAT.value: (4000, True),
+    NotificationChannel.FEISHU.value: (20000, True),
+    NotificationChannel.TELEGRAM.value: (4096, False),
+    NotificationChannel.DISCORD.value: (2000, False),
+}
+PAGE_MARKER_RESERVE = 100  # 为分页标记预留的长度
+
+# 各渠道每分钟最多发送的消息数（按分段计）（参考各平台机器人/接口的频率限制，取保守值）
+CHANNEL_RATE_LIMITS: Dict[str, int] = {
+    NotificationChannel.WECHAT.value: 20,       # 企业微信群机器人 20 条/分钟
+    NotificationChannel.FEISHU.value: 100,      # 飞书自定义机器人 100 次/分钟
+    NotificationChannel.TELEGRAM.value: 20,     # Telegram 同一群组 20 条/分钟
+    NotificationChannel.EMAIL.value: 30,
+    NotificationChannel.PUSHOVER.value: 60,
+    NotificationChannel.PUSHPLUS.value: 10,
+    NotificationChannel.SERVERCHAN3.value: 10,
+    NotificationChannel.CUSTOM.value: 20,       # 钉钉等自定义 Webhook 20 条/分钟
+    NotificationChannel.DISCORD.value: 30,      # Discord Webhook 30 条/分钟
+    NotificationChannel.ASTRBOT.value: 60,
+}
+DEFAULT_RATE_LIMIT = 20
+
+RETRY_BASE_DELAY = 30       # 首次重试等待（秒），之后每次翻倍
+RETRY_MAX_DELAY = 30 * 60   # 单次重试最长等待（秒）
+MAX_ATTEMPTS = 5            # 超过后标记为 failed
+POLL_INTERVAL = 5.0         # 无消息时的轮询间隔（秒），入队时会立即唤醒
+
+DEDUP_WINDOW = 60 * 60      # 未指定幂等范围时按时间窗口去重（秒）：窗口内相同消息只发一次
+RETENTION_DAYS = 7          # 已送达 / 已放弃记录的保留天数
+PRUNE_INTERVAL = 60 * 60    # 清理过期记录的最小间隔（秒）
+
+
+class _RateLimiter:
+    """滑动窗口限流（每分钟最多 limit 次）"""
+
+    def __init__(self, limit: int, window: float = 60.0):
+        self._limit = limit
+        self._window = window
+        self._sent: Deque[float] = deque()
+
+    def acquire(self, stop_event: threading.Event) -> bool:
+        """等待可发送的名额；投递器停止时返回 False"""
+        while True:
+            now = time.monotonic()
+            while self._sent and now - self._sent[0] >= self._window:
+                self._sent.popleft()
+            if len(self._sent) < self._limit:
+                self._sent.append(now)
+                return True
+            if stop_event.wait(self._window - (now - self._sent[0])):
+                return False
+
+
+class OutboxDispatcher:
+    """
+    发件箱投递器（进程内单例，见 get_outbox_dispatcher）
+
+    每个渠道一个后台线程串行投递，渠道之间互不阻塞；分析线程只负责入队。
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, notifier: Optional[NotificationService] = None):
+        self._db = db or get_db()
+        # 投递只使用全局配置的渠道（消息上下文渠道为会话临时渠道，不进入发件箱）
+        self._notifier = notifier or NotificationService()
+        self._stop_event = threading.Event()
+        self._wakeups: Dict[str, threading.Event] = {}
+        self._workers: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+        self._prune()
+        recovered = self._db.requeue_interrupted_notifications()
+        if recovered:
+            logger.info(f"[发件箱] 恢复上次中断的 {recovered} 条消息")
+        for channel in self._db.get_outbox_backlog():
+            self._ensure_worker(channel)
+
+    def enqueue(self, channel_contents: Dict[NotificationChannel, str], scope: Optional[str] = None) -> int:
+        """
+        消息写入发件箱并唤醒对应渠道的投递线程
+
+        Args:
+            channel_contents: {渠道: 消息内容}
+            scope: 幂等范围（如运行 ID），同一范围内相同消息只入队一次；
+                   为空时按 DEDUP_WINDOW 时间窗口去重
+
+        Returns:
+            新入队条数（重复消息不计）
+        """
+        self._prune()
+        scope = scope or f"window:{int(time.time() // DEDUP_WINDOW)}"
+        messages = []
+        for channel, content in channel_contents.items():
+            if not content:
+                continue
+            message_id = self._db.build_outbox_message_id(content, scope)
+            for index, chunk in enumerate(self._split(channel.value, content)):
+                messages.append({
+                    'channel': channel.value,
+                    'content': chunk,
+                    'message_id': message_id,
+                    'chunk_index': index,
+                    'chunk_id': self._db.build_outbox_chunk_id(channel.value, message_id, index),
+                })
+        added = self._db.enqueue_notifications(messages)
+        for channel in {message['channel'] for message in messages}:
+            self._ensure_worker(channel).set()
+        return added
+
+    def _prune(self) -> None:
+        """清理过期的已送达 / 已放弃记录（至多每 PRUNE_INTERVAL 秒一次）"""
+        with self._lock:
+            now = time.monotonic()
+            if self._last_prune and now - self._last_prune < PRUNE_INTERVAL:
+                return
+            self._last_prune = now
+        try:
+            pruned = self._db.prune_outbox(RETENTION_DAYS)
+        except Exception as e:
+            logger.warning(f"[发件箱] 清理过期记录失败: {e}")
+            return
+        if pruned:
+            logger.info(f"[发件箱] 清理 {pruned} 条 {RETENTION_DAYS} 天前的已完成记录")
+
+    def _split(self, channel: str, content: str) -> List[str]:
+        """按渠道长度上限切分消息，多段时追加分页标记"""
+        limit = CHANNEL_CHUNK_LIMITS.get(channel)
+        if limit is None:
+            return [content]
+        max_size, count_bytes = limit
+        if channel == NotificationChannel.WECHAT.value:
+            max_size = getattr(self._notifier, '_wechat_max_bytes', max_size)
+        elif channel == NotificationChannel.FEISHU.value:
+            max_size = getattr(self._notifier, '_feishu_max_bytes', max_size)
+
+        if channel == NotificationChannel.TELEGRAM.value:
+            # Telegram 按 MarkdownV2 转义后的长度计算
+            if len(split_telegram_chunks(content, max_size)) == 1:
+                return [content]
+            chunks = split_telegram_chunks(content, max_size - PAGE_MARKER_RESERVE)
+        else:
+            size = len(content.encode('utf-8')) if count_bytes else len(content)
+            if size <= max_size:
+                return [content]
+            chunks = split_markdown_chunks(content, max_size - PAGE_MARKER_RESERVE, count_bytes=count_bytes)
+        if len(chunks) == 1:
+            return chunks
+        return [f"{chunk}\n\n📄 ({i}/{len(chunks)})" for i, chunk in enumerate(chunks, 1)]
+
+    def wait_idle(self, timeout: float) -> bool:
+        """
+        等待已到期的消息全部投递完成（程序退出前调用，避免丢失待发消息）
+
+        Returns:
+            是否在超时前投递完成（等待重试中的消息、未配置渠道的消息不计入）
+        """
+        # 已不再配置的渠道没有投递线程，其消息保留在发件箱，不等待
+        channels = [channel.value for channel in self._notifier.get_available_channels()]
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self._db.get_outbox_backlog(due_only=True, channels=channels):
+                return True
+            time.sleep(0.5)
+        backlog = self._db.get_outbox_backlog(due_only=True, channels=channels)
+        if backlog:
+            logger.warning(f"[发件箱] 等待 {timeout}s 后仍有未投递消息: {backlog}，将在下次启动时继续投递")
+        return not backlog
+
+    def stop(self) -> None:
+        """停止所有投递线程（未发送的消息保留在发件箱）"""
+        self._stop_event.set()
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+
+    def _ensure_worker(self, channel: str) -> threading.Event:
+        """确保渠道投递线程已启动，返回其唤醒事件"""
+        with self._lock:
+            worker = self._workers.get(channel)
+            if worker is None or not worker.is_alive():
+                self._wakeups[channel] = threading.Event()
+                worker = threading.Thread(
+                    target=self._run_worker,
+                    args=(channel, self._wakeups[channel]),
+                    name=f"outbox_{channel}",
+                    daemon=True
+                )
+                self._workers[channel] = worker
+                worker.start()
+            return self._wakeups[channel]
+
+    def _run_worker(self, channel: str, wakeup: threading.Event) -> None:
+        """渠道投递循环"""
+        try:
+            sender = self._notifier._get_channel_sender(NotificationChannel(channel))
+        except ValueError:
+            sender = None
+        if sender is None or NotificationChannel(channel) not in self._notifier.get_available_channels():
+            logger.warning(f"[发件箱] 渠道 {channel} 未配置，消息保留在发件箱")
+            return
+
+        channel_name = ChannelDetector.get_channel_name(NotificationChannel(channel))
+        limiter = _RateLimiter(CHANNEL_RATE_LIMITS.get(channel, DEFAULT_RATE_LIMIT))
+        while not self._stop_event.is_set():
+            wakeup.clear()
+            try:
+                items = self._db.claim_due_notifications(channel)
+            except Exception as e:
+                logger.error(f"[发件箱] {channel_name} 读取发件箱失败: {e}")
+                items = []
+
+            if not items:
+                wakeup.wait(POLL_INTERVAL)
+                continue
+
+            for item in items:
+                if not limiter.acquire(self._stop_event):
+                    return
+                try:
+                    self._deliver(channel_name, sender, item)
+                except Exception as e:
+                    # 记录结果失败时消息保持 sending，下次启动时恢复投递
+                    logger.error(f"[发件箱] {channel_name} 投递记录失败: {e}")
+
+    def _deliver(self, channel_name: str, sender, item) -> None:
+        """发送单个分段并记录结果"""
+        error = None
+        started = time.monotonic()
+        try:
+            success = bool(sender(item.content))
+            if not success:
+                error = "发送接口返回失败"
+        except Exception as e:
+            success = False
+            error = str(e)
+        get_metrics().record(STAGE_NOTIFY, time.monotonic() - started, source=item.channel, success=success)
+
+        if success:
+            self._db.complete_notification(item.id, True)
+            return
+
+        attempts = item.attempts + 1
+        if attempts >= MAX_ATTEMPTS:
+            logger.error(f"[发件箱] {channel_name} 消息 {item.chunk_id[:8]} 发送失败 {attempts} 次，放弃: {error}")
+            self._db.complete_notification(item.id, False, error=error)
+            return
+
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+        logger.warning(f"[发件箱] {channel_name} 消息 {item.chunk_id[:8]} 发送失败（第 {attempts} 次），"
+                       f"{delay}s 后重试: {error}")
+        self._db.complete_notification(
+            item.id, False, error=error, retry_at=datetime.now() + timedelta(seconds=delay)
+        )
+
+
+_dispatcher: Optional[OutboxDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    """获取发件箱投递器单例（首次调用时启动，并恢复上次未送达的消息）"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = OutboxDispatcher()
+        return _dispatcher
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 渐进推送（分析进度看板）
+===================================
+
+职责：
+1. 分析开始时向支持编辑的渠道发送一条进度看板消息
+   （Telegram、Discord、触发分析的飞书会话卡片）
+2. 每完成一只股票原地更新看板（按渠道限频合并更新，不阻塞分析）
+3. 全部完成后更新为最终汇总，完整仪表盘仍按原流程推送
+
+大自选股列表下，首批结论在几秒内即可看到，而不必等待全部分析完成。
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from src.analyzer import AnalysisResult
+from src.notification import NotificationService, _get_http_session
+
+logger = logging.getLogger(__name__)
+
+
+class LiveMessage(ABC):
+    """可原地编辑的消息（各渠道实现 post / edit）"""
+
+    name = ""
+    max_length = 4000  # 单条消息长度上限（字符）
+
+    @abstractmethod
+    def post(self, content: str) -> bool:
+        """发送首条消息并记录消息 ID"""
+
+    @abstractmethod
+    def edit(self, content: str) -> bool:
+        """原地更新消息内容"""
+
+    def measure(self, content: str) -> int:
+        """按渠道实际发送的格式计算消息长度（用于长度上限裁剪）"""
+        return len(content)
+
+
+class TelegramLiveMessage(LiveMessage):
+    """Telegram：sendMessage 后用 editMessageText 更新"""
+
+    name = "Telegram"
+    max_length = 4096
+
+    def __init__(self, notifier: NotificationService):
+        config = notifier._telegram_config
+        self._api_base = f"https://api.telegram.org/bot{config['bot_token']}"
+        self._chat_id = config['chat_id']
+        self._thread_id = config.get('message_thread_id')
+        self._convert = notifier._convert_to_telegram_markdown
+        self._to_plain_text = notifier._markdown_to_plain_text
+        self._message_id: Optional[int] = None
+
+    def _call(self, method: str, payload: dict, content: str) -> Optional[dict]:
+        url = f"{self._api_base}/{method}"
+        response = _get_http_session(url).post(url, json=payload, timeout=10)
+        result = response.json()
+        if result.get('ok'):
+            return result
+        description = result.get('description', '')
+        # 内容未变化时 Telegram 返回错误，视为成功
+        if 'message is not modified' in description:
+            return result
+        # MarkdownV2 解析失败时退回纯文本
+        if 'parse_mode' in payload and 'parse' in description.lower():
+            payload = {k: v for k, v in payload.items() if k != 'parse_mode'}
+            payload['text'] = self._to_plain_text(content)
+            return self._call(method, payload, content)
+        logger.warning(f"[渐进推送] Telegram {method} 失败: {description}")
+        return None
+
+    def measure(self, content: str) -> int:
+        # MarkdownV2 转义（. - | ( 等）会使消息变长，按转换后的长度计算
+        return len(self._convert(content))
+
+    def post(self, content: str) -> bool:
+        payload = {
+            "chat_id": self._chat_id,
+            "text": self._convert(content),
+            "parse_mode": "MarkdownV2",
+            "disable_web_page_preview": True,
+        }
+        if self._thread_id:
+            payload['message_thread_id'] = self._thread_id
+        result = self._call("sendMessage", payload, content)
+        if result is None:
+            return False
+        self._message_id = result['result']['message_id']
+        return True
+
+    def edit(self, content: str) -> bool:
+        payload = {
+            "chat_id": self._chat_id,
+            "message_id": self._message_id,
+            "text": self._convert(content),
+            "parse_mode": "MarkdownV2",
+            "disable_web_page_preview": True,
+        }
+        return self._call("editMessageText", payload, content) is not None
+
+
+class DiscordLiveMessage(LiveMessage):
+    """Discord：Webhook（?wait=true 取消息 ID）或 Bot API，PATCH 更新"""
+
+    name = "Discord"
+    max_length = 2000
+
+    def __init__(self, notifier: NotificationService):
+        config = notifier._discord_config
+        self._headers = {}
+        if config['webhook_url']:
+            self._create_url = config['webhook_url'].split('?')[0]
+            self._edit_base = f"{self._create_url}/messages"
+        else:
+            self._create_url = f"https://discord.com/api/v10/channels/{config['channel_id']}/messages"
+            self._edit_base = self._create_url
+            self._headers = {'Authorization': f"Bot {config['bot_token']}"}
+        self._message_id: Optional[str] = None
+
+    def post(self, content: str) -> bool:
+        response = _get_http_session(self._create_url).post(
+            self._create_url, params={'wait': 'true'}, json={'content': content},
+            headers=self._headers, timeout=10
+        )
+        if response.status_code != 200:
+            logger.warning(f"[渐进推送] Discord 发送失败: {response.status_code} {response.text[:200]}")
+            return False
+        self._message_id = response.json()['id']
+        return True
+
+    def edit(self, content: str) -> bool:
+        url = f"{self._edit_base}/{self._message_id}"
+        response = _get_http_session(url).patch(url, json={'content': content}, headers=self._headers, timeout=10)
+        if response.status_code != 200:
+            logger.warning(f"[渐进推送] Discord 更新失败: {response.status_code} {response.text[:200]}")
+            return False
+        return True
+
+
+class FeishuCardLiveMessage(LiveMessage):
+    """飞书会话（Stream 模式触发）：发送共享交互卡片后 PATCH 更新"""
+
+    name = "飞书会话"
+    max_length = 8000  # 卡片内容按字符粗略控制，远低于飞书 30KB 卡片上限
+
+    def __init__(self, reply_client, chat_id: str):
+        self._client = reply_client
+        self._chat_id = chat_id
+        self._message_id: Optional[str] = None
+
+    def post(self, content: str) -> bool:
+        self._message_id = self._client.create_card(self._chat_id, content)
+        return self._message_id is not None
+
+    def edit(self, content: str) -> bool:
+        return self._client.update_card(self._message_id, content)
+
+
+def build_live_messages(notifier: NotificationService) -> List[LiveMessage]:
+    """按已配置的渠道创建可编辑消息（不支持编辑的渠道仍走最终的完整推送）"""
+    targets: List[LiveMessage] = []
+    if notifier._is_telegram_configured():
+        targets.append(TelegramLiveMessage(notifier))
+    if notifier._is_discord_configured():
+        targets.append(DiscordLiveMessage(notifier))
+
+    feishu_info = notifier._extract_feishu_reply_info()
+    if feishu_info:
+        try:
+            from src.config import get_config
+            from bot.platforms.feishu_stream import FeishuReplyClient
+
+            config = get_config()
+            if config.feishu_app_id and config.feishu_app_secret:
+                client = FeishuReplyClient(config.feishu_app_id, config.feishu_app_secret)
+                targets.append(FeishuCardLiveMessage(client, feishu_info['chat_id']))
+        except ImportError as e:
+            logger.warning(f"[渐进推送] 飞书 SDK 不可用，跳过飞书进度卡片: {e}")
+    return targets
+
+
+class ProgressiveDashboard:
+    """
+    分析进度看板
+
+    add_result 只记录结果并调度更新，更新在单独线程中执行：
+    距上次更新不足 update_interval 时等待后合并为一次更新（渠道编辑接口均有频率限制），
+    等待期间到达的结果在同一次更新中体现。
+    """
+
+    def __init__(
+        self,
+        notifier: NotificationService,
+        total: int,
+        update_interval: float = 3.0,
+        targets: Optional[List[LiveMessage]] = None
+    ):
+        self._notifier = notifier
+        self._total = total
+        self._update_interval = update_interval
+        self._targets = build_live_messages(notifier) if targets is None else targets
+        self._results: List[AnalysisResult] = []
+        self._lock = threading.Lock()
+        self._update_pending = False
+        self._last_update = 0.0
+        self._started_at = time.time()
+        self._finished = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="progressive_notify")
+
+    def start(self) -> bool:
+        """发送初始看板；没有可用渠道时返回 False"""
+        active = []
+        for target in self._targets:
+            try:
+                if target.post(self._render(target, finished=False)):
+                    active.append(target)
+            except Exception as e:
+                logger.warning(f"[渐进推送] {target.name} 初始看板发送异常: {e}")
+        self._targets = active
+        self._last_update = time.monotonic()
+        if active:
+            logger.info(f"[渐进推送] 已发送进度看板: {', '.join(t.name for t in active)}")
+        else:
+            self._executor.shutdown(wait=False)
+        return bool(active)
+
+    def add_result(self, result: AnalysisResult) -> None:
+        """记录一只股票的分析结果并调度看板更新（不阻塞调用方）"""
+        with self._lock:
+            self._results.append(result)
+            if self._update_pending or self._finished.is_set():
+                return
+            self._update_pending = True
+        self._executor.submit(self._run_update)
+
+    def finalize(self, timeout: float = 30.0) -> None:
+        """全部完成：看板更新为最终汇总（等待至多 timeout 秒）"""
+        self._finished.set()
+        future = self._executor.submit(self._edit_all, True)
+        try:
+            future.result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"[渐进推送] 最终汇总更新未完成: {e}")
+        self._executor.shutdown(wait=False)
+
+    def _run_update(self) -> None:
+        # 限频：距上次更新不足间隔时等待（完成时立即结束等待，由最终汇总覆盖）
+        delay = self._update_interval - (time.monotonic() - self._last_update)
+        if delay > 0 and self._finished.wait(delay):
+            return
+        with self._lock:
+            self._update_pending = False
+        self._edit_all(False)
+
+    def _edit_all(self, finished: bool) -> None:
+        for target in self._targets:
+            try:
+                target.edit(self._render(target, finished))
+            except Exception as e:
+                logger.warning(f"[渐进推送] {target.name} 看板更新异常: {e}")
+        self._last_update = time.monotonic()
+
+    def _render(self, target: LiveMessage, finished: bool) -> str:
+        with self._lock:
+            results = list(self._results)
+        return self._notifier.generate_progress_dashboard(
+            results,
+            self._total,
+            elapsed=time.time() - self._started_at,
+            finished=finished,
+            max_length=target.max_length,
+            length_func=target.measure,
+        )
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 报告片段缓存
+===================================
+
+职责：
+1. 按分析结果内容计算指纹（结果被修改后指纹随之变化）
+2. 缓存每只股票各报告格式的渲染片段（仪表盘、企业微信精简版、单股报告等）
+3. 同一批结果在文件报告、各推送渠道、飞书文档之间只渲染一次，各格式由片段拼装
+"""
+
+import hashlib
+import json
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.analyzer import AnalysisResult
+
+# 最多缓存的片段数（每只股票每种格式一条，足够覆盖一次全量分析的所有格式）
+DEFAULT_MAX_FRAGMENTS = 4096
+
+# 不参与指纹计算的字段（不影响渲染）
+_FINGERPRINT_EXCLUDED_FIELDS = ('raw_response',)
+
+
+def result_fingerprint(result: AnalysisResult) -> str:
+    """
+    计算分析结果的内容指纹（覆盖所有渲染会用到的字段，包括 dashboard）
+
+    优先用 pickle 序列化（比 JSON 排序序列化快约 3 倍）；序列化结果相同即内容相同，
+    字段顺序等差异最多造成一次未命中，不会误命中
+    """
+    payload = {
+        key: value for key, value in vars(result).items()
+        if key not in _FINGERPRINT_EXCLUDED_FIELDS
+    }
+    try:
+        serialized = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+
+class ReportFragmentCache:
+    """
+    报告片段缓存（进程内 LRU，线程安全）
+
+    键为 (片段类型, 结果指纹)：结果内容不变时直接复用渲染好的片段，
+    结果被修改（如补充 dashboard）后指纹变化，自然重新渲染。
+
+    指纹按结果对象记忆：同一对象的字段未被重新赋值时不重复序列化，
+    因此同一批结果生成多种格式时，每只股票只计算一次指纹、每种片段只渲染一次
+    （分析结果生成后视为只读，不应原地修改 dashboard 等嵌套字典）。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_FRAGMENTS):
+        self._max_entries = max_entries
+        self._fragments: 'OrderedDict[Tuple[str, str], str]' = OrderedDict()
+        # id(result) -> (弱引用, 字段对象快照, 指纹)
+        self._fingerprints: Dict[int, Tuple[weakref.ref, Tuple[int, ...], str]] = {}
+        # 已回收结果对象的 id（弱引用回调可能在任意线程、甚至持锁期间触发，只追加不加锁，由持锁方清理）
+        self._dead_ids: List[int] = []
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def render(self, kind: str, result: AnalysisResult, renderer: Callable[[AnalysisResult], str]) -> str:
+        """
+        获取片段，未命中时调用 renderer 渲染并缓存
+
+        Args:
+            kind: 片段类型（如 dashboard / wechat_dashboard）
+            result: 分析结果
+            renderer: 渲染函数
+        """
+        key = (kind, self._fingerprint(result))
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                self._hits += 1
+                return fragment
+            self._misses += 1
+
+        fragment = renderer(result)
+        with self._lock:
+            self._fragments[key] = fragment
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self._max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def _fingerprint(self, result: AnalysisResult) -> str:
+        """获取结果指纹（字段未被重新赋值时复用上次计算的结果）"""
+        object_id = id(result)
+        snapshot = tuple(map(id, vars(result).values()))
+        with self._lock:
+            self._purge_dead()
+            entry = self._fingerprints.get(object_id)
+        if entry is not None and entry[0]() is result and entry[1] == snapshot:
+            return entry[2]
+
+        fingerprint = result_fingerprint(result)
+        # 结果对象回收时移除记录，避免 id 被新对象复用后误命中
+        ref = weakref.ref(result, lambda _, object_id=object_id: self._dead_ids.append(object_id))
+        with self._lock:
+            self._fingerprints[object_id] = (ref, snapshot, fingerprint)
+        return fingerprint
+
+    def _purge_dead(self) -> None:
+        """移除已回收结果对象的指纹记录（调用方持有 self._lock）"""
+        while self._dead_ids:
+            object_id = self._dead_ids.pop()
+            entry = self._fingerprints.get(object_id)
+            # id 可能已被新对象复用并重新登记，只删除引用已失效的记录
+            if entry is not None and entry[0]() is None:
+                del self._fingerprints[object_id]
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._fragments.clear()
+            self._fingerprints.clear()
+            self._dead_ids.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'fragments': len(self._fragments),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / total if total else 0.0,
+            }
+
+
+_fragment_cache = ReportFragmentCache()
+
+
+def get_fragment_cache() -> ReportFragmentCache:
+    """获取进程内共享的报告片段缓存（不同 NotificationService 实例共用）"""
+    return _fragment_cache
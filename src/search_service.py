@@ -11,50 +11,217 @@ A股自选股智能分析系统 - 搜索服务模块
 4. 搜索结果缓存和格式化
 """
 
+import codecs
+import hashlib
+import json
 import logging
+import os
 import random
+import re
+import sqlite3
+import threading
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
+)
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 from itertools import cycle
 import requests
+import requests.adapters
 from newspaper import Article, Config
 
+from src.news_dedup import SimHashIndex, news_fingerprint
+from src.metrics import get_metrics, STAGE_SEARCH
+
 logger = logging.getLogger(__name__)
 
 
-def fetch_url_content(url: str, timeout: int = 5) -> str:
+_URL_CACHE_TTL = 7 * 24 * 3600  # 网页正文缓存有效期（秒），过期后用 ETag 条件请求校验
+# <meta charset="gbk"> 或 <meta http-equiv="Content-Type" content="text/html; charset=gbk">
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_-]+)', re.IGNORECASE)
+_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# 网页正文抓取共享资源：连接池复用的 Session + 有界线程池（所有搜索共享）
+_http_session: Optional[requests.Session] = None
+_fetch_executor: Optional[ThreadPoolExecutor] = None
+_url_cache: Optional['UrlContentCache'] = None
+_fetch_lock = threading.Lock()
+
+
+class UrlContentCache:
     """
-    获取 URL 网页正文内容 (使用 newspaper3k)
+    网页正文磁盘缓存（按 URL 存储正文与 ETag）
+
+    - 有效期内直接命中，不发起网络请求
+    - 过期后携带 If-None-Match 条件请求，304 时沿用缓存正文
+    - 跨股票、跨运行复用，同一篇文章只下载一次
     """
-    try:
-        # 配置 newspaper3k
-        config = Config()
-        config.browser_user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        config.request_timeout = timeout
-        config.fetch_images = False  # 不下载图片
-        config.memoize_articles = False # 不缓存
 
-        article = Article(url, config=config, language='zh') # 默认中文，但也支持其他
-        article.download()
-        article.parse()
+    def __init__(self, cache_dir: str, ttl: int = _URL_CACHE_TTL):
+        self._cache_dir = Path(cache_dir)
+        self._ttl = ttl
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str) -> Path:
+        return self._cache_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目（不存在或损坏返回 None）"""
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        entry['fresh'] = time.time() - entry.get('fetched_at', 0) < self._ttl
+        return entry
+
+    def put(self, url: str, text: str, etag: Optional[str]) -> None:
+        """写入缓存条目（先写临时文件再替换，避免并发读到半截文件）"""
+        path = self._path(url)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'etag': etag, 'text': text, 'fetched_at': time.time()}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"写入网页缓存失败 {url}: {e}")
+
+
+def _get_fetch_resources() -> Tuple[requests.Session, ThreadPoolExecutor, Optional[UrlContentCache]]:
+    """懒加载共享 Session、抓取线程池与磁盘缓存"""
+    global _http_session, _fetch_executor, _url_cache
+    if _http_session is None:
+        with _fetch_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=32, pool_maxsize=32)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = _USER_AGENT
+                try:
+                    from src.config import get_config
+                    cache_dir = Path(get_config().database_path).parent / 'url_cache'
+                    _url_cache = UrlContentCache(str(cache_dir))
+                except Exception as e:
+                    logger.warning(f"网页正文缓存初始化失败，将不使用缓存: {e}")
+                _fetch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="url_fetch")
+                _http_session = session
+    return _http_session, _fetch_executor, _url_cache
+
+
+def _extract_article_text(url: str, html: str) -> str:
+    """使用 newspaper3k 从 HTML 中解析正文"""
+    config = Config()
+    config.browser_user_agent = _USER_AGENT
+    config.fetch_images = False  # 不下载图片
+    config.memoize_articles = False # 不缓存
+
+    article = Article(url, config=config, language='zh') # 默认中文，但也支持其他
+    article.download(input_html=html)
+    article.parse()
+
+    # 获取正文
+    text = article.text.strip()
+
+    # 简单的后处理，去除空行
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    text = '\n'.join(lines)
+
+    return text[:1500]  # 限制返回长度（比 bs4 稍微多一点，因为 newspaper 解析更干净）
+
+
+def _decode_html(response: requests.Response) -> str:
+    """
+    解码网页 HTML
+
+    响应头未声明 charset 时 requests 按 ISO-8859-1 解码，只在 <meta> 中声明 GBK/UTF-8 的中文页面会变成乱码，
+    此时按 <meta> 声明（没有则按内容探测）重新确定编码
+    """
+    if 'charset' not in response.headers.get('Content-Type', '').lower():
+        match = _META_CHARSET_RE.search(response.content[:4096])
+        encoding = match.group(1).decode('ascii').lower() if match else None
+        if encoding in ('gb2312', 'gbk'):
+            encoding = 'gb18030'  # 兼容 GB2312/GBK 页面中的扩展字符
+        try:
+            codecs.lookup(encoding or '')
+        except LookupError:
+            encoding = response.apparent_encoding
+        response.encoding = encoding
+    return response.text
 
-        # 获取正文
-        text = article.text.strip()
 
-        # 简单的后处理，去除空行
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        text = '\n'.join(lines)
+def fetch_url_content(url: str, timeout: int = 5) -> str:
+    """
+    获取 URL 网页正文内容 (使用 newspaper3k)
+
+    通过共享 Session 下载，结果写入磁盘缓存（按 URL + ETag），同一篇文章不重复下载
+    """
+    session, _, cache = _get_fetch_resources()
+    entry = cache.get(url) if cache else None
+    if entry and entry['fresh']:
+        return entry.get('text', '')
+
+    try:
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        response = session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and entry:
+            # 内容未变化，刷新缓存时间
+            cache.put(url, entry.get('text', ''), entry.get('etag'))
+            return entry.get('text', '')
+        response.raise_for_status()
 
-        return text[:1500]  # 限制返回长度（比 bs4 稍微多一点，因为 newspaper 解析更干净）
+        text = _extract_article_text(url, _decode_html(response))
+        if cache and text:
+            cache.put(url, text, response.headers.get('ETag'))
+        return text
     except Exception as e:
         logger.debug(f"Fetch content failed for {url}: {e}")
 
     return ""
 
 
+def fetch_urls_content(
+    urls: List[str],
+    deadline: float = 8.0,
+    first_n: Optional[int] = None,
+    timeout: int = 5
+) -> Dict[str, str]:
+    """
+    并发获取多个 URL 的网页正文
+
+    Args:
+        urls: URL 列表
+        deadline: 整体截止时间（秒），到时返回已完成的结果
+        first_n: 获取到 N 篇正文即返回（None 表示等待全部）
+        timeout: 单个请求超时（秒）
+
+    Returns:
+        {url: 正文}，仅包含成功获取的 URL；未完成的任务在后台继续执行并写入缓存
+    """
+    urls = [url for url in dict.fromkeys(urls) if url]
+    if not urls:
+        return {}
+    _, executor, _ = _get_fetch_resources()
+    futures = {executor.submit(fetch_url_content, url, timeout): url for url in urls}
+    contents: Dict[str, str] = {}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            text = future.result()
+            if text:
+                contents[futures[future]] = text
+                if first_n is not None and len(contents) >= first_n:
+                    break
+    except FutureTimeoutError:
+        logger.debug(f"网页正文抓取达到截止时间 {deadline}s，已获取 {len(contents)}/{len(urls)} 篇")
+    return contents
+
+
 @dataclass
 class SearchResult:
     """搜索结果数据类"""
@@ -92,9 +259,279 @@ class SearchResponse:
         return "\n".join(lines)
 
 
+class SearchResultCache:
+    """
+    搜索结果持久化缓存（SQLite）
+    
+    - 键：归一化查询词 + 时间范围（与搜索引擎无关，不同引擎的结果可互相复用）
+    - 有效期由调用方按维度指定（新闻短、行业长）
+    - 只缓存成功且有结果的响应
+    """
+    
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "cache_key TEXT PRIMARY KEY, query TEXT, days INTEGER, max_results INTEGER, "
+                "provider TEXT, results TEXT, created_at REAL, expires_at REAL)"
+            )
+            # 清理过期条目
+            self._conn.execute("DELETE FROM search_cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """归一化查询词：小写、合并空白（含全角空格）"""
+        return ' '.join(query.lower().split())
+    
+    def _make_key(self, query: str, days: int) -> str:
+        return f"{self.normalize_query(query)}|{days}"
+    
+    def get(self, query: str, days: int, max_results: int) -> Optional[SearchResponse]:
+        """
+        读取缓存
+        
+        缓存条目的结果数少于本次请求数时视为未命中（避免缓存截断的结果）
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT provider, results, max_results FROM search_cache "
+                "WHERE cache_key = ? AND expires_at > ?",
+                (self._make_key(query, days), time.time())
+            ).fetchone()
+            if row is None or (row[2] < max_results and len(json.loads(row[1])) >= row[2]):
+                self._misses += 1
+                return None
+            self._hits += 1
+        
+        provider, results_json, _ = row
+        results = [SearchResult(**item) for item in json.loads(results_json)]
+        return SearchResponse(
+            query=query,
+            results=results[:max_results],
+            provider=f"{provider}(缓存)",
+            success=True,
+        )
+    
+    def put(self, response: SearchResponse, days: int, max_results: int, ttl: int) -> None:
+        """写入缓存（失败或无结果的响应不缓存）"""
+        if not response.success or not response.results:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache "
+                    "(cache_key, query, days, max_results, provider, results, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        self._make_key(response.query, days), response.query, days, max_results,
+                        response.provider,
+                        json.dumps([asdict(r) for r in response.results], ensure_ascii=False),
+                        now, now + ttl,
+                    )
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"写入搜索缓存失败: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / total if total else 0.0,
+            }
+    
+    def reset_stats(self) -> None:
+        """重置命中统计"""
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+    
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class SearchKeyScheduler:
+    """
+    配额感知的搜索 Key 调度器
+    
+    - 按月持久化每个 Key 的调用次数（SQLite，Key 以哈希存储）
+    - 按当月进度均摊配额：已用比例超过月份进度的 Key 降低优先级，避免月初耗尽
+    - 连续失败的 Key 短暂冷却，而不是清零所有 Key 的错误计数
+    - 根据当月调用速度预测配额耗尽日期
+    """
+    
+    FAILURE_THRESHOLD = 3  # 连续失败次数达到阈值后冷却
+    COOLDOWN_SECONDS = 600  # 冷却时间（秒）
+    
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._consecutive_errors: Dict[str, int] = {}
+        self._cooldown_until: Dict[str, float] = {}
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_key_usage ("
+                "provider TEXT, key_id TEXT, month TEXT, calls INTEGER DEFAULT 0, "
+                "errors INTEGER DEFAULT 0, updated_at REAL, "
+                "PRIMARY KEY (provider, key_id, month))"
+            )
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+    
+    @staticmethod
+    def key_id(api_key: str) -> str:
+        """Key 的哈希标识（不落盘明文 Key）"""
+        return hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:12]
+    
+    @staticmethod
+    def _current_month() -> str:
+        return datetime.now().strftime('%Y-%m')
+    
+    @staticmethod
+    def month_progress(now: Optional[datetime] = None) -> Tuple[float, float]:
+        """
+        当月进度
+        
+        Returns:
+            (已过天数, 当月总天数)，已过天数含小数
+        """
+        now = now or datetime.now()
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        elapsed = (now - month_start).total_seconds() / 86400
+        total = (next_month - month_start).total_seconds() / 86400
+        return elapsed, total
+    
+    def get_usage(self, provider: str, api_keys: List[str]) -> Dict[str, int]:
+        """获取各 Key 本月调用次数 {api_key: calls}"""
+        ids = {self.key_id(key): key for key in api_keys}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key_id, calls FROM search_key_usage WHERE provider = ? AND month = ?",
+                (provider, self._current_month())
+            ).fetchall()
+        usage = {key: 0 for key in api_keys}
+        for key_id, calls in rows:
+            if key_id in ids:
+                usage[ids[key_id]] = calls
+        return usage
+    
+    def record(self, provider: str, api_key: str, success: bool) -> None:
+        """记录一次调用（失败也消耗配额）"""
+        key_id = self.key_id(api_key)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO search_key_usage (provider, key_id, month, calls, errors, updated_at) "
+                "VALUES (?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT(provider, key_id, month) DO UPDATE SET "
+                "calls = calls + 1, errors = errors + excluded.errors, updated_at = excluded.updated_at",
+                (provider, key_id, self._current_month(), 0 if success else 1, time.time())
+            )
+            self._conn.commit()
+            
+            cooldown_key = f"{provider}:{key_id}"
+            if success:
+                self._consecutive_errors.pop(cooldown_key, None)
+                self._cooldown_until.pop(cooldown_key, None)
+            else:
+                errors = self._consecutive_errors.get(cooldown_key, 0) + 1
+                self._consecutive_errors[cooldown_key] = errors
+                if errors >= self.FAILURE_THRESHOLD:
+                    self._cooldown_until[cooldown_key] = time.time() + self.COOLDOWN_SECONDS
+                    logger.warning(f"[{provider}] API Key {key_id} 连续失败 {errors} 次，冷却 {self.COOLDOWN_SECONDS}s")
+    
+    def pick_key(self, provider: str, api_keys: List[str], quota: Optional[int]) -> Optional[str]:
+        """
+        选择 Key
+        
+        优先级：未冷却 > 未耗尽 > 已用比例未超过月份进度 > 已用次数最少
+        所有 Key 都在冷却时选择最早结束冷却的 Key
+        """
+        if not api_keys:
+            return None
+        usage = self.get_usage(provider, api_keys)
+        elapsed, total = self.month_progress()
+        now = time.time()
+        
+        def rank(key: str) -> Tuple:
+            cooldown = self._cooldown_until.get(f"{provider}:{self.key_id(key)}", 0)
+            used = usage[key]
+            if quota:
+                exhausted = used >= quota
+                ahead_of_pace = used / quota > elapsed / total
+                return (cooldown > now, exhausted, ahead_of_pace, used / quota, cooldown)
+            return (cooldown > now, False, False, used, cooldown)
+        
+        return min(api_keys, key=rank)
+    
+    def get_provider_status(self, provider: str, api_keys: List[str], quota: Optional[int]) -> Dict[str, Any]:
+        """
+        获取搜索引擎本月配额状态与耗尽预测
+        
+        Returns:
+            {used, quota, remaining, pace_ratio, forecast_exhaustion, keys: [...]}
+        """
+        usage = self.get_usage(provider, api_keys)
+        elapsed, total = self.month_progress()
+        now = datetime.now()
+        keys = []
+        for key, used in usage.items():
+            item: Dict[str, Any] = {'key_id': self.key_id(key), 'used': used, 'quota': quota}
+            if quota:
+                item['remaining'] = max(quota - used, 0)
+                item['forecast_exhaustion'] = self._forecast(used, quota, elapsed, total, now)
+            keys.append(item)
+        
+        used_total = sum(usage.values())
+        status: Dict[str, Any] = {'provider': provider, 'used': used_total, 'quota': None, 'keys': keys}
+        if quota:
+            quota_total = quota * len(api_keys)
+            status.update({
+                'quota': quota_total,
+                'remaining': max(quota_total - used_total, 0),
+                # 已用比例 / 月份进度，大于 1 表示消耗快于均摊速度
+                'pace_ratio': round((used_total / quota_total) / (elapsed / total), 2) if elapsed else 0.0,
+                'forecast_exhaustion': self._forecast(used_total, quota_total, elapsed, total, now),
+            })
+        return status
+    
+    @staticmethod
+    def _forecast(used: int, quota: int, elapsed: float, total: float, now: datetime) -> Optional[str]:
+        """按当月平均速度预测耗尽日期；本月内不会耗尽返回 None"""
+        if used >= quota:
+            return now.date().isoformat()
+        if used <= 0 or elapsed <= 0:
+            return None
+        days_left = (quota - used) / (used / elapsed)
+        if elapsed + days_left >= total:
+            return None
+        return (now + timedelta(days=days_left)).date().isoformat()
+
+
 class BaseSearchProvider(ABC):
     """搜索引擎基类"""
     
+    max_concurrency: int = 3  # 单个搜索引擎的最大并发请求数
+    monthly_quota: Optional[int] = None  # 每个 Key 的每月免费额度（None 表示按量付费、不限额）
+    cost_per_call: float = 0.0  # 额度内单次调用的相对成本（用于选择最便宜的搜索引擎）
+    
     def __init__(self, api_keys: List[str], name: str):
         """
         初始化搜索引擎
@@ -108,6 +545,9 @@ class BaseSearchProvider(ABC):
         self._key_cycle = cycle(api_keys) if api_keys else None
         self._key_usage: Dict[str, int] = {key: 0 for key in api_keys}
         self._key_errors: Dict[str, int] = {key: 0 for key in api_keys}
+        # 并发上限：所有股票、所有维度共享，避免瞬时请求过多触发限流
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._scheduler: Optional[SearchKeyScheduler] = None
     
     @property
     def name(self) -> str:
@@ -118,14 +558,46 @@ class BaseSearchProvider(ABC):
         """检查是否有可用的 API Key"""
         return bool(self._api_keys)
     
+    def attach_scheduler(self, scheduler: SearchKeyScheduler) -> None:
+        """接入配额感知调度器（接入后按配额选择 Key 并持久化用量）"""
+        self._scheduler = scheduler
+    
+    def has_spare_quota(self) -> bool:
+        """本月是否还有剩余免费额度（按量付费的搜索引擎始终为 True）"""
+        if not self.monthly_quota or self._scheduler is None:
+            return True
+        usage = self._scheduler.get_usage(self._name, self._api_keys)
+        return any(used < self.monthly_quota for used in usage.values())
+    
+    def is_ahead_of_pace(self) -> bool:
+        """
+        本月用量是否快于按月均摊的速度（已用次数超过月份进度对应的额度，预留一天用量的余量）
+        
+        不限额或未接入调度器时始终为 False
+        """
+        if not self.monthly_quota or self._scheduler is None:
+            return False
+        used = sum(self._scheduler.get_usage(self._name, self._api_keys).values())
+        elapsed, total = self._scheduler.month_progress()
+        allowance = self.monthly_quota * len(self._api_keys) * min(elapsed + 1, total) / total
+        return used >= allowance
+    
+    def get_quota_status(self) -> Dict[str, Any]:
+        """获取本月配额状态（未接入调度器时返回进程内计数）"""
+        if self._scheduler is None:
+            return {'provider': self._name, 'used': sum(self._key_usage.values()), 'quota': None}
+        return self._scheduler.get_provider_status(self._name, self._api_keys, self.monthly_quota)
+    
     def _get_next_key(self) -> Optional[str]:
         """
         获取下一个可用的 API Key（负载均衡）
         
-        策略：轮询 + 跳过错误过多的 key
+        策略：接入调度器时按配额均摊选择；否则轮询 + 跳过错误过多的 key
         """
         if not self._key_cycle:
             return None
+        if self._scheduler is not None:
+            return self._scheduler.pick_key(self._name, self._api_keys, self.monthly_quota)
         
         # 最多尝试所有 key
         for _ in range(len(self._api_keys)):
@@ -142,6 +614,8 @@ class BaseSearchProvider(ABC):
     def _record_success(self, key: str) -> None:
         """记录成功使用"""
         self._key_usage[key] = self._key_usage.get(key, 0) + 1
+        if self._scheduler is not None:
+            self._scheduler.record(self._name, key, success=True)
         # 成功后减少错误计数
         if key in self._key_errors and self._key_errors[key] > 0:
             self._key_errors[key] -= 1
@@ -149,6 +623,8 @@ class BaseSearchProvider(ABC):
     def _record_error(self, key: str) -> None:
         """记录错误"""
         self._key_errors[key] = self._key_errors.get(key, 0) + 1
+        if self._scheduler is not None:
+            self._scheduler.record(self._name, key, success=False)
         logger.warning(f"[{self._name}] API Key {key[:8]}... 错误计数: {self._key_errors[key]}")
     
     @abstractmethod
@@ -180,7 +656,8 @@ class BaseSearchProvider(ABC):
         
         start_time = time.time()
         try:
-            response = self._do_search(query, api_key, max_results, days=days)
+            with self._semaphore:
+                response = self._do_search(query, api_key, max_results, days=days)
             response.search_time = time.time() - start_time
             
             if response.success:
@@ -217,6 +694,9 @@ class TavilySearchProvider(BaseSearchProvider):
     文档：https://docs.tavily.com/
     """
     
+    monthly_quota = 1000
+    cost_per_call = 0.0
+    
     def __init__(self, api_keys: List[str]):
         super().__init__(api_keys, "Tavily")
     
@@ -306,6 +786,12 @@ class SerpAPISearchProvider(BaseSearchProvider):
     文档：https://serpapi.com/baidu-search-api?utm_source=github_daily_stock_analysis
     """
     
+    max_concurrency = 2  # 免费额度少，且每次搜索还会抓取网页正文
+    monthly_quota = 100
+    cost_per_call = 0.0
+    FETCH_DEADLINE = 8.0  # 网页正文抓取整体截止时间（秒）
+    FETCH_FIRST_N = 3  # 获取到 N 篇正文即返回
+
     def __init__(self, api_keys: List[str]):
         super().__init__(api_keys, "SerpAPI")
     
@@ -438,29 +924,26 @@ class SerpAPISearchProvider(BaseSearchProvider):
                      ))
 
             # 4. 解析 Organic Results (自然搜索结果)
-            organic_results = response.get('organic_results', [])
+            organic_results = response.get('organic_results', [])[:max_results]
 
-            for item in organic_results[:max_results]:
+            # 增强：并发解析网页正文（有截止时间，先完成的前 N 篇生效，其余保留原摘要）
+            fetched = fetch_urls_content(
+                [item.get('link', '') for item in organic_results],
+                deadline=self.FETCH_DEADLINE,
+                first_n=self.FETCH_FIRST_N,
+            )
+
+            for item in organic_results:
                 link = item.get('link', '')
                 snippet = item.get('snippet', '')
 
-                # 增强：如果需要，解析网页正文
-                # 策略：如果摘要太短，或者为了获取更多信息，可以请求网页
-                # 这里我们对所有结果尝试获取正文，但为了性能，仅获取前1000字符
-                content = ""
-                if link:
-                   try:
-                       fetched_content = fetch_url_content(link, timeout=5)
-                       if fetched_content:
-                           # 如果获取到了正文，将其拼接到 snippet 中，或者替换 snippet
-                           # 这里选择拼接，保留原摘要
-                           content = fetched_content
-                           if len(content) > 500:
-                               snippet = f"{snippet}\n\n【网页详情】\n{content[:500]}..."
-                           else:
-                               snippet = f"{snippet}\n\n【网页详情】\n{content}"
-                   except Exception as e:
-                       logger.debug(f"[SerpAPI] Fetch content failed: {e}")
+                content = fetched.get(link, '')
+                if content:
+                    # 如果获取到了正文，将其拼接到 snippet 中，保留原摘要
+                    if len(content) > 500:
+                        snippet = f"{snippet}\n\n【网页详情】\n{content[:500]}..."
+                    else:
+                        snippet = f"{snippet}\n\n【网页详情】\n{content}"
 
                 results.append(SearchResult(
                     title=item.get('title', ''),
@@ -511,6 +994,9 @@ class BochaSearchProvider(BaseSearchProvider):
     文档：https://bocha-ai.feishu.cn/wiki/RXEOw02rFiwzGSkd9mUcqoeAnNK
     """
     
+    monthly_quota = None  # 按量付费
+    cost_per_call = 1.0
+    
     def __init__(self, api_keys: List[str]):
         super().__init__(api_keys, "Bocha")
     
@@ -715,11 +1201,38 @@ class SearchService:
         "{name} {code} 涨跌 成交量",
     ]
     
+    # 多维度情报搜索维度（同时也是情报报告的展示顺序）
+    INTEL_DIMENSION_NAMES = ['latest_news', 'market_analysis', 'risk_check', 'earnings', 'industry']
+    
+    # 仅由板块合并搜索提供的共享维度（展示在个股维度之后）
+    SECTOR_DIMENSION_NAMES = ['macro']
+    
+    # 多维度情报搜索的整体截止时间（秒），到时返回已完成的维度
+    INTEL_SEARCH_DEADLINE = 20.0
+    
+    # 股价兜底搜索的整体截止时间（秒），到时返回已收集的结果
+    PRICE_FALLBACK_DEADLINE = 10.0
+    
+    # 搜索缓存有效期（秒）：新闻时效性强，行业分析变化慢
+    SEARCH_CACHE_TTLS = {
+        'latest_news': 2 * 3600,
+        'stock_news': 2 * 3600,
+        'risk_check': 6 * 3600,
+        'stock_events': 6 * 3600,
+        'market_analysis': 12 * 3600,
+        'earnings': 24 * 3600,
+        'industry': 72 * 3600,
+        'macro': 24 * 3600,
+    }
+    DEFAULT_SEARCH_CACHE_TTL = 3600
+    
     def __init__(
         self,
         bocha_keys: Optional[List[str]] = None,
         tavily_keys: Optional[List[str]] = None,
         serpapi_keys: Optional[List[str]] = None,
+        cache_enabled: bool = True,
+        prefer_free_quota: bool = False,
     ):
         """
         初始化搜索服务
@@ -728,8 +1241,26 @@ class SearchService:
             bocha_keys: 博查搜索 API Key 列表
             tavily_keys: Tavily API Key 列表
             serpapi_keys: SerpAPI Key 列表
+            cache_enabled: 是否启用搜索结果持久化缓存
+            prefer_free_quota: 是否优先使用有剩余免费额度的引擎（默认按配置优先级）
         """
         self._providers: List[BaseSearchProvider] = []
+        self._prefer_free_quota = prefer_free_quota
+        self._cache: Optional[SearchResultCache] = None
+        self._scheduler: Optional[SearchKeyScheduler] = None
+        monthly_quotas: Dict[str, int] = {}
+        try:
+            from src.config import get_config
+            config = get_config()
+            search_db_path = str(Path(config.database_path).parent / 'search_cache.db')
+            monthly_quotas = config.search_monthly_quotas
+            if cache_enabled:
+                self._cache = SearchResultCache(search_db_path)
+            self._scheduler = SearchKeyScheduler(search_db_path)
+        except Exception as e:
+            logger.warning(f"搜索缓存/配额调度初始化失败，将使用进程内轮询: {e}")
+        # 多维度情报并发搜索线程池（实际并发受各搜索引擎的 max_concurrency 限制）
+        self._executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="intel_search")
         
         # 初始化搜索引擎（按优先级排序）
         # 1. Bocha 优先（中文搜索优化，AI摘要）
@@ -747,6 +1278,13 @@ class SearchService:
             self._providers.append(SerpAPISearchProvider(serpapi_keys))
             logger.info(f"已配置 SerpAPI 搜索，共 {len(serpapi_keys)} 个 API Key")
         
+        for provider in self._providers:
+            if provider.name.lower() in monthly_quotas:
+                # 配置覆盖默认额度（0 表示不限额）
+                provider.monthly_quota = monthly_quotas[provider.name.lower()] or None
+            if self._scheduler is not None:
+                provider.attach_scheduler(self._scheduler)
+        
         if not self._providers:
             logger.warning("未配置任何搜索引擎 API Key，新闻搜索功能将不可用")
     
@@ -755,6 +1293,60 @@ class SearchService:
         """检查是否有可用的搜索引擎"""
         return any(p.is_available for p in self._providers)
     
+    def _rank_providers(self, providers: List[BaseSearchProvider]) -> List[BaseSearchProvider]:
+        """
+        选出有剩余额度的搜索引擎，保持 Bocha → Tavily → SerpAPI 优先级
+        
+        用量快于按月均摊速度的引擎暂停使用（其他引擎都超速时才使用），把免费额度分摊到整月；
+        启用 prefer_free_quota 时只保留其中最便宜的一组（同成本的多个引擎轮流使用以保持并发）；
+        所有引擎额度都已耗尽时返回全部可用引擎
+        """
+        spare = [p for p in providers if p.has_spare_quota()]
+        if not spare:
+            return providers
+        candidates = [p for p in spare if not p.is_ahead_of_pace()] or spare
+        if not self._prefer_free_quota:
+            return candidates
+        cheapest = min(p.cost_per_call for p in candidates)
+        return [p for p in candidates if p.cost_per_call == cheapest]
+    
+    def close(self) -> None:
+        """关闭搜索线程池与缓存/配额数据库连接（已提交的搜索继续执行完）"""
+        self._executor.shutdown(wait=False)
+        if self._cache is not None:
+            self._cache.close()
+        if self._scheduler is not None:
+            self._scheduler.close()
+    
+    def get_quota_status(self) -> List[Dict[str, Any]]:
+        """获取各搜索引擎本月配额用量与耗尽预测"""
+        return [p.get_quota_status() for p in self._providers if p.is_available]
+    
+    def _get_cached(self, query: str, max_results: int, days: int) -> Optional[SearchResponse]:
+        """查询搜索缓存（未启用缓存时返回 None）"""
+        if self._cache is None:
+            return None
+        cached = self._cache.get(query, days, max_results)
+        if cached is not None:
+            logger.info(f"[搜索缓存] 命中 '{query}' (近{days}天, {len(cached.results)} 条)")
+        return cached
+    
+    def _put_cached(self, response: SearchResponse, max_results: int, days: int, dimension: str) -> None:
+        """写入搜索缓存，有效期按维度确定"""
+        if self._cache is None:
+            return
+        ttl = self.SEARCH_CACHE_TTLS.get(dimension, self.DEFAULT_SEARCH_CACHE_TTL)
+        self._cache.put(response, days, max_results, ttl)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取搜索缓存命中统计（未启用缓存时返回空字典）"""
+        return self._cache.get_stats() if self._cache else {}
+    
+    def reset_cache_stats(self) -> None:
+        """重置搜索缓存命中统计（每次运行开始时调用）"""
+        if self._cache is not None:
+            self._cache.reset_stats()
+    
     def search_stock_news(
         self,
         stock_code: str,
@@ -797,6 +1389,10 @@ class SearchService:
 
         logger.info(f"搜索股票新闻: {stock_name}({stock_code}), query='{query}', 时间范围: 近{search_days}天")
         
+        cached = self._get_cached(query, max_results, search_days)
+        if cached is not None:
+            return cached
+        
         # 依次尝试各个搜索引擎
         for provider in self._providers:
             if not provider.is_available:
@@ -806,6 +1402,7 @@ class SearchService:
             
             if response.success and response.results:
                 logger.info(f"使用 {provider.name} 搜索成功")
+                self._put_cached(response, max_results, search_days, 'stock_news')
                 return response
             else:
                 logger.warning(f"{provider.name} 搜索失败: {response.error_message}，尝试下一个引擎")
@@ -847,6 +1444,10 @@ class SearchService:
         
         logger.info(f"搜索股票事件: {stock_name}({stock_code}) - {event_types}")
         
+        cached = self._get_cached(query, 5, 7)
+        if cached is not None:
+            return cached
+        
         # 依次尝试各个搜索引擎
         for provider in self._providers:
             if not provider.is_available:
@@ -855,6 +1456,7 @@ class SearchService:
             response = provider.search(query, max_results=5)
             
             if response.success:
+                self._put_cached(response, 5, 7, 'stock_events')
                 return response
         
         return SearchResponse(
@@ -865,33 +1467,9 @@ class SearchService:
             error_message="事件搜索失败"
         )
     
-    def search_comprehensive_intel(
-        self,
-        stock_code: str,
-        stock_name: str,
-        max_searches: int = 3
-    ) -> Dict[str, SearchResponse]:
-        """
-        多维度情报搜索（同时使用多个引擎、多个维度）
-        
-        搜索维度：
-        1. 最新消息 - 近期新闻动态
-        2. 风险排查 - 减持、处罚、利空
-        3. 业绩预期 - 年报预告、业绩快报
-        
-        Args:
-            stock_code: 股票代码
-            stock_name: 股票名称
-            max_searches: 最大搜索次数
-            
-        Returns:
-            {维度名称: SearchResponse} 字典
-        """
-        results = {}
-        search_count = 0
-        
-        # 定义搜索维度
-        search_dimensions = [
+    def _build_intel_dimensions(self, stock_code: str, stock_name: str) -> List[Dict[str, str]]:
+        """构建多维度情报搜索的维度定义（顺序与 format_intel_report 展示顺序一致）"""
+        return [
             {
                 'name': 'latest_news',
                 'query': f"{stock_name} {stock_code} 最新 新闻 重大 事件",
@@ -903,7 +1481,7 @@ class SearchService:
                 'desc': '机构分析'
             },
             {
-                'name': 'risk_check', 
+                'name': 'risk_check',
                 'query': f"{stock_name} 减持 处罚 违规 诉讼 利空 风险",
                 'desc': '风险排查'
             },
@@ -918,39 +1496,215 @@ class SearchService:
                 'desc': '行业分析'
             },
         ]
+    
+    def search_comprehensive_intel(
+        self,
+        stock_code: str,
+        stock_name: str,
+        max_searches: int = 3,
+        deadline: Optional[float] = None,
+        dimensions: Optional[List[str]] = None
+    ) -> Dict[str, SearchResponse]:
+        """
+        多维度情报搜索（同时使用多个引擎、多个维度）
+        
+        搜索维度：
+        1. 最新消息 - 近期新闻动态
+        2. 风险排查 - 减持、处罚、利空
+        3. 业绩预期 - 年报预告、业绩快报
+        
+        各维度轮流分配到可用的搜索引擎并发执行，单个引擎的并发数受 max_concurrency 限制；
+        到达截止时间后只返回已完成的维度。
+        
+        Args:
+            stock_code: 股票代码
+            stock_name: 股票名称
+            max_searches: 最大搜索次数
+            deadline: 整体截止时间（秒），默认 INTEL_SEARCH_DEADLINE
+            dimensions: 只搜索指定维度（默认全部维度）
+        
+        Returns:
+            {维度名称: SearchResponse} 字典（按维度顺序）
+        """
+        available_providers = [p for p in self._providers if p.is_available]
+        if not available_providers:
+            return {}
+        available_providers = self._rank_providers(available_providers)
+        
+        search_dimensions = [
+            dim for dim in self._build_intel_dimensions(stock_code, stock_name)
+            if dimensions is None or dim['name'] in dimensions
+        ][:max_searches]
+        deadline = self.INTEL_SEARCH_DEADLINE if deadline is None else deadline
         
         logger.info(f"开始多维度情报搜索: {stock_name}({stock_code})")
         
-        # 轮流使用不同的搜索引擎
+        # 轮流使用不同的搜索引擎（命中缓存的维度不发起请求）
+        completed: Dict[str, SearchResponse] = {}
+        futures = {}
         provider_index = 0
-        
         for dim in search_dimensions:
-            if search_count >= max_searches:
-                break
-            
-            # 选择搜索引擎（轮流使用）
-            available_providers = [p for p in self._providers if p.is_available]
-            if not available_providers:
-                break
-            
+            cached = self._get_cached(dim['query'], 3, 7)
+            if cached is not None:
+                completed[dim['name']] = cached
+                continue
             provider = available_providers[provider_index % len(available_providers)]
             provider_index += 1
-            
             logger.info(f"[情报搜索] {dim['desc']}: 使用 {provider.name}")
+            future = self._executor.submit(provider.search, dim['query'], 3)
+            futures[future] = dim
+        
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                dim = futures[future]
+                response = future.result()
+                completed[dim['name']] = response
+                get_metrics().record(
+                    f"{STAGE_SEARCH}.{dim['name']}", response.search_time,
+                    code=stock_code, source=response.provider, success=response.success
+                )
+                if response.success:
+                    self._put_cached(response, 3, 7, dim['name'])
+                    logger.info(f"[情报搜索] {dim['desc']}: 获取 {len(response.results)} 条结果")
+                else:
+                    logger.warning(f"[情报搜索] {dim['desc']}: 搜索失败 - {response.error_message}")
+        except FutureTimeoutError:
+            pending = [dim['desc'] for future, dim in futures.items() if dim['name'] not in completed]
+            for future, dim in futures.items():
+                if dim['name'] not in completed:
+                    get_metrics().record(f"{STAGE_SEARCH}.{dim['name']}", deadline, code=stock_code, success=False)
+            logger.warning(f"[情报搜索] {stock_name} 达到截止时间 {deadline}s，未完成维度: {', '.join(pending)}")
+        
+        # 按维度顺序返回
+        return {
+            dim['name']: completed[dim['name']]
+            for dim in search_dimensions if dim['name'] in completed
+        }
+
+    def _build_sector_dimensions(self, board_name: str) -> List[Dict[str, str]]:
+        """构建板块级共享维度（同板块股票共用一次搜索）"""
+        return [
+            {
+                'name': 'industry',
+                'query': f"{board_name} 板块 行业前景 政策 景气度 竞争格局",
+                'desc': '行业分析'
+            },
+            {
+                'name': 'macro',
+                'query': f"{board_name} 宏观经济 货币政策 产业政策 影响",
+                'desc': '宏观环境'
+            },
+        ]
+    
+    def plan_batch_intel(
+        self,
+        stock_boards: Dict[str, Optional[str]],
+        min_group_size: int = 2,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Dict[str, SearchResponse]]:
+        """
+        批量情报规划：按所属板块分组，板块级维度（行业、宏观）每组只搜索一次并分发给组内每只股票
+        
+        只有一只股票的板块仍由 search_comprehensive_intel 按公司名称搜索（结果更精确）。
+        
+        Args:
+            stock_boards: {股票代码: 所属板块名称}，板块未知为 None
+            min_group_size: 合并搜索的最小组大小
+            deadline: 整体截止时间（秒），默认 INTEL_SEARCH_DEADLINE
+        
+        Returns:
+            {股票代码: {维度名称: SearchResponse}}，只包含被合并搜索覆盖的股票
+        """
+        groups: Dict[str, List[str]] = {}
+        for code, board in stock_boards.items():
+            if board:
+                groups.setdefault(board, []).append(code)
+        groups = {board: codes for board, codes in groups.items() if len(codes) >= min_group_size}
+        
+        available_providers = [p for p in self._providers if p.is_available]
+        if not groups or not available_providers:
+            return {}
+        available_providers = self._rank_providers(available_providers)
+        
+        deadline = self.INTEL_SEARCH_DEADLINE if deadline is None else deadline
+        shared: Dict[str, Dict[str, SearchResponse]] = {}
+        futures = {}
+        provider_index = 0
+        for board, codes in groups.items():
+            for dim in self._build_sector_dimensions(board):
+                cached = self._get_cached(dim['query'], 3, 7)
+                if cached is not None:
+                    for code in codes:
+                        shared.setdefault(code, {})[dim['name']] = cached
+                    continue
+                provider = available_providers[provider_index % len(available_providers)]
+                provider_index += 1
+                future = self._executor.submit(provider.search, dim['query'], 3)
+                futures[future] = (board, dim)
+        
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                board, dim = futures[future]
+                response = future.result()
+                if not response.success:
+                    logger.warning(f"[板块情报] {board} {dim['desc']}: 搜索失败 - {response.error_message}")
+                    continue
+                self._put_cached(response, 3, 7, dim['name'])
+                for code in groups[board]:
+                    shared.setdefault(code, {})[dim['name']] = response
+        except FutureTimeoutError:
+            logger.warning(f"[板块情报] 达到截止时间 {deadline}s，未完成的板块将按个股搜索")
+        
+        covered = sum(len(codes) for codes in groups.values())
+        logger.info(f"[板块情报] {len(groups)} 个板块覆盖 {covered} 只股票，"
+                    f"行业维度节省 {covered - len(groups)} 次搜索")
+        return shared
+    
+    def collapse_intel_results(self, intel_results: Dict[str, SearchResponse]) -> Dict[str, SearchResponse]:
+        """
+        跨维度合并近似重复新闻
+        
+        不同搜索引擎/维度常返回同一通稿的不同 URL 版本。按展示顺序遍历，
+        每个近似重复簇只保留一条：位置取首次出现的维度，内容取信息量最大的版本
+        （摘要最长，其次有发布日期、有 URL）。
+        
+        Args:
+            intel_results: 多维度搜索结果
             
-            response = provider.search(dim['query'], max_results=3)
-            results[dim['name']] = response
-            search_count += 1
-            
-            if response.success:
-                logger.info(f"[情报搜索] {dim['desc']}: 获取 {len(response.results)} 条结果")
-            else:
-                logger.warning(f"[情报搜索] {dim['desc']}: 搜索失败 - {response.error_message}")
-            
-            # 短暂延迟避免请求过快
-            time.sleep(0.5)
+        Returns:
+            合并后的多维度搜索结果（未变化的维度原样返回）
+        """
+        def informativeness(result: SearchResult) -> Tuple[int, bool, bool]:
+            return (len(result.snippet or ''), bool(result.published_date), bool(result.url))
         
-        return results
+        order = [dim for dim in self.INTEL_DIMENSION_NAMES if dim in intel_results]
+        order += [dim for dim in intel_results if dim not in order]
+        
+        index = SimHashIndex()
+        kept: Dict[str, List[SearchResult]] = {}
+        collapsed = 0
+        for dim in order:
+            kept[dim] = []
+            for result in intel_results[dim].results:
+                fingerprint = news_fingerprint(result.title, result.snippet)
+                slot = index.find(fingerprint)
+                if slot is None:
+                    index.add(fingerprint, (dim, len(kept[dim])))
+                    kept[dim].append(result)
+                    continue
+                collapsed += 1
+                slot_dim, position = slot
+                if informativeness(result) > informativeness(kept[slot_dim][position]):
+                    kept[slot_dim][position] = result
+        
+        if not collapsed:
+            return intel_results
+        
+        logger.info(f"[情报去重] 合并近似重复新闻 {collapsed} 条")
+        return {
+            dim: replace(intel_results[dim], results=kept[dim])
+            for dim in intel_results
+        }
     
     def format_intel_report(self, intel_results: Dict[str, SearchResponse], stock_name: str) -> str:
         """
@@ -965,8 +1719,11 @@ class SearchService:
         """
         lines = [f"【{stock_name} 情报搜索结果】"]
         
+        # 跨维度合并近似重复新闻（同一通稿只进入 prompt 一次）
+        intel_results = self.collapse_intel_results(intel_results)
+        
         # 维度展示顺序
-        display_order = ['latest_news', 'market_analysis', 'risk_check', 'earnings', 'industry']
+        display_order = self.INTEL_DIMENSION_NAMES + self.SECTOR_DIMENSION_NAMES
         
         for dim_name in display_order:
             if dim_name not in intel_results:
@@ -981,6 +1738,7 @@ class SearchService:
             elif dim_name == 'risk_check': dim_desc = '⚠️ 风险排查'
             elif dim_name == 'earnings': dim_desc = '📊 业绩预期'
             elif dim_name == 'industry': dim_desc = '🏭 行业分析'
+            elif dim_name == 'macro': dim_desc = '🌐 宏观环境'
             
             lines.append(f"\n{dim_desc} (来源: {resp.provider}):")
             if resp.success and resp.results:
@@ -1032,7 +1790,8 @@ class SearchService:
         stock_code: str,
         stock_name: str,
         max_attempts: int = 3,
-        max_results: int = 5
+        max_results: int = 5,
+        deadline: Optional[float] = None
     ) -> SearchResponse:
         """
         Enhance search when data sources fail.
@@ -1041,19 +1800,22 @@ class SearchService:
         stock data, use search engines to find stock trends and price info as supplemental data for AI analysis.
         
         Strategy:
-        1. Search using multiple keyword templates
-        2. Try all available search engines for each keyword
-        3. Aggregate and deduplicate results
+        1. Search all keyword templates in parallel, each starting on a different search engine
+        2. A keyword whose search fails is retried on the next search engine
+        3. Stop once max_results unique results are collected or the deadline is reached
+        4. Aggregate and deduplicate results in keyword order; cache successful results for the trading day
         
         Args:
             stock_code: Stock Code
             stock_name: Stock Name
             max_attempts: Max search attempts (using different keywords)
             max_results: Max results to return
+            deadline: Overall time budget in seconds (default PRICE_FALLBACK_DEADLINE)
             
         Returns:
             SearchResponse object with aggregated results
         """
+        query_label = f"{stock_name}({stock_code}) 股价走势"
 
         if not self.is_available:
             return SearchResponse(
@@ -1064,48 +1826,78 @@ class SearchService:
                 error_message="未配置搜索引擎 API Key"
             )
         
+        # 同一交易日内复用已有结果（多只股票数据源同时失败时避免重复搜索）
+        cached = self._get_cached(query_label, max_results, 1)
+        if cached is not None:
+            return cached
+        
         logger.info(f"[增强搜索] 数据源失败，启动增强搜索: {stock_name}({stock_code})")
         
-        all_results = []
-        seen_urls = set()
-        successful_providers = []
+        available_providers = [p for p in self._providers if p.is_available]
+        ranked = self._rank_providers(available_providers)
+        providers = ranked + [p for p in available_providers if p not in ranked]
+        queries = [
+            keyword_template.format(name=stock_name, code=stock_code)
+            for keyword_template in self.ENHANCED_SEARCH_KEYWORDS[:max_attempts]
+        ]
+        deadline = self.PRICE_FALLBACK_DEADLINE if deadline is None else deadline
+        deadline_at = time.monotonic() + deadline
         
-        # 使用多个关键词模板搜索
-        for i, keyword_template in enumerate(self.ENHANCED_SEARCH_KEYWORDS[:max_attempts]):
-            query = keyword_template.format(name=stock_name, code=stock_code)
-            
-            logger.info(f"[增强搜索] 第 {i+1}/{max_attempts} 次搜索: {query}")
-            
-            # 依次尝试各个搜索引擎
-            for provider in self._providers:
-                if not provider.is_available:
-                    continue
-                
+        # future -> (关键词序号, 已尝试的搜索引擎数)
+        pending: Dict[Future, Tuple[int, int]] = {}
+        
+        def submit(keyword_index: int, tried: int) -> None:
+            provider = providers[(keyword_index + tried) % len(providers)]
+            logger.info(f"[增强搜索] 第 {keyword_index + 1}/{len(queries)} 个关键词: {queries[keyword_index]} ({provider.name})")
+            future = self._executor.submit(provider.search, queries[keyword_index], 3)
+            pending[future] = (keyword_index, tried)
+        
+        for keyword_index in range(len(queries)):
+            submit(keyword_index, 0)
+        
+        responses: Dict[int, SearchResponse] = {}
+        seen_urls = set()
+        while pending and len(seen_urls) < max_results:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                keyword_index, tried = pending.pop(future)
+                provider = providers[(keyword_index + tried) % len(providers)]
                 try:
-                    response = provider.search(query, max_results=3)
-                    
-                    if response.success and response.results:
-                        # 去重并添加结果
-                        for result in response.results:
-                            if result.url not in seen_urls:
-                                seen_urls.add(result.url)
-                                all_results.append(result)
-                                
-                        if provider.name not in successful_providers:
-                            successful_providers.append(provider.name)
-                        
-                        logger.info(f"[增强搜索] {provider.name} 返回 {len(response.results)} 条结果")
-                        break  # 成功后跳到下一个关键词
-                    else:
-                        logger.debug(f"[增强搜索] {provider.name} 无结果或失败")
-                        
+                    response = future.result()
                 except Exception as e:
                     logger.warning(f"[增强搜索] {provider.name} 搜索异常: {e}")
-                    continue
-            
-            # 短暂延迟避免请求过快
-            if i < max_attempts - 1:
-                time.sleep(0.5)
+                    response = None
+                
+                if response is not None and response.success and response.results:
+                    logger.info(f"[增强搜索] {provider.name} 返回 {len(response.results)} 条结果")
+                    responses[keyword_index] = response
+                    seen_urls.update(result.url for result in response.results)
+                elif tried + 1 < len(providers):
+                    # 该关键词换下一个搜索引擎重试
+                    logger.debug(f"[增强搜索] {provider.name} 无结果或失败，换引擎重试")
+                    submit(keyword_index, tried + 1)
+        
+        if pending:
+            for future in pending:
+                future.cancel()
+            reason = "已收集足够结果" if len(seen_urls) >= max_results else f"达到截止时间 {deadline}s"
+            logger.info(f"[增强搜索] {reason}，放弃剩余 {len(pending)} 个搜索")
+        
+        # 按关键词顺序汇总并去重
+        all_results = []
+        seen_urls = set()
+        successful_providers = []
+        for keyword_index in sorted(responses):
+            response = responses[keyword_index]
+            for result in response.results:
+                if result.url not in seen_urls:
+                    seen_urls.add(result.url)
+                    all_results.append(result)
+            if response.provider not in successful_providers:
+                successful_providers.append(response.provider)
         
         # 汇总结果
         if all_results:
@@ -1115,16 +1907,22 @@ class SearchService:
             
             logger.info(f"[增强搜索] 完成，共获取 {len(final_results)} 条结果（来源: {provider_str}）")
             
-            return SearchResponse(
-                query=f"{stock_name}({stock_code}) 股价走势",
+            response = SearchResponse(
+                query=query_label,
                 results=final_results,
                 provider=provider_str,
                 success=True,
             )
+            if self._cache is not None:
+                # 缓存至当日结束（同一交易日内有效）
+                now = datetime.now()
+                day_end = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+                self._cache.put(response, 1, max_results, int((day_end - now).total_seconds()))
+            return response
         else:
             logger.warning(f"[增强搜索] 所有搜索均未返回结果")
             return SearchResponse(
-                query=f"{stock_name}({stock_code}) 股价走势",
+                query=query_label,
                 results=[],
                 provider="None",
                 success=False,
@@ -1157,8 +1955,11 @@ class SearchService:
         """
         results = {}
         
+        # 新闻搜索与股价兜底搜索并行执行
+        news_future = None
         if include_news:
-            results['news'] = self.search_stock_news(
+            news_future = self._executor.submit(
+                self.search_stock_news,
                 stock_code, 
                 stock_name, 
                 max_results=max_results
@@ -1172,6 +1973,9 @@ class SearchService:
                 max_results=max_results
             )
         
+        if news_future is not None:
+            results = {'news': news_future.result(), **results}
+        
         return results
 
     def format_price_search_context(self, response: SearchResponse) -> str:
@@ -1204,21 +2008,30 @@ class SearchService:
 
 # === 便捷函数 ===
 _search_service: Optional[SearchService] = None
+_search_service_lock = threading.Lock()
 
 
 def get_search_service() -> SearchService:
-    """获取搜索服务单例"""
+    """
+    获取搜索服务单例
+    
+    流水线、大盘复盘与机器人命令共用同一实例（共享搜索线程池、缓存与配额数据库连接），
+    不随每次命令重复创建
+    """
     global _search_service
     
-    if _search_service is None:
-        from src.config import get_config
-        config = get_config()
-        
-        _search_service = SearchService(
-            bocha_keys=config.bocha_api_keys,
-            tavily_keys=config.tavily_api_keys,
-            serpapi_keys=config.serpapi_keys,
-        )
+    with _search_service_lock:
+        if _search_service is None:
+            from src.config import get_config
+            config = get_config()
+            
+            _search_service = SearchService(
+                bocha_keys=config.bocha_api_keys,
+                tavily_keys=config.tavily_api_keys,
+                serpapi_keys=config.serpapi_keys,
+                cache_enabled=config.search_cache_enabled,
+                prefer_free_quota=config.search_prefer_free_quota,
+            )
     
     return _search_service
 
@@ -1226,7 +2039,10 @@ def get_search_service() -> SearchService:
 def reset_search_service() -> None:
     """重置搜索服务（用于测试）"""
     global _search_service
-    _search_service = None
+    with _search_service_lock:
+        if _search_service is not None:
+            _search_service.close()
+        _search_service = None
 
 
 if __name__ == "__main__":
@@ -16,6 +16,8 @@ import hashlib
 import json
 import logging
 import re
+import unicodedata
+from dataclasses import replace
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any, TYPE_CHECKING
 from pathlib import Path
@@ -35,15 +37,24 @@ from sqlalchemy import (
     select,
     and_,
     desc,
+    exists,
+    func,
+    text,
+    table,
+    column,
+    literal_column,
 )
 from sqlalchemy.orm import (
+    aliased,
     declarative_base,
     sessionmaker,
     Session,
 )
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
 
 from src.config import get_config
+from src.news_dedup import SimHashIndex, news_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +65,43 @@ if TYPE_CHECKING:
     from src.search_service import SearchResponse
 
 
+# === 新闻全文检索（SQLite FTS5）===
+# FTS5 自带分词器不切分中文（unicode61 把整段汉字视为一个词，trigram 不支持两字查询），
+# 因此入库前在 Python 侧预分词：汉字按字符二元组、字母数字按整词，以空格连接后写入 FTS 表
+NEWS_FTS_TABLE = 'news_intel_fts'
+_FTS_TOKEN_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]+|[0-9a-z]+')
+
+
+def _fts_tokens(content: str) -> List[str]:
+    """全文检索分词：汉字二元组 + 字母数字整词"""
+    tokens: List[str] = []
+    for run in _FTS_TOKEN_RE.findall(unicodedata.normalize('NFKC', content or '').lower()):
+        if run.isascii() or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def _build_fts_query(keywords: str) -> Optional[str]:
+    """
+    关键词转换为 FTS5 MATCH 表达式
+
+    空格分隔的多个关键词为 AND 关系；每个关键词转换为二元组短语（要求连续出现），
+    单个汉字转换为前缀查询。无有效关键词返回 None。
+    """
+    terms = []
+    for keyword in (keywords or '').split():
+        tokens = _fts_tokens(keyword)
+        if not tokens:
+            continue
+        if len(tokens) == 1 and len(tokens[0]) == 1 and not tokens[0].isascii():
+            terms.append(f'{tokens[0]}*')
+        else:
+            terms.append('"' + ' '.join(tokens) + '"')
+    return ' AND '.join(terms) if terms else None
+
+
 # === 数据模型定义 ===
 
 class StockDaily(Base):
@@ -174,6 +222,47 @@ class NewsIntel(Base):
     def __repr__(self) -> str:
         return f"<NewsIntel(code={self.code}, title={self.title[:20]}...)>"
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'code': self.code,
+            'name': self.name,
+            'dimension': self.dimension,
+            'provider': self.provider,
+            'title': self.title,
+            'snippet': self.snippet,
+            'url': self.url if self.url.startswith('http') else '',
+            'source': self.source,
+            'published_date': self.published_date.isoformat() if self.published_date else None,
+            'fetched_at': self.fetched_at.isoformat() if self.fetched_at else None,
+        }
+
+
+class NewsIntelFetch(Base):
+    """
+    新闻情报维度搜索记录
+
+    每只股票每个维度一条，记录最近一次成功搜索的时间。入库时近似重复的新闻会合并到
+    其他维度已有的记录，某个维度可能没有一条记录归在自己名下；新鲜期按本表判断，
+    避免这类维度每次运行都被视为缺失而重复搜索。
+    """
+    __tablename__ = 'news_intel_fetch'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    code = Column(String(10), nullable=False)
+    dimension = Column(String(32), nullable=False)
+    query = Column(String(255))
+    provider = Column(String(32))
+    fetched_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('code', 'dimension', name='uix_news_fetch_dim'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<NewsIntelFetch(code={self.code}, dimension={self.dimension}, fetched_at={self.fetched_at})>"
+
 
 class AnalysisHistory(Base):
     """
@@ -239,6 +328,45 @@ class AnalysisHistory(Base):
         }
 
 
+class NotificationOutbox(Base):
+    """
+    通知发件箱模型
+
+    待推送消息先持久化再由后台投递线程发送，进程崩溃后未送达的消息可继续投递。
+    长消息入队时按渠道长度上限切分，每条记录对应一个分段；chunk_id 由渠道 + 消息 ID（幂等范围 + 完整内容摘要）
+    + 分段序号生成，同一范围（一次运行或一个时间窗口）内重复入队同一消息不会重复发送，
+    某一段失败重试时也不会重发已送达的分段，且同一消息靠后的分段等前面的分段送达后才发送。
+    """
+    __tablename__ = 'notification_outbox'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # 幂等键（sha1(渠道 + 消息 ID + 分段序号)）
+    chunk_id = Column(String(64), nullable=False)
+    channel = Column(String(32), nullable=False, index=True)  # NotificationChannel.value
+    message_id = Column(String(64), nullable=False, default='')
+    chunk_index = Column(Integer, nullable=False, default=0)
+    content = Column(Text, nullable=False)
+
+    # 投递状态：pending / sending / sent / failed
+    status = Column(String(16), nullable=False, default='pending', index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.now, index=True)
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.now)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        UniqueConstraint('chunk_id', name='uix_outbox_chunk'),
+        Index('ix_outbox_channel_due', 'channel', 'status', 'next_attempt_at'),
+        Index('ix_outbox_message', 'message_id', 'chunk_index'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<NotificationOutbox(channel={self.channel}, status={self.status}, attempts={self.attempts})>"
+
+
 class DatabaseManager:
     """
     数据库管理器 - 单例模式
@@ -251,6 +379,9 @@ class DatabaseManager:
     
     _instance: Optional['DatabaseManager'] = None
     
+    # 入库近似重复比对的回看天数（同一通稿通常在数日内被多家网站转载）
+    NEWS_DEDUP_LOOKBACK_DAYS = 7
+    
     def __new__(cls, *args, **kwargs):
         """单例模式实现"""
         if cls._instance is None:
@@ -288,6 +419,9 @@ class DatabaseManager:
         
         # 创建所有表
         Base.metadata.create_all(self._engine)
+        
+        # 新闻全文检索索引（FTS5 不可用时退化为 LIKE 查询）
+        self._news_fts_enabled = self._init_news_fts()
 
         self._initialized = True
         logger.info(f"数据库初始化完成: {db_url}")
@@ -407,96 +541,186 @@ class DatabaseManager:
         query_context: Optional[Dict[str, str]] = None
     ) -> int:
         """
-        保存新闻情报到数据库
+        保存单个维度的新闻情报到数据库（save_news_intel_batch 的单维度形式）
+
+        Returns:
+            新增记录数
+        """
+        if not response or not response.results:
+            return 0
+        if query and query != response.query:
+            response = replace(response, query=query)
+        return self.save_news_intel_batch(code, name, {dimension: response}, query_context)
+
+    def save_news_intel_batch(
+        self,
+        code: str,
+        name: str,
+        responses: Dict[str, 'SearchResponse'],
+        query_context: Optional[Dict[str, str]] = None
+    ) -> int:
+        """
+        批量保存多个维度的新闻情报到数据库（单个事务）
 
         去重策略：
         - 优先按 URL 去重（唯一约束）
         - URL 缺失时按 title + source + published_date 进行软去重
+        - 同一股票近期已入库的近似重复新闻（同一通稿不同 URL）不再新增，
+          新版本摘要更长时更新已有记录的摘要
+
+        写入策略：
+        - 先计算全部 url_key，用一次 IN 查询预取已存在记录并原地更新
+        - 新记录一次性批量插入（ON CONFLICT DO NOTHING，并发写入的同 URL 记录直接跳过）
+        - 每个搜索成功的维度更新一次搜索记录（即使条目全部被合并、没有新增记录），用于判断新鲜期
 
         关联策略：
         - query_context 记录用户查询信息（平台、用户、会话、原始指令等）
+
+        Args:
+            code: 股票代码
+            name: 股票名称
+            responses: {维度: SearchResponse}
+            query_context: 用户查询上下文
+
+        Returns:
+            新增记录数
         """
-        if not response or not response.results:
+        # 展开为 (维度, 查询, 搜索引擎, 条目)，同一批次内相同 url_key 只保留首次出现
+        entries: Dict[str, Dict[str, Any]] = {}
+        for dimension, response in responses.items():
+            if not response or not response.results:
+                continue
+            for item in response.results:
+                title = (item.title or '').strip()
+                url = (item.url or '').strip()
+                if not title and not url:
+                    continue
+
+                source = (item.source or '').strip()
+                published_date = self._parse_published_date(item.published_date)
+                url_key = url or self._build_fallback_url_key(
+                    code=code,
+                    title=title,
+                    source=source,
+                    published_date=published_date
+                )
+                entries.setdefault(url_key, {
+                    'dimension': dimension,
+                    'query': response.query,
+                    'provider': response.provider,
+                    'title': title,
+                    'snippet': (item.snippet or '').strip(),
+                    'source': source,
+                    'published_date': published_date,
+                })
+
+        fetched_dims = [
+            {'code': code, 'dimension': dimension, 'query': response.query, 'provider': response.provider}
+            for dimension, response in responses.items()
+            if response and response.success
+        ]
+        if not entries and not fetched_dims:
             return 0
 
+        query_context = query_context or {}
+        context_fields = [
+            "query_id", "query_source", "requester_platform", "requester_user_id",
+            "requester_user_name", "requester_chat_id", "requester_message_id", "requester_query",
+        ]
+        now = datetime.now()
         saved_count = 0
+        collapsed_count = 0
 
         with self.get_session() as session:
             try:
-                for item in response.results:
-                    title = (item.title or '').strip()
-                    url = (item.url or '').strip()
-                    source = (item.source or '').strip()
-                    snippet = (item.snippet or '').strip()
-                    published_date = self._parse_published_date(item.published_date)
-
-                    if not title and not url:
+                existing_rows = {
+                    row.url: row
+                    for row in session.execute(
+                        select(NewsIntel).where(NewsIntel.url.in_(list(entries.keys())))
+                    ).scalars().all()
+                }
+                near_dup_index = self._build_news_dedup_index(session, code)
+
+                new_rows: List[Dict[str, Any]] = []
+                touched_rows: List[NewsIntel] = []  # 内容可能变化、需要刷新全文索引的已有记录
+                for url_key, entry in entries.items():
+                    existing = existing_rows.get(url_key)
+                    if existing:
+                        touched_rows.append(existing)
+                        existing.name = name or existing.name
+                        existing.dimension = entry['dimension'] or existing.dimension
+                        existing.query = entry['query'] or existing.query
+                        existing.provider = entry['provider'] or existing.provider
+                        existing.snippet = entry['snippet'] or existing.snippet
+                        existing.source = entry['source'] or existing.source
+                        existing.published_date = entry['published_date'] or existing.published_date
+                        existing.fetched_at = now
+                        for field_name in context_fields:
+                            value = query_context.get(field_name)
+                            if value:
+                                setattr(existing, field_name, value)
                         continue
 
-                    url_key = url or self._build_fallback_url_key(
-                        code=code,
-                        title=title,
-                        source=source,
-                        published_date=published_date
-                    )
+                    fingerprint = news_fingerprint(entry['title'], entry['snippet'])
+                    near_dup = near_dup_index.find(fingerprint)
+                    if near_dup is not None:
+                        # 近似重复：不新增记录，保留信息量更大的摘要
+                        # （near_dup 为已入库的 NewsIntel 或本批次待插入的字典）
+                        if isinstance(near_dup, dict):
+                            if len(entry['snippet']) > len(near_dup['snippet']):
+                                near_dup['snippet'] = entry['snippet']
+                            near_dup['published_date'] = near_dup['published_date'] or entry['published_date']
+                        else:
+                            if len(entry['snippet']) > len(near_dup.snippet or ''):
+                                near_dup.snippet = entry['snippet']
+                                touched_rows.append(near_dup)
+                            near_dup.published_date = near_dup.published_date or entry['published_date']
+                        collapsed_count += 1
+                        continue
 
-                    # 优先按 URL 或兜底键去重
-                    existing = session.execute(
-                        select(NewsIntel).where(NewsIntel.url == url_key)
-                    ).scalar_one_or_none()
+                    row = {
+                        'code': code,
+                        'name': name,
+                        'url': url_key,
+                        'fetched_at': now,
+                        **entry,
+                        **{field_name: query_context.get(field_name) for field_name in context_fields},
+                    }
+                    near_dup_index.add(fingerprint, row)
+                    new_rows.append(row)
+
+                if new_rows:
+                    # URL 唯一约束冲突（如并发插入）直接跳过，保留本批其余记录
+                    result = session.connection().execute(
+                        sqlite_insert(NewsIntel).on_conflict_do_nothing(index_elements=['url']),
+                        new_rows
+                    )
+                    saved_count = result.rowcount if result.rowcount >= 0 else len(new_rows)
+
+                if fetched_dims:
+                    upsert = sqlite_insert(NewsIntelFetch)
+                    session.connection().execute(
+                        upsert.on_conflict_do_update(
+                            index_elements=['code', 'dimension'],
+                            set_={
+                                'query': upsert.excluded.query,
+                                'provider': upsert.excluded.provider,
+                                'fetched_at': upsert.excluded.fetched_at,
+                            },
+                        ),
+                        [{**dim, 'fetched_at': now} for dim in fetched_dims]
+                    )
 
-                    if existing:
-                        existing.name = name or existing.name
-                        existing.dimension = dimension or existing.dimension
-                        existing.query = query or existing.query
-                        existing.provider = response.provider or existing.provider
-                        existing.snippet = snippet or existing.snippet
-                        existing.source = source or existing.source
-                        existing.published_date = published_date or existing.published_date
-                        existing.fetched_at = datetime.now()
-
-                        if query_context:
-                            existing.query_id = query_context.get("query_id") or existing.query_id
-                            existing.query_source = query_context.get("query_source") or existing.query_source
-                            existing.requester_platform = query_context.get("requester_platform") or existing.requester_platform
-                            existing.requester_user_id = query_context.get("requester_user_id") or existing.requester_user_id
-                            existing.requester_user_name = query_context.get("requester_user_name") or existing.requester_user_name
-                            existing.requester_chat_id = query_context.get("requester_chat_id") or existing.requester_chat_id
-                            existing.requester_message_id = query_context.get("requester_message_id") or existing.requester_message_id
-                            existing.requester_query = query_context.get("requester_query") or existing.requester_query
-                    else:
-                        try:
-                            with session.begin_nested():
-                                record = NewsIntel(
-                                    code=code,
-                                    name=name,
-                                    dimension=dimension,
-                                    query=query,
-                                    provider=response.provider,
-                                    title=title,
-                                    snippet=snippet,
-                                    url=url_key,
-                                    source=source,
-                                    published_date=published_date,
-                                    fetched_at=datetime.now(),
-                                    query_id=(query_context or {}).get("query_id"),
-                                    query_source=(query_context or {}).get("query_source"),
-                                    requester_platform=(query_context or {}).get("requester_platform"),
-                                    requester_user_id=(query_context or {}).get("requester_user_id"),
-                                    requester_user_name=(query_context or {}).get("requester_user_name"),
-                                    requester_chat_id=(query_context or {}).get("requester_chat_id"),
-                                    requester_message_id=(query_context or {}).get("requester_message_id"),
-                                    requester_query=(query_context or {}).get("requester_query"),
-                                )
-                                session.add(record)
-                                session.flush()
-                            saved_count += 1
-                        except IntegrityError:
-                            # 单条 URL 唯一约束冲突（如并发插入），仅跳过本条，保留本批其余成功项
-                            logger.debug("新闻情报重复（已跳过）: %s %s", code, url_key)
+                # 增量更新全文索引：刷新内容变化的记录，并补录新插入的记录
+                if self._news_fts_enabled:
+                    session.flush()
+                    connection = session.connection()
+                    self._index_news_fts(connection, [(row.id, row.title, row.snippet) for row in touched_rows])
+                    self._sync_news_fts(connection)
 
                 session.commit()
-                logger.info(f"保存新闻情报成功: {code}, 新增 {saved_count} 条")
+                logger.info(f"保存新闻情报成功: {code}, 新增 {saved_count} 条，"
+                            f"更新 {len(existing_rows)} 条，合并近似重复 {collapsed_count} 条")
 
             except Exception as e:
                 session.rollback()
@@ -505,6 +729,171 @@ class DatabaseManager:
 
         return saved_count
 
+    def _build_news_dedup_index(self, session: Session, code: str) -> SimHashIndex:
+        """用该股票近 NEWS_DEDUP_LOOKBACK_DAYS 天已入库的新闻构建近似重复索引"""
+        cutoff_date = datetime.now() - timedelta(days=self.NEWS_DEDUP_LOOKBACK_DAYS)
+        rows = session.execute(
+            select(NewsIntel).where(
+                and_(
+                    NewsIntel.code == code,
+                    NewsIntel.fetched_at >= cutoff_date
+                )
+            )
+        ).scalars().all()
+
+        index = SimHashIndex()
+        for row in rows:
+            index.add(news_fingerprint(row.title, row.snippet or ''), row)
+        return index
+
+    def get_latest_news_id(self, code: str) -> int:
+        """获取股票已入库新闻的最大 id（作为下一次 get_new_news_since 的起点，无新闻返回 0）"""
+        with self.get_session() as session:
+            return session.execute(
+                select(func.max(NewsIntel.id)).where(NewsIntel.code == code)
+            ).scalar() or 0
+
+    def get_new_news_since(self, code: str, last_seen_id: int, limit: int = 50) -> List[NewsIntel]:
+        """
+        获取上次运行之后新入库的新闻（"自上次以来有什么新消息"）
+
+        入库时已合并近似重复，id 大于 last_seen_id 的记录即为此前未出现过的新闻。
+
+        Args:
+            code: 股票代码
+            last_seen_id: 上次运行时已看到的最大 NewsIntel.id（首次运行传 0）
+            limit: 最多返回条数
+
+        Returns:
+            新闻列表，按 id 升序
+        """
+        with self.get_session() as session:
+            results = session.execute(
+                select(NewsIntel)
+                .where(
+                    and_(
+                        NewsIntel.code == code,
+                        NewsIntel.id > last_seen_id
+                    )
+                )
+                .order_by(NewsIntel.id)
+                .limit(limit)
+            ).scalars().all()
+
+            return list(results)
+
+    def _init_news_fts(self) -> bool:
+        """
+        创建新闻全文检索表并补录尚未建索引的记录（兼容已有数据库，首次启动时全量建立）
+
+        Returns:
+            全文检索是否可用（SQLite 未编译 FTS5 时返回 False）
+        """
+        try:
+            with self._engine.begin() as connection:
+                connection.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {NEWS_FTS_TABLE} USING fts5(title, snippet)"
+                ))
+                indexed = self._sync_news_fts(connection)
+        except OperationalError as e:
+            logger.warning(f"SQLite 不支持 FTS5，新闻检索将使用 LIKE 查询: {e}")
+            return False
+
+        if indexed:
+            logger.info(f"新闻全文索引补录 {indexed} 条")
+        return True
+
+    @staticmethod
+    def _index_news_fts(connection, rows: List[tuple]) -> None:
+        """写入/覆盖新闻全文索引，rows 为 (id, title, snippet)"""
+        if not rows:
+            return
+        connection.execute(
+            text(f"INSERT OR REPLACE INTO {NEWS_FTS_TABLE}(rowid, title, snippet) VALUES (:id, :title, :snippet)"),
+            [
+                {
+                    'id': news_id,
+                    'title': ' '.join(_fts_tokens(title)),
+                    'snippet': ' '.join(_fts_tokens(snippet)),
+                }
+                for news_id, title, snippet in rows
+            ]
+        )
+
+    def _sync_news_fts(self, connection) -> int:
+        """补录 id 大于索引最大 rowid 的新闻（news_intel 只追加，id 单调递增）"""
+        last_indexed = connection.execute(text(f"SELECT COALESCE(MAX(rowid), 0) FROM {NEWS_FTS_TABLE}")).scalar()
+        rows = connection.execute(
+            select(NewsIntel.id, NewsIntel.title, NewsIntel.snippet)
+            .where(NewsIntel.id > last_indexed)
+            .order_by(NewsIntel.id)
+        ).all()
+        self._index_news_fts(connection, [tuple(row) for row in rows])
+        return len(rows)
+
+    def search_news(
+        self,
+        keywords: str,
+        code: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        dimension: Optional[str] = None,
+        limit: int = 50
+    ) -> List[NewsIntel]:
+        """
+        全文检索新闻情报（跨股票、跨时间，按相关度排序）
+
+        Args:
+            keywords: 关键词，空格分隔表示同时包含（如 "减持 股东"）
+            code: 限定股票代码
+            start_date: 起始时间（按发布时间，缺失时按入库时间）
+            end_date: 截止时间
+            dimension: 限定搜索维度
+            limit: 最多返回条数
+
+        Returns:
+            NewsIntel 列表，按相关度（标题命中权重更高）降序
+        """
+        match = _build_fts_query(keywords)
+        if not match:
+            return []
+
+        news_date = func.coalesce(NewsIntel.published_date, NewsIntel.fetched_at)
+        conditions = []
+        if code:
+            conditions.append(NewsIntel.code == code)
+        if start_date:
+            conditions.append(news_date >= start_date)
+        if end_date:
+            conditions.append(news_date <= end_date)
+        if dimension:
+            conditions.append(NewsIntel.dimension == dimension)
+
+        with self.get_session() as session:
+            if not self._news_fts_enabled:
+                like_conditions = [
+                    NewsIntel.title.contains(keyword) | NewsIntel.snippet.contains(keyword)
+                    for keyword in keywords.split()
+                ]
+                return list(session.execute(
+                    select(NewsIntel)
+                    .where(and_(*conditions, *like_conditions))
+                    .order_by(desc(news_date))
+                    .limit(limit)
+                ).scalars().all())
+
+            fts = table(NEWS_FTS_TABLE, column('rowid'))
+            rank = literal_column(f"bm25({NEWS_FTS_TABLE}, 2.0, 1.0)")
+            results = session.execute(
+                select(NewsIntel)
+                .join(fts, fts.c.rowid == NewsIntel.id)
+                .where(and_(literal_column(NEWS_FTS_TABLE).op('MATCH')(match), *conditions))
+                .order_by(rank)
+                .limit(limit)
+            ).scalars().all()
+
+            return list(results)
+
     def get_recent_news(self, code: str, days: int = 7, limit: int = 20) -> List[NewsIntel]:
         """
         获取指定股票最近 N 天的新闻情报
@@ -526,6 +915,64 @@ class DatabaseManager:
 
             return list(results)
 
+    def get_fresh_news_intel(
+        self,
+        code: str,
+        max_age: Dict[str, int],
+        limit_per_dimension: int = 3
+    ) -> Dict[str, List[NewsIntel]]:
+        """
+        按维度获取仍在新鲜期内的新闻情报
+        
+        Args:
+            code: 股票代码
+            max_age: {维度: 新鲜期（秒）}，只查询其中的维度
+            limit_per_dimension: 每个维度最多返回条数
+        
+        Returns:
+            {维度: [NewsIntel]}，按入库时间倒序；新鲜期内搜索过但条目全部合并到其他维度的
+            维度对应空列表，新鲜期内未搜索过的维度不出现在结果中
+        """
+        if not max_age:
+            return {}
+        
+        now = datetime.now()
+        cutoff_date = now - timedelta(seconds=max(max_age.values()))
+        
+        with self.get_session() as session:
+            rows = session.execute(
+                select(NewsIntel)
+                .where(
+                    and_(
+                        NewsIntel.code == code,
+                        NewsIntel.dimension.in_(list(max_age.keys())),
+                        NewsIntel.fetched_at >= cutoff_date
+                    )
+                )
+                .order_by(desc(NewsIntel.fetched_at))
+            ).scalars().all()
+            fetches = session.execute(
+                select(NewsIntelFetch).where(
+                    and_(
+                        NewsIntelFetch.code == code,
+                        NewsIntelFetch.dimension.in_(list(max_age.keys())),
+                        NewsIntelFetch.fetched_at >= cutoff_date
+                    )
+                )
+            ).scalars().all()
+        
+        fresh: Dict[str, List[NewsIntel]] = {}
+        for row in rows:
+            if row.fetched_at < now - timedelta(seconds=max_age[row.dimension]):
+                continue
+            items = fresh.setdefault(row.dimension, [])
+            if len(items) < limit_per_dimension:
+                items.append(row)
+        for fetch in fetches:
+            if fetch.fetched_at >= now - timedelta(seconds=max_age[fetch.dimension]):
+                fresh.setdefault(fetch.dimension, [])
+        return fresh
+    
     def save_analysis_history(
         self,
         result: Any,
@@ -604,6 +1051,194 @@ class DatabaseManager:
 
             return list(results)
     
+    # === 通知发件箱 ===
+
+    @staticmethod
+    def build_outbox_message_id(content: str, scope: str = '') -> str:
+        """
+        生成消息 ID（幂等范围 + 完整消息内容摘要，切分前计算）
+
+        Args:
+            content: 完整消息内容
+            scope: 幂等范围（如运行 ID、时间窗口），不同范围的相同内容视为不同消息
+        """
+        return hashlib.sha1(f"{scope}\n{content}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def build_outbox_chunk_id(channel: str, message_id: str, index: int = 0) -> str:
+        """生成发件箱幂等键（同一渠道、同一消息的同一分段得到相同 chunk_id）"""
+        return hashlib.sha1(f"{channel}\n{message_id}\n{index}".encode('utf-8')).hexdigest()
+
+    def enqueue_notifications(self, messages: List[Dict[str, str]]) -> int:
+        """
+        消息写入发件箱（已存在的 chunk_id 忽略）
+
+        Args:
+            messages: [{'channel': 渠道, 'content': 内容}]，可选 'message_id'、'chunk_index'、'chunk_id'
+                      （未指定时按整条消息、分段序号 0 生成）
+
+        Returns:
+            新入队条数
+        """
+        if not messages:
+            return 0
+
+        now = datetime.now()
+        rows = []
+        for message in messages:
+            message_id = message.get('message_id') or self.build_outbox_message_id(message['content'])
+            chunk_index = message.get('chunk_index', 0)
+            rows.append({
+                'chunk_id': message.get('chunk_id') or self.build_outbox_chunk_id(
+                    message['channel'], message_id, chunk_index
+                ),
+                'channel': message['channel'],
+                'message_id': message_id,
+                'chunk_index': chunk_index,
+                'content': message['content'],
+                'status': 'pending',
+                'attempts': 0,
+                'next_attempt_at': now,
+                'created_at': now,
+            })
+        with self.get_session() as session:
+            result = session.connection().execute(
+                sqlite_insert(NotificationOutbox).on_conflict_do_nothing(index_elements=['chunk_id']),
+                rows
+            )
+            session.commit()
+            return result.rowcount if result.rowcount >= 0 else len(rows)
+
+    @staticmethod
+    def _outbox_not_blocked():
+        """查询条件：同一消息没有更靠前的分段仍在等待发送或重试（保证分段按序送达）"""
+        earlier = aliased(NotificationOutbox)
+        return ~exists().where(
+            and_(
+                earlier.channel == NotificationOutbox.channel,
+                earlier.message_id == NotificationOutbox.message_id,
+                earlier.chunk_index < NotificationOutbox.chunk_index,
+                earlier.status.in_(['pending', 'sending'])
+            )
+        )
+
+    def claim_due_notifications(self, channel: str, limit: int = 10) -> List[NotificationOutbox]:
+        """
+        领取渠道到期待发送的消息（按入队顺序），并标记为 sending
+
+        同一消息每次只领取最靠前的未送达分段；某段失败等待重试时，其后的分段不会被领取。
+
+        Returns:
+            已领取的消息列表
+        """
+        with self.get_session() as session:
+            rows = session.execute(
+                select(NotificationOutbox)
+                .where(
+                    and_(
+                        NotificationOutbox.channel == channel,
+                        NotificationOutbox.status == 'pending',
+                        NotificationOutbox.next_attempt_at <= datetime.now(),
+                        self._outbox_not_blocked()
+                    )
+                )
+                .order_by(NotificationOutbox.id)
+                .limit(limit)
+            ).scalars().all()
+            for row in rows:
+                row.status = 'sending'
+            session.flush()
+            # 脱离 Session 后提交，返回的对象保留已加载的属性供投递线程使用
+            session.expunge_all()
+            session.commit()
+            return list(rows)
+
+    def complete_notification(
+        self,
+        outbox_id: int,
+        success: bool,
+        error: Optional[str] = None,
+        retry_at: Optional[datetime] = None
+    ) -> None:
+        """
+        记录投递结果
+
+        Args:
+            outbox_id: 发件箱记录 ID
+            success: 是否发送成功
+            error: 失败原因
+            retry_at: 失败后的下次重试时间；为空表示不再重试（标记为 failed）
+        """
+        with self.get_session() as session:
+            row = session.get(NotificationOutbox, outbox_id)
+            if row is None:
+                return
+            row.attempts += 1
+            if success:
+                row.status = 'sent'
+                row.sent_at = datetime.now()
+                row.last_error = None
+            else:
+                row.status = 'pending' if retry_at else 'failed'
+                row.next_attempt_at = retry_at or row.next_attempt_at
+                row.last_error = error
+            session.commit()
+
+    def requeue_interrupted_notifications(self) -> int:
+        """进程重启后将上次中断的 sending 消息恢复为 pending"""
+        with self.get_session() as session:
+            count = session.query(NotificationOutbox).filter(
+                NotificationOutbox.status == 'sending'
+            ).update({NotificationOutbox.status: 'pending'})
+            session.commit()
+            return count
+
+    def prune_outbox(self, retention_days: int) -> int:
+        """
+        清理已送达或已放弃的发件箱记录（其幂等键随之失效）
+
+        Args:
+            retention_days: 保留天数，早于此的 sent / failed 记录被删除
+
+        Returns:
+            删除条数
+        """
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        with self.get_session() as session:
+            count = session.query(NotificationOutbox).filter(
+                NotificationOutbox.status.in_(['sent', 'failed']),
+                func.coalesce(NotificationOutbox.sent_at, NotificationOutbox.created_at) < cutoff
+            ).delete(synchronize_session=False)
+            session.commit()
+            return count
+
+    def get_outbox_backlog(self, due_only: bool = False, channels: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        发件箱未完成消息数（pending + sending）
+
+        Args:
+            due_only: 只统计正在发送或已到重试时间（且未被同一消息前面的分段阻塞）的消息
+            channels: 只统计这些渠道（为空统计全部）
+
+        Returns:
+            {渠道: 未完成条数}
+        """
+        conditions = [NotificationOutbox.status.in_(['pending', 'sending'])]
+        if channels is not None:
+            conditions.append(NotificationOutbox.channel.in_(channels))
+        if due_only:
+            conditions.append(
+                (NotificationOutbox.status == 'sending')
+                | and_(NotificationOutbox.next_attempt_at <= datetime.now(), self._outbox_not_blocked())
+            )
+        with self.get_session() as session:
+            rows = session.execute(
+                select(NotificationOutbox.channel, func.count())
+                .where(and_(*conditions))
+                .group_by(NotificationOutbox.channel)
+            ).all()
+        return {channel: count for channel, count in rows}
+
     def get_data_range(
         self, 
         code: str, 
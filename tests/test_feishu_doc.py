@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 飞书文档分批写入单元测试
+===================================
+
+职责：
+1. 验证按单次请求块数上限分批、顺序写入并统计吞吐
+2. 验证只重试失败的批次，且重试复用同一 client_token
+3. 验证参数错误不重试，网络异常、频率超限与 5xx 才重试
+"""
+
+import importlib.util
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+if importlib.util.find_spec("lark_oapi") is not None:
+    from src.feishu_doc import MAX_BLOCKS_PER_REQUEST, RATE_LIMIT_CODE, FeishuDocManager
+
+
+class _FakeBlockChildren:
+    """按预设结果序列响应的 document_block_children 接口"""
+
+    def __init__(self, outcomes):
+        # outcomes: {批次首块: [结果, ...]}，结果为 Exception 或 (错误码, HTTP 状态码)，缺省为成功
+        self._outcomes = outcomes
+        self.requests = []
+
+    def create(self, request):
+        children = request.request_body.children
+        self.requests.append((children[0], len(children), request.client_token))
+        pending = self._outcomes.get(children[0])
+        outcome = pending.pop(0) if pending else None
+        if isinstance(outcome, Exception):
+            raise outcome
+        if outcome is None:
+            return SimpleNamespace(success=lambda: True, code=0, msg="success", raw=SimpleNamespace(status_code=200))
+        code, status = outcome
+        return SimpleNamespace(success=lambda: False, code=code, msg="error", raw=SimpleNamespace(status_code=status))
+
+
+@unittest.skipUnless(importlib.util.find_spec("lark_oapi"), "需要安装 lark-oapi")
+class UploadBlocksTestCase(unittest.TestCase):
+    """飞书文档分批写入测试"""
+
+    def _upload(self, blocks, outcomes):
+        children = _FakeBlockChildren(outcomes)
+        manager = object.__new__(FeishuDocManager)
+        manager.client = SimpleNamespace(docx=SimpleNamespace(v1=SimpleNamespace(document_block_children=children)))
+        with mock.patch("src.feishu_doc.time.sleep"):
+            stats = manager._upload_blocks("doc_token", blocks)
+        return stats, children.requests
+
+    def test_batches_and_retries_only_failed_batch(self) -> None:
+        """超过块数上限时分批；只有失败批次重试，重试复用 client_token"""
+        blocks = list(range(MAX_BLOCKS_PER_REQUEST * 2 + 10))
+        second = MAX_BLOCKS_PER_REQUEST
+        stats, requests = self._upload(blocks, {
+            second: [ConnectionError("timeout"), (RATE_LIMIT_CODE, 400), (99991500, 503)],
+        })
+
+        self.assertEqual([(first, size) for first, size, _ in requests], [
+            (0, MAX_BLOCKS_PER_REQUEST),
+            (second, MAX_BLOCKS_PER_REQUEST),
+            (second, MAX_BLOCKS_PER_REQUEST),
+            (second, MAX_BLOCKS_PER_REQUEST),
+            (second, MAX_BLOCKS_PER_REQUEST),
+            (second * 2, 10),
+        ])
+        tokens = [token for first, _, token in requests]
+        self.assertEqual(len(set(tokens[1:5])), 1)
+        self.assertEqual(len(set(tokens)), 3)
+        self.assertEqual(
+            {key: stats[key] for key in ('blocks', 'batches', 'retries', 'failed_batches')},
+            {'blocks': len(blocks), 'batches': 3, 'retries': 3, 'failed_batches': 0},
+        )
+        self.assertIn('blocks_per_second', stats)
+
+    def test_invalid_block_not_retried(self) -> None:
+        """参数错误（非法块）直接记为失败批次，不重试，后续批次继续写入"""
+        blocks = list(range(MAX_BLOCKS_PER_REQUEST + 1))
+        stats, requests = self._upload(blocks, {0: [(1770001, 400)]})
+
+        self.assertEqual([first for first, _, _ in requests], [0, MAX_BLOCKS_PER_REQUEST])
+        self.assertEqual((stats['retries'], stats['failed_batches']), (0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 多维度情报并发搜索单元测试
+===================================
+
+职责：
+1. 验证并发搜索后仍按维度顺序返回
+2. 验证到达截止时间时返回已完成的维度
+3. 验证单个搜索引擎的并发数受 max_concurrency 限制
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from typing import Dict, Optional
+
+from src.config import Config
+from src.search_service import BaseSearchProvider, SearchResponse, SearchResult, SearchService
+
+
+class _FakeProvider(BaseSearchProvider):
+    """按查询设定耗时、记录并发峰值的模拟搜索引擎"""
+
+    max_concurrency = 2
+
+    def __init__(self, name: str, delays: Optional[Dict[str, float]] = None, default_delay: float = 0.05):
+        super().__init__(["fake-key"], name)
+        self.delays = delays or {}
+        self.default_delay = default_delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _do_search(self, query: str, api_key: str, max_results: int, days: int = 7) -> SearchResponse:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delays.get(query, self.default_delay))
+        finally:
+            with self._lock:
+                self.active -= 1
+        results = [SearchResult(title=query, snippet="摘要", url=f"https://example.com/{query}", source="example.com")]
+        return SearchResponse(query=query, results=results, provider=self.name)
+
+
+class ComprehensiveIntelTestCase(unittest.TestCase):
+    """多维度情报并发搜索测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "stock_analysis.db")
+        Config._instance = None
+        self.service = SearchService(cache_enabled=False)
+        self.queries = {
+            dim['name']: dim['query'] for dim in self.service._build_intel_dimensions("600519", "贵州茅台")
+        }
+
+    def tearDown(self) -> None:
+        Config._instance = None
+        self._temp_dir.cleanup()
+
+    def test_results_keep_dimension_order(self) -> None:
+        """靠前的维度最后完成，返回结果仍按维度顺序排列"""
+        names = list(self.queries)
+        delays = {self.queries[name]: 0.05 * (len(names) - i) for i, name in enumerate(names)}
+        self.service._providers = [_FakeProvider("A", delays), _FakeProvider("B", delays)]
+
+        results = self.service.search_comprehensive_intel("600519", "贵州茅台", max_searches=len(names))
+
+        self.assertEqual(list(results), names)
+
+    def test_deadline_returns_partial_results(self) -> None:
+        """慢维度超过截止时间时不等待，返回其余已完成的维度"""
+        slow = self.queries['latest_news']
+        provider = _FakeProvider("A", {slow: 1.0})
+        provider._semaphore = threading.BoundedSemaphore(len(self.queries))
+        self.service._providers = [provider]
+
+        started = time.monotonic()
+        results = self.service.search_comprehensive_intel("600519", "贵州茅台", max_searches=5, deadline=0.3)
+
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertNotIn('latest_news', results)
+        self.assertEqual(list(results), [name for name in self.queries if name != 'latest_news'][:4])
+
+    def test_provider_concurrency_capped(self) -> None:
+        """线程池并发高于引擎上限时，同一引擎同时进行的请求不超过 max_concurrency"""
+        provider = _FakeProvider("A")
+        self.service._providers = [provider]
+
+        results = self.service.search_comprehensive_intel("600519", "贵州茅台", max_searches=5)
+
+        self.assertEqual(len(results), min(5, len(self.queries)))
+        self.assertEqual(provider.peak, _FakeProvider.max_concurrency)
+
+
+if __name__ == "__main__":
+    unittest.main()
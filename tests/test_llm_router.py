@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - LLM 路由单元测试
+===================================
+
+职责：
+1. 验证按加权在途请求数选择端点
+2. 验证限流（429）后端点冷却并切换
+3. 验证全部端点达到 RPM 上限时等待空位，而不是直接发出请求
+"""
+
+import time
+import unittest
+from unittest import mock
+
+from src.analyzer import LLMEndpoint, LLMRouter
+
+
+def _endpoint(name: str, **kwargs) -> LLMEndpoint:
+    return LLMEndpoint(name=name, base_url=None, api_key="sk-test", model="test-model", **kwargs)
+
+
+class LLMRouterTestCase(unittest.TestCase):
+    """LLM 路由测试"""
+
+    def test_least_weighted_load_selected(self) -> None:
+        """选择 (在途请求数 + 1) / 权重 最小的端点"""
+        busy = _endpoint("busy", outstanding=2)
+        idle = _endpoint("idle")
+        heavy = _endpoint("heavy", weight=4.0, outstanding=2)
+        router = LLMRouter([busy, idle, heavy])
+
+        self.assertIs(router.acquire(), heavy)  # 3/4 < idle 1/1 < busy 3/1
+        self.assertIs(router.acquire(), idle)   # 与 heavy 并列 1.0，选调用次数更少者
+        self.assertIs(router.acquire(), heavy)  # 4/4 < idle 2/1
+
+    def test_rate_limited_endpoint_cooled_down(self) -> None:
+        """429 后端点进入冷却，请求换到其他端点，冷却期内不再分配"""
+        limited = _endpoint("limited", weight=2.0)
+        backup = _endpoint("backup")
+        router = LLMRouter([limited, backup])
+
+        def invoke(endpoint: LLMEndpoint) -> str:
+            if endpoint is limited:
+                raise RuntimeError("429 Resource has been exhausted")
+            return endpoint.name
+
+        self.assertEqual(router.call(invoke), "backup")
+        self.assertGreater(limited.cooldown_until, time.time())
+        self.assertEqual(limited.outstanding, 0)
+        self.assertIs(router.acquire(), backup)
+
+    def test_waits_for_rpm_slot_when_all_capped(self) -> None:
+        """全部端点达到 RPM 上限时等到最早空位，并预约该时间点"""
+        now = time.time()
+        capped = _endpoint("capped", rpm=2, recent_starts=[now - 30, now - 20])
+        router = LLMRouter([capped])
+
+        with mock.patch("src.analyzer.time.sleep") as sleep:
+            self.assertEqual(router.call(lambda endpoint: "ok"), "ok")
+
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args[0][0], 30, delta=1)
+        # 预约的时间点计入窗口，下一个请求排在 now - 20 + 60 之后
+        _, start_at = router.reserve()
+        self.assertAlmostEqual(start_at, now + 40, delta=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 长消息分段单元测试
+===================================
+
+职责：
+1. 验证按分隔线打包股票块、段首尾不残留分隔线
+2. 验证单块超长时降级到标题/段落断开，表格不被拆开，超长行硬切不丢内容
+3. 验证 Telegram 按 MarkdownV2 转义后的长度分段
+"""
+
+import unittest
+
+from src.formatters import split_markdown_chunks
+from src.markdown_render import parse_markdown
+from src.notification import split_telegram_chunks
+
+
+def _stock_block(index: int, body_lines: int) -> str:
+    lines = [f"## 股票{index}", "", "| 指标 | 数值 |", "|---|---|", "| 现价 | 25.3 |", "| 量比 | 1.3 |", ""]
+    lines += [f"分析要点{j}：量能温和放大，关注均线支撑。" for j in range(body_lines)]
+    return "\n".join(lines)
+
+
+class MarkdownChunkerTestCase(unittest.TestCase):
+    """长消息分段测试"""
+
+    def test_packs_stock_blocks_at_dividers(self) -> None:
+        """按 --- 分隔的股票块整块打包，不超过字节预算"""
+        blocks = [_stock_block(i, 3) for i in range(6)]
+        content = "\n---\n".join(blocks)
+        block_bytes = len(blocks[0].encode("utf-8"))
+
+        chunks = split_markdown_chunks(content, block_bytes * 2 + 10)
+
+        self.assertEqual(len(chunks), 3)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk.encode("utf-8")), block_bytes * 2 + 10)
+            self.assertTrue(chunk.startswith("## 股票"))
+            self.assertFalse(chunk.endswith("---"))
+        self.assertEqual(chunks[0], "\n---\n".join(blocks[:2]))
+
+    def test_oversized_block_falls_back_without_losing_content(self) -> None:
+        """单只股票超长时按段落/行断开，表格保持完整；超长单行按字符硬切"""
+        content = _stock_block(0, 40)
+        chunks = split_markdown_chunks(content, 400)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertIn("| 现价 | 25.3 |\n| 量比 | 1.3 |", chunks[0])
+        self.assertEqual("".join(chunks).replace("\n", ""), content.replace("\n", ""))
+
+        long_line = "茅台" * 100
+        pieces = split_markdown_chunks(long_line, 50, count_bytes=False)
+        self.assertEqual([len(p) for p in pieces], [50, 50, 50, 50])
+        self.assertEqual("".join(pieces), long_line)
+        byte_pieces = split_markdown_chunks(long_line, 100)
+        self.assertTrue(all(len(p.encode("utf-8")) <= 100 for p in byte_pieces))
+        self.assertEqual("".join(byte_pieces), long_line)
+
+    def test_telegram_chunks_fit_after_escaping(self) -> None:
+        """转义使长度膨胀的内容按转换后的长度分段，每段转换后不超过上限"""
+        content = "\n".join(f"- 价格 {i}.5 (+1.2%) | 量比 1.3 - 支撑 23.5" for i in range(400))
+
+        chunks = split_telegram_chunks(content, 4096)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(parse_markdown(chunk).to_telegram()) <= 4096 for chunk in chunks))
+        self.assertEqual("".join(chunks).replace("\n", ""), content.replace("\n", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - Markdown 多格式渲染单元测试
+===================================
+
+职责：
+1. 验证同一语法树生成的 HTML、Telegram MarkdownV2、纯文本
+2. 验证相同内容只解析一次
+3. 验证加粗斜体（***x***）与相邻斜体
+"""
+
+import unittest
+
+from src.markdown_render import parse_markdown
+
+SAMPLE = """# 📅 决策仪表盘
+
+> 共分析 **2** 只股票
+
+**🚨 风险警报**:
+- 大股东减持 (计划中)
+- 价格战 *加剧*
+
+| 点位类型 | 价格 |
+|---------|-----:|
+| 🛑 止损位 | 23.5 |
+
+---
+"""
+
+
+class MarkdownRenderTestCase(unittest.TestCase):
+    """Markdown 渲染测试"""
+
+    def test_html(self) -> None:
+        """标题、引用、紧贴段落的列表、表格对齐与分隔线"""
+        html = parse_markdown(SAMPLE).to_html()
+
+        self.assertIn("<h1>📅 决策仪表盘</h1>", html)
+        self.assertIn("<blockquote>\n<p>共分析 <strong>2</strong> 只股票</p>\n</blockquote>", html)
+        self.assertIn("<ul>\n<li>大股东减持 (计划中)</li>\n<li>价格战 <em>加剧</em></li>\n</ul>", html)
+        self.assertIn('<td style="text-align:right;">23.5</td>', html)
+        self.assertIn("<hr />", html)
+
+    def test_telegram_and_plain_text(self) -> None:
+        """Telegram 转义特殊字符、标题转加粗；纯文本去除格式标记"""
+        telegram = parse_markdown(SAMPLE).to_telegram()
+        self.assertIn("*📅 决策仪表盘*", telegram)
+        self.assertIn(">共分析 *2* 只股票", telegram)
+        self.assertIn("• 大股东减持 \\(计划中\\)", telegram)
+        self.assertIn("🛑 止损位 \\| 23\\.5", telegram)
+
+        plain = parse_markdown(SAMPLE).to_plain_text()
+        self.assertIn("🚨 风险警报:\n• 大股东减持 (计划中)\n• 价格战 加剧", plain)
+        self.assertIn("🛑 止损位 | 23.5", plain)
+        self.assertNotIn("**", plain)
+
+    def test_bold_italic(self) -> None:
+        """***x*** 渲染为斜体包裹的加粗，相邻的斜体各自闭合"""
+        document = parse_markdown("***重点*** 与 *提示* 和 ___风险___")
+
+        self.assertEqual(
+            document.to_html(),
+            "<p><em><strong>重点</strong></em> 与 <em>提示</em> 和 <em><strong>风险</strong></em></p>",
+        )
+        self.assertEqual(document.to_telegram(), "_*重点*_ 与 _提示_ 和 _*风险*_")
+
+    def test_parsed_once(self) -> None:
+        """相同内容复用解析结果与渲染结果"""
+        document = parse_markdown(SAMPLE)
+        self.assertIs(parse_markdown(SAMPLE), document)
+        self.assertIs(document.to_html(), document.to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 阶段耗时指标单元测试
+===================================
+
+职责：
+1. 验证运行汇总的分位数与失败计数
+2. 验证 Prometheus 文本导出
+"""
+
+import unittest
+
+from src.metrics import StageMetrics
+
+
+class StageMetricsTestCase(unittest.TestCase):
+    """阶段耗时指标测试"""
+
+    def test_run_summary_percentiles(self) -> None:
+        """按阶段汇总 p50/p95/p99，异常的 span 记为失败"""
+        metrics = StageMetrics()
+        metrics.record("fetch", 9.0, code="000001", source="before_run")
+        metrics.begin_run()
+        for i in range(1, 101):
+            metrics.record("fetch", i / 100, code="600519", source="AkshareFetcher")
+        with self.assertRaises(RuntimeError):
+            with metrics.span("llm", code="600519", source="gemini"):
+                raise RuntimeError("timeout")
+
+        summary = {row['stage']: row for row in metrics.end_run(stocks=1)}
+
+        fetch = summary["fetch"]
+        self.assertEqual(fetch['count'], 100)
+        self.assertAlmostEqual(fetch['p50'], 0.50)
+        self.assertAlmostEqual(fetch['p95'], 0.95)
+        self.assertAlmostEqual(fetch['p99'], 0.99)
+        self.assertEqual((summary["llm"]['count'], summary["llm"]['failures']), (1, 1))
+        self.assertIn("fetch", metrics.format_run_summary())
+
+    def test_prometheus_export(self) -> None:
+        """累计直方图、失败计数与最近一次运行分位数"""
+        metrics = StageMetrics()
+        metrics.begin_run()
+        metrics.record("notify", 0.3, source="wechat")
+        metrics.record("notify", 3.0, source="wechat", success=False)
+        metrics.end_run()
+
+        text = metrics.to_prometheus()
+        self.assertIn('stock_analysis_stage_duration_seconds_bucket{stage="notify",source="wechat",le="0.5"} 1', text)
+        self.assertIn('stock_analysis_stage_duration_seconds_count{stage="notify",source="wechat"} 2', text)
+        self.assertIn('stock_analysis_stage_failures_total{stage="notify",source="wechat"} 1', text)
+        self.assertIn('stock_analysis_last_run_stage_seconds{stage="notify",quantile="0.99"} 3.000000', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
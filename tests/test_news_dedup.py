@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 新闻近似去重单元测试
+===================================
+
+职责：
+1. 验证 SimHash 对转载改写（标点、全半角、后缀）不敏感，对不同新闻区分明显
+2. 验证情报报告跨维度合并近似重复并保留信息量最大的版本
+"""
+
+import os
+import tempfile
+import unittest
+
+from src.config import Config
+from src.news_dedup import DEFAULT_MAX_DISTANCE, SimHashIndex, hamming_distance, news_fingerprint
+from src.search_service import SearchResponse, SearchResult, SearchService
+
+
+class NewsDedupTestCase(unittest.TestCase):
+    """新闻近似去重测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "stock_analysis.db")
+        Config._instance = None
+
+    def tearDown(self) -> None:
+        Config._instance = None
+        self._temp_dir.cleanup()
+
+    def test_fingerprint_tolerates_reprint_variants(self) -> None:
+        """同一通稿的转载版本判为近似重复，不同新闻不会误判"""
+        original = news_fingerprint(
+            "贵州茅台：2025年前三季度净利润同比增长15%",
+            "公司公告显示，前三季度实现营业收入1200亿元，净利润同比增长15%。"
+        )
+        reprint = news_fingerprint(
+            "贵州茅台:2025年前三季度净利润同比增长15％",
+            "公司公告显示,前三季度实现营业收入1200亿元，净利润同比增长15%。【网页详情】"
+        )
+        unrelated = news_fingerprint("宁德时代发布新一代电池", "宁德时代今日发布麒麟电池二代，能量密度提升")
+
+        self.assertLessEqual(hamming_distance(original, reprint), DEFAULT_MAX_DISTANCE)
+        self.assertGreater(hamming_distance(original, unrelated), DEFAULT_MAX_DISTANCE)
+
+        index = SimHashIndex()
+        index.add(original, "original")
+        self.assertEqual(index.find(reprint), "original")
+        self.assertIsNone(index.find(unrelated))
+
+    def test_collapse_intel_results_across_dimensions(self) -> None:
+        """跨维度的同一新闻只保留一条，位置取首次出现的维度，内容取摘要更长的版本"""
+        short = SearchResult(
+            title="贵州茅台：2025年前三季度净利润同比增长15%",
+            snippet="公司公告显示，前三季度实现营业收入1200亿元，净利润同比增长15%。",
+            url="https://a.example.com/1",
+            source="a.example.com",
+        )
+        detailed = SearchResult(
+            title="贵州茅台:2025年前三季度净利润同比增长15％",
+            snippet="公司公告显示,前三季度实现营业收入1200亿元，净利润同比增长15%。【网页详情】直销渠道占比继续提升",
+            url="https://b.example.com/2",
+            source="b.example.com",
+            published_date="2025-10-20",
+        )
+        other = SearchResult(title="茅台召开股东大会", snippet="会议审议通过分红方案", url="https://c.example.com/3", source="c")
+
+        intel_results = {
+            "earnings": SearchResponse(query="业绩", results=[detailed], provider="Tavily"),
+            "latest_news": SearchResponse(query="最新", results=[short, other], provider="Bocha"),
+        }
+        collapsed = SearchService().collapse_intel_results(intel_results)
+
+        self.assertEqual(collapsed["latest_news"].results, [detailed, other])
+        self.assertEqual(collapsed["earnings"].results, [])
+        self.assertEqual(collapsed["latest_news"].provider, "Bocha")
+
+
+if __name__ == "__main__":
+    unittest.main()
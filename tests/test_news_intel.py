@@ -7,16 +7,20 @@ A股自选股智能分析系统 - 新闻情报存储单元测试
 职责：
 1. 验证新闻情报的保存与去重逻辑
 2. 验证无 URL 情况下的兜底去重键
+3. 验证按维度判断新鲜期（条目全部合并到其他维度的维度同样视为新鲜）
+4. 验证情报报告标注上次运行以来新增的新闻（近似重复的转载不算新增）
 """
 
 import os
 import tempfile
 import unittest
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from types import SimpleNamespace
 
 from src.config import Config
-from src.storage import DatabaseManager, NewsIntel
+from src.core.pipeline import StockAnalysisPipeline
+from src.storage import DatabaseManager, NewsIntel, NewsIntelFetch
 from src.search_service import SearchResponse, SearchResult
 
 
@@ -158,6 +162,160 @@ class NewsIntelStorageTestCase(unittest.TestCase):
         self.assertEqual(len(recent_news), 1)
         self.assertEqual(recent_news[0].title, "茅台股价震荡")
 
+    def test_get_fresh_news_intel_by_dimension(self) -> None:
+        """按维度新鲜期返回情报，过期维度不返回"""
+        for dimension, url in (("latest_news", "https://news.example.com/c"), ("industry", "https://news.example.com/d")):
+            response = self._build_response([
+                SearchResult(title=f"{dimension} 新闻", snippet="...", url=url, source="example.com")
+            ])
+            self.db.save_news_intel(
+                code="600519",
+                name="贵州茅台",
+                dimension=dimension,
+                query=response.query,
+                response=response
+            )
+
+        with self.db.get_session() as session:
+            session.query(NewsIntel).filter(NewsIntel.dimension == "latest_news").update(
+                {NewsIntel.fetched_at: datetime.now() - timedelta(hours=3)}
+            )
+            session.query(NewsIntelFetch).filter(NewsIntelFetch.dimension == "latest_news").update(
+                {NewsIntelFetch.fetched_at: datetime.now() - timedelta(hours=3)}
+            )
+            session.commit()
+
+        fresh = self.db.get_fresh_news_intel(
+            code="600519",
+            max_age={"latest_news": 2 * 3600, "industry": 72 * 3600, "earnings": 24 * 3600}
+        )
+        self.assertEqual(list(fresh.keys()), ["industry"])
+        self.assertEqual(fresh["industry"][0].title, "industry 新闻")
+
+    def test_collapsed_dimension_still_fresh(self) -> None:
+        """维度的条目全部合并到其他维度时没有自己的记录，仍视为新鲜、不再重复搜索"""
+        article = SearchResult(title="茅台提价", snippet="出厂价上调...", url="https://news.example.com/g", source="example.com")
+        responses = {
+            "latest_news": self._build_response([article]),
+            "market_analysis": self._build_response([article]),
+        }
+        self.assertEqual(self.db.save_news_intel_batch("600519", "贵州茅台", responses), 1)
+
+        fresh = self.db.get_fresh_news_intel(
+            code="600519",
+            max_age={"latest_news": 2 * 3600, "market_analysis": 12 * 3600, "risk_check": 6 * 3600}
+        )
+        self.assertEqual(len(fresh["latest_news"]), 1)
+        self.assertEqual(fresh["market_analysis"], [])
+        self.assertNotIn("risk_check", fresh)
+
+    def test_save_news_intel_collapses_near_duplicates(self) -> None:
+        """同一通稿不同 URL 只入库一次，保留更长的摘要；新消息可按 id 增量获取"""
+        first = self._build_response([
+            SearchResult(
+                title="贵州茅台：2025年前三季度净利润同比增长15%",
+                snippet="公司公告显示，前三季度实现营业收入1200亿元，净利润同比增长15%。",
+                url="https://a.example.com/1",
+                source="a.example.com",
+            )
+        ])
+        reprint = self._build_response([
+            SearchResult(
+                title="贵州茅台:2025年前三季度净利润同比增长15％",
+                snippet="公司公告显示,前三季度实现营业收入1200亿元，净利润同比增长15%。直销渠道占比继续提升",
+                url="https://b.example.com/2",
+                source="b.example.com",
+            ),
+            SearchResult(title="茅台召开股东大会", snippet="会议审议通过分红方案", url="https://c.example.com/3", source="c"),
+        ])
+
+        self.assertEqual(self.db.save_news_intel("600519", "贵州茅台", "earnings", first.query, first), 1)
+        last_seen_id = self.db.get_new_news_since("600519", 0)[-1].id
+        self.assertEqual(self.db.save_news_intel("600519", "贵州茅台", "latest_news", reprint.query, reprint), 1)
+
+        with self.db.get_session() as session:
+            rows = session.query(NewsIntel).order_by(NewsIntel.id).all()
+        self.assertEqual(len(rows), 2)
+        self.assertIn("直销渠道", rows[0].snippet)
+
+        new_news = self.db.get_new_news_since("600519", last_seen_id)
+        self.assertEqual([row.title for row in new_news], ["茅台召开股东大会"])
+
+    def test_search_intel_marks_news_new_since_last_run(self) -> None:
+        """第二次运行时，情报报告末尾列出首次出现的新闻，转载的旧闻不列出"""
+        runs = [
+            {"latest_news": self._build_response([
+                SearchResult(title="贵州茅台前三季度净利润同比增长15%", snippet="公司公告显示，前三季度净利润同比增长15%",
+                             url="https://a.example.com/1", source="a.example.com"),
+            ])},
+            {"latest_news": self._build_response([
+                SearchResult(title="贵州茅台:前三季度净利润同比增长15％", snippet="公司公告显示,前三季度净利润同比增长15%。",
+                             url="https://b.example.com/2", source="b.example.com"),
+                SearchResult(title="茅台召开股东大会", snippet="会议审议通过分红方案",
+                             url="https://c.example.com/3", source="c.example.com"),
+            ])},
+        ]
+        pipeline = object.__new__(StockAnalysisPipeline)
+        pipeline.config = SimpleNamespace(news_intel_reuse_enabled=False)
+        pipeline.db = self.db
+        pipeline.search_service = SimpleNamespace(
+            INTEL_DIMENSION_NAMES=["latest_news"],
+            search_comprehensive_intel=lambda **kwargs: runs.pop(0),
+            format_intel_report=lambda results, name: "情报报告",
+        )
+        pipeline._shared_intel = None
+        pipeline._build_query_context = lambda: {}
+
+        self.assertEqual(pipeline._search_intel("600519", "贵州茅台"), "情报报告")
+        report = pipeline._search_intel("600519", "贵州茅台")
+
+        self.assertIn("上次分析以来的新消息 (1 条)", report)
+        self.assertIn("茅台召开股东大会", report)
+        self.assertNotIn("净利润", report)
+
+    def test_save_news_intel_batch_across_dimensions(self) -> None:
+        """多维度一次写入：跨维度相同 URL 只入库一次，再次写入只更新不新增"""
+        shared = SearchResult(title="茅台提价", snippet="出厂价上调...", url="https://news.example.com/e", source="example.com")
+        responses = {
+            "latest_news": self._build_response([
+                shared,
+                SearchResult(title="茅台回购", snippet="拟回购股份...", url="https://news.example.com/f", source="example.com"),
+            ]),
+            "market_analysis": self._build_response([
+                shared,
+                SearchResult(title="券商上调目标价", snippet="维持买入评级...", url="", source="broker.com"),
+            ]),
+        }
+
+        self.assertEqual(self.db.save_news_intel_batch("600519", "贵州茅台", responses), 3)
+        self.assertEqual(self.db.save_news_intel_batch("600519", "贵州茅台", responses), 0)
+
+        with self.db.get_session() as session:
+            rows = session.query(NewsIntel).order_by(NewsIntel.id).all()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0].dimension, "latest_news")
+        self.assertTrue(rows[2].url.startswith("no-url:"))
+
+    def test_search_news_full_text(self) -> None:
+        """全文检索跨股票命中、按股票过滤，且摘要更新后索引同步"""
+        for code, title, url in (
+            ("600519", "控股股东拟减持不超过2%股份", "https://news.example.com/g"),
+            ("000858", "五粮液股东减持计划实施完毕", "https://news.example.com/h"),
+            ("000858", "五粮液发布回购方案", "https://news.example.com/i"),
+        ):
+            response = self._build_response([SearchResult(title=title, snippet="公告", url=url, source="example.com")])
+            self.db.save_news_intel_batch(code, "", {"risk_check": response})
+
+        self.assertEqual(len(self.db.search_news("减持")), 2)
+        self.assertEqual([row.code for row in self.db.search_news("减持", code="000858")], ["000858"])
+        self.assertEqual(self.db.search_news("股东 回购"), [])
+
+        updated = self._build_response([
+            SearchResult(title="五粮液发布回购方案", snippet="回购后注销，大股东承诺不减持", url="https://news.example.com/i", source="example.com")
+        ])
+        self.db.save_news_intel_batch("000858", "", {"risk_check": updated})
+        self.assertEqual(len(self.db.search_news("减持", code="000858")), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 多渠道并发推送单元测试
+===================================
+
+职责：
+1. 验证各渠道并发发送、超时渠道在截止时间返回
+2. 验证同一渠道的多次推送保持顺序
+3. 验证 HTTP Session 按主机复用、SMTP 连接跨邮件复用
+"""
+
+import os
+import tempfile
+import time
+import smtplib
+import unittest
+from unittest import mock
+
+from src.config import Config
+from src.notification import NotificationChannel, NotificationService, _SmtpConnectionCache, _get_http_session
+
+
+class NotificationDeliveryTestCase(unittest.TestCase):
+    """多渠道并发推送测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "stock_analysis.db")
+        Config._instance = None
+        self.service = NotificationService()
+        self.service._available_channels = [
+            NotificationChannel.WECHAT, NotificationChannel.FEISHU, NotificationChannel.EMAIL
+        ]
+        self.sent = []
+
+    def tearDown(self) -> None:
+        Config._instance = None
+        self._temp_dir.cleanup()
+
+    def _fake_sender(self, name: str, delay: float, success: bool = True):
+        def sender(content: str) -> bool:
+            time.sleep(delay)
+            self.sent.append((name, content))
+            return success
+        return sender
+
+    def test_deliver_concurrently_with_deadline(self) -> None:
+        """渠道并发发送，慢渠道超过截止时间记为超时"""
+        self.service.send_to_wechat = self._fake_sender("wechat", 0.3)
+        self.service.send_to_feishu = self._fake_sender("feishu", 0.3, success=False)
+        self.service.send_to_email = self._fake_sender("email", 1.5)
+
+        started = time.time()
+        results = self.service.deliver("报告", deadline=0.8)
+        self.assertLess(time.time() - started, 1.2)
+
+        by_channel = {result.channel: result for result in results}
+        self.assertTrue(by_channel["wechat"].success)
+        self.assertFalse(by_channel["feishu"].success)
+        self.assertFalse(by_channel["feishu"].timed_out)
+        self.assertTrue(by_channel["email"].timed_out)
+        self.assertEqual(self.service.last_delivery, results)
+
+    def test_channel_order_preserved_across_sends(self) -> None:
+        """同一渠道内消息按发送顺序到达（前一条超时仍在后台发送时也不乱序）"""
+        self.service._available_channels = [NotificationChannel.EMAIL]
+        self.service.send_to_email = self._fake_sender("email", 0.3)
+
+        self.service.deliver("第1段", deadline=0.05)
+        self.assertTrue(self.service.send("第2段"))
+        self.assertEqual([content for _, content in self.sent], ["第1段", "第2段"])
+
+    def test_connections_reused(self) -> None:
+        """同一主机共享 Session；连续邮件只登录一次，服务器断开后重连"""
+        session = _get_http_session("https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key=a")
+        self.assertIs(session, _get_http_session("https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key=b"))
+        self.assertIsNot(session, _get_http_session("https://open.feishu.cn/open-apis/bot/v2/hook/x"))
+
+        cache = _SmtpConnectionCache()
+        with mock.patch("smtplib.SMTP_SSL") as smtp_ssl:
+            connection = smtp_ssl.return_value
+            cache.send("smtp.qq.com", 465, True, "a@qq.com", "pwd", "msg1")
+            cache.send("smtp.qq.com", 465, True, "a@qq.com", "pwd", "msg2")
+            self.assertEqual(smtp_ssl.call_count, 1)
+            self.assertEqual(connection.login.call_count, 1)
+
+            connection.send_message.side_effect = [smtplib.SMTPServerDisconnected(), None]
+            cache.send("smtp.qq.com", 465, True, "a@qq.com", "pwd", "msg3")
+            self.assertEqual(smtp_ssl.call_count, 2)
+            self.assertEqual(connection.send_message.call_count, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 通知发件箱单元测试
+===================================
+
+职责：
+1. 验证同一幂等范围内重复入队的消息只投递一次，新范围的相同消息照常投递
+2. 验证发送失败后按退避时间重新投递
+3. 验证中断的消息在重启后恢复投递
+4. 验证长消息按分段入队，失败时只重发失败的分段，其后的分段等它送达后按序发送
+5. 验证未配置渠道的积压消息不阻塞 wait_idle
+6. 验证过期的已送达记录被清理
+"""
+
+import os
+import tempfile
+import re
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from src.config import Config
+from src.notification import NotificationChannel
+from src.notification_outbox import RETENTION_DAYS, OutboxDispatcher
+from src.storage import DatabaseManager, NotificationOutbox
+
+
+class _FakeNotifier:
+    """记录发送内容的模拟通知服务（首次发送可指定失败）"""
+
+    _wechat_max_bytes = 300
+
+    def __init__(self, fail_first: bool = False, fail_marker: str = ""):
+        self.sent = []
+        self._fail_first = fail_first
+        self._fail_marker = fail_marker
+
+    def get_available_channels(self):
+        return [NotificationChannel.WECHAT]
+
+    def _get_channel_sender(self, channel):
+        def sender(content: str) -> bool:
+            if self._fail_first:
+                self._fail_first = False
+                return False
+            if self._fail_marker and self._fail_marker in content:
+                self._fail_marker = ""
+                return False
+            self.sent.append(content)
+            return True
+        return sender
+
+
+class NotificationOutboxTestCase(unittest.TestCase):
+    """通知发件箱测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_outbox.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+        self._dispatchers = []
+
+    def tearDown(self) -> None:
+        for dispatcher in self._dispatchers:
+            dispatcher.stop()
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def _start(self, notifier: _FakeNotifier) -> OutboxDispatcher:
+        dispatcher = OutboxDispatcher(db=self.db, notifier=notifier)
+        self._dispatchers.append(dispatcher)
+        return dispatcher
+
+    def test_duplicate_enqueue_delivered_once(self) -> None:
+        """同一范围内相同内容重复入队只投递一次；下一次运行的相同内容照常投递"""
+        notifier = _FakeNotifier()
+        dispatcher = self._start(notifier)
+
+        self.assertEqual(dispatcher.enqueue({NotificationChannel.WECHAT: "报告A"}, scope="run-1"), 1)
+        self.assertEqual(dispatcher.enqueue({NotificationChannel.WECHAT: "报告A"}, scope="run-1"), 0)
+        dispatcher.enqueue({NotificationChannel.WECHAT: "报告B"}, scope="run-1")
+        self.assertTrue(dispatcher.wait_idle(5))
+
+        self.assertEqual(dispatcher.enqueue({NotificationChannel.WECHAT: "报告A"}, scope="run-2"), 1)
+        self.assertTrue(dispatcher.wait_idle(5))
+        self.assertEqual(notifier.sent, ["报告A", "报告B", "报告A"])
+
+    def test_failed_send_retried_after_backoff(self) -> None:
+        """发送失败后记录错误并安排重试，到期后再次投递成功"""
+        notifier = _FakeNotifier(fail_first=True)
+        dispatcher = self._start(notifier)
+        dispatcher.enqueue({NotificationChannel.WECHAT: "报告C"})
+        self.assertTrue(dispatcher.wait_idle(5))
+
+        with self.db.get_session() as session:
+            row = session.query(NotificationOutbox).one()
+            self.assertEqual((row.status, row.attempts), ("pending", 1))
+            self.assertGreater(row.next_attempt_at, datetime.now())
+            # 模拟退避时间已到
+            row.next_attempt_at = datetime.now()
+            session.commit()
+
+        dispatcher._ensure_worker(NotificationChannel.WECHAT.value).set()
+        self.assertTrue(dispatcher.wait_idle(5))
+        self.assertEqual(notifier.sent, ["报告C"])
+
+    def test_interrupted_messages_resumed_on_restart(self) -> None:
+        """上次中断（sending 状态）的消息在新投递器启动时恢复投递"""
+        self.db.enqueue_notifications([{"channel": NotificationChannel.WECHAT.value, "content": "报告D"}])
+        self.db.claim_due_notifications(NotificationChannel.WECHAT.value)
+
+        notifier = _FakeNotifier()
+        dispatcher = self._start(notifier)
+        self.assertTrue(dispatcher.wait_idle(5))
+        self.assertEqual(notifier.sent, ["报告D"])
+
+    def _make_due(self) -> None:
+        """模拟退避时间已到"""
+        with self.db.get_session() as session:
+            session.query(NotificationOutbox).filter(NotificationOutbox.status == "pending").update(
+                {NotificationOutbox.next_attempt_at: datetime.now()}
+            )
+            session.commit()
+
+    def test_long_message_split_and_only_failed_chunk_retried(self) -> None:
+        """长消息切分为多段入队，某段失败时其后的分段暂缓；重试时不重发已送达的分段且保持顺序"""
+        sections = [f"## 股票{i}\n\n" + "分析内容" * 20 for i in range(4)]
+        report = "\n\n---\n\n".join(sections)
+        notifier = _FakeNotifier(fail_marker="股票2")
+        dispatcher = self._start(notifier)
+
+        added = dispatcher.enqueue({NotificationChannel.WECHAT: report}, scope="run-1")
+        self.assertGreater(added, 2)
+        self.assertEqual(dispatcher.enqueue({NotificationChannel.WECHAT: report}, scope="run-1"), 0)
+        self.assertTrue(dispatcher.wait_idle(5))
+        self.assertTrue(notifier.sent)
+        self.assertFalse(any("股票2" in chunk or "股票3" in chunk for chunk in notifier.sent))
+        delivered = len(notifier.sent)
+
+        self._make_due()
+        dispatcher._ensure_worker(NotificationChannel.WECHAT.value).set()
+        self.assertTrue(dispatcher.wait_idle(5))
+        self.assertEqual(len(notifier.sent), added)
+        self.assertTrue(all(len(chunk.encode("utf-8")) <= 300 for chunk in notifier.sent))
+        self.assertIn("股票2", notifier.sent[delivered])
+        pages = [int(re.search(r"\((\d+)/\d+\)", chunk).group(1)) for chunk in notifier.sent]
+        self.assertEqual(pages, list(range(1, added + 1)))
+
+    def test_unconfigured_channel_does_not_block_wait_idle(self) -> None:
+        """已不再配置的渠道的积压消息保留在发件箱，wait_idle 不等待"""
+        self.db.enqueue_notifications([{"channel": NotificationChannel.TELEGRAM.value, "content": "报告E"}])
+        dispatcher = self._start(_FakeNotifier())
+
+        started = time.monotonic()
+        self.assertTrue(dispatcher.wait_idle(5))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.db.get_outbox_backlog(), {NotificationChannel.TELEGRAM.value: 1})
+
+    def test_expired_records_pruned(self) -> None:
+        """超过保留天数的已送达记录被清理，未送达的记录保留"""
+        self.db.enqueue_notifications([
+            {"channel": NotificationChannel.TELEGRAM.value, "content": "旧报告"},
+            {"channel": NotificationChannel.TELEGRAM.value, "content": "待发报告"},
+        ])
+        expired = datetime.now() - timedelta(days=RETENTION_DAYS + 1)
+        with self.db.get_session() as session:
+            session.query(NotificationOutbox).filter(NotificationOutbox.content == "旧报告").update(
+                {NotificationOutbox.status: "sent", NotificationOutbox.sent_at: expired}
+            )
+            session.commit()
+
+        self._start(_FakeNotifier())
+
+        with self.db.get_session() as session:
+            self.assertEqual([row.content for row in session.query(NotificationOutbox)], ["待发报告"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 单股分析依赖图单元测试
+===================================
+
+职责：
+1. 验证股票名称已知时情报搜索与行情获取同时发起，结果汇入 AI 分析
+2. 验证投机调用：情报超时先行分析，迟到的情报只做简短修正而不重新完整分析
+3. 验证分阶段流水线中情报搜索与数据获取阶段重叠执行
+"""
+
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from src.core.pipeline import StockAnalysisPipeline
+from src.enums import ReportType
+
+
+class _FakeAnalyzer:
+    """记录调用的模拟分析器"""
+
+    def __init__(self, delay: float = 0.0):
+        self.analyze_calls = []
+        self.refine_calls = []
+        self._delay = delay
+
+    def analyze(self, context, news_context=None, report_type=None):
+        self.analyze_calls.append(news_context)
+        time.sleep(self._delay)
+        return SimpleNamespace(code=context['code'], success=True, operation_advice='持有', sentiment_score=55)
+
+    def refine_with_news(self, result, news_context):
+        self.refine_calls.append(news_context)
+        return SimpleNamespace(code=result.code, success=True, operation_advice='减仓', sentiment_score=40)
+
+
+def _build_pipeline(analyzer: _FakeAnalyzer, speculative: bool = False, news_wait: float = 8.0):
+    pipeline = object.__new__(StockAnalysisPipeline)
+    pipeline.config = SimpleNamespace(speculative_llm_enabled=speculative, speculative_news_wait=news_wait)
+    pipeline.max_workers = 2
+    pipeline._stage_executor = None
+    pipeline._stage_executor_lock = threading.Lock()
+    pipeline.search_service = SimpleNamespace(is_available=True)
+    pipeline.analyzer = analyzer
+    pipeline._analyze_trend = lambda code, context: None
+    pipeline._enhance_context = lambda context, quote, chip, trend, name: {**context, 'stock_name': name}
+    pipeline._save_analysis_history = lambda *args: None
+    return pipeline
+
+
+class PipelineDependencyTestCase(unittest.TestCase):
+    """单股分析依赖图测试"""
+
+    def test_search_starts_alongside_quote_when_name_known(self) -> None:
+        """名称已知时情报搜索不等待实时行情，行情返回的名称与情报都进入 AI 分析"""
+        events = {}
+        analyzer = _FakeAnalyzer()
+        pipeline = _build_pipeline(analyzer)
+
+        def fetch_quote(code):
+            time.sleep(0.2)
+            events['quote_done'] = time.monotonic()
+            return SimpleNamespace(name="贵州茅台")
+
+        def search(code, name):
+            events['search_started'] = time.monotonic()
+            return f"{name} 情报"
+
+        pipeline._fetch_realtime_quote = fetch_quote
+        pipeline._fetch_chip_distribution = lambda code: None
+        pipeline._search_intel = search
+        pipeline.db = SimpleNamespace(get_analysis_context=lambda code: {'code': code})
+
+        try:
+            result = pipeline.analyze_stock("600519", ReportType.SIMPLE)
+        finally:
+            pipeline.close()
+
+        self.assertEqual(result.code, "600519")
+        self.assertLess(events['search_started'], events['quote_done'])
+        self.assertEqual(len(analyzer.analyze_calls), 1)
+        self.assertIn("情报", analyzer.analyze_calls[0])
+
+    def test_late_news_refines_without_second_full_analysis(self) -> None:
+        """情报超过等待时间才返回：先行分析一次，情报到达后只调用简短修正"""
+        analyzer = _FakeAnalyzer(delay=0.3)
+        pipeline = _build_pipeline(analyzer, speculative=True, news_wait=0.05)
+        slow_news = pipeline._get_stage_executor().submit(lambda: (time.sleep(0.15), "减持公告")[1])
+        never = pipeline._get_stage_executor().submit(lambda: (time.sleep(1), "迟到情报")[1])
+
+        try:
+            refined, news = pipeline._analyze_with_news("600519", {'code': "600519"}, slow_news, ReportType.SIMPLE)
+            first, missing = pipeline._analyze_with_news("000001", {'code': "000001"}, never, ReportType.SIMPLE)
+        finally:
+            pipeline.close()
+
+        self.assertEqual(analyzer.analyze_calls, [None, None])
+        self.assertEqual(analyzer.refine_calls, ["减持公告"])
+        self.assertEqual((refined.operation_advice, news), ('减仓', "减持公告"))
+        self.assertEqual((first.operation_advice, missing), ('持有', None))
+
+    def test_staged_search_overlaps_fetch(self) -> None:
+        """分阶段流水线（非投机模式）：名称已知时情报搜索在数据获取阶段开始时发起，不等数据获取结束"""
+        events = {}
+        analyzer = _FakeAnalyzer()
+        pipeline = _build_pipeline(analyzer)
+        pipeline.config = SimpleNamespace(
+            speculative_llm_enabled=False, stage_fetch_workers=1, stage_search_workers=2,
+            stage_llm_workers=1, stage_persist_workers=1, stage_notify_workers=1, stage_queue_size=2,
+        )
+
+        def fetch_and_save(code):
+            time.sleep(0.2)
+            events['fetch_done'] = time.monotonic()
+            return True, None
+
+        def search(code, name):
+            events['search_started'] = time.monotonic()
+            return f"{name} 情报"
+
+        pipeline.fetch_and_save_stock_data = fetch_and_save
+        pipeline._prepare_analysis = lambda code, submit_search=True: (
+            {'code': code, 'stock_name': "贵州茅台"}, None, None, None
+        )
+        pipeline._search_intel = search
+
+        try:
+            results = list(pipeline._run_staged(["600519"], False, False, ReportType.SIMPLE, 0))
+        finally:
+            pipeline.close()
+
+        self.assertEqual([r.code for r in results], ["600519"])
+        self.assertLess(events['search_started'], events['fetch_done'])
+        self.assertEqual(analyzer.analyze_calls, ["贵州茅台 情报"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 股价兜底搜索单元测试
+===================================
+
+职责：
+1. 验证多个关键词并行搜索，失败的关键词换搜索引擎重试
+2. 验证同一交易日内复用兜底搜索结果
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from src.config import Config
+from src.search_service import BaseSearchProvider, SearchResponse, SearchResult, SearchService
+
+
+class _FakeProvider(BaseSearchProvider):
+    """固定耗时的模拟搜索引擎"""
+
+    def __init__(self, name: str, delay: float, fail: bool = False):
+        super().__init__(["fake-key"], name)
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def _do_search(self, query: str, api_key: str, max_results: int, days: int = 7) -> SearchResponse:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            return SearchResponse(query=query, results=[], provider=self.name, success=False, error_message="fail")
+        results = [
+            SearchResult(title=f"{query} {i}", snippet="涨跌", url=f"https://{self.name}.example.com/{query}/{i}", source="example.com")
+            for i in range(2)
+        ]
+        return SearchResponse(query=query, results=results, provider=self.name)
+
+
+class PriceFallbackTestCase(unittest.TestCase):
+    """股价兜底搜索测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "stock_analysis.db")
+        Config._instance = None
+        self.service = SearchService()
+
+    def tearDown(self) -> None:
+        Config._instance = None
+        self._temp_dir.cleanup()
+
+    def test_parallel_with_provider_retry_and_day_cache(self) -> None:
+        """关键词并行搜索，失败换引擎重试；第二次调用命中当日缓存"""
+        failing = _FakeProvider("Failing", delay=0.3, fail=True)
+        working = _FakeProvider("Working", delay=0.3)
+        self.service._providers = [failing, working]
+
+        started = time.time()
+        response = self.service.search_stock_price_fallback("600519", "贵州茅台", max_attempts=3, max_results=5)
+        elapsed = time.time() - started
+
+        self.assertTrue(response.success)
+        self.assertEqual(len(response.results), 5)
+        self.assertEqual(response.provider, "Working")
+        # 串行需要 3 个关键词 x (失败 + 重试)，并行只需两轮
+        self.assertLess(elapsed, 1.2)
+
+        calls = failing.calls + working.calls
+        cached = self.service.search_stock_price_fallback("600519", "贵州茅台", max_attempts=3, max_results=5)
+        self.assertEqual([r.url for r in cached.results], [r.url for r in response.results])
+        self.assertEqual(failing.calls + working.calls, calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 渐进推送单元测试
+===================================
+
+职责：
+1. 验证进度看板随结果到达原地更新，并在完成时更新为最终汇总
+2. 验证超出渠道长度上限时省略评分靠后的股票（按渠道转换后的长度计算）
+3. 验证渠道实现缺少 post / edit 时创建即报错
+"""
+
+import unittest
+
+from src.analyzer import AnalysisResult
+from src.notification import NotificationService
+from src.progressive_notify import LiveMessage, ProgressiveDashboard
+
+
+class _FakeLiveMessage(LiveMessage):
+    """记录发送与编辑内容的模拟渠道"""
+
+    name = "fake"
+
+    def __init__(self, max_length: int = 4000):
+        self.max_length = max_length
+        self.posted = []
+        self.edits = []
+
+    def post(self, content: str) -> bool:
+        self.posted.append(content)
+        return True
+
+    def edit(self, content: str) -> bool:
+        self.edits.append(content)
+        return True
+
+
+def _make_result(code: str, score: int) -> AnalysisResult:
+    return AnalysisResult(
+        code=code,
+        name=f"股票{code}",
+        sentiment_score=score,
+        trend_prediction="看多",
+        operation_advice="持有",
+        decision_type="hold",
+    )
+
+
+class ProgressiveDashboardTestCase(unittest.TestCase):
+    """渐进推送看板测试"""
+
+    def setUp(self) -> None:
+        self.notifier = NotificationService()
+
+    def test_updates_and_final_summary(self) -> None:
+        """初始看板、合并更新与最终汇总"""
+        target = _FakeLiveMessage()
+        dashboard = ProgressiveDashboard(self.notifier, total=3, update_interval=0, targets=[target])
+        self.assertTrue(dashboard.start())
+        self.assertIn("分析中 0/3", target.posted[0])
+
+        dashboard.add_result(_make_result("600519", 60))
+        dashboard.add_result(_make_result("000001", 80))
+        dashboard.add_result(_make_result("300750", 70))
+        dashboard.finalize()
+
+        final = target.edits[-1]
+        self.assertIn("分析完成 3/3", final)
+        # 按评分排序
+        self.assertLess(final.index("000001"), final.index("300750"))
+        self.assertLess(final.index("300750"), final.index("600519"))
+
+    def test_truncated_to_channel_limit(self) -> None:
+        """超出渠道上限时只保留评分靠前的股票"""
+        results = [_make_result(f"{600000 + i}", i) for i in range(100)]
+        content = self.notifier.generate_progress_dashboard(results, total=100, elapsed=5, max_length=2000)
+
+        self.assertLessEqual(len(content), 2000)
+        self.assertIn("600099", content)
+        self.assertNotIn("600000)", content)
+        self.assertIn("另有", content)
+
+    def test_truncated_by_converted_length(self) -> None:
+        """Telegram MarkdownV2 转义后仍不超过上限"""
+        results = [_make_result(f"{600000 + i}", i) for i in range(200)]
+        convert = self.notifier._convert_to_telegram_markdown
+        content = self.notifier.generate_progress_dashboard(
+            results, total=200, elapsed=5, max_length=4096, length_func=lambda text: len(convert(text))
+        )
+
+        self.assertLessEqual(len(convert(content)), 4096)
+        self.assertIn("600199", content)
+        self.assertIn("另有", content)
+
+    def test_incomplete_channel_rejected_on_creation(self) -> None:
+        """只实现 post 的渠道在创建时即报错，而不是在后台更新时才失败"""
+        class _PostOnly(LiveMessage):
+            def post(self, content: str) -> bool:
+                return True
+
+        with self.assertRaises(TypeError):
+            _PostOnly()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - Prompt 前缀缓存单元测试
+===================================
+
+职责：
+1. 验证稳定前缀作为系统消息在各股票间保持一致，可变数据只进入用户消息
+2. 验证按 OpenAI / DeepSeek 用量字段累计缓存命中与节省的预填充 Token
+3. 验证大盘复盘使用通用系统提示词，不带决策仪表盘 JSON 任务说明
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from src.analyzer import GeminiAnalyzer
+from src.market_analyzer import MarketAnalyzer
+
+
+class _FakeOpenAIClient:
+    """按预设用量依次响应的 OpenAI 兼容客户端"""
+
+    def __init__(self, usages=None) -> None:
+        self.requests = []
+        self._usages = list(usages or [])
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        usage = self._usages.pop(0) if self._usages else None
+        message = SimpleNamespace(content="## 复盘")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+class PromptCacheTestCase(unittest.TestCase):
+    """Prompt 前缀缓存测试"""
+
+    def setUp(self) -> None:
+        self.analyzer = GeminiAnalyzer(api_key="")
+        self.analyzer._use_openai = True
+        self.analyzer._current_model_name = "fake-model"
+
+    def _use_client(self, usages=None) -> _FakeOpenAIClient:
+        client = _FakeOpenAIClient(usages)
+        self.analyzer._openai_client = client
+        return client
+
+    def test_stable_prefix_shared_across_stocks(self) -> None:
+        """不同股票的请求系统消息完全相同，任务说明不重复出现在用户消息中"""
+        client = self._use_client()
+        prompts = [
+            self.analyzer._format_prompt({"code": code, "stock_name": name}, name)
+            for code, name in (("600519", "贵州茅台"), ("000858", "五粮液"))
+        ]
+        for prompt in prompts:
+            self.analyzer._call_openai_api(prompt, {})
+
+        systems = [request["messages"][0] for request in client.requests]
+        self.assertEqual(systems[0], systems[1])
+        self.assertEqual(systems[0], {"role": "system", "content": GeminiAnalyzer.STABLE_PREFIX})
+        users = [request["messages"][1]["content"] for request in client.requests]
+        self.assertEqual(users, prompts)
+        self.assertTrue(all(GeminiAnalyzer.ANALYSIS_TASK_PROMPT not in user for user in users))
+
+    def test_usage_stats_accumulate(self) -> None:
+        """OpenAI 与 DeepSeek 的缓存命中字段都计入统计，无用量的响应不计入"""
+        self._use_client([
+            SimpleNamespace(prompt_tokens=1200, prompt_tokens_details=SimpleNamespace(cached_tokens=1024)),
+            SimpleNamespace(prompt_tokens=1000, prompt_cache_hit_tokens=0),
+            SimpleNamespace(prompt_tokens=1000, prompt_cache_hit_tokens=896),
+            None,
+        ])
+        for _ in range(4):
+            self.analyzer._call_openai_api("PROMPT", {})
+
+        self.assertEqual(self.analyzer.get_prompt_cache_stats(), {
+            "calls": 3,
+            "cache_hits": 2,
+            "hit_rate": 0.6667,
+            "prompt_tokens": 3200,
+            "cached_tokens": 1920,
+            "saved_ratio": 0.6,
+        })
+
+        self.analyzer.reset_prompt_cache_stats()
+        self.assertEqual(self.analyzer.get_prompt_cache_stats()["calls"], 0)
+
+    def test_market_review_uses_plain_system_prompt(self) -> None:
+        """大盘复盘的系统消息为通用提示词，不要求输出 JSON"""
+        client = self._use_client()
+        market_analyzer = object.__new__(MarketAnalyzer)
+        market_analyzer.analyzer = self.analyzer
+        market_analyzer._build_review_prompt = lambda overview, news: "复盘请求"
+
+        review = market_analyzer.generate_market_review(None, [])
+
+        self.assertEqual(review, "## 复盘")
+        self.assertEqual(client.requests[0]["messages"][0]["content"], GeminiAnalyzer.SYSTEM_PROMPT)
+        self.assertNotIn("response_format", client.requests[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 报告片段缓存单元测试
+===================================
+
+职责：
+1. 验证同一结果的片段只渲染一次，跨报告格式/服务实例复用
+2. 验证结果字段被修改后重新渲染
+3. 验证多线程渲染时已回收结果的指纹记录被清理
+"""
+
+import gc
+import os
+import tempfile
+import threading
+import unittest
+
+from src.analyzer import AnalysisResult
+from src.config import Config
+from src.notification import NotificationService
+from src.report_fragments import ReportFragmentCache, get_fragment_cache
+
+
+def _build_result(code: str = "600519") -> AnalysisResult:
+    result = AnalysisResult(
+        code=code,
+        name="贵州茅台",
+        sentiment_score=78,
+        trend_prediction="看多",
+        operation_advice="持有",
+        analysis_summary="基本面稳健，短期震荡",
+    )
+    result.dashboard = {
+        "core_conclusion": {"one_sentence": "回踩均线低吸", "position_advice": {"no_position": "轻仓试探"}},
+        "battle_plan": {"sniper_points": {"ideal_buy": "1500", "stop_loss": "1420", "take_profit": "1680"}},
+    }
+    return result
+
+
+class ReportFragmentCacheTestCase(unittest.TestCase):
+    """报告片段缓存测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "stock_analysis.db")
+        Config._instance = None
+        get_fragment_cache().clear()
+
+    def tearDown(self) -> None:
+        Config._instance = None
+        self._temp_dir.cleanup()
+
+    def test_fragment_rendered_once_until_result_changes(self) -> None:
+        """同一结果只渲染一次；等值的新对象同样命中；字段重新赋值后重新渲染"""
+        cache = ReportFragmentCache()
+        calls = []
+
+        def renderer(result: AnalysisResult) -> str:
+            calls.append(result.code)
+            return f"{result.code}:{result.operation_advice}"
+
+        result = _build_result()
+        self.assertEqual(cache.render("block", result, renderer), "600519:持有")
+        self.assertEqual(cache.render("block", result, renderer), "600519:持有")
+        self.assertEqual(cache.render("block", _build_result(), renderer), "600519:持有")
+        self.assertEqual(len(calls), 1)
+
+        result.operation_advice = "买入"
+        self.assertEqual(cache.render("block", result, renderer), "600519:买入")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cache.get_stats()["hits"], 2)
+
+    def test_fingerprints_of_collected_results_purged_across_threads(self) -> None:
+        """多线程渲染临时结果对象，对象回收后的指纹记录被清理，缓存结果保持正确"""
+        cache = ReportFragmentCache()
+        errors = []
+
+        def worker(code: str) -> None:
+            for i in range(200):
+                result = _build_result(code)
+                result.sentiment_score = i % 5
+                if cache.render("block", result, lambda r: f"{r.code}:{r.sentiment_score}") != f"{code}:{i % 5}":
+                    errors.append((code, i))
+
+        threads = [threading.Thread(target=worker, args=(f"60000{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        gc.collect()
+
+        result = _build_result()
+        cache.render("block", result, lambda r: r.code)
+        self.assertEqual(errors, [])
+        self.assertEqual(list(cache._fingerprints), [id(result)])
+        self.assertEqual(cache.get_stats()["fragments"], 21)
+
+    def test_reports_reuse_fragments_across_services(self) -> None:
+        """文件报告、推送渠道、飞书文档（不同服务实例）复用同一份渲染片段"""
+        results = [_build_result("600519"), _build_result("000001")]
+        first = NotificationService().generate_dashboard_report(results, report_date="2026-01-02")
+        before = get_fragment_cache().get_stats()
+
+        second = NotificationService().generate_dashboard_report(results, report_date="2026-01-02")
+        stats = get_fragment_cache().get_stats()
+
+        # 仅底部生成时间可能不同
+        self.assertEqual(first.rsplit("\n", 1)[0], second.rsplit("\n", 1)[0])
+        self.assertEqual(stats["misses"], before["misses"])
+        self.assertEqual(stats["hits"] - before["hits"], 2)
+        self.assertIn("1500", NotificationService().generate_single_stock_report(results[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
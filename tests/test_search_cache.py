@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 搜索缓存单元测试
+===================================
+
+职责：
+1. 验证归一化查询词命中与跨搜索引擎复用
+2. 验证过期条目与失败响应不参与命中
+3. 验证网页正文抓取按 <meta> 声明的编码解码
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from src import search_service
+from src.search_service import SearchResponse, SearchResult, SearchResultCache
+
+
+class SearchResultCacheTestCase(unittest.TestCase):
+    """搜索缓存测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.cache = SearchResultCache(os.path.join(self._temp_dir.name, "search_cache.db"))
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def _build_response(self, query: str, provider: str = "Bocha", success: bool = True) -> SearchResponse:
+        results = [
+            SearchResult(title=f"新闻{i}", snippet="摘要", url=f"https://news.example.com/{i}", source="example.com")
+            for i in range(3)
+        ]
+        return SearchResponse(query=query, results=results, provider=provider, success=success)
+
+    def test_normalized_query_hit_across_providers(self) -> None:
+        """空白与大小写不同的查询命中同一条缓存，结果来自原搜索引擎"""
+        self.cache.put(self._build_response("贵州茅台  最新 新闻", provider="Tavily"), days=7, max_results=3, ttl=60)
+
+        cached = self.cache.get("贵州茅台　最新 新闻", days=7, max_results=2)
+        self.assertIsNotNone(cached)
+        self.assertEqual(len(cached.results), 2)
+        self.assertEqual(cached.provider, "Tavily(缓存)")
+
+        # 时间范围不同视为不同查询
+        self.assertIsNone(self.cache.get("贵州茅台 最新 新闻", days=1, max_results=3))
+        self.assertEqual(self.cache.get_stats()["hits"], 1)
+        self.assertEqual(self.cache.get_stats()["misses"], 1)
+
+    def test_expired_and_failed_responses_not_served(self) -> None:
+        """过期条目不命中，失败响应不写入"""
+        self.cache.put(self._build_response("茅台 行业"), days=7, max_results=3, ttl=-1)
+        self.cache.put(self._build_response("茅台 风险", success=False), days=7, max_results=3, ttl=60)
+        time.sleep(0.01)
+
+        self.assertIsNone(self.cache.get("茅台 行业", days=7, max_results=3))
+        self.assertIsNone(self.cache.get("茅台 风险", days=7, max_results=3))
+
+
+class FetchUrlContentTestCase(unittest.TestCase):
+    """网页正文抓取测试"""
+
+    def test_meta_declared_gbk_page_decoded(self) -> None:
+        """响应头无 charset、仅 <meta> 声明 GBK 的页面不按 ISO-8859-1 解码"""
+        html = '<html><head><meta http-equiv="Content-Type" content="text/html; charset=gb2312"></head>' \
+               '<body><p>贵州茅台发布年度业绩预告</p></body></html>'
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/html'
+        response._content = html.encode('gbk')
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        session = mock.Mock()
+        session.get.return_value = response
+
+        with mock.patch.object(search_service, '_get_fetch_resources', return_value=(session, None, None)), \
+                mock.patch.object(search_service, '_extract_article_text', side_effect=lambda url, text: text):
+            text = search_service.fetch_url_content("https://news.example.com/1")
+
+        self.assertIn("贵州茅台发布年度业绩预告", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 搜索配额调度单元测试
+===================================
+
+职责：
+1. 验证用量持久化与按配额均摊选择 Key
+2. 验证连续失败的 Key 冷却
+3. 验证引擎排序保持配置优先级、额度配置格式错误时不影响加载
+4. 验证用量快于按月均摊速度的引擎暂停使用
+"""
+
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from src.config import _parse_search_quotas
+from src.search_service import SearchKeyScheduler, SearchService, TavilySearchProvider
+
+
+class SearchKeySchedulerTestCase(unittest.TestCase):
+    """搜索 Key 调度测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._db_path = os.path.join(self._temp_dir.name, "search_cache.db")
+        self.scheduler = SearchKeyScheduler(self._db_path)
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_usage_persisted_and_least_used_key_picked(self) -> None:
+        """用量跨实例持久化，优先选择已用比例最低的 Key"""
+        for _ in range(3):
+            self.scheduler.record("Tavily", "key_a", success=True)
+        self.scheduler.record("Tavily", "key_b", success=True)
+
+        reloaded = SearchKeyScheduler(self._db_path)
+        self.assertEqual(reloaded.get_usage("Tavily", ["key_a", "key_b"]), {"key_a": 3, "key_b": 1})
+        self.assertEqual(reloaded.pick_key("Tavily", ["key_a", "key_b"], quota=1000), "key_b")
+
+        status = reloaded.get_provider_status("Tavily", ["key_a", "key_b"], quota=1000)
+        self.assertEqual(status["used"], 4)
+        self.assertEqual(status["remaining"], 1996)
+        self.assertNotIn("key_a", str(status))
+
+    def test_failing_key_cooled_down(self) -> None:
+        """连续失败达到阈值的 Key 进入冷却，改用其他 Key"""
+        for _ in range(SearchKeyScheduler.FAILURE_THRESHOLD):
+            self.scheduler.record("SerpAPI", "key_a", success=False)
+        self.scheduler.record("SerpAPI", "key_b", success=True)
+        self.scheduler.record("SerpAPI", "key_b", success=True)
+        self.scheduler.record("SerpAPI", "key_b", success=True)
+        self.scheduler.record("SerpAPI", "key_b", success=True)
+
+        self.assertEqual(self.scheduler.pick_key("SerpAPI", ["key_a", "key_b"], quota=100), "key_b")
+
+    def test_provider_ahead_of_pace_paused(self) -> None:
+        """用量超过月份进度对应额度的引擎暂停使用，改用其他引擎"""
+        tavily = TavilySearchProvider(["key_a"])
+        tavily.monthly_quota = 100
+        tavily.attach_scheduler(self.scheduler)
+        service = object.__new__(SearchService)
+        service._prefer_free_quota = True
+        bocha = _provider("Bocha", 1.0)
+
+        # 第 0.5 天：允许用到 100 * 1.5 / 30 = 5 次
+        with mock.patch.object(SearchKeyScheduler, "month_progress", return_value=(0.5, 30.0)):
+            self.assertEqual(service._rank_providers([bocha, tavily]), [tavily])
+            for _ in range(5):
+                self.scheduler.record("Tavily", "key_a", success=True)
+            self.assertTrue(tavily.is_ahead_of_pace())
+            self.assertEqual(service._rank_providers([bocha, tavily]), [bocha])
+
+
+
+def _provider(name: str, cost: float, spare: bool = True, ahead: bool = False) -> SimpleNamespace:
+    return SimpleNamespace(
+        name=name, cost_per_call=cost, has_spare_quota=lambda: spare, is_ahead_of_pace=lambda: ahead
+    )
+
+
+class ProviderRankingTestCase(unittest.TestCase):
+    """搜索引擎排序测试"""
+
+    def _service(self, prefer_free_quota: bool) -> SearchService:
+        service = object.__new__(SearchService)
+        service._prefer_free_quota = prefer_free_quota
+        return service
+
+    def test_configured_priority_kept_by_default(self) -> None:
+        """默认保持 Bocha → Tavily → SerpAPI 顺序，只跳过额度耗尽的引擎"""
+        bocha, tavily, serpapi = _provider("Bocha", 1.0), _provider("Tavily", 0.0), _provider("SerpAPI", 0.0, spare=False)
+
+        self.assertEqual(self._service(False)._rank_providers([bocha, tavily, serpapi]), [bocha, tavily])
+        self.assertEqual(self._service(True)._rank_providers([bocha, tavily, serpapi]), [tavily])
+
+    def test_ahead_of_pace_used_only_when_all_ahead(self) -> None:
+        """超速的引擎暂停使用；所有引擎都超速时仍照常使用"""
+        bocha, tavily = _provider("Bocha", 1.0), _provider("Tavily", 0.0, ahead=True)
+        self.assertEqual(self._service(False)._rank_providers([bocha, tavily]), [bocha])
+
+        serpapi = _provider("SerpAPI", 0.0, ahead=True)
+        self.assertEqual(self._service(False)._rank_providers([tavily, serpapi]), [tavily, serpapi])
+
+    def test_all_exhausted_returns_all(self) -> None:
+        """全部额度耗尽时仍返回全部引擎"""
+        providers = [_provider("Tavily", 0.0, spare=False), _provider("SerpAPI", 0.0, spare=False)]
+        self.assertEqual(self._service(True)._rank_providers(providers), providers)
+
+    def test_bad_quota_entry_skipped(self) -> None:
+        """格式错误的额度条目记录警告后跳过，其余条目正常解析"""
+        with self.assertLogs("src.config", level="WARNING"):
+            quotas = _parse_search_quotas("tavily:1000, serpapi:1OO,bocha,")
+        self.assertEqual(quotas, {"tavily": 1000})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 板块情报合并搜索单元测试
+===================================
+
+职责：
+1. 验证按所属板块分组，每组只搜索一次行业、宏观维度并分发给组内每只股票
+2. 验证个股搜索复用共享维度，不再重复搜索
+3. 验证板块查询卡住时按截止时间退化为个股搜索
+4. 验证板块合并搜索在后台执行，不推迟分析开始
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from src.config import Config
+from src.core.pipeline import StockAnalysisPipeline
+from src.search_service import BaseSearchProvider, SearchResponse, SearchResult, SearchService
+
+
+class _FakeProvider(BaseSearchProvider):
+    """记录查询的模拟搜索引擎"""
+
+    def __init__(self, name: str = "Fake"):
+        super().__init__(["fake-key"], name)
+        self.queries = []
+
+    def _do_search(self, query: str, api_key: str, max_results: int, days: int = 7) -> SearchResponse:
+        self.queries.append(query)
+        results = [SearchResult(title=query, snippet="行业景气", url="https://example.com/a", source="example.com")]
+        return SearchResponse(query=query, results=results, provider=self.name)
+
+
+class PlanBatchIntelTestCase(unittest.TestCase):
+    """板块合并搜索测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "stock_analysis.db")
+        Config._instance = None
+        self.provider = _FakeProvider()
+        self.service = SearchService(cache_enabled=False)
+        self.service._providers = [self.provider]
+
+    def tearDown(self) -> None:
+        Config._instance = None
+        self._temp_dir.cleanup()
+
+    def test_groups_by_board_and_shares_response(self) -> None:
+        """同板块两只及以上股票合并搜索一次，单只股票与板块未知的股票不覆盖"""
+        shared = self.service.plan_batch_intel({
+            "600519": "白酒行业",
+            "000858": "白酒行业",
+            "601398": "银行行业",
+            "000001": None,
+        })
+
+        self.assertEqual(sorted(shared), ["000858", "600519"])
+        self.assertEqual(len(self.provider.queries), 2)
+        self.assertTrue(all("白酒行业" in query for query in self.provider.queries))
+        for dim in ("industry", "macro"):
+            self.assertIs(shared["600519"][dim], shared["000858"][dim])
+
+
+class SharedIntelReuseTestCase(unittest.TestCase):
+    """个股搜索复用共享维度测试"""
+
+    def _build_pipeline(self, searched_dimensions: list) -> StockAnalysisPipeline:
+        def search(stock_code, stock_name, max_searches, dimensions):
+            searched_dimensions.extend(dimensions)
+            return {dim: SearchResponse(query=dim, results=[], provider="Fake") for dim in dimensions}
+
+        pipeline = object.__new__(StockAnalysisPipeline)
+        pipeline.config = SimpleNamespace(news_intel_reuse_enabled=False)
+        pipeline.search_service = SimpleNamespace(
+            INTEL_DIMENSION_NAMES=SearchService.INTEL_DIMENSION_NAMES,
+            INTEL_SEARCH_DEADLINE=0.2,
+            search_comprehensive_intel=search,
+            format_intel_report=lambda results, name: ",".join(results),
+            plan_batch_intel=lambda stock_boards: {
+                code: {"industry": SearchResponse(query=board, results=[], provider="Fake")}
+                for code, board in stock_boards.items() if board
+            },
+        )
+        pipeline.db = SimpleNamespace(save_news_intel_batch=lambda **kwargs: None, get_latest_news_id=lambda code: 0)
+        pipeline._build_query_context = lambda: {}
+        pipeline._stage_executor = None
+        pipeline._shared_intel = None
+        pipeline._stage_executor_lock = threading.Lock()
+        pipeline.max_workers = 2
+        return pipeline
+
+    def test_shared_dimension_not_searched_again(self) -> None:
+        """共享的行业维度直接进入情报报告，只搜索其余维度"""
+        searched = []
+        pipeline = self._build_pipeline(searched)
+        industry = SearchResponse(query="白酒行业", results=[], provider="Fake")
+        pipeline._shared_intel = Future()
+        pipeline._shared_intel.set_result({"600519": {"industry": industry}})
+
+        report = pipeline._search_intel("600519", "贵州茅台")
+
+        self.assertNotIn("industry", searched)
+        self.assertEqual(sorted(searched), sorted(d for d in SearchService.INTEL_DIMENSION_NAMES if d != "industry"))
+        self.assertIn("industry", report)
+
+    def test_hung_board_lookup_bounded_by_deadline(self) -> None:
+        """个别板块查询卡住时按截止时间返回，该股票视为板块未知"""
+        release = threading.Event()
+
+        def get_industry_board(code):
+            if code == "000001":
+                release.wait(5)
+            return "白酒行业"
+
+        boards = {}
+        pipeline = self._build_pipeline([])
+        pipeline.SECTOR_BOARD_DEADLINE = 0.2
+        pipeline.search_service.plan_batch_intel = lambda stock_boards: boards.update(stock_boards) or {}
+        pipeline.fetcher_manager = SimpleNamespace(get_industry_board=get_industry_board)
+
+        started = time.monotonic()
+        try:
+            pipeline._plan_sector_intel(["600519", "000858", "000001"])
+        finally:
+            release.set()
+            pipeline.close()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(boards, {"600519": "白酒行业", "000858": "白酒行业", "000001": None})
+
+    def test_sector_planning_runs_in_background(self) -> None:
+        """板块合并搜索在后台执行，立即返回；个股搜索时才等待其结果"""
+        release = threading.Event()
+
+        def get_industry_board(code):
+            release.wait(5)
+            return "白酒行业"
+
+        searched = []
+        pipeline = self._build_pipeline(searched)
+        pipeline.fetcher_manager = SimpleNamespace(get_industry_board=get_industry_board)
+
+        started = time.monotonic()
+        try:
+            pipeline._shared_intel = pipeline._start_sector_intel(["600519", "000858"])
+            self.assertLess(time.monotonic() - started, 0.1)
+            self.assertFalse(pipeline._shared_intel.done())
+            release.set()
+            pipeline._search_intel("600519", "贵州茅台")
+        finally:
+            release.set()
+            pipeline.close()
+
+        self.assertTrue(pipeline._shared_intel.done())
+        self.assertTrue(searched)
+        self.assertNotIn("industry", searched)
+
+
+if __name__ == "__main__":
+    unittest.main()
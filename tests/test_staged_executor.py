@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 分阶段流水线执行器单元测试
+===================================
+
+职责：
+1. 验证各阶段按独立线程数并发，结果全部产出、异常项被丢弃
+2. 验证下游积压时上游阻塞（背压）
+3. 验证提前结束迭代时取消剩余项并停止全部线程
+"""
+
+import threading
+import time
+import unittest
+
+from src.core.staged_executor import PipelineStage, StagedExecutor
+
+
+class StagedExecutorTestCase(unittest.TestCase):
+    """分阶段流水线执行器测试"""
+
+    def test_stages_run_with_independent_concurrency(self) -> None:
+        """慢阶段多线程并发，返回 None 或抛异常的项不进入后续阶段"""
+        lock = threading.Lock()
+        active = {'fetch': 0, 'llm': 0}
+        peak = {'fetch': 0, 'llm': 0}
+
+        def tracked(name, func):
+            def handler(item):
+                with lock:
+                    active[name] += 1
+                    peak[name] = max(peak[name], active[name])
+                try:
+                    time.sleep(0.02)
+                    return func(item)
+                finally:
+                    with lock:
+                        active[name] -= 1
+            return handler
+
+        def fetch(code):
+            if code == "bad":
+                raise RuntimeError("数据源异常")
+            return None if code == "skip" else code
+
+        executor = StagedExecutor([
+            PipelineStage("fetch", tracked('fetch', fetch), workers=1),
+            PipelineStage("llm", tracked('llm', lambda code: f"{code}:done"), workers=4),
+        ])
+        codes = [f"{i:06d}" for i in range(8)]
+        results = list(executor.run(codes + ["bad", "skip"]))
+
+        self.assertEqual(sorted(results), [f"{code}:done" for code in codes])
+        self.assertEqual(peak['fetch'], 1)
+        self.assertEqual(active, {'fetch': 0, 'llm': 0})
+
+    def test_backpressure_bounds_work_ahead_of_slow_stage(self) -> None:
+        """下游阻塞时上游最多领先队列容量与线程数之和，不会把全部输入取完"""
+        release = threading.Event()
+        fetched = []
+
+        def fetch(code):
+            fetched.append(code)
+            return code
+
+        def analyze(code):
+            release.wait(5)
+            return code
+
+        executor = StagedExecutor([
+            PipelineStage("fetch", fetch, workers=1),
+            PipelineStage("llm", analyze, workers=1),
+        ], queue_size=2)
+        results = []
+        consumer = threading.Thread(target=lambda: results.extend(executor.run(range(20))))
+        consumer.start()
+        time.sleep(0.2)
+
+        # llm 处理中 1 项 + llm 队列 2 项 + fetch 阻塞在放入下游的 1 项
+        self.assertLessEqual(len(fetched), 4)
+        release.set()
+        consumer.join(5)
+        self.assertEqual(sorted(results), list(range(20)))
+
+    def test_early_close_cancels_remaining_items(self) -> None:
+        """调用方提前结束时不再处理剩余项，各阶段线程全部退出"""
+        processed = []
+
+        def slow(item):
+            time.sleep(0.02)
+            processed.append(item)
+            return item
+
+        executor = StagedExecutor([
+            PipelineStage("fetch", lambda item: item, workers=2),
+            PipelineStage("llm", slow, workers=1),
+        ], queue_size=1)
+        results = executor.run(range(200))
+        self.assertIsNotNone(next(results))
+
+        started = time.monotonic()
+        results.close()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertLess(len(processed), 20)
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith("stage-")])
+
+
+if __name__ == '__main__':
+    unittest.main()
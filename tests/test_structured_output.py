@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 结构化输出单元测试
+===================================
+
+职责：
+1. 验证 Schema 推导与缺失字段校验
+2. 验证缺失字段定向补全与兼容解析回退
+"""
+
+import json
+import unittest
+
+from src.analyzer import (
+    ANALYSIS_RESPONSE_SCHEMA,
+    GeminiAnalyzer,
+    find_missing_fields,
+)
+
+
+class StructuredOutputTestCase(unittest.TestCase):
+    """结构化输出测试"""
+
+    def setUp(self) -> None:
+        """构造未配置 API Key 的分析器（不发起真实调用）"""
+        self.analyzer = GeminiAnalyzer(api_key="")
+        self.calls = []
+
+    def _build_data(self) -> dict:
+        """构造完整的决策仪表盘数据"""
+        return {
+            "stock_name": "贵州茅台",
+            "sentiment_score": 72,
+            "trend_prediction": "看多",
+            "operation_advice": "持有",
+            "decision_type": "hold",
+            "confidence_level": "中",
+            "analysis_summary": "趋势向好",
+            "dashboard": {
+                "core_conclusion": {
+                    "one_sentence": "持有观望",
+                    "signal_type": "🟡持有观望",
+                    "time_sensitivity": "不急",
+                    "position_advice": {"no_position": "等待回踩", "has_position": "继续持有"},
+                },
+                "data_perspective": {
+                    "trend_status": {"ma_alignment": "多头排列", "is_bullish": True, "trend_score": 70},
+                    "price_position": {"current_price": None, "bias_ma5": 1.2, "bias_status": "安全"},
+                    "volume_analysis": {"volume_status": "缩量", "volume_meaning": "抛压减轻"},
+                    "chip_structure": {"chip_health": "健康"},
+                },
+                "intelligence": {
+                    "latest_news": "无重大消息",
+                    "risk_alerts": ["暂无"],
+                    "positive_catalysts": ["业绩稳定"],
+                    "earnings_outlook": "稳健",
+                    "sentiment_summary": "中性",
+                },
+                "battle_plan": {
+                    "sniper_points": {
+                        "ideal_buy": "1500",
+                        "secondary_buy": "1480",
+                        "stop_loss": "1420",
+                        "take_profit": "1650",
+                    },
+                    "position_strategy": {
+                        "suggested_position": "5成",
+                        "entry_plan": "分批",
+                        "risk_control": "跌破止损离场",
+                    },
+                    "action_checklist": ["✅ 多头排列"],
+                },
+            },
+        }
+
+    def test_schema_derived_from_analysis_result(self) -> None:
+        """Schema 顶层字段由 AnalysisResult 推导，元数据字段不要求模型输出"""
+        properties = ANALYSIS_RESPONSE_SCHEMA["properties"]
+        self.assertIn("dashboard", properties)
+        self.assertIn("risk_warning", properties)
+        self.assertEqual(properties["sentiment_score"]["type"], "integer")
+        self.assertNotIn("raw_response", properties)
+        self.assertNotIn("code", properties)
+
+    def test_find_missing_fields_allows_explicit_null(self) -> None:
+        """可空数值字段显式为 null 时视为有效，缺失的嵌套字段返回完整路径"""
+        data = self._build_data()
+        self.assertEqual(find_missing_fields(data, ANALYSIS_RESPONSE_SCHEMA), [])
+
+        del data["dashboard"]["battle_plan"]["action_checklist"]
+        missing = find_missing_fields(data, ANALYSIS_RESPONSE_SCHEMA)
+        self.assertEqual(missing, ["dashboard.battle_plan.action_checklist"])
+
+    def test_repair_only_missing_fields(self) -> None:
+        """缺失字段时只发起一次补全调用，并合并到原结果"""
+        data = self._build_data()
+        del data["dashboard"]["battle_plan"]["action_checklist"]
+
+        def fake_call(prompt, generation_config):
+            self.calls.append((prompt, generation_config))
+            return json.dumps({"dashboard": {"battle_plan": {"action_checklist": ["✅ 补全项"]}}})
+
+        self.analyzer._call_api_with_retry = fake_call
+        result = self.analyzer._parse_structured_response(
+            json.dumps(data, ensure_ascii=False),
+            "600519",
+            "贵州茅台",
+            "PROMPT",
+            {"response_mime_type": "application/json", "response_schema": ANALYSIS_RESPONSE_SCHEMA},
+        )
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertNotIn("response_schema", self.calls[0][1])
+        self.assertIn("dashboard.battle_plan.action_checklist", self.calls[0][0])
+        self.assertEqual(result.get_checklist(), ["✅ 补全项"])
+        self.assertEqual(result.sentiment_score, 72)
+
+    def test_invalid_json_falls_back_to_legacy_parser(self) -> None:
+        """非法 JSON 回退到兼容解析，不发起补全调用"""
+        self.analyzer._call_api_with_retry = lambda *args: self.fail("不应发起补全调用")
+        result = self.analyzer._parse_structured_response(
+            "看多，建议买入，突破上涨", "600519", "贵州茅台", "PROMPT", {}
+        )
+        self.assertTrue(result.success)
+        self.assertEqual(result.confidence_level, "低")
+
+
+if __name__ == "__main__":
+    unittest.main()
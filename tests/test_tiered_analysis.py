@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 分层分析单元测试
+===================================
+
+职责：
+1. 验证升级条件（完整报告、强信号、指标冲突）
+2. 验证本地初筛无信号时直接返回精简结论
+"""
+
+import json
+import unittest
+from types import SimpleNamespace
+
+from src.analyzer import GeminiAnalyzer
+
+
+class _FakeLocalClient:
+    """模拟 OpenAI 兼容本地模型客户端"""
+
+    def __init__(self, content: str) -> None:
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._content = content
+
+    def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        message = SimpleNamespace(content=self._content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class TieredAnalysisTestCase(unittest.TestCase):
+    """分层分析测试"""
+
+    def setUp(self) -> None:
+        self.analyzer = GeminiAnalyzer(api_key="")
+        self.context = {
+            "code": "600519",
+            "trend_analysis": {
+                "trend_status": "弱势多头",
+                "buy_signal": "持有",
+                "signal_score": 55,
+                "signal_reasons": ["均线多头排列"],
+                "risk_factors": [],
+            },
+        }
+
+    def _run(self, content: str, report_type: str = "simple"):
+        self.analyzer._local_client = _FakeLocalClient(content)
+        return self.analyzer._run_local_tier(
+            self.context, "600519", "贵州茅台", "PROMPT", None, report_type
+        )
+
+    def test_escalation_conditions(self) -> None:
+        """完整报告、强信号、指标冲突直接升级，不调用本地模型"""
+        self.assertEqual(self.analyzer._check_escalation(self.context, "full"), "full_report")
+        self.assertIsNone(self.analyzer._check_escalation(self.context, "simple"))
+
+        self.context["trend_analysis"]["signal_score"] = 82
+        self.assertEqual(self.analyzer._check_escalation(self.context, "simple"), "strong_signal")
+
+        self.context["trend_analysis"].update({"signal_score": 50, "buy_signal": "卖出"})
+        self.assertEqual(
+            self.analyzer._check_escalation(self.context, "simple"), "conflicting_indicators"
+        )
+
+    def test_local_tier_returns_compact_result(self) -> None:
+        """本地判断无信号时返回精简结论，并记录本地调用"""
+        result = self._run(json.dumps({
+            "stock_name": "贵州茅台",
+            "sentiment_score": 52,
+            "trend_prediction": "震荡",
+            "operation_advice": "观望",
+            "decision_type": "hold",
+            "confidence_level": "中",
+            "one_sentence": "震荡整理，暂不操作",
+        }, ensure_ascii=False))
+
+        self.assertIsNotNone(result)
+        self.assertEqual(result.operation_advice, "观望")
+        self.assertEqual(result.get_core_conclusion(), "震荡整理，暂不操作")
+        stats = self.analyzer.get_tier_stats()
+        self.assertEqual(stats["local_calls"], 1)
+        self.assertEqual(stats["escalations"], 0)
+
+    def test_local_signal_escalates(self) -> None:
+        """本地模型给出买卖信号时升级到远程模型"""
+        result = self._run(json.dumps({"sentiment_score": 75, "decision_type": "buy"}))
+        self.assertIsNone(result)
+        self.assertEqual(self.analyzer.get_tier_stats()["escalation_reasons"], {"local_signal": 1})
+
+        # 完整报告在调用本地模型前即升级：升级率按经过分层判断的股票数计算，不超过 1
+        self.assertIsNone(self._run("{}", report_type="full"))
+        stats = self.analyzer.get_tier_stats()
+        self.assertEqual((stats["local_calls"], stats["precheck_escalations"], stats["escalations"]), (1, 1, 2))
+        self.assertEqual(stats["escalation_rate"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -139,7 +139,11 @@ class ApiHandler:
             {
                 "status": "ok",
                 "timestamp": "2026-01-19T10:30:00",
-                "service": "stock-analysis-webui"
+                "service": "stock-analysis-webui",
+                "search_quota": [
+                    {"provider": "Tavily", "used": 120, "quota": 1000, "remaining": 880,
+                     "pace_ratio": 0.6, "forecast_exhaustion": null, "keys": [...]}
+                ]
             }
         """
         data = {
@@ -147,8 +151,26 @@ class ApiHandler:
             "timestamp": datetime.now().isoformat(),
             "service": "stock-analysis-webui"
         }
+        try:
+            from src.search_service import get_search_service
+            data["search_quota"] = get_search_service().get_quota_status()
+        except Exception as e:
+            logger.warning(f"获取搜索配额状态失败: {e}")
         return JsonResponse(data)
     
+    def handle_metrics(self) -> Response:
+        """
+        阶段耗时指标 GET /metrics
+        
+        返回 Prometheus 文本格式：各阶段（数据源、搜索、LLM、推送等）耗时直方图、
+        失败次数，以及最近一次运行的 p50/p95/p99
+        """
+        from src.metrics import get_metrics
+        return Response(
+            body=get_metrics().to_prometheus().encode("utf-8"),
+            content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    
     def handle_analysis(self, query: Dict[str, list]) -> Response:
         """
         触发股票分析 GET /analysis?code=xxx
@@ -243,6 +265,47 @@ class ApiHandler:
             "count": len(history)
         })
 
+    def handle_news_search(self, query: Dict[str, list]) -> Response:
+        """
+        新闻情报全文检索 GET /news/search
+        
+        Args:
+            query: URL 查询参数 (q, code, dimension, days, limit)
+        """
+        keywords = query.get("q", [""])[0].strip()
+        if not keywords:
+            return JsonResponse(
+                {"success": False, "error": "缺少必填参数: q (搜索关键词)"},
+                status=HTTPStatus.BAD_REQUEST
+            )
+        
+        code = query.get("code", [""])[0].strip() or None
+        dimension = query.get("dimension", [""])[0].strip() or None
+        
+        try:
+            days = int(query.get("days", ["0"])[0])
+        except ValueError:
+            days = 0
+        
+        try:
+            limit = int(query.get("limit", ["50"])[0])
+        except ValueError:
+            limit = 50
+        
+        records = self.analysis_service.search_news(
+            keywords=keywords,
+            code=code,
+            dimension=dimension,
+            days=days or None,
+            limit=limit
+        )
+        
+        return JsonResponse({
+            "success": True,
+            "records": records,
+            "count": len(records)
+        })
+    
     @staticmethod
     def _parse_bool(value: str) -> Optional[bool]:
         """
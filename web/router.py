@@ -304,6 +304,12 @@ def create_default_router() -> Router:
         "健康检查"
     )
     
+    router.register(
+        "/metrics", "GET",
+        lambda q: api_handler.handle_metrics(),
+        "Prometheus 阶段耗时指标"
+    )
+    
     router.register(
         "/analysis", "GET",
         lambda q: api_handler.handle_analysis(q),
@@ -316,6 +322,12 @@ def create_default_router() -> Router:
         "查询分析历史"
     )
     
+    router.register(
+        "/news/search", "GET",
+        lambda q: api_handler.handle_news_search(q),
+        "新闻情报全文检索"
+    )
+    
     router.register(
         "/tasks", "GET",
         lambda q: api_handler.handle_tasks(q),
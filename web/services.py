@@ -16,7 +16,7 @@ import re
 import logging
 import threading
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List, Union
 
 from src.enums import ReportType
@@ -240,6 +240,28 @@ class AnalysisService:
         records = db.get_analysis_history(code=code, query_id=query_id, days=days, limit=limit)
         return [r.to_dict() for r in records]
     
+    def search_news(
+        self,
+        keywords: str,
+        code: Optional[str] = None,
+        dimension: Optional[str] = None,
+        days: Optional[int] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        全文检索新闻情报（days 为空时检索全部历史）
+        """
+        db = get_db()
+        start_date = datetime.now() - timedelta(days=days) if days else None
+        records = db.search_news(
+            keywords,
+            code=code,
+            start_date=start_date,
+            dimension=dimension,
+            limit=limit
+        )
+        return [r.to_dict() for r in records]
+    
     def _run_analysis(
         self, 
         code: str, 
@@ -289,12 +311,15 @@ class AnalysisService:
             )
             
             # 执行单只股票分析（启用单股推送）
-            result = pipeline.process_single_stock(
-                code=code,
-                skip_analysis=False,
-                single_stock_notify=True,
-                report_type=report_type
-            )
+            try:
+                result = pipeline.process_single_stock(
+                    code=code,
+                    skip_analysis=False,
+                    single_stock_notify=True,
+                    report_type=report_type
+                )
+            finally:
+                pipeline.close()
             
             if result:
                 result_data = {